@@ -0,0 +1,110 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .principal import Principal
+
+
+def auth_user_version_key(user_id):
+    return f'auth:user-version:{user_id}'
+
+
+def auth_user_cache_key(user_id, token_id):
+    return f'auth:user:{user_id}:{token_id}'
+
+
+def invalidate_auth_user_cache(*user_ids):
+    """
+    Invalidate every cached authentication entry of the given users.
+
+    Entries are keyed per token, so instead of deleting them we rotate the user's
+    version stamp; entries carrying an older stamp are treated as misses.
+    """
+    cache.set_many({auth_user_version_key(uid): uuid.uuid4().hex for uid in user_ids if uid}, None)
+
+
+def _token_id(validated_token):
+    return validated_token.get(api_settings.JTI_CLAIM) or validated_token.get('iat')
+
+
+class PrincipalJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that attaches a request-scoped Principal to the user.
+
+    Views and permission helpers read role/organization/supervisee scope from
+    ``request.user._principal`` (via api.principal.get_principal) instead of
+    re-deriving them from the profile and Supervision rows.
+
+    The user and profile are loaded with one query and cached for a short TTL
+    (AUTH_USER_CACHE_TTL) keyed by (user id, token jti), so repeated API calls
+    with the same token skip the database entirely. Password changes,
+    deactivation and profile/role changes invalidate the cache (see api.signals).
+    The cache is only used when it is shared by all workers
+    (settings.CACHE_IS_SHARED); otherwise other workers would keep
+    authenticating a deactivated user until the entry expired.
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is None:
+            return None
+        user, token = result
+        user._principal = Principal(user)
+        return user, token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        ttl = getattr(settings, 'AUTH_USER_CACHE_TTL', 60) if getattr(settings, 'CACHE_IS_SHARED', False) else 0
+        token_id = _token_id(validated_token)
+        user = None
+        if ttl and token_id:
+            version_key = auth_user_version_key(user_id)
+            entry_key = auth_user_cache_key(user_id, token_id)
+            cached = cache.get_many([version_key, entry_key])
+            version = cached.get(version_key)
+            if version is None:
+                # No stamp yet (or it was evicted): start a new one so that no
+                # entry written before the eviction can be served
+                version = uuid.uuid4().hex
+                cache.set(version_key, version, None)
+            else:
+                entry = cached.get(entry_key)
+                if entry and entry[0] == version:
+                    user = entry[1]
+
+        if user is None:
+            user = self._load_user(user_id)
+            if ttl and token_id:
+                cache.set(entry_key, (version, user), ttl)
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
+
+    def _load_user(self, user_id):
+        """Load the user together with its profile in a single query"""
+        try:
+            return self.user_model.objects.select_related('profile').get(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
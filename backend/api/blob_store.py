@@ -0,0 +1,167 @@
+"""
+Content-addressed blob storage for profile images (signatures and initials).
+
+Images are stored once under the SHA-256 of their bytes and the profile row only
+keeps a short URL pointing at the cached image endpoint. The backend is pluggable
+via the PROFILE_IMAGE_STORE setting; the default keeps blobs on the local filesystem.
+
+Only raster images (PNG, JPEG, GIF, WebP) are accepted: blobs are served without
+authentication from the API origin, where an SVG could run script.
+"""
+
+import base64
+import binascii
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+DATA_URL_RE = re.compile(r'^data:(?P<mime>[\w.+-]+/[\w.+-]+)?(?:;[^,]*)?;base64,(?P<data>.*)$', re.DOTALL)
+DIGEST_RE = re.compile(r'^[0-9a-f]{64}$')
+
+# Magic-byte signatures for the image types the profile page accepts
+_IMAGE_SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+]
+
+RASTER_IMAGE_TYPES = frozenset({'image/png', 'image/jpeg', 'image/gif', 'image/webp'})
+
+
+def sniff_content_type(content):
+    """Best-effort content type detection from the first bytes of an image"""
+    for signature, mime in _IMAGE_SIGNATURES:
+        if content.startswith(signature):
+            return mime
+    if content[:4] == b'RIFF' and content[8:12] == b'WEBP':
+        return 'image/webp'
+    head = content[:256].lstrip().lower()
+    if head.startswith(b'<svg') or (head.startswith(b'<?xml') and b'<svg' in content[:1024].lower()):
+        return 'image/svg+xml'
+    return 'application/octet-stream'
+
+
+class BlobStore:
+    """Interface for content-addressed blob backends"""
+
+    def put(self, content):
+        """Store bytes and return their hex SHA-256 digest"""
+        raise NotImplementedError
+
+    def get(self, digest):
+        """Return the bytes stored under digest, or None if missing"""
+        raise NotImplementedError
+
+    def exists(self, digest):
+        return self.get(digest) is not None
+
+    def delete(self, digest):
+        raise NotImplementedError
+
+    @staticmethod
+    def digest_for(content):
+        return hashlib.sha256(content).hexdigest()
+
+
+class FileSystemBlobStore(BlobStore):
+    """Stores blobs as files fanned out by digest prefix: <location>/ab/cd/<digest>"""
+
+    def __init__(self, location=None):
+        self.location = Path(location or Path(settings.BASE_DIR) / 'media' / 'blobs')
+
+    def _path(self, digest):
+        if not DIGEST_RE.match(digest):
+            raise ValueError(f'Invalid blob digest: {digest!r}')
+        return self.location / digest[:2] / digest[2:4] / digest
+
+    def put(self, content):
+        digest = self.digest_for(content)
+        path = self._path(digest)
+        if path.exists():
+            return digest
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                fh.write(content)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return digest
+
+    def get(self, digest):
+        try:
+            return self._path(digest).read_bytes()
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def exists(self, digest):
+        try:
+            return self._path(digest).exists()
+        except ValueError:
+            return False
+
+    def delete(self, digest):
+        try:
+            self._path(digest).unlink()
+        except (FileNotFoundError, ValueError):
+            pass
+
+
+_store = None
+
+
+def get_blob_store():
+    """Return the configured blob store (cached per process)"""
+    global _store
+    if _store is None:
+        config = getattr(settings, 'PROFILE_IMAGE_STORE', {})
+        backend = import_string(config.get('BACKEND', 'api.blob_store.FileSystemBlobStore'))
+        _store = backend(**config.get('OPTIONS', {}))
+    return _store
+
+
+def reset_blob_store():
+    """Drop the cached store so the next call re-reads settings (used by tests)"""
+    global _store
+    _store = None
+
+
+def profile_image_url(digest):
+    return reverse('profile-image', kwargs={'digest': digest})
+
+
+def store_profile_image(content):
+    """Store raw image bytes and return the URL to persist on the profile"""
+    if sniff_content_type(content) not in RASTER_IMAGE_TYPES:
+        raise ValueError('Image must be a PNG, JPEG, GIF or WebP file')
+    return profile_image_url(get_blob_store().put(content))
+
+
+def offload_data_url(value):
+    """
+    Move an inline data-URL image into the blob store.
+
+    Returns the blob URL for data URLs; any other value (blank, an existing blob URL
+    or a plain path) is returned unchanged.
+    """
+    if not value or not value.startswith('data:'):
+        return value
+    match = DATA_URL_RE.match(value)
+    if not match:
+        raise ValueError('Image data URL must be base64 encoded')
+    try:
+        content = base64.b64decode(match.group('data'), validate=False)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f'Invalid base64 image data: {e}')
+    return store_profile_image(content)
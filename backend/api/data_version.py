@@ -0,0 +1,134 @@
+"""
+Per-user data versions and conditional GET for the trainee dashboard endpoints.
+
+The trainee SPA refetches its dashboard, summary and reference lists on every
+navigation although they rarely changed in between. Each user has a version
+counter in the Django cache that is bumped, once the transaction commits,
+after any write to their entries, logbooks (including their unlock requests
+and audit logs), supervisions or profile (see api.signals); the competency
+and EPA lists share one reference counter:
+
+    data-version:user:<user_id>
+    data-version:reference
+
+``etag_by_data_version`` derives a weak ETag from the endpoint, the caller,
+the query string, the counters and today's local and UTC dates (several
+summaries count the current week, overdue flags use the UTC date) before the
+view runs, and answers a matching If-None-Match with 304 without running the
+view at all. Views with fields that change on the clock rather than on writes
+pass ``clock``, a function of the request whose result is added to the tag. The version is read before the view, so
+a write that lands while the view runs can only make the next tag differ.
+
+A counter missing from the cache is recreated from the clock rather than from
+zero, so an evicted counter never repeats a version a client already holds.
+Writes that skip post_save (``QuerySet.update``, ``bulk_update``) must call
+``bump_user_versions`` themselves.
+"""
+
+import hashlib
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponseNotModified
+from django.utils import timezone
+from rest_framework.request import Request
+
+REFERENCE_KEY = 'data-version:reference'
+# Clients keep the copy but revalidate it on every use
+REVALIDATE_CACHE_CONTROL = 'private, no-cache'
+
+
+def user_version_key(user_id):
+    return f'data-version:user:{user_id}'
+
+
+def _current(key):
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def _increment(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def user_version(user_id):
+    return _current(user_version_key(user_id))
+
+
+def reference_version():
+    return _current(REFERENCE_KEY)
+
+
+def bump_user_versions(*user_ids):
+    """Invalidate the users' conditional GETs once the current transaction commits"""
+    keys = {user_version_key(user_id) for user_id in user_ids if user_id}
+
+    def bump():
+        for key in keys:
+            _increment(key)
+
+    if keys:
+        transaction.on_commit(bump)
+
+
+def bump_reference_version():
+    transaction.on_commit(lambda: _increment(REFERENCE_KEY))
+
+
+def data_etag(request, endpoint, user=True, reference=False, clock=None):
+    parts = [endpoint, request.META.get('HTTP_ACCEPT', ''), request.META.get('QUERY_STRING', '')]
+    if user:
+        parts += [
+            request.user.pk, user_version(request.user.pk),
+            timezone.localdate().isoformat(), timezone.now().date().isoformat(),
+        ]
+    if reference:
+        parts.append(reference_version())
+    if clock:
+        parts.append(clock(request))
+    digest = hashlib.sha256('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+
+def _matches(if_none_match, tag):
+    if if_none_match.strip() == '*':
+        return True
+    # If-None-Match uses weak comparison
+    opaque = tag.removeprefix('W/')
+    return any(value.strip().removeprefix('W/') == opaque for value in if_none_match.split(','))
+
+
+def etag_by_data_version(endpoint, user=True, reference=False, clock=None):
+    """
+    Serve GETs of the decorated view with a weak ETag and answer 304 when it
+    still matches. Decorate function views below @api_view (so authentication
+    and permission checks still run) or viewset methods directly.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            request = args[0] if isinstance(args[0], Request) else args[1]
+            if request.method not in ('GET', 'HEAD') or not request.user.is_authenticated:
+                return view(*args, **kwargs)
+
+            tag = data_etag(request, endpoint, user, reference, clock)
+            if _matches(request.headers.get('If-None-Match', ''), tag):
+                response = HttpResponseNotModified()
+            else:
+                response = view(*args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response['ETag'] = tag
+            response['Cache-Control'] = REVALIDATE_CACHE_CONTROL
+            return response
+        return wrapper
+    return decorator
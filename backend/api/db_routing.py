@@ -0,0 +1,149 @@
+"""
+Read-replica routing for reports, dashboards and exports.
+
+Registrar reports, compliance summaries, support dashboards and CSV exports
+are long read-only queries that competed with entry logging on the primary.
+Views decorated with ``read_from_replica`` (and jobs wrapped in
+``replica_reads``) send their reads to the replica alias; everything else,
+and every write, stays on ``default``:
+
+* reads go back to the primary for the rest of the block once it writes, and
+  inside any transaction opened within the block;
+* a user whose request could have written (an unsafe method answered below
+  400) reads from the primary for STICKY_SECONDS, so they see their own
+  changes however far the replica lags (ReplicaStickinessMiddleware);
+* without a replica alias in DATABASES nothing changes at all.
+
+``primary_reads`` forces the primary inside a replica block, for code that
+reads state it is about to update (e.g. support.rollups compaction).
+
+Settings (DATABASE_REPLICA):
+    ALIAS           DATABASES alias of the replica
+    STICKY_SECONDS  seconds a user's reads stay on the primary after they wrote
+"""
+
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import HttpRequest
+from rest_framework.request import Request
+
+DEFAULTS = {
+    'ALIAS': 'replica',
+    'STICKY_SECONDS': 15,
+}
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def replica_setting(name):
+    return getattr(settings, 'DATABASE_REPLICA', {}).get(name, DEFAULTS[name])
+
+
+def replica_alias():
+    """The replica's alias, or None when it is not configured"""
+    alias = replica_setting('ALIAS')
+    return alias if alias in connections.settings else None
+
+
+class _Reads:
+    """Routing state of the current replica_reads / primary_reads block"""
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.wrote = False
+        self.atomic_depth = len(connections[DEFAULT_DB_ALIAS].atomic_blocks)
+
+
+_reads = contextvars.ContextVar('replica_reads', default=None)
+
+
+def sticky_key(user_id):
+    return f'db-replica:sticky:user:{user_id}'
+
+
+def stick_to_primary(user_id):
+    """Keep the user's reads on the primary until the replica has caught up with their writes"""
+    if replica_alias():
+        cache.set(sticky_key(user_id), True, replica_setting('STICKY_SECONDS'))
+
+
+@contextmanager
+def _routing(alias):
+    token = _reads.set(_Reads(alias))
+    try:
+        yield alias
+    finally:
+        _reads.reset(token)
+
+
+def replica_reads(user_id=None):
+    """Route the block's reads to the replica, unless ``user_id`` wrote within STICKY_SECONDS"""
+    alias = replica_alias()
+    if alias and user_id is not None and cache.get(sticky_key(user_id)):
+        alias = None
+    return _routing(alias)
+
+
+def primary_reads():
+    return _routing(None)
+
+
+def read_from_replica(view):
+    """
+    Serve safe requests to the decorated view from the replica. Decorate
+    function views below @api_view (so request.user is the API user) or
+    viewset methods directly.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        request = args[0] if isinstance(args[0], (HttpRequest, Request)) else args[1]
+        if request.method not in SAFE_METHODS:
+            return view(*args, **kwargs)
+        user = request.user
+        with replica_reads(user.pk if user.is_authenticated else None):
+            return view(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _reads.get()
+        if state is None or state.alias is None:
+            return None
+        if state.wrote or len(connections[DEFAULT_DB_ALIAS].atomic_blocks) > state.atomic_depth:
+            return DEFAULT_DB_ALIAS
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        state = _reads.get()
+        if state is not None:
+            state.wrote = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the primary's rows, so objects from either may be related
+        alias = replica_alias()
+        if alias and {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, alias}:
+            return True
+        return None
+
+
+class ReplicaStickinessMiddleware:
+    """Keeps a user's reads on the primary for STICKY_SECONDS after a request of theirs that could write"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            # DRF puts the token-authenticated user back on the Django request
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                stick_to_primary(user.pk)
+        return response
@@ -1,9 +1,19 @@
 """
 Email service for sending supervision-related emails
-Currently a dummy implementation - in production this would integrate with a real email service
+
+Emails are not sent inline: each helper renders its template and writes it to
+the transactional EmailOutbox (api.outbox), so it commits or rolls back together
+with the caller's change and is delivered by the deliver_email_outbox worker.
+
+The batch helpers queue inside their own savepoint, so a failure they log and
+swallow rolls back only the emails, never the caller's transaction (which on
+Postgres would otherwise be left aborted).
 """
 
 import logging
+
+from django.db import transaction
+
 from .email_templates import (
     get_supervision_invite_email_template,
     get_supervision_response_email_template,
@@ -13,27 +23,26 @@ from .email_templates import (
     get_disconnection_request_email_template,
     get_disconnection_response_email_template
 )
+from .outbox import build_email, enqueue_email, enqueue_emails
 
 logger = logging.getLogger(__name__)
 
+
+def _queue(category, recipient, template, dedup_key=''):
+    enqueue_email(
+        subject=template['subject'],
+        body=template['body'],
+        recipients=[recipient],
+        dedup_key=dedup_key,
+        category=category,
+    )
+    logger.info(f"{category} email queued for {recipient}: {template['subject']}")
+
 def send_supervision_invite_email(supervision, user_exists=True):
     """Send supervision invitation email"""
     try:
         template = get_supervision_invite_email_template(supervision, user_exists)
-        
-        # In production, this would send a real email
-        logger.info(f"SUPERVISION INVITE EMAIL:")
-        logger.info(f"To: {supervision.supervisee_email}")
-        logger.info(f"Subject: {template['subject']}")
-        logger.info(f"Body:\n{template['body']}")
-        
-        # For now, just log the email content
-        print(f"\n=== SUPERVISION INVITE EMAIL ===")
-        print(f"To: {supervision.supervisee_email}")
-        print(f"Subject: {template['subject']}")
-        print(f"Body:\n{template['body']}")
-        print("=" * 50)
-        
+        _queue('SUPERVISION_INVITE', supervision.supervisee_email, template)
         return True
     except Exception as e:
         logger.error(f"Failed to send supervision invite email: {e}")
@@ -43,20 +52,7 @@ def send_supervision_response_email(supervision, action):
     """Send supervision response email to supervisor"""
     try:
         template = get_supervision_response_email_template(supervision, action)
-        
-        # In production, this would send a real email
-        logger.info(f"SUPERVISION RESPONSE EMAIL:")
-        logger.info(f"To: {supervision.supervisor.email}")
-        logger.info(f"Subject: {template['subject']}")
-        logger.info(f"Body:\n{template['body']}")
-        
-        # For now, just log the email content
-        print(f"\n=== SUPERVISION RESPONSE EMAIL ===")
-        print(f"To: {supervision.supervisor.email}")
-        print(f"Subject: {template['subject']}")
-        print(f"Body:\n{template['body']}")
-        print("=" * 50)
-        
+        _queue('SUPERVISION_RESPONSE', supervision.supervisor.email, template)
         return True
     except Exception as e:
         logger.error(f"Failed to send supervision response email: {e}")
@@ -66,20 +62,7 @@ def send_supervision_reminder_email(supervision):
     """Send supervision reminder email"""
     try:
         template = get_supervision_reminder_email_template(supervision)
-        
-        # In production, this would send a real email
-        logger.info(f"SUPERVISION REMINDER EMAIL:")
-        logger.info(f"To: {supervision.supervisee_email}")
-        logger.info(f"Subject: {template['subject']}")
-        logger.info(f"Body:\n{template['body']}")
-        
-        # For now, just log the email content
-        print(f"\n=== SUPERVISION REMINDER EMAIL ===")
-        print(f"To: {supervision.supervisee_email}")
-        print(f"Subject: {template['subject']}")
-        print(f"Body:\n{template['body']}")
-        print("=" * 50)
-        
+        _queue('SUPERVISION_REMINDER', supervision.supervisee_email, template, dedup_key=f'supervision-reminder:{supervision.id}')
         return True
     except Exception as e:
         logger.error(f"Failed to send supervision reminder email: {e}")
@@ -89,20 +72,7 @@ def send_supervision_expired_email(supervision):
     """Send supervision expired email to supervisor"""
     try:
         template = get_supervision_expired_email_template(supervision)
-        
-        # In production, this would send a real email
-        logger.info(f"SUPERVISION EXPIRED EMAIL:")
-        logger.info(f"To: {supervision.supervisor.email}")
-        logger.info(f"Subject: {template['subject']}")
-        logger.info(f"Body:\n{template['body']}")
-        
-        # For now, just log the email content
-        print(f"\n=== SUPERVISION EXPIRED EMAIL ===")
-        print(f"To: {supervision.supervisor.email}")
-        print(f"Subject: {template['subject']}")
-        print(f"Body:\n{template['body']}")
-        print("=" * 50)
-        
+        _queue('SUPERVISION_EXPIRED', supervision.supervisor.email, template, dedup_key=f'supervision-expired:{supervision.id}')
         return True
     except Exception as e:
         logger.error(f"Failed to send supervision expired email: {e}")
@@ -112,20 +82,7 @@ def send_supervision_removal_email(supervision, supervisee_email):
     """Send supervision removal email to supervisee"""
     try:
         template = get_supervision_removal_email_template(supervision, supervisee_email)
-        
-        # In production, this would send a real email
-        logger.info(f"SUPERVISION REMOVAL EMAIL:")
-        logger.info(f"To: {supervisee_email}")
-        logger.info(f"Subject: {template['subject']}")
-        logger.info(f"Body:\n{template['body']}")
-        
-        # For now, just log the email content
-        print(f"\n=== SUPERVISION REMOVAL EMAIL ===")
-        print(f"To: {supervisee_email}")
-        print(f"Subject: {template['subject']}")
-        print(f"Body:\n{template['body']}")
-        print("=" * 50)
-        
+        _queue('SUPERVISION_REMOVAL', supervisee_email, template)
         return True
     except Exception as e:
         logger.error(f"Failed to send supervision removal email: {e}")
@@ -135,20 +92,7 @@ def send_disconnection_request_email(disconnection_request):
     """Send disconnection request email to supervisor"""
     try:
         template = get_disconnection_request_email_template(disconnection_request)
-        
-        # In production, this would send a real email
-        logger.info(f"DISCONNECTION REQUEST EMAIL:")
-        logger.info(f"To: {disconnection_request.supervisor.email}")
-        logger.info(f"Subject: {template['subject']}")
-        logger.info(f"Body:\n{template['body']}")
-        
-        # For now, just log the email content
-        print(f"\n=== DISCONNECTION REQUEST EMAIL ===")
-        print(f"To: {disconnection_request.supervisor.email}")
-        print(f"Subject: {template['subject']}")
-        print(f"Body:\n{template['body']}")
-        print("=" * 50)
-        
+        _queue('DISCONNECTION_REQUEST', disconnection_request.supervisor.email, template)
         return True
     except Exception as e:
         logger.error(f"Failed to send disconnection request email: {e}")
@@ -158,22 +102,50 @@ def send_disconnection_response_email(disconnection_request, action):
     """Send disconnection response email to supervisee"""
     try:
         template = get_disconnection_response_email_template(disconnection_request, action)
-        
-        # In production, this would send a real email
-        logger.info(f"DISCONNECTION RESPONSE EMAIL:")
-        logger.info(f"To: {disconnection_request.supervisee.email}")
-        logger.info(f"Subject: {template['subject']}")
-        logger.info(f"Body:\n{template['body']}")
-        
-        # For now, just log the email content
-        print(f"\n=== DISCONNECTION RESPONSE EMAIL ===")
-        print(f"To: {disconnection_request.supervisee.email}")
-        print(f"Subject: {template['subject']}")
-        print(f"Body:\n{template['body']}")
-        print("=" * 50)
-        
+        _queue('DISCONNECTION_RESPONSE', disconnection_request.supervisee.email, template)
         return True
     except Exception as e:
         logger.error(f"Failed to send disconnection response email: {e}")
         return False
 
+
+def _queue_batch(category, messages, dedup_prefix):
+    """Queue a batch of (supervision, recipient, template) with a single INSERT"""
+    enqueue_emails([
+        build_email(
+            subject=template['subject'],
+            body=template['body'],
+            recipients=[recipient],
+            dedup_key=f'{dedup_prefix}:{supervision.id}',
+            category=category,
+        )
+        for supervision, recipient, template in messages
+    ])
+    logger.info(f"{category} email batch queued: {len(messages)} message(s)")
+    return len(messages)
+
+
+def send_supervision_expired_emails(supervisions):
+    """Send expired emails to the supervisors of many supervisions at once"""
+    try:
+        with transaction.atomic():
+            return _queue_batch('SUPERVISION_EXPIRED', [
+                (supervision, supervision.supervisor.email, get_supervision_expired_email_template(supervision))
+                for supervision in supervisions
+            ], 'supervision-expired')
+    except Exception as e:
+        logger.error(f"Failed to send supervision expired email batch: {e}")
+        return 0
+
+
+def send_supervision_reminder_emails(supervisions):
+    """Send reminder emails for many pending supervisions at once"""
+    try:
+        with transaction.atomic():
+            return _queue_batch('SUPERVISION_REMINDER', [
+                (supervision, supervision.supervisee_email, get_supervision_reminder_email_template(supervision))
+                for supervision in supervisions
+            ], 'supervision-reminder')
+    except Exception as e:
+        logger.error(f"Failed to send supervision reminder email batch: {e}")
+        return 0
@@ -0,0 +1,88 @@
+"""
+JSON renderer and parser for the REST API backed by orjson when it is installed.
+
+Dashboards, registrar lists and support test plans are large responses that
+spent most of their rendering time in the stdlib ``json`` encoder calling
+DRF's ``JSONEncoder.default`` for every date, datetime and Decimal. orjson
+encodes str/int/float/bool/None, dicts, lists, tuples, dates, datetimes,
+times and UUIDs natively in C, with the same text DRF produces (ISO 8601,
+``Z`` for UTC, microseconds kept); everything else (Decimal, timedelta, lazy
+strings, querysets, sets) still goes through DRF's ``JSONEncoder.default``, so
+a Decimal is a float and a timedelta its seconds exactly as before.
+
+The output is compact UTF-8 with U+2028/U+2029 escaped, as DRF's renderer
+writes it with the default UNICODE_JSON/COMPACT_JSON settings. Anything orjson
+refuses (non-string dict keys, integers over 64 bits, aware times) and any
+request for indented output (``Accept: application/json; indent=4``) is
+rendered by DRF's renderer instead, as are all requests when orjson is missing
+or BACKEND is 'stdlib'. Floats may be spelled differently (``1e16`` rather
+than ``1e+16``) and NaN becomes null instead of an error.
+
+The parser tries orjson on UTF-8 bodies and hands anything it rejects to the
+stdlib parser, so errors read as before. orjson reads integers over 64 bits
+as floats.
+
+Settings (API_JSON):
+    BACKEND     'orjson' (used when installed) or 'stdlib'
+"""
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+DEFAULTS = {
+    'BACKEND': 'orjson',
+}
+
+ORJSON_OPTIONS = orjson.OPT_UTC_Z if orjson else 0
+
+
+def api_json_setting(name):
+    return getattr(settings, 'API_JSON', {}).get(name, DEFAULTS[name])
+
+
+def use_orjson():
+    return orjson is not None and api_json_setting('BACKEND') == 'orjson'
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            data is None or not use_orjson() or self.ensure_ascii or not self.compact or not self.strict
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if b'\xe2\x80' in ret:
+            ret = ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        body = stream.read()
+        if use_orjson() and self.strict and encoding.lower().replace('-', '') == 'utf8':
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass
+
+        try:
+            parse_constant = json.strict_constant if self.strict else None
+            return json.loads(body.decode(encoding), parse_constant=parse_constant)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,112 @@
+import json
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from api.json_codec import FastJSONRenderer, use_orjson
+from api.models import UserProfile
+from logbook_app import row_serializers
+from logbook_app.models import LogbookAuditLog, WeeklyLogbook
+from registrar_logbook.models import RegistrarPracticeEntry, RegistrarProgram
+from registrar_logbook.serializers import RegistrarPracticeEntrySerializer
+
+
+class Command(BaseCommand):
+    help = 'Compare JSON encode throughput of the DRF and orjson renderers on API payloads (all rows are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Rows per payload')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed renders of each payload after one warm-up')
+
+    def handle(self, *args, **options):
+        if not use_orjson():
+            self.stdout.write('orjson is not installed or API_JSON BACKEND is stdlib; both renderers use json')
+        with transaction.atomic():
+            payloads = self.payloads(options['rows'])
+            for name, data in payloads:
+                reference = JSONRenderer().render(data)
+                fast = FastJSONRenderer().render(data)
+                if json.loads(reference) != json.loads(fast):
+                    raise CommandError(f'{name}: renderers disagree')
+                stdlib_ms = self.time(JSONRenderer().render, data, options['repeat'])
+                fast_ms = self.time(FastJSONRenderer().render, data, options['repeat'])
+                self.stdout.write(
+                    f"{name} ({len(reference) / 1024:.0f} KiB): DRF {stdlib_ms:.1f} ms "
+                    f"({len(reference) / stdlib_ms / 1000:.1f} MB/s), fast {fast_ms:.1f} ms "
+                    f"({len(fast) / fast_ms / 1000:.1f} MB/s), {stdlib_ms / fast_ms:.1f}x"
+                )
+            transaction.set_rollback(True)
+
+    def time(self, render, data, repeat):
+        """Median milliseconds per render"""
+        render(data)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            render(data)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        return timings[len(timings) // 2] * 1000
+
+    def payloads(self, rows):
+        trainee = User.objects.create_user(username='json-benchmark', email='json-benchmark@example.com', password=None)
+        UserProfile.objects.create(user=trainee, role='REGISTRAR', first_name='Jay', last_name='Benchmark')
+        start = date(2020, 1, 6)
+        logbooks = WeeklyLogbook.objects.bulk_create(
+            WeeklyLogbook(
+                trainee=trainee, week_start_date=start + timedelta(weeks=n),
+                week_end_date=start + timedelta(weeks=n, days=6), status='submitted', submitted_at=timezone.now(),
+            )
+            for n in range(rows)
+        )
+        LogbookAuditLog.objects.bulk_create(
+            LogbookAuditLog(logbook=logbook, action='submitted', user=trainee, metadata={'week': n, 'note': 'Submitted'})
+            for n, logbook in enumerate(logbooks)
+        )
+        program = RegistrarProgram.objects.create(
+            user=trainee, aope='CLINICAL', qualification_tier='masters', start_date=start,
+            expected_end_date=start + timedelta(days=730), targets_practice_hrs=3000, targets_supervision_hrs=80,
+            targets_cpd_hrs=80,
+        )
+        RegistrarPracticeEntry.objects.bulk_create(
+            RegistrarPracticeEntry(
+                program=program, date=start + timedelta(days=n % 730), duration_minutes=60, dcc_minutes=45,
+                setting='outpatient', modality='in_person', client_code=f'C-{n % 100:03d}', client_age_band='26-44',
+                tasks='Assessment and formulation', competency_tags=['Assessment'], created_by=trainee,
+            )
+            for n in range(rows)
+        )
+        test_plan = {
+            'testing_level': 'DEV',
+            'suites': [
+                {
+                    'id': f'suite-{s}', 'name': f'Suite {s}', 'notes': '',
+                    'tests': [
+                        {
+                            'id': f'test-{s}-{t}', 'name': f'Test {t}', 'status': 'pending',
+                            'steps': [
+                                {'id': f'step-{s}-{t}-{n}', 'action': 'Open the dashboard',
+                                 'expected': 'Totals match the week', 'passed': n % 2 == 0,
+                                 'updated_at': timezone.now()}
+                                for n in range(10)
+                            ],
+                        }
+                        for t in range(10)
+                    ],
+                }
+                for s in range(max(1, rows // 100))
+            ],
+        }
+        return [
+            ('logbook list', row_serializers.logbook_rows(WeeklyLogbook.objects.filter(trainee=trainee))),
+            ('registrar practice entries', RegistrarPracticeEntrySerializer(
+                RegistrarPracticeEntry.objects.filter(program=program), many=True
+            ).data),
+            ('audit rows', list(LogbookAuditLog.objects.filter(logbook__trainee=trainee).values())),
+            ('test plan', {'test_plan': test_plan}),
+        ]
@@ -1,7 +1,6 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from api.models import Supervision
-from api.email_service import send_supervision_expired_email
+from api.supervision_jobs import DEFAULT_CHUNK_SIZE, expire_pending_supervisions, expired_invitations
 
 
 class Command(BaseCommand):
@@ -13,16 +12,19 @@ class Command(BaseCommand):
             action='store_true',
             help='Show what would be done without making changes',
         )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f'Number of invitations processed per transaction (default {DEFAULT_CHUNK_SIZE})',
+        )
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
         now = timezone.now()
         
         # Find expired invitations that are still pending
-        expired_supervisions = Supervision.objects.filter(
-            status='PENDING',
-            expires_at__lt=now
-        )
+        expired_supervisions = expired_invitations(now)
         
         count = expired_supervisions.count()
         
@@ -38,49 +40,24 @@ class Command(BaseCommand):
             self.stdout.write(
                 self.style.WARNING('DRY RUN - No changes will be made')
             )
-            for supervision in expired_supervisions:
+            for supervision in expired_supervisions.select_related('supervisor__profile')[:100]:
                 self.stdout.write(
                     f'  - {supervision.supervisor.profile.first_name} {supervision.supervisor.profile.last_name} → '
                     f'{supervision.supervisee_email} (expired {supervision.expires_at})'
                 )
+            if count > 100:
+                self.stdout.write(f'  ... and {count - 100} more')
             return
         
-        # Update expired invitations
-        updated_count = 0
-        for supervision in expired_supervisions:
-            # Update status to expired
-            supervision.status = 'EXPIRED'
-            supervision.save()
-            
-            # Create notification record
-            from api.models import SupervisionNotification
-            SupervisionNotification.objects.create(
-                supervision=supervision,
-                notification_type='EXPIRED',
-                email_sent=False,  # We'll send email below
-                in_app_sent=True
-            )
-            
-            # Send expiration email
-            try:
-                send_supervision_expired_email(supervision)
-                # Update notification to mark email as sent
-                supervision.notifications.filter(
-                    notification_type='EXPIRED'
-                ).update(email_sent=True)
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f'Failed to send expiration email for supervision {supervision.id}: {e}')
-                )
-            
-            updated_count += 1
-            
-            self.stdout.write(
-                f'  ✓ Marked as expired: {supervision.supervisor.profile.first_name} {supervision.supervisor.profile.last_name} → '
-                f'{supervision.supervisee_email}'
-            )
+        # Expire in chunks: one UPDATE, one notification insert and one email batch per chunk
+        updated_count = expire_pending_supervisions(
+            now,
+            chunk_size=options['chunk_size'],
+            on_chunk=lambda ids: self.stdout.write(
+                f'  ✓ Marked {len(ids)} invitation(s) as expired (checkpoint: id {ids[-1]})'
+            ),
+        )
         
         self.stdout.write(
             self.style.SUCCESS(f'Successfully updated {updated_count} expired supervision invitation(s)')
         )
-
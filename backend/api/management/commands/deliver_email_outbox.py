@@ -0,0 +1,45 @@
+"""
+Management command to deliver queued emails from the EmailOutbox.
+
+Run once (e.g. from cron) or with --loop as a long-running delivery worker.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from api.outbox import deliver_pending
+
+
+class Command(BaseCommand):
+    help = 'Deliver pending emails from the transactional email outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Emails claimed per batch (defaults to EMAIL_OUTBOX["BATCH_SIZE"])',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and poll for new emails',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Seconds to wait between polls when running with --loop',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            stats = deliver_pending(batch_size=options['batch_size'])
+            if any(stats.values()):
+                self.stdout.write(
+                    f"Sent {stats['sent']}, retrying {stats['retried']}, "
+                    f"failed {stats['failed']}, suppressed {stats['suppressed']}"
+                )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,61 @@
+"""
+Management command to check PDWeeklySummary and SupervisionWeeklySummary for drift.
+
+The summaries are maintained incrementally by model signals; writes that bypass
+signals (bulk updates, raw SQL, fixtures) can leave them out of step. This
+recomputes every trainee's weekly and running totals in bulk and, with --repair,
+fixes the stored rows. A plain check only reads, so it runs on the read
+replica when one is configured (api.db_routing).
+"""
+
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand
+
+from api.db_routing import replica_reads
+from section_b.models import weekly_summaries as pd_weekly_summaries
+from section_c.models import weekly_summaries as supervision_weekly_summaries
+
+MAINTAINERS = {
+    'pd': ('PDWeeklySummary', pd_weekly_summaries),
+    'supervision': ('SupervisionWeeklySummary', supervision_weekly_summaries),
+}
+
+
+class Command(BaseCommand):
+    help = 'Verify (and optionally repair) the incremental weekly summary tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--section',
+            choices=sorted(MAINTAINERS) + ['all'],
+            default='all',
+            help='Which summary table to verify',
+        )
+        parser.add_argument(
+            '--repair',
+            action='store_true',
+            help='Rewrite drifted summaries and create missing ones',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per batch when reading and repairing summaries',
+        )
+
+    def handle(self, *args, **options):
+        names = sorted(MAINTAINERS) if options['section'] == 'all' else [options['section']]
+        for name in names:
+            label, maintainer = MAINTAINERS[name]
+            with nullcontext() if options['repair'] else replica_reads():
+                stats = maintainer.verify(repair=options['repair'], batch_size=options['batch_size'])
+            message = (
+                f"{label}: checked {stats['checked']}, drifted {stats['drifted']}, missing {stats['missing']}"
+            )
+            if not stats['drifted'] and not stats['missing']:
+                self.stdout.write(self.style.SUCCESS(message))
+            elif options['repair']:
+                self.stdout.write(self.style.WARNING(f'{message} (repaired)'))
+            else:
+                self.stdout.write(self.style.WARNING(f'{message} (run with --repair to fix)'))
@@ -0,0 +1,69 @@
+# Move inline data-URL signature/initials images into the blob store
+
+import base64
+
+from django.db import migrations, models
+
+
+IMAGE_FIELDS = ('signature_url', 'initials_url')
+
+
+def offload_images(apps, schema_editor):
+    from api.blob_store import offload_data_url
+
+    UserProfile = apps.get_model('api', 'UserProfile')
+    profiles = UserProfile.objects.filter(
+        models.Q(signature_url__startswith='data:') | models.Q(initials_url__startswith='data:')
+    ).only('id', *IMAGE_FIELDS)
+    for profile in profiles.iterator(chunk_size=200):
+        for field in IMAGE_FIELDS:
+            value = getattr(profile, field)
+            try:
+                setattr(profile, field, offload_data_url(value))
+            except ValueError:
+                # Leave malformed values untouched rather than losing data
+                continue
+        profile.save(update_fields=list(IMAGE_FIELDS))
+
+
+def inline_images(apps, schema_editor):
+    from api.blob_store import get_blob_store, sniff_content_type
+
+    UserProfile = apps.get_model('api', 'UserProfile')
+    store = get_blob_store()
+    profiles = UserProfile.objects.filter(
+        models.Q(signature_url__contains='/profile-images/') | models.Q(initials_url__contains='/profile-images/')
+    ).only('id', *IMAGE_FIELDS)
+    for profile in profiles.iterator(chunk_size=200):
+        for field in IMAGE_FIELDS:
+            value = getattr(profile, field)
+            if '/profile-images/' not in value:
+                continue
+            digest = value.rstrip('/').rsplit('/', 1)[-1]
+            content = store.get(digest)
+            if content is None:
+                continue
+            b64 = base64.b64encode(content).decode('ascii')
+            setattr(profile, field, f"data:{sniff_content_type(content)};base64,{b64}")
+        profile.save(update_fields=list(IMAGE_FIELDS))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0032_userprofile_identifies_as_indigenous'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userprofile',
+            name='signature_url',
+            field=models.TextField(blank=True, help_text='Signature image URL (blob store URL or path)'),
+        ),
+        migrations.AlterField(
+            model_name='userprofile',
+            name='initials_url',
+            field=models.TextField(blank=True, help_text='Initials image URL (blob store URL or path)'),
+        ),
+        migrations.RunPython(offload_images, inline_images),
+    ]
@@ -57,9 +57,10 @@ class UserProfile(models.Model):
     secondary_supervisor_email = models.EmailField(blank=True)
     supervisor_emails = models.TextField(blank=True, help_text="Additional supervisor email addresses, one per line")
     
-    # Signature (store data URL or relative path)
-    signature_url = models.TextField(blank=True, help_text="Signature image (data URL or path)")
-    initials_url = models.TextField(blank=True, help_text="Initials image (data URL or path)")
+    # Signature images live in the content-addressed blob store (api.blob_store);
+    # the profile only keeps the image URL so the row stays small
+    signature_url = models.TextField(blank=True, help_text="Signature image URL (blob store URL or path)")
+    initials_url = models.TextField(blank=True, help_text="Initials image URL (blob store URL or path)")
     
     # Prior Hours (for provisionals/registrars who started logging elsewhere)
     prior_hours = models.JSONField(default=dict, blank=True, help_text="Prior hours completed before using PsychPATH")
@@ -720,4 +721,45 @@ class SupportErrorLog(models.Model):
         return f"Error {self.error_id} - {self.user.username} - {self.created_at}"
 
 
+class EmailOutbox(models.Model):
+    """
+    Transactional outbox for outgoing email.
+
+    Rows are written in the same transaction as the change that triggers the
+    email and delivered later in batches by the deliver_email_outbox worker
+    (see api.outbox), so request and WebSocket handlers never wait on SMTP.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('SENDING', 'Sending'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed'),
+        ('SUPPRESSED', 'Suppressed (duplicate)'),
+    ]
+
+    category = models.CharField(max_length=50, blank=True, help_text="Kind of email, e.g. SUPERVISION_INVITE")
+    recipients = models.JSONField(default=list)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255, blank=True)
+    dedup_key = models.CharField(max_length=255, blank=True, help_text="Repeated notifications with the same key are collapsed")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['dedup_key', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.category or 'EMAIL'} to {', '.join(self.recipients)}: {self.subject} ({self.status})"
+
+
 # Create your models here.
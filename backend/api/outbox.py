@@ -0,0 +1,219 @@
+"""
+Transactional email outbox.
+
+Callers enqueue emails with ``enqueue_email`` inside the same database
+transaction as the change that triggers them; nothing touches SMTP in the
+request or WebSocket handler. ``deliver_pending`` (run by the
+deliver_email_outbox management command) sends due rows in batches over a
+single pooled backend connection, with exponential backoff on failure, a
+per-second rate limit and suppression of repeated notifications.
+
+A batch is claimed in a short transaction that marks its rows SENDING until
+CLAIM_TIMEOUT_SECONDS from now; the emails are then sent outside any
+transaction, so no row locks are held across SMTP round trips or rate-limit
+sleeps. Rows of a worker that died mid-batch become due again once their
+claim times out.
+
+Settings (EMAIL_OUTBOX):
+    BATCH_SIZE            rows claimed per delivery batch
+    MAX_ATTEMPTS          attempts before a row is marked FAILED
+    RETRY_BACKOFF_SECONDS base delay, doubled on every failed attempt
+    RATE_LIMIT_PER_SECOND maximum messages sent per second (0 = unlimited)
+    DEDUP_WINDOW_SECONDS  window in which emails with the same dedup_key collapse
+    CLAIM_TIMEOUT_SECONDS seconds a claimed batch has before other workers may retry it
+"""
+
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection as db_connection, transaction
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BACKOFF_SECONDS': 60,
+    'RATE_LIMIT_PER_SECOND': 10,
+    'DEDUP_WINDOW_SECONDS': 600,
+    'CLAIM_TIMEOUT_SECONDS': 600,
+}
+
+# Statuses of emails that count towards the dedup window
+LIVE_STATUSES = ['PENDING', 'SENDING', 'SENT']
+
+
+def outbox_setting(name):
+    return getattr(settings, 'EMAIL_OUTBOX', {}).get(name, DEFAULTS[name])
+
+
+def _normalise_recipients(recipients):
+    if isinstance(recipients, str):
+        recipients = [recipients]
+    return [r for r in recipients if r]
+
+
+def build_email(subject, body, recipients, html_body='', from_email='', dedup_key='', category=''):
+    """Build an unsaved outbox row (for use with bulk_create)"""
+    return EmailOutbox(
+        category=category,
+        recipients=_normalise_recipients(recipients),
+        subject=subject[:255],
+        body=body,
+        html_body=html_body or '',
+        from_email=from_email or '',
+        dedup_key=dedup_key or '',
+    )
+
+
+def _recent_dedup_keys(dedup_keys):
+    """The keys among ``dedup_keys`` of emails queued within the dedup window"""
+    dedup_keys = {key for key in dedup_keys if key}
+    if not dedup_keys:
+        return set()
+    window_start = timezone.now() - timedelta(seconds=outbox_setting('DEDUP_WINDOW_SECONDS'))
+    return set(EmailOutbox.objects.filter(
+        dedup_key__in=dedup_keys,
+        created_at__gte=window_start,
+        status__in=LIVE_STATUSES,
+    ).values_list('dedup_key', flat=True))
+
+
+def enqueue_email(subject, body, recipients, html_body='', from_email='', dedup_key='', category=''):
+    """
+    Queue one email for delivery. Returns the outbox row, or None if there were
+    no recipients or an email with the same dedup_key was queued recently.
+    """
+    email = build_email(subject, body, recipients, html_body, from_email, dedup_key, category)
+    if not email.recipients or _recent_dedup_keys([email.dedup_key]):
+        return None
+    email.save()
+    return email
+
+
+def enqueue_emails(emails):
+    """
+    Queue many pre-built emails (see build_email) with a single INSERT, skipping
+    those without recipients or whose dedup_key was queued recently (or earlier
+    in the list)
+    """
+    emails = [email for email in emails if email.recipients]
+    seen_keys = _recent_dedup_keys(email.dedup_key for email in emails)
+    queued = []
+    for email in emails:
+        if email.dedup_key:
+            if email.dedup_key in seen_keys:
+                continue
+            seen_keys.add(email.dedup_key)
+        queued.append(email)
+    return EmailOutbox.objects.bulk_create(queued)
+
+
+def _claim_batch(batch_size, now):
+    """
+    Claim the next batch of due emails (and batches whose claim timed out) by
+    marking them SENDING; concurrent workers skip each other's rows
+    """
+    with transaction.atomic():
+        qs = EmailOutbox.objects.filter(
+            status__in=['PENDING', 'SENDING'], next_attempt_at__lte=now
+        ).order_by('id')
+        if db_connection.features.has_select_for_update_skip_locked:
+            qs = qs.select_for_update(skip_locked=True)
+        batch = list(qs[:batch_size])
+        claimed_until = now + timedelta(seconds=outbox_setting('CLAIM_TIMEOUT_SECONDS'))
+        EmailOutbox.objects.filter(pk__in=[email.pk for email in batch]).update(
+            status='SENDING', next_attempt_at=claimed_until
+        )
+    return batch
+
+
+def _to_message(email, backend):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email or settings.DEFAULT_FROM_EMAIL,
+        to=email.recipients,
+        connection=backend,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def deliver_pending(batch_size=None, max_batches=None, backend=None):
+    """
+    Deliver due emails in batches over one backend connection.
+
+    Returns a dict with sent/retried/failed/suppressed counts.
+    """
+    batch_size = batch_size or outbox_setting('BATCH_SIZE')
+    max_attempts = outbox_setting('MAX_ATTEMPTS')
+    backoff = outbox_setting('RETRY_BACKOFF_SECONDS')
+    rate_limit = outbox_setting('RATE_LIMIT_PER_SECOND')
+    min_interval = 1.0 / rate_limit if rate_limit else 0
+
+    stats = {'sent': 0, 'retried': 0, 'failed': 0, 'suppressed': 0}
+    backend = backend or get_connection(fail_silently=False)
+    batches = 0
+    last_send = 0.0
+
+    backend.open()
+    try:
+        while max_batches is None or batches < max_batches:
+            now = timezone.now()
+            batch = _claim_batch(batch_size, now)
+            if not batch:
+                break
+
+            seen_keys = set()
+            for email in batch:
+                if email.dedup_key and email.dedup_key in seen_keys:
+                    email.status = 'SUPPRESSED'
+                    stats['suppressed'] += 1
+                    continue
+                if email.dedup_key:
+                    seen_keys.add(email.dedup_key)
+
+                if min_interval:
+                    wait = min_interval - (time.monotonic() - last_send)
+                    if wait > 0:
+                        time.sleep(wait)
+                last_send = time.monotonic()
+
+                email.attempts += 1
+                try:
+                    _to_message(email, backend).send()
+                except Exception as e:
+                    email.last_error = str(e)[:2000]
+                    if email.attempts >= max_attempts:
+                        email.status = 'FAILED'
+                        stats['failed'] += 1
+                        logger.error(f"Email outbox {email.id} failed permanently: {e}")
+                    else:
+                        email.status = 'PENDING'
+                        email.next_attempt_at = now + timedelta(seconds=backoff * 2 ** (email.attempts - 1))
+                        stats['retried'] += 1
+                        logger.warning(f"Email outbox {email.id} failed (attempt {email.attempts}), retrying: {e}")
+                    continue
+                email.status = 'SENT'
+                email.sent_at = timezone.now()
+                email.last_error = ''
+                stats['sent'] += 1
+
+            EmailOutbox.objects.bulk_update(
+                batch, ['status', 'attempts', 'last_error', 'next_attempt_at', 'sent_at']
+            )
+            batches += 1
+    finally:
+        backend.close()
+
+    if any(stats.values()):
+        logger.info(f"Email outbox delivery: {stats}")
+    return stats
@@ -0,0 +1,134 @@
+"""
+Request-scoped principal for role and supervision-scope lookups.
+
+The principal is attached to the authenticated user once per request (see
+api.authentication) and answers the questions views ask over and over: what is
+the caller's role, which organization are they in, and which trainees do they
+supervise. The supervisee sets are memoized in the Django cache across requests
+and invalidated whenever a Supervision row changes (see api.signals). They are
+only memoized when the cache is shared by all workers (settings.CACHE_IS_SHARED):
+with the per-process fallback cache an invalidation would miss the other
+workers, which would keep granting access through an ended supervision.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Supervision, UserProfile, UserRole
+
+SUPERVISEE_CACHE_TTL = 300
+TRAINEE_ROLES = (UserRole.PROVISIONAL, UserRole.REGISTRAR)
+
+
+def supervisee_cache_key(supervisor_id):
+    return f'principal:supervisees:{supervisor_id}'
+
+
+def invalidate_supervisee_cache(*supervisor_ids):
+    cache.delete_many([supervisee_cache_key(sid) for sid in supervisor_ids if sid])
+
+
+def load_supervisee_scope(supervisor_id):
+    """
+    Return the accepted supervision scope for a supervisor as a dict of id lists.
+
+    One query covers both the all-roles and PRIMARY-only user id sets plus the
+    matching UserProfile ids (Section C keys entries by profile).
+    """
+    memoize = getattr(settings, 'CACHE_IS_SHARED', False)
+    key = supervisee_cache_key(supervisor_id)
+    scope = cache.get(key) if memoize else None
+    if scope is None:
+        rows = Supervision.objects.filter(
+            supervisor_id=supervisor_id,
+            status='ACCEPTED',
+            supervisee__isnull=False,
+        ).values_list('supervisee_id', 'role', 'supervisee__profile__id')
+        scope = {'all': [], 'primary': [], 'profiles': []}
+        for supervisee_id, role, profile_id in rows:
+            scope['all'].append(supervisee_id)
+            if role == 'PRIMARY':
+                scope['primary'].append(supervisee_id)
+            if profile_id is not None:
+                scope['profiles'].append(profile_id)
+        if memoize:
+            cache.set(key, scope, SUPERVISEE_CACHE_TTL)
+    return scope
+
+
+class Principal:
+    """Role, organization and supervision scope of the authenticated caller"""
+
+    def __init__(self, user):
+        self.user = user
+        self.user_id = getattr(user, 'id', None)
+        try:
+            profile = user.profile if user.is_authenticated else None
+        except UserProfile.DoesNotExist:
+            profile = None
+        self.profile = profile
+        self.profile_id = profile.id if profile else None
+        self.role = profile.role if profile else None
+        self.organization_id = profile.organization_id if profile else None
+        self._scope = None
+
+    def __repr__(self):  # pragma: no cover
+        return f'<Principal user={self.user_id} role={self.role}>'
+
+    @property
+    def has_profile(self):
+        return self.profile is not None
+
+    @property
+    def is_trainee(self):
+        return self.role in TRAINEE_ROLES
+
+    @property
+    def is_supervisor(self):
+        return self.role == UserRole.SUPERVISOR
+
+    @property
+    def is_org_admin(self):
+        return self.role == UserRole.ORG_ADMIN
+
+    def has_role(self, *roles):
+        return self.role in roles
+
+    def _supervisee_scope(self):
+        if self._scope is None:
+            if self.is_supervisor:
+                scope = load_supervisee_scope(self.user_id)
+                self._scope = {name: frozenset(ids) for name, ids in scope.items()}
+            else:
+                self._scope = {'all': frozenset(), 'primary': frozenset(), 'profiles': frozenset()}
+        return self._scope
+
+    def supervisee_ids(self, primary_only=False):
+        """User ids of accepted supervisees (PRIMARY supervisions only if requested)"""
+        return self._supervisee_scope()['primary' if primary_only else 'all']
+
+    def supervisee_profile_ids(self):
+        """UserProfile ids of accepted supervisees, for models keyed by profile"""
+        return self._supervisee_scope()['profiles']
+
+    def supervises(self, user_or_id, primary_only=False):
+        user_id = getattr(user_or_id, 'id', user_or_id)
+        return user_id in self.supervisee_ids(primary_only=primary_only)
+
+
+def get_principal(user_or_request):
+    """
+    Return the principal for a user (or request), creating and attaching it on first use.
+
+    The authentication class attaches it eagerly; this fallback keeps helpers working
+    for session-authenticated views and tests.
+    """
+    user = getattr(user_or_request, 'user', user_or_request)
+    principal = getattr(user, '_principal', None)
+    if principal is None or principal.user is not user:
+        principal = Principal(user)
+        try:
+            user._principal = principal
+        except AttributeError:
+            pass
+    return principal
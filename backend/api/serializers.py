@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from .blob_store import offload_data_url
 from .models import UserProfile, Organization, EPA, Milestone, Supervision, MilestoneProgress, Reflection, Message, SupervisorRequest, SupervisorInvitation, SupervisorEndorsement, SupervisionNotification, SupervisionAssignment, Meeting, MeetingInvite, DisconnectionRequest, SupportErrorLog
 
 class UserProfileSerializer(serializers.ModelSerializer):
@@ -34,6 +35,19 @@ class UserProfileSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'email', 'ahpra_registration_number', 'provisional_start_date', 'start_date', 'created_at', 'updated_at']
 
+    def _offload_image(self, value):
+        """Inline data-URL images are moved to the blob store; only the URL is saved"""
+        try:
+            return offload_data_url(value)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+
+    def validate_signature_url(self, value):
+        return self._offload_image(value)
+
+    def validate_initials_url(self, value):
+        return self._offload_image(value)
+
     def validate_mobile(self, value):
         """
         Validate mobile number format and uniqueness
@@ -0,0 +1,83 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_auth_user_cache
+from .data_version import bump_reference_version, bump_user_versions
+from .models import Supervision, UserProfile
+from .principal import invalidate_supervisee_cache
+
+
+@receiver(post_save, sender=Supervision)
+@receiver(post_delete, sender=Supervision)
+def supervision_changed(sender, instance, **kwargs):
+    """Drop the memoized supervisee scope of the supervisor whose relationship changed"""
+    invalidate_supervisee_cache(instance.supervisor_id)
+
+
+@receiver(post_save, sender=UserProfile)
+def profile_created(sender, instance, created, **kwargs):
+    """A new profile changes the profile-id view of any existing supervisions of that user"""
+    if created:
+        supervisor_ids = Supervision.objects.filter(
+            supervisee_id=instance.user_id
+        ).values_list('supervisor_id', flat=True)
+        invalidate_supervisee_cache(*supervisor_ids)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    """Password changes and deactivation must not be served from the auth cache"""
+    invalidate_auth_user_cache(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def profile_changed(sender, instance, **kwargs):
+    """Role/organization changes must reach the next authenticated request"""
+    invalidate_auth_user_cache(instance.user_id)
+
+
+@receiver(post_save, sender=Supervision)
+@receiver(post_delete, sender=Supervision)
+def supervision_data_changed(sender, instance, **kwargs):
+    bump_user_versions(instance.supervisor_id, instance.supervisee_id)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def profile_data_changed(sender, instance, **kwargs):
+    bump_user_versions(instance.user_id)
+
+
+def trainee_data_changed(sender, instance, **kwargs):
+    """Entries and logbooks feed the trainee's dashboard and summary endpoints"""
+    bump_user_versions(instance.trainee_id)
+
+
+def logbook_record_changed(sender, instance, **kwargs):
+    """Unlocks and audit logs show on the dashboard without saving the logbook itself"""
+    bump_user_versions(instance.logbook.trainee_id)
+
+
+def supervision_entry_changed(sender, instance, **kwargs):
+    """Section C keys entries by profile rather than user"""
+    bump_user_versions(UserProfile.objects.filter(pk=instance.trainee_id).values_list('user_id', flat=True).first())
+
+
+def reference_data_changed(sender, instance, **kwargs):
+    bump_reference_version()
+
+
+# Connected by label: these apps depend on api, not the other way round
+for label in ('section_a.SectionAEntry', 'section_b.ProfessionalDevelopmentEntry', 'logbook_app.WeeklyLogbook'):
+    post_save.connect(trainee_data_changed, sender=label)
+    post_delete.connect(trainee_data_changed, sender=label)
+for label in ('logbook_app.UnlockRequest', 'logbook_app.LogbookAuditLog'):
+    post_save.connect(logbook_record_changed, sender=label)
+post_save.connect(supervision_entry_changed, sender='section_c.SupervisionEntry')
+post_delete.connect(supervision_entry_changed, sender='section_c.SupervisionEntry')
+for label in ('competencies.Competency', 'epas.EPA'):
+    post_save.connect(reference_data_changed, sender=label)
+    post_delete.connect(reference_data_changed, sender=label)
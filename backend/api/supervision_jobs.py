@@ -0,0 +1,127 @@
+"""
+Set-based processing of supervision invitations.
+
+Shared by the process_supervision_invitations and cleanup_expired_supervisions
+management commands. Invitations are handled in bounded, id-ordered chunks:
+each chunk flips statuses with a single UPDATE ... RETURNING, bulk-creates the
+SupervisionNotification rows and queues the emails in the EmailOutbox with one
+more INSERT. A chunk commits atomically, and the selection criteria only match
+unprocessed rows, so an interrupted run simply resumes where it stopped.
+"""
+
+from datetime import timedelta
+
+from django.db import connection, transaction
+
+from .email_service import send_supervision_expired_emails, send_supervision_reminder_emails
+from .models import Supervision, SupervisionNotification
+
+DEFAULT_CHUNK_SIZE = 1000
+REMINDER_WINDOW = timedelta(days=3)
+
+
+def expired_invitations(now):
+    return Supervision.objects.filter(status='PENDING', expires_at__lt=now)
+
+
+def invitations_needing_reminder(now):
+    """Pending invitations expiring within the reminder window that have not been reminded yet"""
+    return Supervision.objects.filter(
+        status='PENDING',
+        expires_at__gte=now,
+        expires_at__lte=now + REMINDER_WINDOW,
+    ).exclude(notifications__notification_type='REMINDER_SENT')
+
+
+def _expire_chunk(now, after_id, chunk_size):
+    """Mark the next chunk of expired invitations as EXPIRED and return their ids"""
+    if connection.features.can_return_columns_from_insert:
+        # Postgres and SQLite >= 3.35 support UPDATE ... RETURNING
+        qn = connection.ops.quote_name
+        table = qn(Supervision._meta.db_table)
+        sql = (
+            f"UPDATE {table} SET {qn('status')} = %s "
+            f"WHERE {qn('id')} IN ("
+            f"SELECT {qn('id')} FROM {table} "
+            f"WHERE {qn('status')} = %s AND {qn('expires_at')} < %s AND {qn('id')} > %s "
+            f"ORDER BY {qn('id')} LIMIT %s"
+            f") RETURNING {qn('id')}"
+        )
+        params = ['EXPIRED', 'PENDING', connection.ops.adapt_datetimefield_value(now), after_id, chunk_size]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return sorted(row[0] for row in cursor.fetchall())
+
+    ids = list(
+        expired_invitations(now).filter(id__gt=after_id).order_by('id').values_list('id', flat=True)[:chunk_size]
+    )
+    Supervision.objects.filter(id__in=ids, status='PENDING').update(status='EXPIRED')
+    return ids
+
+
+def expire_pending_supervisions(now, chunk_size=DEFAULT_CHUNK_SIZE, on_chunk=None):
+    """
+    Expire all pending invitations past their expiry date.
+
+    Returns the number of invitations expired. ``on_chunk(ids)`` is called after
+    each committed chunk, e.g. for progress output.
+    """
+    # Only PENDING rows change here, so the cached ACCEPTED supervisee scopes in
+    # api.principal are unaffected by skipping the model save() signals.
+    total = 0
+    after_id = 0
+    while True:
+        with transaction.atomic():
+            ids = _expire_chunk(now, after_id, chunk_size)
+            if not ids:
+                break
+            supervisions = list(
+                Supervision.objects.filter(id__in=ids).select_related('supervisor__profile')
+            )
+            SupervisionNotification.objects.bulk_create([
+                SupervisionNotification(
+                    supervision=supervision,
+                    notification_type='EXPIRED',
+                    email_sent=True,
+                    in_app_sent=True,
+                )
+                for supervision in supervisions
+            ])
+            send_supervision_expired_emails(supervisions)
+        total += len(ids)
+        after_id = ids[-1]
+        if on_chunk:
+            on_chunk(ids)
+    return total
+
+
+def send_supervision_reminders(now, chunk_size=DEFAULT_CHUNK_SIZE, on_chunk=None):
+    """Send reminders for invitations approaching expiry; returns the number reminded"""
+    total = 0
+    after_id = 0
+    while True:
+        with transaction.atomic():
+            supervisions = list(
+                invitations_needing_reminder(now)
+                .filter(id__gt=after_id)
+                .select_related('supervisor__profile')
+                .order_by('id')[:chunk_size]
+            )
+            if not supervisions:
+                break
+            SupervisionNotification.objects.bulk_create([
+                SupervisionNotification(
+                    supervision=supervision,
+                    notification_type='REMINDER_SENT',
+                    email_sent=True,
+                    in_app_sent=True,
+                )
+                for supervision in supervisions
+            ])
+            send_supervision_reminder_emails(supervisions)
+        ids = [supervision.id for supervision in supervisions]
+        total += len(ids)
+        after_id = ids[-1]
+        if on_chunk:
+            on_chunk(ids)
+    return total
@@ -1,3 +1,636 @@
-from django.test import TestCase
+import base64
+from io import BytesIO, StringIO
+from datetime import date, timedelta
+from pathlib import Path
+import shutil
+import tempfile
+import uuid
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .blob_store import get_blob_store, offload_data_url, reset_blob_store
+from .data_version import user_version
+from .db_routing import primary_reads, replica_reads
+from .json_codec import FastJSONParser, FastJSONRenderer
+from .access import get_user_scope_queryset
+from .authentication import PrincipalJWTAuthentication
+from .models import EmailOutbox, Supervision, SupervisionNotification, UserProfile
+from .outbox import build_email, deliver_pending, enqueue_email, enqueue_emails
+from .principal import Principal, get_principal, supervisee_cache_key
+from .serializers import UserProfileSerializer
+from .supervision_jobs import expire_pending_supervisions, send_supervision_reminders
+
+PNG_BYTES = b'\x89PNG\r\n\x1a\n' + b'\x00' * 64
+
+
+class ProfileImageBlobStoreTests(TestCase):
+    def setUp(self):
+        self.blob_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(PROFILE_IMAGE_STORE={
+            'BACKEND': 'api.blob_store.FileSystemBlobStore',
+            'OPTIONS': {'location': self.blob_root},
+        })
+        self.settings_override.enable()
+        reset_blob_store()
+
+        user = User.objects.create_user(username='trainee@example.com', email='trainee@example.com', password='pass1234')
+        self.profile = UserProfile.objects.create(
+            user=user, role='PROVISIONAL', provisional_registration_date=date(2024, 1, 1),
+        )
+
+    def tearDown(self):
+        self.settings_override.disable()
+        reset_blob_store()
+        shutil.rmtree(self.blob_root, ignore_errors=True)
+
+    def test_data_url_is_offloaded_to_content_addressed_blob(self):
+        data_url = 'data:image/png;base64,' + base64.b64encode(PNG_BYTES).decode('ascii')
+        url = offload_data_url(data_url)
+
+        digest = get_blob_store().digest_for(PNG_BYTES)
+        self.assertEqual(url, reverse('profile-image', kwargs={'digest': digest}))
+        self.assertEqual(get_blob_store().get(digest), PNG_BYTES)
+        # Same content maps to the same blob
+        self.assertEqual(offload_data_url(data_url), url)
+
+    def test_serializer_stores_url_not_image(self):
+        data_url = 'data:image/png;base64,' + base64.b64encode(PNG_BYTES).decode('ascii')
+        serializer = UserProfileSerializer(self.profile, data={'signature_url': data_url}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+
+        self.profile.refresh_from_db()
+        self.assertTrue(self.profile.signature_url.startswith('/api/profile-images/'))
+        self.assertLess(len(self.profile.signature_url), 120)
+
+    def test_image_endpoint_serves_with_strong_etag(self):
+        url = offload_data_url('data:image/png;base64,' + base64.b64encode(PNG_BYTES).decode('ascii'))
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response.content, PNG_BYTES)
+        self.assertIn('immutable', response['Cache-Control'])
+
+        cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_unknown_digest_returns_404(self):
+        response = self.client.get(reverse('profile-image', kwargs={'digest': '0' * 64}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_only_raster_images_are_accepted(self):
+        svg = b'<svg xmlns="http://www.w3.org/2000/svg"><script>alert(1)</script></svg>'
+        for content in [svg, b'<html><script>alert(1)</script></html>']:
+            data_url = 'data:image/png;base64,' + base64.b64encode(content).decode('ascii')
+            serializer = UserProfileSerializer(self.profile, data={'signature_url': data_url}, partial=True)
+            self.assertFalse(serializer.is_valid())
+            self.assertIn('signature_url', serializer.errors)
+        self.assertEqual(list(Path(self.blob_root).rglob('*')), [])
+
+        # Blobs stored before the restriction are downloads that cannot run script
+        digest = get_blob_store().put(svg)
+        response = self.client.get(reverse('profile-image', kwargs={'digest': digest}))
+        self.assertEqual(response['Content-Disposition'], 'attachment')
+        self.assertEqual(response['Content-Security-Policy'], "default-src 'none'")
+
+
+# The test process is the only worker, so its in-memory cache is effectively shared
+@override_settings(CACHE_IS_SHARED=True)
+class PrincipalScopeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.supervisor = User.objects.create_user(username='sup@example.com', email='sup@example.com', password='pass1234')
+        UserProfile.objects.create(user=self.supervisor, role='SUPERVISOR')
+        self.trainee = User.objects.create_user(username='trainee@example.com', email='trainee@example.com', password='pass1234')
+        self.trainee_profile = UserProfile.objects.create(user=self.trainee, role='PROVISIONAL')
+        self.supervision = Supervision.objects.create(
+            supervisor=self.supervisor,
+            supervisee=self.trainee,
+            supervisee_email=self.trainee.email,
+            role='PRIMARY',
+            status='ACCEPTED',
+        )
+
+    def fresh_principal(self):
+        return Principal(User.objects.select_related('profile').get(pk=self.supervisor.pk))
+
+    def test_supervisee_scope_is_memoized_across_requests(self):
+        principal = self.fresh_principal()
+        self.assertEqual(principal.supervisee_ids(primary_only=True), {self.trainee.id})
+        self.assertEqual(principal.supervisee_profile_ids(), {self.trainee_profile.id})
+
+        other_request = self.fresh_principal()
+        with self.assertNumQueries(0):
+            self.assertTrue(other_request.supervises(self.trainee))
+
+    @override_settings(CACHE_IS_SHARED=False)
+    def test_scope_is_not_memoized_in_a_per_process_cache(self):
+        self.assertTrue(self.fresh_principal().supervises(self.trainee))
+        self.assertIsNone(cache.get(supervisee_cache_key(self.supervisor.id)))
+
+        # Another worker ended the supervision; its invalidation never reached this process
+        Supervision.objects.filter(pk=self.supervision.pk).update(status='REJECTED')
+        self.assertFalse(self.fresh_principal().supervises(self.trainee))
+
+    def test_supervision_change_invalidates_scope(self):
+        self.assertTrue(self.fresh_principal().supervises(self.trainee))
+
+        self.supervision.status = 'REJECTED'
+        self.supervision.save()
+
+        self.assertFalse(self.fresh_principal().supervises(self.trainee))
+
+    def test_secondary_supervision_excluded_from_primary_scope(self):
+        self.supervision.role = 'SECONDARY'
+        self.supervision.save()
+
+        principal = self.fresh_principal()
+        self.assertEqual(principal.supervisee_ids(), {self.trainee.id})
+        self.assertEqual(principal.supervisee_ids(primary_only=True), frozenset())
+
+    def test_scope_queryset_uses_principal(self):
+        qs = get_user_scope_queryset(self.supervisor, User.objects.all(), user_field='id')
+        self.assertEqual(list(qs), [self.trainee])
+        self.assertIs(get_principal(self.supervisor), get_principal(self.supervisor))
+
+
+@override_settings(CACHE_IS_SHARED=True)
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='sup@example.com', email='sup@example.com', password='pass1234')
+        self.profile = UserProfile.objects.create(user=self.user, role='SUPERVISOR')
+        self.token = str(AccessToken.for_user(self.user))
+        self.factory = RequestFactory()
+
+    def authenticate(self, authenticator=None):
+        request = self.factory.get('/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        return (authenticator or PrincipalJWTAuthentication()).authenticate(request)[0]
+
+    def test_repeat_requests_are_served_from_cache(self):
+        with self.assertNumQueries(1):
+            user = self.authenticate()
+            self.assertEqual(user.profile.role, 'SUPERVISOR')
+
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+            self.assertEqual(user.profile.role, 'SUPERVISOR')
+            self.assertTrue(user._principal.is_supervisor)
+
+    def test_role_change_invalidates_cache(self):
+        self.authenticate()
+        self.profile.role = 'ORG_ADMIN'
+        self.profile.save()
+
+        self.assertEqual(self.authenticate().profile.role, 'ORG_ADMIN')
+
+    def test_deactivation_invalidates_cache(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    @override_settings(CACHE_IS_SHARED=False)
+    def test_per_process_cache_is_not_used(self):
+        self.authenticate()
+        # Deactivated from another worker, whose invalidation never reaches this process
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_load_scenario_query_counts(self):
+        """Supervisor polling the dashboard with one token: per-request queries vs the stock authenticator"""
+        requests = 20
+
+        def authenticate_many(authenticator):
+            with CaptureQueriesContext(connection) as ctx:
+                for _ in range(requests):
+                    self.authenticate(authenticator).profile.role
+            return len(ctx.captured_queries)
+
+        stock = authenticate_many(JWTAuthentication())
+        cached = authenticate_many(PrincipalJWTAuthentication())
+        self.assertEqual(stock, 2 * requests)
+        self.assertEqual(cached, 1)
+
+        # End to end, the whole status-summary endpoint is served without touching
+        # the database for auth or supervision scope once warm
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        url = reverse('logbook-status-summary')
+        client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            for _ in range(requests):
+                self.assertEqual(client.get(url).status_code, 200)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+
+class SupervisionInvitationJobTests(TestCase):
+    def setUp(self):
+        self.supervisor = User.objects.create_user(username='sup@example.com', email='sup@example.com', password='pass1234')
+        UserProfile.objects.create(user=self.supervisor, role='SUPERVISOR', first_name='Sam', last_name='Super')
+        self.now = timezone.now()
+        Supervision.objects.bulk_create([
+            Supervision(
+                supervisor=self.supervisor,
+                supervisee_email=f'expired{i}@example.com',
+                status='PENDING',
+                verification_token=f'expired-{i}',
+                expires_at=self.now - timedelta(days=1),
+            )
+            for i in range(25)
+        ] + [
+            Supervision(
+                supervisor=self.supervisor,
+                supervisee_email=f'soon{i}@example.com',
+                status='PENDING',
+                verification_token=f'soon-{i}',
+                expires_at=self.now + timedelta(days=2),
+            )
+            for i in range(7)
+        ])
+
+    def test_expiry_is_processed_in_chunks(self):
+        chunks = []
+        total = expire_pending_supervisions(self.now, chunk_size=10, on_chunk=chunks.append)
+
+        self.assertEqual(total, 25)
+        self.assertEqual([len(c) for c in chunks], [10, 10, 5])
+        self.assertEqual(Supervision.objects.filter(status='EXPIRED').count(), 25)
+        self.assertEqual(SupervisionNotification.objects.filter(notification_type='EXPIRED').count(), 25)
+        # Re-running (e.g. after an interruption) finds nothing left to do
+        self.assertEqual(expire_pending_supervisions(self.now, chunk_size=10), 0)
+
+    def test_query_count_is_per_chunk_not_per_row(self):
+        with CaptureQueriesContext(connection) as ctx:
+            expire_pending_supervisions(self.now, chunk_size=100)
+        self.assertLess(len(ctx.captured_queries), 15)
+
+    def test_reminders_sent_once(self):
+        self.assertEqual(send_supervision_reminders(self.now, chunk_size=3), 7)
+        self.assertEqual(SupervisionNotification.objects.filter(notification_type='REMINDER_SENT').count(), 7)
+        self.assertEqual(send_supervision_reminders(self.now), 0)
+
+    def test_command_runs(self):
+        call_command('process_supervision_invitations', '--chunk-size', '10', stdout=StringIO())
+        self.assertFalse(Supervision.objects.filter(status='PENDING', expires_at__lt=self.now).exists())
+
+    def test_emails_are_queued_in_the_outbox(self):
+        expire_pending_supervisions(self.now, chunk_size=10)
+        self.assertEqual(EmailOutbox.objects.filter(category='SUPERVISION_EXPIRED').count(), 25)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_failed_email_batch_keeps_the_chunk(self):
+        def broken_enqueue(emails):
+            # A failed query leaves the enclosing Postgres transaction aborted
+            transaction.set_rollback(True)
+            raise DatabaseError('outbox unavailable')
+
+        with mock.patch('api.email_service.enqueue_emails', side_effect=broken_enqueue):
+            self.assertEqual(expire_pending_supervisions(self.now, chunk_size=10), 25)
+        self.assertEqual(Supervision.objects.filter(status='EXPIRED').count(), 25)
+        self.assertEqual(SupervisionNotification.objects.filter(notification_type='EXPIRED').count(), 25)
+
+
+class FailingBackend:
+    def __init__(self):
+        self.opened = 0
+
+    def open(self):
+        self.opened += 1
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages):
+        raise ConnectionError('SMTP unavailable')
+
+
+class StatusRecordingBackend(FailingBackend):
+    """Records each queued email's stored status at the moment it is sent"""
+    def __init__(self):
+        super().__init__()
+        self.statuses = []
+
+    def send_messages(self, messages):
+        for message in messages:
+            self.statuses.append(
+                EmailOutbox.objects.get(recipients=message.to).status
+            )
+        return len(messages)
+
+
+@override_settings(EMAIL_OUTBOX={'RATE_LIMIT_PER_SECOND': 0, 'RETRY_BACKOFF_SECONDS': 30, 'MAX_ATTEMPTS': 2})
+class EmailOutboxTests(TestCase):
+    def test_rolled_back_transaction_queues_nothing(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                enqueue_email('Subject', 'Body', 'a@example.com')
+                raise RuntimeError('abort')
+        self.assertFalse(EmailOutbox.objects.exists())
+
+    def test_delivery_sends_batches_and_marks_sent(self):
+        for i in range(5):
+            enqueue_email(f'Subject {i}', 'Body', [f'user{i}@example.com'], html_body='<p>Body</p>')
+
+        stats = deliver_pending(batch_size=2)
+
+        self.assertEqual(stats['sent'], 5)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+        self.assertEqual(EmailOutbox.objects.filter(status='SENT').count(), 5)
+        self.assertEqual(deliver_pending()['sent'], 0)
+
+    def test_failures_back_off_then_fail(self):
+        email = enqueue_email('Subject', 'Body', 'a@example.com')
+        backend = FailingBackend()
+
+        self.assertEqual(deliver_pending(backend=backend)['retried'], 1)
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'PENDING')
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        self.assertIn('SMTP unavailable', email.last_error)
+        # Not due yet
+        self.assertEqual(deliver_pending(backend=backend)['retried'], 0)
+
+        EmailOutbox.objects.filter(id=email.id).update(next_attempt_at=timezone.now())
+        self.assertEqual(deliver_pending(backend=backend)['failed'], 1)
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'FAILED')
+
+    def test_repeated_notifications_collapse(self):
+        first = enqueue_email('Reply', 'Body', 'a@example.com', dedup_key='ticket-reply:1:user')
+        self.assertIsNotNone(first)
+        self.assertIsNone(enqueue_email('Reply', 'Body', 'a@example.com', dedup_key='ticket-reply:1:user'))
+        self.assertIsNotNone(enqueue_email('Reply', 'Body', 'a@example.com', dedup_key='ticket-reply:2:user'))
+        self.assertIsNone(enqueue_email('Nobody', 'Body', []))
+        self.assertEqual(EmailOutbox.objects.count(), 2)
+
+    def test_bulk_enqueue_collapses_repeated_notifications(self):
+        enqueue_email('Reply', 'Body', 'a@example.com', dedup_key='ticket-reply:1:user')
+
+        queued = enqueue_emails([
+            build_email('Reply', 'Body', 'a@example.com', dedup_key='ticket-reply:1:user'),
+            build_email('Reply', 'Body', 'b@example.com', dedup_key='ticket-reply:2:user'),
+            build_email('Reply', 'Body', 'b@example.com', dedup_key='ticket-reply:2:user'),
+            build_email('Digest', 'Body', 'c@example.com'),
+        ])
+
+        self.assertEqual([email.dedup_key for email in queued], ['ticket-reply:2:user', ''])
+        self.assertEqual(EmailOutbox.objects.count(), 3)
+
+    def test_claimed_rows_are_marked_sending_before_delivery(self):
+        enqueue_email('Subject', 'Body', 'a@example.com')
+        backend = StatusRecordingBackend()
+
+        self.assertEqual(deliver_pending(backend=backend)['sent'], 1)
+
+        self.assertEqual(backend.statuses, ['SENDING'])
+        self.assertEqual(EmailOutbox.objects.get().status, 'SENT')
+
+    def test_timed_out_claims_are_redelivered(self):
+        email = enqueue_email('Subject', 'Body', 'a@example.com')
+        # A worker claimed the row and died before recording the outcome
+        EmailOutbox.objects.filter(id=email.id).update(
+            status='SENDING', next_attempt_at=timezone.now() + timedelta(minutes=5)
+        )
+        self.assertEqual(deliver_pending()['sent'], 0)
+
+        EmailOutbox.objects.filter(id=email.id).update(next_attempt_at=timezone.now())
+        self.assertEqual(deliver_pending()['sent'], 1)
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'SENT')
+
+
+class DataVersionETagTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.trainee = User.objects.create_user(username='trainee@example.com', email='trainee@example.com', password='pass1234')
+        UserProfile.objects.create(user=self.trainee, role='PROVISIONAL')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.trainee)
+
+    def add_pd_entry(self):
+        from section_b.models import ProfessionalDevelopmentEntry
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProfessionalDevelopmentEntry.objects.create(
+                trainee=self.trainee, activity_type='WORKSHOP', date_of_activity=date(2025, 1, 14),
+                duration_minutes=90, activity_details='Ethics workshop', topics_covered='Ethics',
+                week_starting=date(2025, 1, 13),
+            )
+
+    def test_unchanged_data_is_not_modified_without_running_the_view(self):
+        first = self.client.get('/api/section-b/summary-metrics/')
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first['ETag'].startswith('W/"'))
+
+        with CaptureQueriesContext(connection) as queries:
+            cached = self.client.get('/api/section-b/summary-metrics/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached['ETag'], first['ETag'])
+        self.assertFalse([q for q in queries.captured_queries if 'section_b' in q['sql']])
+
+        # Query parameters and other endpoints get their own tags
+        other = self.client.get('/api/section-b/summary-metrics/?year=2024', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(other.status_code, 200)
+        self.assertNotEqual(other['ETag'], first['ETag'])
+
+    def test_trainee_endpoints_revalidate(self):
+        for url in (
+            '/api/logbook/dashboard/',
+            '/api/logbook/eligible-weeks/',
+            '/api/section-c/entries/summary_metrics/',
+            '/api/program-summary/',
+            '/api/epas/epas/',
+        ):
+            first = self.client.get(url)
+            self.assertEqual(first.status_code, 200, url)
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304, url)
+
+    def test_writes_change_the_tag(self):
+        first = self.client.get('/api/section-b/summary-metrics/')
+        version = user_version(self.trainee.id)
+
+        self.add_pd_entry()
+
+        self.assertEqual(user_version(self.trainee.id), version + 1)
+        fresh = self.client.get('/api/section-b/summary-metrics/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(fresh.status_code, 200)
+        self.assertNotEqual(fresh['ETag'], first['ETag'])
+        self.assertEqual(fresh.json()['total_pd_minutes'], 90)
+
+    def test_dashboard_follows_unlocks_and_their_expiry(self):
+        from logbook_app.models import LogbookAuditLog, UnlockRequest, WeeklyLogbook
+
+        week = timezone.localdate() - timedelta(days=timezone.localdate().weekday() + 14)
+        with self.captureOnCommitCallbacks(execute=True):
+            logbook = WeeklyLogbook.objects.create(
+                trainee=self.trainee, week_start_date=week, week_end_date=week + timedelta(days=6), status='approved',
+            )
+        first = self.client.get('/api/logbook/dashboard/')
+        self.assertFalse(first.json()[0]['is_editable'])
+
+        version = user_version(self.trainee.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            LogbookAuditLog.objects.create(logbook=logbook, action='comment_added', user=self.trainee)
+        self.assertEqual(user_version(self.trainee.id), version + 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            unlock = UnlockRequest.objects.create(
+                logbook=logbook, requester=self.trainee, requester_role='provisional', reason='Fix', status='approved',
+                unlock_expires_at=timezone.now() + timedelta(minutes=30), duration_minutes=30,
+            )
+        unlocked = self.client.get('/api/logbook/dashboard/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(unlocked.status_code, 200)
+        self.assertTrue(unlocked.json()[0]['is_editable'])
+
+        # Expiry writes nothing, but the tag stops matching once the unlock is over
+        UnlockRequest.objects.filter(pk=unlock.pk).update(unlock_expires_at=timezone.now() - timedelta(minutes=1))
+        expired = self.client.get('/api/logbook/dashboard/', HTTP_IF_NONE_MATCH=unlocked['ETag'])
+        self.assertEqual(expired.status_code, 200)
+        self.assertFalse(expired.json()[0]['is_editable'])
+
+    def test_reference_lists_follow_the_reference_version(self):
+        from competencies.models import Competency
+
+        first = self.client.get('/api/competencies/competencies/summary/')
+        self.assertEqual(self.client.get('/api/competencies/competencies/summary/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        # Trainee writes leave the reference lists alone
+        self.add_pd_entry()
+        self.assertEqual(self.client.get('/api/competencies/competencies/summary/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Competency.objects.create(code='C9', title='New', description='New', descriptors=[])
+        fresh = self.client.get('/api/competencies/competencies/summary/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(fresh.status_code, 200)
+        self.assertEqual([c['code'] for c in fresh.json()], ['C9'])
+
+
+class JSONCodecTests(TestCase):
+    payload = {
+        'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'created_at': timezone.now(),
+        'local': timezone.localtime(),
+        'week': date(2025, 1, 6),
+        'hours': Decimal('12.50'),
+        'elapsed': timedelta(minutes=90),
+        'tags': {'Assessment'},
+        'nested': [{'note': 'caf\u00e9 \u2028 line', 'count': 3, 'ratio': 0.25, 'ok': True, 'none': None}],
+    }
+
+    def test_renders_what_drf_renders(self):
+        reference = JSONRenderer().render(self.payload)
+        self.assertEqual(FastJSONRenderer().render(self.payload), reference)
+        self.assertIn(b'\\u2028', reference)
+        # Payloads orjson refuses go through DRF's encoder
+        for data in [{1: 'int key'}, {'big': 2 ** 70}]:
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            FastJSONRenderer().render(self.payload, 'application/json; indent=2'),
+            JSONRenderer().render(self.payload, 'application/json; indent=2'),
+        )
+        with override_settings(API_JSON={'BACKEND': 'stdlib'}):
+            self.assertEqual(FastJSONRenderer().render(self.payload), reference)
+
+    def test_parses_json_bodies(self):
+        parser = FastJSONParser()
+        self.assertEqual(parser.parse(BytesIO('{"a": [1, 2.5, "\u00e9"]}'.encode())), {'a': [1, 2.5, '\u00e9']})
+        # Lone surrogates are valid for the stdlib parser
+        self.assertEqual(parser.parse(BytesIO(b'"\\ud800"')), '\ud800')
+        for body in [b'{"a": NaN}', b'{"a": ', b'\xff']:
+            with self.assertRaises(ParseError):
+                parser.parse(BytesIO(body))
+
+    def test_api_uses_the_codec(self):
+        user = User.objects.create_user(username='codec@example.com', email='codec@example.com', password='pass1234')
+        UserProfile.objects.create(user=user, role='PROVISIONAL')
+        client = APIClient()
+        client.force_authenticate(user=user)
+        response = client.get('/api/logbook/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.accepted_renderer, FastJSONRenderer)
+        self.assertEqual(response.content, b'[]')
+
+    def test_benchmark_command_rolls_back(self):
+        out = StringIO()
+        call_command('benchmark_json_renderer', '--rows', '20', '--repeat', '1', stdout=out)
+        self.assertIn('logbook list', out.getvalue())
+        self.assertFalse(User.objects.filter(username='json-benchmark').exists())
+
+
+
+class ReplicaRoutingTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='replica@example.com', email='replica@example.com', password='pass1234')
+        UserProfile.objects.create(user=self.user, role='REGISTRAR')
+
+    @override_settings(DATABASE_REPLICA={'ALIAS': 'reporting'})
+    def test_reads_stay_on_primary_without_replica(self):
+        with replica_reads() as alias:
+            self.assertIsNone(alias)
+            self.assertTrue(User.objects.filter(pk=self.user.pk).exists())
+
+    # The test replica is a separate empty database, so rows only exist on the primary
+    @skipUnless('replica' in settings.DATABASES, 'set SQLITE_REPLICA=1 to configure a replica')
+    def test_reads_go_to_replica_until_the_block_writes(self):
+        with replica_reads() as alias:
+            self.assertEqual(alias, 'replica')
+            self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+            with primary_reads():
+                self.assertTrue(User.objects.filter(pk=self.user.pk).exists())
+            with transaction.atomic():
+                self.assertTrue(User.objects.filter(pk=self.user.pk).exists())
+            self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+            self.user.save(update_fields=['last_login'])
+            self.assertTrue(User.objects.filter(pk=self.user.pk).exists())
+
+    @skipUnless('replica' in settings.DATABASES, 'set SQLITE_REPLICA=1 to configure a replica')
+    def test_user_reads_primary_after_writing(self):
+        from logbook_app.models import Notification
+        from registrar_logbook.models import RegistrarPracticeEntry, RegistrarProgram
+
+        program = RegistrarProgram.objects.create(
+            user=self.user, aope='CLINICAL', qualification_tier='masters', start_date=date(2024, 1, 1),
+            expected_end_date=date(2025, 1, 1), targets_practice_hrs=3000, targets_supervision_hrs=80,
+            targets_cpd_hrs=80,
+        )
+        RegistrarPracticeEntry.objects.create(
+            program=program, date=date(2024, 2, 1), duration_minutes=60, dcc_minutes=30, setting='outpatient',
+            modality='in_person', client_code='C-001', client_age_band='26-44', tasks='Work', created_by=self.user,
+        )
+        notification = Notification.objects.create(user=self.user, notification_type='logbook_submission', payload={})
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        url = '/api/registrar/practice-entries/summary_stats/'
+        self.assertEqual(client.get(url).data['total_entries'], 0)
+
+        response = client.post(f'/api/logbook/notifications/{notification.pk}/read/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(client.get(url).data['total_entries'], 1)
@@ -3,6 +3,7 @@ from . import views
 
 urlpatterns = [
     path('health/', views.health, name='health'),
+    path('profile-images/<str:digest>/', views.profile_image, name='profile-image'),
     path('me/', views.me, name='me'),
     path('user-profile/', views.user_profile, name='user-profile'),
     path('program-summary/', views.program_summary, name='program-summary'),
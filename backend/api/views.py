@@ -7,9 +7,10 @@ from django.contrib.auth.models import User
 from .models import UserProfile, EmailVerificationCode, UserRole, Message, SupervisorRequest, SupervisorInvitation, SupervisorEndorsement, Supervision, SupervisionNotification, SupervisionAssignment, Meeting, MeetingInvite, DisconnectionRequest, SupportErrorLog
 from .serializers import UserProfileSerializer, MessageSerializer, SupervisorRequestSerializer, SupervisorInvitationSerializer, SupervisorEndorsementSerializer, SupervisionSerializer, SupervisionNotificationSerializer, SupervisionInviteSerializer, SupervisionResponseSerializer, SupervisionAssignmentSerializer, SupervisionAssignmentCreateSerializer, MeetingSerializer, MeetingCreateSerializer, MeetingInviteSerializer, MeetingInviteResponseSerializer, DisconnectionRequestSerializer, DisconnectionRequestCreateSerializer, DisconnectionRequestResponseSerializer, SupportErrorLogSerializer, SupportErrorLogCreateSerializer
 from .email_service import send_supervision_invite_email, send_supervision_response_email, send_supervision_reminder_email, send_supervision_expired_email, send_disconnection_request_email, send_disconnection_response_email
-from rest_framework.parsers import JSONParser, FormParser, MultiPartParser
-import base64
-import mimetypes
+from .blob_store import get_blob_store, store_profile_image, sniff_content_type, DIGEST_RE, RASTER_IMAGE_TYPES
+from .data_version import etag_by_data_version
+from .json_codec import FastJSONParser
+from rest_framework.parsers import FormParser, MultiPartParser
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.contrib.auth.tokens import default_token_generator
@@ -28,9 +29,44 @@ from datetime import date, timedelta
 def health(_request):
     return JsonResponse({"status": "ok"})
 
+
+def profile_image(request, digest):
+    """
+    Serve a signature/initials image from the blob store.
+
+    Blobs are content-addressed, so the digest is a strong ETag and the response
+    can be cached forever by the browser. Anything that is not a raster image
+    (e.g. an SVG stored before uploads were restricted) is only offered as a
+    download, and no blob may load or run anything.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponse(status=405, headers={'Allow': 'GET, HEAD'})
+    if not DIGEST_RE.match(digest):
+        return HttpResponse(status=404)
+
+    etag = f'"{digest}"'
+    cache_control = 'private, max-age=31536000, immutable'
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+    if etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*':
+        return HttpResponse(status=304, headers={'ETag': etag, 'Cache-Control': cache_control})
+
+    content = get_blob_store().get(digest)
+    if content is None:
+        return HttpResponse(status=404)
+
+    content_type = sniff_content_type(content)
+    response = HttpResponse(content, content_type=content_type)
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    response['X-Content-Type-Options'] = 'nosniff'
+    response['Content-Security-Policy'] = "default-src 'none'"
+    if content_type not in RASTER_IMAGE_TYPES:
+        response['Content-Disposition'] = 'attachment'
+    return response
+
 @api_view(['GET', 'PUT', 'PATCH'])
 @permission_classes([IsAuthenticated])
-@parser_classes([MultiPartParser, FormParser, JSONParser])
+@parser_classes([MultiPartParser, FormParser, FastJSONParser])
 @support_error_handler
 @audit_data_access('USER_PROFILE', 'UserProfile')
 def user_profile(request):
@@ -78,13 +114,9 @@ def user_profile(request):
                     print(f"File too large: {signature_file.size} bytes")
                     return JsonResponse({'error': 'File too large. Maximum size is 2MB.'}, status=400)
                 
-                # Convert to data URL so it renders without a media server
-                content = signature_file.read()
-                mime, _ = mimetypes.guess_type(signature_file.name)
-                mime = mime or 'image/png'
-                b64 = base64.b64encode(content).decode('ascii')
-                data['signature_url'] = f"data:{mime};base64,{b64}"
-                print(f"Generated signature_url with length: {len(data['signature_url'])}")
+                # Store in the blob store; the profile only keeps the image URL
+                data['signature_url'] = store_profile_image(signature_file.read())
+                print(f"Stored signature image at: {data['signature_url']}")
             except Exception as e:
                 print(f"Error processing signature file: {e}")
                 import traceback
@@ -102,13 +134,9 @@ def user_profile(request):
                     print(f"File too large: {initials_file.size} bytes")
                     return JsonResponse({'error': 'File too large. Maximum size is 2MB.'}, status=400)
                 
-                # Convert to data URL so it renders without a media server
-                content = initials_file.read()
-                mime, _ = mimetypes.guess_type(initials_file.name)
-                mime = mime or 'image/png'
-                b64 = base64.b64encode(content).decode('ascii')
-                data['initials_url'] = f"data:{mime};base64,{b64}"
-                print(f"Generated initials_url with length: {len(data['initials_url'])}")
+                # Store in the blob store; the profile only keeps the image URL
+                data['initials_url'] = store_profile_image(initials_file.read())
+                print(f"Stored initials image at: {data['initials_url']}")
             except Exception as e:
                 print(f"Error processing initials file: {e}")
                 import traceback
@@ -180,8 +208,8 @@ def user_profile(request):
                 
                 saved_profile = serializer.save()
                 print(f"Profile saved successfully")
-                print(f"Profile saved. Signature URL length: {len(saved_profile.signature_url) if saved_profile.signature_url else 0}")
-                print(f"Profile saved. Initials URL length: {len(saved_profile.initials_url) if saved_profile.initials_url else 0}")
+                print(f"Profile saved. Signature URL: {saved_profile.signature_url}")
+                print(f"Profile saved. Initials URL: {saved_profile.initials_url}")
             else:
                 print(f"Serializer validation failed: {serializer.errors}")
                 print(f"Field errors: {serializer.errors}")
@@ -626,6 +654,7 @@ def register_complete(request):
 @permission_classes([IsAuthenticated])
 @support_error_handler
 @audit_data_access('PROGRAM_SUMMARY', 'UserProfile')
+@etag_by_data_version('program-summary')
 def program_summary(request):
     """
     Get role-scoped program summary with requirements and progress
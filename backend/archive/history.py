@@ -0,0 +1,109 @@
+"""
+Reads archived rows back alongside the hot table.
+
+``archived_rows`` rebuilds model instances from an owner's segments, so audit
+views and serializers handle them exactly like rows from the table (they are
+never saved). Rows whose foreign keys point at objects deleted since they were
+archived are treated as the table would have: dropped for CASCADE, the key
+cleared for SET_NULL.
+
+``with_history`` merges them into a queryset's results, so a view that lists a
+logbook's or program's full audit history keeps working after its older rows
+have been archived.
+"""
+
+import logging
+
+from django.db import models
+from django.db.models import prefetch_related_objects
+
+from .models import ArchiveSegment
+from .retention import SOURCES, decode_segment, get_archive_store, source_model
+
+logger = logging.getLogger(__name__)
+
+
+def archived_segments(source, owner_id):
+    return ArchiveSegment.objects.filter(source=source, owner_id=owner_id).order_by('period', 'id')
+
+
+def archived_count(source, owner_id):
+    """Rows of the owner's history that now live in the archive"""
+    return archived_segments(source, owner_id).aggregate(total=models.Sum('row_count'))['total'] or 0
+
+
+def archived_counts(source, owner_ids):
+    """``{owner_id: rows in the archive}`` for several owners in one query"""
+    rows = ArchiveSegment.objects.filter(source=source, owner_id__in=owner_ids).values('owner_id').annotate(
+        total=models.Sum('row_count')
+    ).order_by()
+    return {row['owner_id']: row['total'] for row in rows}
+
+
+def _drop_dangling(model, instances):
+    """Apply CASCADE / SET_NULL for foreign keys whose targets were deleted after archiving"""
+    for field in model._meta.concrete_fields:
+        if not field.is_relation:
+            continue
+        ids = {getattr(obj, field.attname) for obj in instances} - {None}
+        if not ids:
+            continue
+        existing = set(
+            field.related_model._base_manager.filter(pk__in=ids).values_list('pk', flat=True)
+        )
+        if existing == ids:
+            continue
+        if field.null:
+            for obj in instances:
+                if getattr(obj, field.attname) not in existing:
+                    setattr(obj, field.attname, None)
+        else:
+            instances = [obj for obj in instances if getattr(obj, field.attname) in existing]
+    return instances
+
+
+def archived_rows(source, owner_id, related=()):
+    """Unsaved instances of the owner's archived rows, oldest first"""
+    model = source_model(source)
+    fields = {field.attname: field for field in model._meta.concrete_fields}
+    store = get_archive_store()
+    instances = []
+    for segment in archived_segments(source, owner_id):
+        blob = store.get(segment.digest)
+        if blob is None:
+            logger.error('Archive segment %s is missing blob %s', segment.pk, segment.digest)
+            continue
+        for row in decode_segment(blob):
+            # Columns dropped since the row was archived are ignored
+            values = {name: fields[name].to_python(value) for name, value in row.items() if name in fields}
+            instances.append(model(**values))
+
+    instances = _drop_dangling(model, instances)
+    ts_field = SOURCES[source][1]
+    instances.sort(key=lambda obj: (getattr(obj, ts_field), obj.pk))
+    if related:
+        prefetch_related_objects(instances, *related)
+    return instances
+
+
+def _select_related_lookups(queryset):
+    """The queryset's select_related() paths, to fetch the same relations for archived rows"""
+    def walk(tree, prefix):
+        for name, subtree in tree.items():
+            yield prefix + name
+            yield from walk(subtree, f'{prefix}{name}__')
+
+    select_related = queryset.query.select_related
+    return list(walk(select_related, '')) if isinstance(select_related, dict) else []
+
+
+def with_history(queryset, source, owner_id, newest_first=True):
+    """``queryset``'s rows (all of one owner's, unfiltered otherwise) plus the archived ones"""
+    archived = archived_rows(source, owner_id, related=_select_related_lookups(queryset))
+    rows = list(queryset)
+    if not archived:
+        return rows
+    ts_field = SOURCES[source][1]
+    rows.extend(archived)
+    rows.sort(key=lambda obj: (getattr(obj, ts_field), obj.pk), reverse=newest_first)
+    return rows
@@ -0,0 +1,74 @@
+"""
+Management command to move cold activity, audit and notification rows into the archive.
+
+Run it daily from cron. Each source keeps ``ARCHIVE['RETENTION_DAYS']`` in its
+hot table; older rows are moved into compressed monthly segments (see
+archive.retention) that the audit views still read. Segments of deleted
+logbooks, programs and users are removed on every run. ``--purge-before``
+deletes archived months for good once they are past any legal retention period.
+"""
+
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from archive import retention
+
+
+class Command(BaseCommand):
+    help = 'Move rows past their retention window into the compressed archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source',
+            action='append',
+            choices=sorted(retention.SOURCES),
+            help='Only archive this source (repeatable; default: all)',
+        )
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            help="Override the sources' ARCHIVE['RETENTION_DAYS']",
+        )
+        parser.add_argument(
+            '--batch-rows',
+            type=int,
+            help="Rows moved per transaction (default: ARCHIVE['BATCH_ROWS'])",
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many rows would be archived',
+        )
+        parser.add_argument(
+            '--purge-before',
+            type=date.fromisoformat,
+            help='Also delete archived months before this date (YYYY-MM-DD) permanently',
+        )
+
+    def handle(self, *args, **options):
+        if options['older_than_days'] is not None and options['older_than_days'] < 1:
+            raise CommandError('--older-than-days must be at least 1')
+
+        total = 0
+        for name in options['source'] or retention.SOURCES:
+            cutoff = None
+            if options['older_than_days'] is not None:
+                cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+            if options['dry_run']:
+                count = retention.cold_row_count(name, cutoff)
+                self.stdout.write(f'{name}: {count} rows would be archived')
+            else:
+                count = retention.archive_source(name, cutoff, options['batch_rows'])
+                self.stdout.write(f'{name}: archived {count} rows')
+                orphaned = retention.purge_orphaned_segments(name)
+                if orphaned:
+                    self.stdout.write(f'{name}: purged {orphaned} archived segments of deleted owners')
+                if options['purge_before']:
+                    purged = retention.purge_segments(name, options['purge_before'])
+                    self.stdout.write(f'{name}: purged {purged} archived segments')
+            total += count
+
+        verb = 'would be archived' if options['dry_run'] else 'archived'
+        self.stdout.write(self.style.SUCCESS(f'{total} rows {verb}'))
@@ -0,0 +1,39 @@
+"""
+Management command to partition the history tables by month (PostgreSQL only).
+
+Each table is copied into a new partitioned table under an exclusive lock (see
+archive.partitions), so run it in a maintenance window, table by table for
+large tables. Afterwards ``archive_cold_rows`` drops whole archived months
+instead of deleting their rows.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from archive import partitions, retention
+
+
+class Command(BaseCommand):
+    help = 'Convert the activity, audit and notification tables to monthly partitions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source',
+            action='append',
+            choices=sorted(retention.SOURCES),
+            help='Only partition this source (repeatable; default: all)',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Partitioning needs PostgreSQL; other databases only use the archive')
+
+        months_ahead = retention.archive_setting('MONTHS_AHEAD')
+        for name in options['source'] or retention.SOURCES:
+            model = retention.source_model(name)
+            column = model._meta.get_field(retention.SOURCES[name][1]).column
+            if partitions.partition_table(model, column, months_ahead):
+                self.stdout.write(f'{name}: partitioned {model._meta.db_table}')
+            else:
+                self.stdout.write(f'{name}: {model._meta.db_table} is already partitioned')
+        self.stdout.write(self.style.SUCCESS('History tables are partitioned by month'))
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.2 on 2026-10-19 08:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(help_text='Key in archive.retention.SOURCES', max_length=30)),
+                ('owner_id', models.BigIntegerField(help_text='Logbook, program or user the rows belong to')),
+                ('period', models.DateField(help_text='First day of the (UTC) month the rows were written in')),
+                ('row_count', models.PositiveIntegerField()),
+                ('first_at', models.DateTimeField()),
+                ('last_at', models.DateTimeField()),
+                ('digest', models.CharField(max_length=64)),
+                ('size', models.PositiveIntegerField(help_text='Compressed bytes')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['source', 'owner_id', 'period'], name='archive_segment_owner'), models.Index(fields=['source', 'period'], name='archive_segment_period')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import models
+
+
+class ArchiveSegment(models.Model):
+    """
+    Cold rows moved out of one hot table (see archive.retention), for one owner
+    and one month.
+
+    The rows themselves are gzip-compressed JSONL in the archive blob store,
+    addressed by ``digest``; this row only indexes them so archive.history can
+    find an owner's segments without reading any others.
+    """
+
+    source = models.CharField(max_length=30, help_text="Key in archive.retention.SOURCES")
+    owner_id = models.BigIntegerField(help_text="Logbook, program or user the rows belong to")
+    period = models.DateField(help_text="First day of the (UTC) month the rows were written in")
+    row_count = models.PositiveIntegerField()
+    first_at = models.DateTimeField()
+    last_at = models.DateTimeField()
+    digest = models.CharField(max_length=64)
+    size = models.PositiveIntegerField(help_text="Compressed bytes")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['source', 'owner_id', 'period'], name='archive_segment_owner'),
+            models.Index(fields=['source', 'period'], name='archive_segment_period'),
+        ]
+
+    def __str__(self):
+        return f"{self.source} #{self.owner_id} {self.period:%Y-%m} ({self.row_count} rows)"
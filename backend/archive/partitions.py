@@ -0,0 +1,181 @@
+"""
+Monthly range partitioning of the history tables on Postgres.
+
+``partition_table`` rebuilds a table as ``PARTITION BY RANGE (<timestamp>)``
+with one partition per UTC month (``<table>_pYYYYMM``) and a default
+partition for anything outside them. Postgres requires the partition key in
+every unique constraint, so the primary key becomes ``(id, <timestamp>)``; ids
+still come from the table's sequence and stay unique, and the ORM keeps
+addressing rows by id. Indexes and foreign keys are recreated from the model,
+as ``migrate`` would have created them.
+
+The conversion copies the table under an exclusive lock, so it is an explicit
+step (``manage.py partition_history_tables``) rather than a migration. After it,
+``archive_cold_rows`` keeps partitions created ``MONTHS_AHEAD`` months ahead and
+drops months once they have been archived (see archive.retention). Rows only
+land in the default partition if partitions were not created in time (e.g. the
+job did not run for longer than MONTHS_AHEAD). Postgres cannot create a month
+while the default partition holds rows for it, so ``ensure_partitions`` moves
+them into the new month as it attaches it; rows of months before the ones it
+creates stay in the default partition and are archived through the batch path.
+
+Callers check ``is_partitioned`` first, which is always False on other
+databases.
+"""
+
+import re
+from datetime import date, datetime
+from datetime import timezone as dt_timezone
+
+from django.db import connection as default_connection
+from django.db import transaction
+from django.utils import timezone
+
+PARTITION_RE = re.compile(r'_p(\d{4})(\d{2})$')
+
+
+def next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def month_bound(month):
+    """Aware UTC datetime at the start of ``month``"""
+    return datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(model, month):
+    return f'{model._meta.db_table}_p{month:%Y%m}'
+
+
+def is_partitioned(model, connection=None):
+    connection = connection or default_connection
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)',
+            [model._meta.db_table],
+        )
+        return cursor.fetchone() is not None
+
+
+def monthly_partitions(model, connection=None):
+    """``[(month, partition table)]`` of the table's monthly partitions, oldest first"""
+    connection = connection or default_connection
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(%s)
+            """,
+            [model._meta.db_table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    months = []
+    for name in names:
+        match = PARTITION_RE.search(name)
+        if match:
+            months.append((date(int(match.group(1)), int(match.group(2)), 1), name))
+    return sorted(months)
+
+
+def partitions_before(model, cutoff, connection=None):
+    """Monthly partitions holding only rows from before ``cutoff``"""
+    return [
+        (month, name) for month, name in monthly_partitions(model, connection)
+        if month_bound(next_month(month)) <= cutoff
+    ]
+
+
+def ensure_partitions(model, column, first, months_ahead, connection=None):
+    """Create the monthly partitions from ``first``'s month to ``months_ahead`` months after now"""
+    connection = connection or default_connection
+    existing = {month for month, _ in monthly_partitions(model, connection)}
+    month = date(first.year, first.month, 1)
+    last = timezone.now().date()
+    for _ in range(months_ahead):
+        last = next_month(date(last.year, last.month, 1))
+    while month <= last:
+        if month not in existing:
+            _add_partition(model, column, month, connection)
+        month = next_month(month)
+
+
+def _add_partition(model, column, month, connection):
+    """Attach ``month``'s partition, taking over its rows from the default partition"""
+    qn = connection.ops.quote_name
+    table = model._meta.db_table
+    name = partition_name(model, month)
+    # The bounds are dates formatted here, not user input
+    start = f"'{month.isoformat()} 00:00:00+00'"
+    end = f"'{next_month(month).isoformat()} 00:00:00+00'"
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE {qn(name)} (LIKE {qn(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cursor.execute(
+            f'WITH moved AS ('
+            f'DELETE FROM {qn(table + "_default")} WHERE {qn(column)} >= {start} AND {qn(column)} < {end} '
+            f'RETURNING *) INSERT INTO {qn(name)} SELECT * FROM moved'
+        )
+        cursor.execute(f'ALTER TABLE {qn(table)} ATTACH PARTITION {qn(name)} FOR VALUES FROM ({start}) TO ({end})')
+
+
+def drop_partition(table, connection=None):
+    connection = connection or default_connection
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE {connection.ops.quote_name(table)}')
+
+
+def partition_table(model, column, months_ahead, connection=None):
+    """Rebuild ``model``'s table partitioned by month on ``column``; False if it already is"""
+    connection = connection or default_connection
+    if connection.vendor != 'postgresql':
+        raise NotImplementedError('Table partitioning needs PostgreSQL')
+    if is_partitioned(model, connection):
+        return False
+
+    qn = connection.ops.quote_name
+    table = model._meta.db_table
+    old = f'{table}_unpartitioned'
+    with transaction.atomic(using=connection.alias):
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {qn(table)} IN ACCESS EXCLUSIVE MODE')
+            cursor.execute(f'SELECT min({qn(column)}) FROM {qn(table)}')
+            first = cursor.fetchone()[0] or timezone.now()
+            cursor.execute(
+                "SELECT attidentity FROM pg_attribute WHERE attrelid = to_regclass(%s) AND attname = 'id'",
+                [table],
+            )
+            identity = cursor.fetchone()[0] != ''
+            cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+            sequence = cursor.fetchone()[0]
+
+            cursor.execute(f'ALTER TABLE {qn(table)} RENAME TO {qn(old)}')
+            cursor.execute(
+                f'CREATE TABLE {qn(table)} (LIKE {qn(old)} INCLUDING DEFAULTS INCLUDING IDENTITY) '
+                f'PARTITION BY RANGE ({qn(column)})'
+            )
+            cursor.execute(f'ALTER TABLE {qn(table)} ADD PRIMARY KEY (id, {qn(column)})')
+            cursor.execute(f'CREATE TABLE {qn(table + "_default")} PARTITION OF {qn(table)} DEFAULT')
+        ensure_partitions(model, column, first, months_ahead, connection)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'INSERT INTO {qn(table)} SELECT * FROM {qn(old)}')
+            if identity:
+                # The copied identity column starts a new sequence
+                cursor.execute(
+                    f"SELECT setval(pg_get_serial_sequence(%s, 'id'), coalesce(max(id), 0) + 1, false) "
+                    f"FROM {qn(table)}",
+                    [table],
+                )
+            elif sequence:
+                # A serial column's default still uses the old table's sequence; keep it alive
+                cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY {qn(table)}.id')
+            cursor.execute(f'DROP TABLE {qn(old)}')
+
+        with connection.schema_editor(atomic=False) as editor:
+            for sql in editor._model_indexes_sql(model):
+                editor.execute(sql)
+            for field in model._meta.local_concrete_fields:
+                if field.remote_field and field.db_constraint:
+                    editor.execute(editor._create_fk_sql(model, field, '_fk_%(to_table)s_%(to_column)s'))
+    return True
@@ -0,0 +1,228 @@
+"""
+Moves cold rows out of the append-only history tables into compressed archives.
+
+Activity, audit and notification rows are written once and read mostly while
+they are recent, but they were kept forever in the hot tables every list view
+and count scans. ``archive_source`` moves the rows older than a source's
+retention window into segments: one gzip-compressed JSONL blob per owner and
+(UTC) month, content-addressed in the archive blob store and indexed by an
+ArchiveSegment row. Each batch is read, written and deleted in one
+transaction, so a row is never both gone from the table and missing from the
+archive; a failed batch leaves at most an unreferenced blob behind.
+
+On Postgres the tables can also be range-partitioned by month (see
+archive.partitions). Months that are wholly past the cutoff are then exported
+and their partition dropped instead of deleting row by row; what is left
+(rows in the default partition, the month the cutoff falls in, and sources
+that keep some rows, such as unread notifications) goes through the batch
+path as on any other database.
+
+archive.history reads the segments back for the audit views. Deleting an
+owner (logbook, program or user) cascades to its hot rows but not to its
+segments; ``purge_orphaned_segments`` removes those on the next run.
+
+Settings (ARCHIVE):
+    STORE           {'BACKEND', 'OPTIONS'} for the blob store holding the segments
+    RETENTION_DAYS  {source: days rows stay in the hot table}
+    BATCH_ROWS      rows moved per transaction
+    MONTHS_AHEAD    monthly partitions created ahead of time on Postgres
+"""
+
+import gzip
+import json
+import logging
+from collections import defaultdict
+from datetime import date, timedelta
+from datetime import timezone as dt_timezone
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import partitions
+from .models import ArchiveSegment
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'STORE': {'BACKEND': 'api.blob_store.FileSystemBlobStore', 'OPTIONS': {}},
+    'RETENTION_DAYS': {
+        'user_activity': 180,
+        'logbook_audit': 730,
+        'registrar_audit': 730,
+        'notification': 90,
+    },
+    'BATCH_ROWS': 5000,
+    'MONTHS_AHEAD': 3,
+}
+
+
+def archive_setting(name):
+    return getattr(settings, 'ARCHIVE', {}).get(name, DEFAULTS[name])
+
+
+# name -> (model, timestamp field, owner field, extra filter for rows that may be archived)
+SOURCES = {
+    'user_activity': ('support.UserActivity', 'created_at', 'user', {}),
+    'logbook_audit': ('logbook_app.LogbookAuditLog', 'timestamp', 'logbook', {}),
+    'registrar_audit': ('registrar_logbook.AuditLog', 'timestamp', 'program', {}),
+    # Unread notifications stay where the user can still see them
+    'notification': ('logbook_app.Notification', 'created_at', 'user', {'read': True}),
+}
+
+
+def source_model(name):
+    return apps.get_model(SOURCES[name][0])
+
+
+def retention_cutoff(name, now=None):
+    days = archive_setting('RETENTION_DAYS')[name]
+    return (now or timezone.now()) - timedelta(days=days)
+
+
+_store = None
+
+
+def get_archive_store():
+    """Return the configured archive blob store (cached per process)"""
+    global _store
+    if _store is None:
+        config = archive_setting('STORE')
+        backend = import_string(config.get('BACKEND', 'api.blob_store.FileSystemBlobStore'))
+        options = dict(config.get('OPTIONS', {}))
+        options.setdefault('location', str(settings.BASE_DIR / 'media' / 'archive'))
+        _store = backend(**options)
+    return _store
+
+
+def reset_archive_store():
+    """Drop the cached store so the next call re-reads settings (used by tests)"""
+    global _store
+    _store = None
+
+
+def encode_segment(rows):
+    """gzip-compressed JSONL for ``rows`` (deterministic, so equal rows share a blob)"""
+    lines = [json.dumps(row, cls=DjangoJSONEncoder, separators=(',', ':')) for row in rows]
+    return gzip.compress('\n'.join(lines).encode('utf-8'), mtime=0)
+
+
+def decode_segment(blob):
+    return [json.loads(line) for line in gzip.decompress(blob).decode('utf-8').splitlines() if line]
+
+
+def month_of(value):
+    value = value.astimezone(dt_timezone.utc)
+    return date(value.year, value.month, 1)
+
+
+def _write_segments(name, rows):
+    """Store ``rows`` (``values()`` dicts ordered by id) as one segment per owner and month"""
+    _, ts_field, owner_field, _ = SOURCES[name]
+    owner_attname = source_model(name)._meta.get_field(owner_field).attname
+    groups = defaultdict(list)
+    for row in rows:
+        groups[(row[owner_attname], month_of(row[ts_field]))].append(row)
+
+    store = get_archive_store()
+    segments = []
+    for (owner_id, period), group in groups.items():
+        blob = encode_segment(group)
+        timestamps = [row[ts_field] for row in group]
+        segments.append(ArchiveSegment(
+            source=name,
+            owner_id=owner_id,
+            period=period,
+            row_count=len(group),
+            first_at=min(timestamps),
+            last_at=max(timestamps),
+            digest=store.put(blob),
+            size=len(blob),
+        ))
+    ArchiveSegment.objects.bulk_create(segments)
+
+
+def _archive_batches(name, queryset, batch_rows, delete=True):
+    """Archive every row of ``queryset`` a batch at a time; returns the number archived"""
+    model = queryset.model
+    columns = [field.attname for field in model._meta.concrete_fields]
+    archived = 0
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            batch = queryset.filter(pk__gt=last_id).order_by('pk')
+            if delete:
+                batch = batch.select_for_update()
+            rows = list(batch.values(*columns)[:batch_rows])
+            if not rows:
+                return archived
+            _write_segments(name, rows)
+            ids = [row['id'] for row in rows]
+            if delete:
+                model._base_manager.filter(pk__in=ids).delete()
+        archived += len(rows)
+        last_id = ids[-1]
+
+
+def archive_source(name, cutoff=None, batch_rows=None):
+    """Move ``name``'s rows older than ``cutoff`` (default: its retention window) into segments"""
+    _, ts_field, _, extra = SOURCES[name]
+    model = source_model(name)
+    cutoff = cutoff or retention_cutoff(name)
+    batch_rows = batch_rows or archive_setting('BATCH_ROWS')
+    manager = model._base_manager
+    archived = 0
+
+    if partitions.is_partitioned(model):
+        column = model._meta.get_field(ts_field).column
+        partitions.ensure_partitions(model, column, timezone.now(), archive_setting('MONTHS_AHEAD'))
+        if not extra:
+            for month, table in partitions.partitions_before(model, cutoff):
+                # Export and drop in one transaction: a crash re-exports the whole month
+                with transaction.atomic():
+                    rows = manager.filter(**{
+                        f'{ts_field}__gte': partitions.month_bound(month),
+                        f'{ts_field}__lt': partitions.month_bound(partitions.next_month(month)),
+                    })
+                    archived += _archive_batches(name, rows, batch_rows, delete=False)
+                    partitions.drop_partition(table)
+                logger.info('Archived and dropped partition %s', table)
+
+    cold = manager.filter(**{f'{ts_field}__lt': cutoff}, **extra)
+    archived += _archive_batches(name, cold, batch_rows)
+    return archived
+
+
+def cold_row_count(name, cutoff=None):
+    _, ts_field, _, extra = SOURCES[name]
+    cutoff = cutoff or retention_cutoff(name)
+    return source_model(name)._base_manager.filter(**{f'{ts_field}__lt': cutoff}, **extra).count()
+
+
+def _delete_segments(segments):
+    digests = set(segments.values_list('digest', flat=True))
+    count, _ = segments.delete()
+    # Blobs are content-addressed, so another segment may still point at one
+    still_used = set(ArchiveSegment.objects.filter(digest__in=digests).values_list('digest', flat=True))
+    store = get_archive_store()
+    for digest in digests - still_used:
+        store.delete(digest)
+    return count
+
+
+def purge_segments(name, before):
+    """Delete ``name``'s archived months before ``before`` for good; returns segments deleted"""
+    return _delete_segments(ArchiveSegment.objects.filter(source=name, period__lt=before))
+
+
+def purge_orphaned_segments(name):
+    """Delete ``name``'s segments whose owner no longer exists; returns segments deleted"""
+    _, _, owner_field, _ = SOURCES[name]
+    owner_model = source_model(name)._meta.get_field(owner_field).related_model
+    return _delete_segments(ArchiveSegment.objects.filter(source=name).filter(
+        ~Exists(owner_model._base_manager.filter(pk=OuterRef('owner_id')))
+    ))
@@ -0,0 +1,171 @@
+import shutil
+import tempfile
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import UserProfile
+from logbook_app.models import LogbookAuditLog, Notification, WeeklyLogbook
+from logbook_app.serializers import LogbookSerializer
+from support.models import UserActivity
+
+from . import history, retention
+from .models import ArchiveSegment
+
+
+def at(year, month, day):
+    return datetime(year, month, day, 12, tzinfo=dt_timezone.utc)
+
+
+class ArchiveRetentionTests(TestCase):
+    def setUp(self):
+        self.archive_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(ARCHIVE={
+            'STORE': {'OPTIONS': {'location': self.archive_root}},
+            'BATCH_ROWS': 2,
+        })
+        self.settings_override.enable()
+        retention.reset_archive_store()
+
+        self.trainee = User.objects.create_user(username='trainee@example.com', email='trainee@example.com', password='pass1234')
+        UserProfile.objects.create(user=self.trainee, role='PROVISIONAL', first_name='Terry', last_name='Trainee')
+        self.supervisor = User.objects.create_user(username='supervisor@example.com', email='supervisor@example.com', password='pass1234')
+        self.logbook = WeeklyLogbook.objects.create(
+            trainee=self.trainee, role_type='Provisional',
+            week_start_date=date(2024, 1, 1), week_end_date=date(2024, 1, 7), status='approved',
+        )
+
+    def tearDown(self):
+        self.settings_override.disable()
+        retention.reset_archive_store()
+        shutil.rmtree(self.archive_root, ignore_errors=True)
+
+    def audit(self, action, timestamp, user=None):
+        log = LogbookAuditLog.objects.create(
+            logbook=self.logbook, action=action, user=user or self.trainee, metadata={'step': action},
+        )
+        LogbookAuditLog.objects.filter(pk=log.pk).update(timestamp=timestamp)
+        return log
+
+    def test_cold_rows_move_into_monthly_segments_and_read_back(self):
+        created = self.audit('created', at(2024, 1, 2))
+        submitted = self.audit('submitted', at(2024, 1, 8), user=self.trainee)
+        approved = self.audit('approved', at(2024, 2, 3), user=self.supervisor)
+        recent = self.audit('comment_added', timezone.now())
+
+        archived = retention.archive_source('logbook_audit', cutoff=timezone.now() - timedelta(days=30))
+
+        self.assertEqual(archived, 3)
+        self.assertEqual(list(LogbookAuditLog.objects.values_list('id', flat=True)), [recent.id])
+        segments = ArchiveSegment.objects.filter(source='logbook_audit', owner_id=self.logbook.id)
+        self.assertEqual(
+            sorted((s.period, s.row_count) for s in segments),
+            [(date(2024, 1, 1), 2), (date(2024, 2, 1), 1)],
+        )
+        self.assertEqual(history.archived_count('logbook_audit', self.logbook.id), 3)
+
+        rows = history.with_history(
+            LogbookAuditLog.objects.filter(logbook=self.logbook).order_by('-timestamp'),
+            'logbook_audit', self.logbook.id,
+        )
+        self.assertEqual([row.id for row in rows], [recent.id, approved.id, submitted.id, created.id])
+        archived_row = rows[-1]
+        self.assertEqual(archived_row.timestamp, at(2024, 1, 2))
+        self.assertEqual(archived_row.metadata, {'step': 'created'})
+        self.assertEqual(archived_row.user, self.trainee)
+
+    def test_deleted_users_are_cleared_from_archived_rows(self):
+        self.audit('approved', at(2024, 2, 3), user=self.supervisor)
+        retention.archive_source('logbook_audit', cutoff=at(2024, 6, 1))
+        self.supervisor.delete()
+
+        [row] = history.archived_rows('logbook_audit', self.logbook.id)
+        self.assertIsNone(row.user_id)
+
+    def test_unread_notifications_stay_in_the_table(self):
+        read = Notification.objects.create(user=self.trainee, notification_type='system_alert', read=True)
+        unread = Notification.objects.create(user=self.trainee, notification_type='system_alert')
+        Notification.objects.update(created_at=at(2024, 1, 5))
+
+        self.assertEqual(retention.cold_row_count('notification', cutoff=at(2024, 6, 1)), 1)
+        self.assertEqual(retention.archive_source('notification', cutoff=at(2024, 6, 1)), 1)
+        self.assertEqual(list(Notification.objects.values_list('id', flat=True)), [unread.id])
+        [row] = history.archived_rows('notification', self.trainee.id)
+        self.assertEqual(row.id, read.id)
+
+    def test_purge_deletes_only_unreferenced_blobs(self):
+        for _ in range(3):
+            UserActivity.objects.create(user=self.trainee, activity_type='LOGIN', description='Logged in')
+        UserActivity.objects.update(created_at=at(2024, 1, 2))
+        UserActivity.objects.create(user=self.trainee, activity_type='LOGIN', description='Later')
+        UserActivity.objects.filter(description='Later').update(created_at=at(2024, 3, 2))
+
+        out = StringIO()
+        call_command('archive_cold_rows', '--source', 'user_activity', '--older-than-days', '1', stdout=out)
+        self.assertIn('4 rows archived', out.getvalue())
+        self.assertFalse(UserActivity.objects.exists())
+        store = retention.get_archive_store()
+        january = ArchiveSegment.objects.filter(period=date(2024, 1, 1)).first()
+        march = ArchiveSegment.objects.get(period=date(2024, 3, 1))
+
+        self.assertEqual(retention.purge_segments('user_activity', date(2024, 2, 1)), 2)
+        self.assertFalse(store.exists(january.digest))
+        self.assertTrue(store.exists(march.digest))
+        self.assertEqual(history.archived_count('user_activity', self.trainee.id), 1)
+
+    def test_segments_of_deleted_owners_are_purged(self):
+        self.audit('created', at(2024, 1, 2))
+        UserActivity.objects.create(user=self.trainee, activity_type='LOGIN', description='Logged in')
+        UserActivity.objects.update(created_at=at(2024, 1, 2))
+        call_command('archive_cold_rows', '--older-than-days', '1', stdout=StringIO())
+        other = WeeklyLogbook.objects.create(
+            trainee=self.supervisor, role_type='Provisional',
+            week_start_date=date(2024, 1, 1), week_end_date=date(2024, 1, 7),
+        )
+        LogbookAuditLog.objects.create(logbook=other, action='created', user=self.supervisor)
+        LogbookAuditLog.objects.filter(logbook=other).update(timestamp=at(2024, 1, 3))
+        retention.archive_source('logbook_audit', cutoff=at(2024, 6, 1))
+        store = retention.get_archive_store()
+        trainee_digests = list(ArchiveSegment.objects.exclude(owner_id=other.id).values_list('digest', flat=True))
+
+        self.trainee.delete()
+        out = StringIO()
+        call_command('archive_cold_rows', '--older-than-days', '1', stdout=out)
+
+        self.assertIn('logbook_audit: purged 1 archived segments of deleted owners', out.getvalue())
+        self.assertIn('user_activity: purged 1 archived segments of deleted owners', out.getvalue())
+        self.assertEqual(list(ArchiveSegment.objects.values_list('owner_id', flat=True)), [other.id])
+        self.assertFalse(any(store.exists(digest) for digest in trainee_digests))
+
+    def test_audit_log_view_includes_archived_history(self):
+        self.audit('created', at(2024, 1, 2))
+        recent = self.audit('submitted', timezone.now())
+        retention.archive_source('logbook_audit', cutoff=timezone.now() - timedelta(days=30))
+
+        client = APIClient()
+        client.force_authenticate(user=self.trainee)
+        response = client.get(f'/api/logbook/{self.logbook.id}/audit-logs/')
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual([log['action'] for log in response.json()], ['submitted', 'created'])
+        self.assertEqual(response.json()[0]['id'], recent.id)
+
+    def test_list_audit_counts_look_up_the_archive_once(self):
+        self.audit('created', at(2024, 1, 2))
+        self.audit('submitted', timezone.now())
+        retention.archive_source('logbook_audit', cutoff=timezone.now() - timedelta(days=30))
+
+        client = APIClient()
+        client.force_authenticate(user=self.trainee)
+        with mock.patch('logbook_app.serializers.archived_count', side_effect=AssertionError('per-row lookup')):
+            dashboard = client.get('/api/logbook/dashboard/').json()
+            rows = LogbookSerializer(WeeklyLogbook.objects.all(), many=True).data
+        self.assertEqual(dashboard[0]['audit_log_count'], 2)
+        self.assertEqual(rows[0]['audit_log_count'], 2)
@@ -3,6 +3,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import Competency
+from api.data_version import etag_by_data_version
 from .serializers import CompetencySerializer
 
 
@@ -19,7 +20,12 @@ class CompetencyViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [IsAuthenticated]
     lookup_field = 'code'
 
+    @etag_by_data_version('competencies', user=False, reference=True)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     @action(detail=False, methods=['get'])
+    @etag_by_data_version('competency-summary', user=False, reference=True)
     def summary(self, request):
         """
         Get a summary of all competencies (code, title only)
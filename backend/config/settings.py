@@ -117,6 +117,8 @@ INSTALLED_APPS = [
     'competencies', # AHPRA 8 Core Competencies
     'system_config', # System configuration management
     'epas', # Entrustable Professional Activities
+    'search', # Full-text search over Section A/B/C entries
+    'archive', # Cold storage for old activity, audit and notification rows
 ]
 
 # Strong password hashers: prefer Argon2
@@ -135,6 +137,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.db_routing.ReplicaStickinessMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -174,12 +177,37 @@ DATABASES = {
     }
 }
 
+# Optional streaming replica for reports and dashboards (api.db_routing)
+if os.getenv('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.getenv('DB_REPLICA_HOST'),
+        'PORT': int(os.getenv('DB_REPLICA_PORT', str(DATABASES['default']['PORT']))),
+        # Tests read the replica through the test database
+        'TEST': {'MIRROR': 'default'},
+    }
+
 # Allow easy local dev with SQLite if desired
 if os.getenv('USE_SQLITE', '0') == '1':
     DATABASES['default'] = {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
     }
+    DATABASES.pop('replica', None)
+    # A second local database standing in for the replica; nothing copies rows into it
+    if os.getenv('SQLITE_REPLICA', '0') == '1':
+        DATABASES['replica'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db_replica.sqlite3',
+        }
+
+DATABASE_ROUTERS = ['api.db_routing.ReplicaRouter']
+
+# Read replica routing (api.db_routing); reads stay on the primary when no replica is configured
+DATABASE_REPLICA = {
+    'ALIAS': 'replica',
+    'STICKY_SECONDS': int(os.getenv('DB_REPLICA_STICKY_SECONDS', '15')),
+}
 
 
 # Password validation
@@ -218,19 +246,58 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Content-addressed store for profile signature/initials images (see api.blob_store)
+PROFILE_IMAGE_STORE = {
+    'BACKEND': os.getenv('PROFILE_IMAGE_STORE_BACKEND', 'api.blob_store.FileSystemBlobStore'),
+    'OPTIONS': {
+        'location': os.getenv('PROFILE_IMAGE_STORE_ROOT', str(BASE_DIR / 'media' / 'blobs')),
+    },
+}
+
+# Email: notifications are queued in api.EmailOutbox and delivered by the
+# deliver_email_outbox management command
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'PsychPATH <noreply@psychpath.local>')
+EMAIL_OUTBOX = {
+    'BATCH_SIZE': int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', '100')),
+    'MAX_ATTEMPTS': int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', '5')),
+    'RETRY_BACKOFF_SECONDS': int(os.getenv('EMAIL_OUTBOX_RETRY_BACKOFF_SECONDS', '60')),
+    'RATE_LIMIT_PER_SECOND': float(os.getenv('EMAIL_OUTBOX_RATE_LIMIT_PER_SECOND', '10')),
+    'DEDUP_WINDOW_SECONDS': int(os.getenv('EMAIL_OUTBOX_DEDUP_WINDOW_SECONDS', '600')),
+    'CLAIM_TIMEOUT_SECONDS': int(os.getenv('EMAIL_OUTBOX_CLAIM_TIMEOUT_SECONDS', '600')),
+}
+
+# Rendered logbook report cache (logbook_app.report_cache)
+LOGBOOK_REPORT_CACHE = {
+    'MAX_BYTES': int(os.getenv('LOGBOOK_REPORT_CACHE_MAX_BYTES', str(64 * 1024 * 1024))),
+    'MAX_ENTRIES': int(os.getenv('LOGBOOK_REPORT_CACHE_MAX_ENTRIES', '5000')),
+    'TOUCH_INTERVAL_SECONDS': int(os.getenv('LOGBOOK_REPORT_CACHE_TOUCH_INTERVAL_SECONDS', '300')),
+    # SQLite serialises writers, so background threads only add lock contention there
+    'PRERENDER': os.getenv('LOGBOOK_REPORT_PRERENDER', 'inline' if os.getenv('USE_SQLITE', '0') == '1' else 'thread'),
+    'PRERENDER_THREADS': int(os.getenv('LOGBOOK_REPORT_PRERENDER_THREADS', '2')),
+}
+
 # REST Framework basic config
+# JSON rendering and parsing (api.json_codec): orjson when installed, 'stdlib' to turn it off
+API_JSON = {
+    'BACKEND': os.getenv('API_JSON_BACKEND', 'orjson'),
+}
+
+# The browsable API is for development; production serves JSON only
+API_BROWSABLE = os.getenv('API_BROWSABLE', '1' if DEBUG else '0') == '1'
+
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',
+        'api.json_codec.FastJSONRenderer',
+        *(['rest_framework.renderers.BrowsableAPIRenderer'] if API_BROWSABLE else []),
     ],
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        'api.json_codec.FastJSONParser',
         'rest_framework.parsers.MultiPartParser',
         'rest_framework.parsers.FormParser',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.PrincipalJWTAuthentication',
     ],
 }
 
@@ -316,3 +383,69 @@ except:
             'BACKEND': 'channels.layers.InMemoryChannelLayer',
         },
     }
+
+# Seconds an authenticated user+profile stays cached per access token (api.authentication);
+# only used when CACHE_IS_SHARED (below)
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', '60'))
+
+# Shared cache for cross-request memoization (e.g. supervisee scopes in api.principal).
+# Uses Redis when it is reachable, otherwise a per-process in-memory cache.
+# CACHE_IS_SHARED says whether every worker sees the same cache; authorization
+# data (supervisee scopes, authenticated users) is only memoized when it is, as
+# invalidations of a per-process cache never reach the other workers.
+if CHANNEL_LAYERS['default']['BACKEND'] == 'channels_redis.core.RedisChannelLayer':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('CACHE_REDIS_URL', 'redis://127.0.0.1:6379/1'),
+        },
+    }
+    CACHE_IS_SHARED = True
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'psychpath-default',
+        },
+    }
+    CACHE_IS_SHARED = False
+
+# Support staff presence (support.presence), kept in the cache above
+SUPPORT_PRESENCE = {
+    'TTL_SECONDS': int(os.getenv('SUPPORT_PRESENCE_TTL_SECONDS', '90')),
+    'HEARTBEAT_SECONDS': int(os.getenv('SUPPORT_PRESENCE_HEARTBEAT_SECONDS', '30')),
+    'SNAPSHOT_SECONDS': int(os.getenv('SUPPORT_PRESENCE_SNAPSHOT_SECONDS', '300')),
+}
+
+# Dev server status for the support dashboard (support.status_probe), kept in the cache above
+SERVER_STATUS_PROBE = {
+    'MODE': os.getenv('SERVER_STATUS_PROBE_MODE', 'thread'),
+    'INTERVAL_SECONDS': int(os.getenv('SERVER_STATUS_PROBE_INTERVAL_SECONDS', '15')),
+    'STALE_SECONDS': int(os.getenv('SERVER_STATUS_PROBE_STALE_SECONDS', '60')),
+    'HTTP_TIMEOUT': float(os.getenv('SERVER_STATUS_PROBE_HTTP_TIMEOUT', '2')),
+}
+
+# Support dashboard rollups (support.rollups)
+SUPPORT_STATS_ROLLUP = {
+    'COMPACT_SECONDS': int(os.getenv('SUPPORT_STATS_COMPACT_SECONDS', '60')),
+    'BATCH_ROWS': int(os.getenv('SUPPORT_STATS_BATCH_ROWS', '20000')),
+    'SETTLE_SECONDS': int(os.getenv('SUPPORT_STATS_SETTLE_SECONDS', '60')),
+}
+
+# Retention for activity, audit and notification history (archive.retention)
+ARCHIVE = {
+    'STORE': {
+        'BACKEND': os.getenv('ARCHIVE_STORE_BACKEND', 'api.blob_store.FileSystemBlobStore'),
+        'OPTIONS': {
+            'location': os.getenv('ARCHIVE_STORE_ROOT', str(BASE_DIR / 'media' / 'archive')),
+        },
+    },
+    'RETENTION_DAYS': {
+        'user_activity': int(os.getenv('ARCHIVE_USER_ACTIVITY_DAYS', '180')),
+        'logbook_audit': int(os.getenv('ARCHIVE_LOGBOOK_AUDIT_DAYS', '730')),
+        'registrar_audit': int(os.getenv('ARCHIVE_REGISTRAR_AUDIT_DAYS', '730')),
+        'notification': int(os.getenv('ARCHIVE_NOTIFICATION_DAYS', '90')),
+    },
+    'BATCH_ROWS': int(os.getenv('ARCHIVE_BATCH_ROWS', '5000')),
+    'MONTHS_AHEAD': int(os.getenv('ARCHIVE_MONTHS_AHEAD', '3')),
+}
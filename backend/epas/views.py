@@ -3,6 +3,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q
 from .models import EPA
+from api.data_version import etag_by_data_version
 from .serializers import EPASerializer
 
 
@@ -40,7 +41,12 @@ class EPAViewSet(viewsets.ReadOnlyModelViewSet):
         
         return queryset.order_by('code')
 
+    @etag_by_data_version('epas', user=False, reference=True)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     @action(detail=False, methods=['get'])
+    @etag_by_data_version('epa-summary', user=False, reference=True)
     def summary(self, request):
         """
         Get a summary of all EPAs (code, title only)
@@ -50,6 +56,7 @@ class EPAViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(list(epas))
 
     @action(detail=False, methods=['get'])
+    @etag_by_data_version('epas-by-descriptor', user=False, reference=True)
     def by_descriptor(self, request):
         """
         Get EPAs that demonstrate a specific descriptor
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class LogbookAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'logbook_app'
+
+    def ready(self):
+        import logbook_app.signals # noqa
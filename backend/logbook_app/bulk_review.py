@@ -0,0 +1,208 @@
+"""
+Bulk supervisor review: approve, return or reject many submitted logbooks at once.
+
+``apply_decisions`` validates every decision up front and reports failures per
+item; the valid ones are applied together in one transaction with a fixed
+number of statements however many logbooks are reviewed: one ``bulk_update``
+of the logbooks, one ``bulk_update`` per entry table for supervisor comments,
+one UPDATE per entry table for locking and one ``bulk_create`` each for audit
+logs and notifications. The outcome per logbook matches the single-logbook
+``approve`` / ``return_for_edits`` / ``reject`` methods on WeeklyLogbook.
+"""
+
+from django.db import transaction
+from django.db.models import Case, Value, When
+from django.utils import timezone
+
+from api.data_version import bump_user_versions
+from api.principal import get_principal
+from . import snapshots
+from .models import LogbookAuditLog, LogbookSnapshot, Notification, WeeklyLogbook
+from .report_cache import PRERENDER_STATUSES, schedule_prerender
+
+MAX_DECISIONS = 100
+
+# decision -> (new status, audit action, timestamp field, notification type, notification wording, link suffix)
+DECISIONS = {
+    'approve': ('approved', 'approved', None, 'logbook_approved', 'approved', ''),
+    'return_for_edits': (
+        'returned_for_edits', 'returned_for_edits', 'returned_at', 'logbook_returned', 'returned for edits', '/edit',
+    ),
+    'reject': ('draft', 'rejected', 'rejected_at', 'logbook_rejected', 'rejected', '/edit'),
+}
+
+LOGBOOK_FIELDS = [
+    'status', 'reviewed_by', 'reviewed_at', 'supervisor_decision_at', 'returned_at', 'rejected_at',
+    'review_comments', 'updated_at',
+]
+
+
+def _entry_models():
+    from section_a.models import SectionAEntry
+    from section_b.models import ProfessionalDevelopmentEntry
+    from section_c.models import SupervisionEntry
+
+    return (
+        (SectionAEntry, 'section_a_entry_ids'),
+        (ProfessionalDevelopmentEntry, 'section_b_entry_ids'),
+        (SupervisionEntry, 'section_c_entry_ids'),
+    )
+
+
+def _parse(item):
+    """``(logbook_id, decision, general_comment, {entry_id: comment})`` or raise ValueError"""
+    if not isinstance(item, dict):
+        raise ValueError('Each decision must be an object')
+    try:
+        logbook_id = int(item.get('logbookId'))
+    except (TypeError, ValueError):
+        raise ValueError('logbookId is required')
+    decision = item.get('decision')
+    if decision not in DECISIONS:
+        raise ValueError('Invalid decision')
+    general_comment = (item.get('generalComment') or '').strip()
+    if decision == 'reject' and not general_comment:
+        raise ValueError('Rejection reason is required')
+    if decision == 'return_for_edits' and not general_comment:
+        raise ValueError('Comments are required when returning for edits')
+    try:
+        entry_comments = {
+            int(comment.get('entryId')): comment.get('comment', '')
+            for comment in item.get('entryComments') or []
+        }
+    except (AttributeError, TypeError, ValueError):
+        raise ValueError('entryComments must be a list of {entryId, comment}')
+    return logbook_id, decision, general_comment, entry_comments
+
+
+def _notification_message(logbook, wording):
+    return (
+        f"Your logbook for the week of {logbook.week_start_date.strftime('%B %d, %Y')} "
+        f"has been {wording} by your supervisor"
+    )
+
+
+def apply_decisions(supervisor, items):
+    """
+    Apply supervisor decisions to many logbooks.
+
+    Returns one result per item, in request order: ``{'logbookId', 'success': True,
+    'status'}`` for applied decisions or ``{'logbookId', 'success': False, 'error'}``.
+    """
+    results = [None] * len(items)
+    parsed = {}
+    for index, item in enumerate(items):
+        try:
+            logbook_id, decision, comment, entry_comments = _parse(item)
+        except ValueError as e:
+            results[index] = {'logbookId': item.get('logbookId') if isinstance(item, dict) else None,
+                              'success': False, 'error': str(e)}
+            continue
+        if logbook_id in parsed:
+            results[index] = {'logbookId': logbook_id, 'success': False, 'error': 'Duplicate decision for logbook'}
+            continue
+        parsed[logbook_id] = (index, decision, comment, entry_comments)
+
+    principal = get_principal(supervisor)
+    now = timezone.now()
+    with transaction.atomic():
+        logbooks = WeeklyLogbook.objects.select_for_update(of=('self',)).select_related(
+            'trainee__profile'
+        ).filter(id__in=parsed)
+        logbooks = {logbook.id: logbook for logbook in logbooks}
+
+        reviewed = []
+        for logbook_id, (index, decision, comment, entry_comments) in parsed.items():
+            logbook = logbooks.get(logbook_id)
+            error = None
+            if logbook is None:
+                error = 'Logbook not found'
+            elif not principal.supervises(logbook.trainee_id):
+                error = 'Can only review logbooks from your supervisees'
+            elif logbook.status != 'submitted':
+                error = 'Logbook is not awaiting review'
+            if error:
+                results[index] = {'logbookId': logbook_id, 'success': False, 'error': error}
+                continue
+            reviewed.append((logbook, decision, comment, entry_comments))
+            results[index] = {'logbookId': logbook_id, 'success': True, 'status': DECISIONS[decision][0]}
+
+        if reviewed:
+            _apply(supervisor, reviewed, now)
+
+    return results
+
+
+def _apply(supervisor, reviewed, now):
+    audit_logs, notifications = [], []
+    for logbook, decision, comment, _ in reviewed:
+        status, action, timestamp_field, notification_type, wording, link_suffix = DECISIONS[decision]
+        logbook.status = status
+        logbook.reviewed_by = supervisor
+        logbook.supervisor_decision_at = now
+        logbook.updated_at = now
+        if decision == 'approve':
+            logbook.reviewed_at = now
+        else:
+            setattr(logbook, timestamp_field, now)
+        if comment:
+            logbook.review_comments = comment
+
+        audit_logs.append(LogbookAuditLog(
+            logbook=logbook,
+            action=action,
+            user=supervisor,
+            user_role='supervisor',
+            comments=comment or 'Logbook approved',
+            previous_status='submitted',
+            new_status=status,
+        ))
+        trainee_profile = getattr(logbook.trainee, 'profile', None)
+        audit_logs.append(LogbookAuditLog(
+            logbook=logbook,
+            action='notification_sent',
+            user=logbook.trainee,
+            user_role=trainee_profile.role.lower() if trainee_profile else 'provisional',
+            comments=f'Notification sent to trainee for {action}',
+            metadata={'action': action, 'recipient': 'trainee'},
+        ))
+        notifications.append(Notification(
+            user=logbook.trainee,
+            notification_type=notification_type,
+            payload={
+                'message': _notification_message(logbook, wording),
+                'link': f'/logbooks/{logbook.id}{link_suffix}',
+            },
+        ))
+
+    WeeklyLogbook.objects.bulk_update([logbook for logbook, *_ in reviewed], LOGBOOK_FIELDS)
+    LogbookAuditLog.objects.bulk_create(audit_logs)
+    Notification.objects.bulk_create(notifications)
+
+    # Entries of approved logbooks stay locked; the others are reopened for editing
+    for model, ids_field in _entry_models():
+        commented, locked, all_ids = [], set(), set()
+        for logbook, decision, _, entry_comments in reviewed:
+            entry_ids = set(getattr(logbook, ids_field) or [])
+            all_ids |= entry_ids
+            if decision == 'approve':
+                locked |= entry_ids
+            commented.extend(
+                model(id=entry_id, supervisor_comment=text)
+                for entry_id, text in entry_comments.items() if entry_id in entry_ids
+            )
+        if commented:
+            model.objects.bulk_update(commented, ['supervisor_comment'])
+        if all_ids:
+            model.objects.filter(id__in=all_ids).update(
+                locked=Case(When(id__in=locked, then=Value(True)), default=Value(False))
+            )
+
+    # bulk_update skips post_save: apply what logbook_app.signals and api.signals would have done
+    bump_user_versions(*{logbook.trainee_id for logbook, *_ in reviewed})
+    reopened = [logbook.id for logbook, *_ in reviewed if logbook.status not in snapshots.FROZEN_STATUSES]
+    if reopened:
+        LogbookSnapshot.objects.filter(logbook_id__in=reopened).delete()
+    for logbook, *_ in reviewed:
+        if logbook.status in PRERENDER_STATUSES:
+            schedule_prerender(logbook.id)
@@ -0,0 +1,121 @@
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework.test import APIRequestFactory
+
+from api.models import UserProfile
+from logbook_app import row_serializers
+from logbook_app.models import CommentMessage, CommentThread, Notification, UnlockRequest, WeeklyLogbook
+from logbook_app.serializers import (
+    CommentThreadSerializer,
+    LogbookSerializer,
+    NotificationSerializer,
+    UnlockRequestSerializer,
+)
+
+TRAINEES = 20
+
+
+class Command(BaseCommand):
+    help = 'Time the list ModelSerializers against their row serializers on synthetic lists (all rows are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Rows per list')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed runs of each serializer after one warm-up run')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        with transaction.atomic():
+            supervisor, trainees = self.create_users()
+            request = APIRequestFactory().get('/')
+            request.user = supervisor
+            logbooks = self.create_logbooks(trainees, rows)
+            self.create_rows(supervisor, trainees, logbooks, rows)
+
+            lists = [
+                ('logbooks', WeeklyLogbook.objects.filter(trainee__in=trainees),
+                 lambda qs: LogbookSerializer(qs, many=True).data, row_serializers.logbook_rows),
+                ('notifications', Notification.objects.filter(user=supervisor),
+                 lambda qs: NotificationSerializer(qs, many=True).data, row_serializers.notification_rows),
+                ('unlock requests', UnlockRequest.objects.filter(requester__in=trainees),
+                 lambda qs: UnlockRequestSerializer(qs, many=True, context={'request': request}).data,
+                 lambda qs: row_serializers.unlock_request_rows(qs, supervisor)),
+                ('comment threads', CommentThread.objects.filter(logbook__in=logbooks).prefetch_related('messages'),
+                 lambda qs: CommentThreadSerializer(qs.all(), many=True, context={'request': request}).data,
+                 lambda qs: row_serializers.comment_thread_rows(qs, supervisor)),
+            ]
+            for name, queryset, model_serializer, row_serializer in lists:
+                for label, serialize in [('ModelSerializer', model_serializer), ('rows', row_serializer)]:
+                    count, queries, timings = self.time(serialize, queryset, options['repeat'])
+                    self.stdout.write(
+                        f"{count} {name} on {connection.vendor}, {label}: {queries} queries, "
+                        f"median {timings[len(timings) // 2] * 1000:.1f} ms, best {timings[0] * 1000:.1f} ms"
+                    )
+            transaction.set_rollback(True)
+
+    def time(self, serialize, queryset, repeat):
+        # Counted with a wrapper: the ModelSerializers overflow connection.queries_log
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        serialize(queryset.all())
+        timings = []
+        for _ in range(repeat):
+            queries = 0
+            with connection.execute_wrapper(count):
+                started = time.perf_counter()
+                data = serialize(queryset.all())
+                timings.append(time.perf_counter() - started)
+        timings.sort()
+        return len(data), queries, timings
+
+    def create_users(self):
+        supervisor = User.objects.create_user(
+            username='list-benchmark-supervisor', email='list-benchmark-supervisor@example.com', password=None,
+        )
+        UserProfile.objects.create(user=supervisor, role='SUPERVISOR', first_name='Sam', last_name='Supervisor')
+        trainees = []
+        for n in range(TRAINEES):
+            trainee = User.objects.create_user(
+                username=f'list-benchmark-{n}', email=f'list-benchmark-{n}@example.com', password=None,
+            )
+            UserProfile.objects.create(user=trainee, role='PROVISIONAL', first_name='Trainee', last_name=str(n))
+            trainees.append(trainee)
+        return supervisor, trainees
+
+    def create_logbooks(self, trainees, count):
+        start = date(2020, 1, 6)
+        statuses = ['draft', 'submitted', 'approved', 'returned_for_edits']
+        logbooks = []
+        for n in range(count):
+            week = start + timedelta(weeks=n // len(trainees))
+            logbooks.append(WeeklyLogbook(
+                trainee=trainees[n % len(trainees)], week_start_date=week, week_end_date=week + timedelta(days=6),
+                status=statuses[n % len(statuses)],
+            ))
+        return WeeklyLogbook.objects.bulk_create(logbooks)
+
+    def create_rows(self, supervisor, trainees, logbooks, count):
+        Notification.objects.bulk_create(
+            Notification(user=supervisor, notification_type='logbook_submission',
+                         payload={'message': f'Logbook {n} submitted', 'link': f'/logbooks/{n}'})
+            for n in range(count)
+        )
+        UnlockRequest.objects.bulk_create(
+            UnlockRequest(logbook=logbook, requester=logbook.trainee, requester_role='provisional',
+                          reason='Correct an entry')
+            for logbook in logbooks[:count]
+        )
+        threads = CommentThread.objects.bulk_create(CommentThread(logbook=logbook) for logbook in logbooks[:count // 2])
+        CommentMessage.objects.bulk_create(
+            CommentMessage(thread=thread, author=author, author_role=role, message='Please check this week')
+            for thread in threads
+            for author, role in [(supervisor, 'supervisor'), (thread.logbook.trainee, 'provisional')]
+        )
@@ -0,0 +1,57 @@
+"""
+Management command to prerender the HTML reports of a cohort of logbooks.
+
+Reports are rendered on submission and on first read; run this before an audit
+to warm the cache for every logbook in scope. With --processes > 1 the reports
+are rendered in a pool of worker processes.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.models import Supervision
+from logbook_app.models import WeeklyLogbook
+from logbook_app.report_cache import PRERENDER_STATUSES, prerender_many
+
+
+class Command(BaseCommand):
+    help = 'Prerender cached HTML reports for a cohort of logbooks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--supervisor',
+            help='Only logbooks of this supervisor\'s accepted supervisees (email)',
+        )
+        parser.add_argument(
+            '--organization',
+            type=int,
+            help='Only logbooks of trainees in this organization (id)',
+        )
+        parser.add_argument(
+            '--status',
+            action='append',
+            help=f'Logbook status to include (repeatable; defaults to {", ".join(sorted(PRERENDER_STATUSES))})',
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=1,
+            help='Worker processes to render in',
+        )
+
+    def handle(self, *args, **options):
+        logbooks = WeeklyLogbook.objects.filter(status__in=options['status'] or PRERENDER_STATUSES)
+        if options['supervisor']:
+            logbooks = logbooks.filter(trainee__in=Supervision.objects.filter(
+                supervisor__email__iexact=options['supervisor'], status='ACCEPTED'
+            ).values('supervisee'))
+        if options['organization']:
+            logbooks = logbooks.filter(trainee__profile__organization_id=options['organization'])
+
+        logbook_ids = list(logbooks.order_by('id').values_list('id', flat=True))
+        started = time.perf_counter()
+        count = prerender_many(logbook_ids, processes=options['processes'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Prerendered {count} of {len(logbook_ids)} logbook reports in {time.perf_counter() - started:.1f}s'
+        ))
@@ -0,0 +1,42 @@
+"""
+Management command to (re)build frozen snapshots of approved logbooks.
+
+Snapshots are written on approval and rebuilt lazily on first read; run this
+after deploying snapshots, after changing the serializers or report template
+that feed them, or after bulk status updates that bypass model signals.
+"""
+
+from django.core.management.base import BaseCommand
+
+from logbook_app.models import WeeklyLogbook
+from logbook_app.snapshots import FROZEN_STATUSES, freeze
+
+
+class Command(BaseCommand):
+    help = 'Rebuild frozen snapshots of approved logbooks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--logbook',
+            type=int,
+            action='append',
+            help='Logbook id to rebuild (repeatable; defaults to all approved logbooks)',
+        )
+        parser.add_argument(
+            '--missing-only',
+            action='store_true',
+            help='Only build snapshots for approved logbooks that have none',
+        )
+
+    def handle(self, *args, **options):
+        logbooks = WeeklyLogbook.objects.filter(status__in=FROZEN_STATUSES).select_related('trainee__profile')
+        if options['logbook']:
+            logbooks = logbooks.filter(id__in=options['logbook'])
+        if options['missing_only']:
+            logbooks = logbooks.filter(snapshot__isnull=True)
+
+        count = 0
+        for logbook in logbooks.iterator():
+            freeze(logbook)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Froze {count} approved logbooks'))
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.2 on 2026-10-19 07:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logbook_app', '0019_remove_notification_logbook_app_recipie_31c241_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LogbookSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(help_text='SHA-256 of the uncompressed payload', max_length=64)),
+                ('payload', models.BinaryField(help_text='zlib-compressed JSON document')),
+                ('payload_size', models.PositiveIntegerField(help_text='Uncompressed size in bytes')),
+                ('section_totals', models.JSONField(default=dict, help_text='Copy of the frozen totals for list views')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('logbook', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='snapshot', to='logbook_app.weeklylogbook')),
+            ],
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.2 on 2026-10-19 07:48
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logbook_app', '0020_logbook_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenderedReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_version', models.CharField(help_text='Hash of everything the report is rendered from', max_length=64)),
+                ('html', models.BinaryField(help_text='zlib-compressed HTML')),
+                ('size', models.PositiveIntegerField(help_text='Compressed size in bytes')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_accessed_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('logbook', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rendered_reports', to='logbook_app.weeklylogbook')),
+            ],
+            options={
+                'unique_together': {('logbook', 'content_version')},
+            },
+        ),
+    ]
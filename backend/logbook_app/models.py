@@ -794,6 +794,48 @@ class CommentMessage(models.Model):
         return False
 
 
+class LogbookSnapshot(models.Model):
+    """
+    Frozen, compressed copy of an approved logbook as it was rendered at approval.
+
+    Built by logbook_app.snapshots; discarded whenever the logbook leaves the
+    approved state (e.g. an approved UnlockRequest) and rebuilt on the next read.
+    """
+    
+    logbook = models.OneToOneField(WeeklyLogbook, on_delete=models.CASCADE, related_name='snapshot')
+    content_hash = models.CharField(max_length=64, help_text="SHA-256 of the uncompressed payload")
+    payload = models.BinaryField(help_text="zlib-compressed JSON document")
+    payload_size = models.PositiveIntegerField(help_text="Uncompressed size in bytes")
+    section_totals = models.JSONField(default=dict, help_text="Copy of the frozen totals for list views")
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Snapshot of {self.logbook} ({self.content_hash[:12]})"
+
+
+class RenderedReport(models.Model):
+    """
+    Cached HTML report for one content version of a logbook.
+
+    Managed by logbook_app.report_cache: superseded versions are dropped when a
+    new one is stored and the least recently used rows are evicted once the
+    cache exceeds its size budget.
+    """
+    
+    logbook = models.ForeignKey(WeeklyLogbook, on_delete=models.CASCADE, related_name='rendered_reports')
+    content_version = models.CharField(max_length=64, help_text="Hash of everything the report is rendered from")
+    html = models.BinaryField(help_text="zlib-compressed HTML")
+    size = models.PositiveIntegerField(help_text="Compressed size in bytes")
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_accessed_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    class Meta:
+        unique_together = ['logbook', 'content_version']
+    
+    def __str__(self):
+        return f"Report of {self.logbook} ({self.content_version[:12]})"
+
+
 class UnlockRequest(models.Model):
     """Requests to unlock approved logbooks for editing"""
     
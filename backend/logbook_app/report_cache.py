@@ -0,0 +1,265 @@
+"""
+Rendered-report cache for logbook_html_report.
+
+The HTML report of a logbook that is not yet approved is rendered once per
+content version and stored (zlib-compressed) in RenderedReport. The content
+version hashes everything the report is rendered from: the logbook row, the
+trainee's profile and, per section, the count, total duration and latest
+``updated_at`` of the entries it lists or accumulates. Editing an entry
+therefore yields a new version, and the superseded row is dropped when the new
+one is stored. Approved logbooks are served from their frozen snapshot
+(logbook_app.snapshots) instead.
+
+Submission and approval schedule a prerender after the transaction commits
+(see logbook_app.signals), so the supervisor's first open is already a hit.
+``prerender_many`` renders a whole cohort, optionally in a process pool, for
+audits (``manage.py prerender_logbook_reports``).
+
+Settings (LOGBOOK_REPORT_CACHE):
+    MAX_BYTES              compressed bytes kept before least recently used rows are evicted
+    MAX_ENTRIES            rows kept before least recently used rows are evicted
+    TOUCH_INTERVAL_SECONDS minimum age of last_accessed_at before a hit refreshes it
+    PRERENDER              'thread' (background thread), 'inline' (on commit, in the request) or 'off'
+    PRERENDER_THREADS      background prerender threads per process
+"""
+
+import hashlib
+import logging
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, Max, Q, Sum
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from . import snapshots
+from .models import RenderedReport, WeeklyLogbook
+
+logger = logging.getLogger(__name__)
+
+# Bump when logbook_report.html or report_context change what a report shows
+REPORT_VERSION = 1
+PRERENDER_STATUSES = {'submitted', 'approved'}
+
+DEFAULTS = {
+    'MAX_BYTES': 64 * 1024 * 1024,
+    'MAX_ENTRIES': 5000,
+    'TOUCH_INTERVAL_SECONDS': 300,
+    'PRERENDER': 'thread',
+    'PRERENDER_THREADS': 2,
+}
+
+
+def cache_setting(name):
+    return getattr(settings, 'LOGBOOK_REPORT_CACHE', {}).get(name, DEFAULTS[name])
+
+
+def _section_stamps(logbook):
+    from section_a.models import SectionAEntry
+    from section_b.models import ProfessionalDevelopmentEntry
+    from section_c.models import SupervisionEntry
+
+    # The weekly tables list entries by id; the cumulative totals cover every
+    # entry up to the end of the week
+    scopes = [
+        SectionAEntry.objects.filter(
+            Q(id__in=logbook.section_a_entry_ids)
+            | Q(trainee_id=logbook.trainee_id, session_date__lte=logbook.week_end_date)
+        ),
+        ProfessionalDevelopmentEntry.objects.filter(
+            Q(id__in=logbook.section_b_entry_ids)
+            | Q(trainee_id=logbook.trainee_id, date_of_activity__lte=logbook.week_end_date)
+        ),
+        SupervisionEntry.objects.filter(
+            Q(id__in=logbook.section_c_entry_ids)
+            | Q(trainee__user_id=logbook.trainee_id, week_starting__lte=logbook.week_start_date)
+        ),
+    ]
+    return [
+        tuple(scope.aggregate(
+            entries=Count('id'), minutes=Sum('duration_minutes'), changed=Max('updated_at')
+        ).values())
+        for scope in scopes
+    ]
+
+
+def content_version(logbook):
+    """Hash of everything the logbook's report is rendered from"""
+    profile = logbook.trainee.profile
+    state = (
+        REPORT_VERSION,
+        logbook.pk,
+        logbook.status,
+        logbook.updated_at,
+        profile.updated_at,
+        *_section_stamps(logbook),
+    )
+    return hashlib.sha256(repr(state).encode('utf-8')).hexdigest()
+
+
+def render_report(logbook):
+    return render_to_string('logbook_report.html', snapshots.report_context(logbook))
+
+
+def get_report(logbook):
+    """HTML report of the logbook, rendered and stored on a cache miss"""
+    version = content_version(logbook)
+    cached = (
+        RenderedReport.objects.filter(logbook=logbook, content_version=version)
+        .only('id', 'html', 'last_accessed_at')
+        .first()
+    )
+    if cached:
+        now = timezone.now()
+        if cached.last_accessed_at < now - timedelta(seconds=cache_setting('TOUCH_INTERVAL_SECONDS')):
+            RenderedReport.objects.filter(pk=cached.pk).update(last_accessed_at=now)
+        return zlib.decompress(bytes(cached.html)).decode('utf-8')
+
+    html = render_report(logbook)
+    store(logbook.pk, version, html)
+    return html
+
+
+def store(logbook_id, version, html):
+    compressed = zlib.compress(html.encode('utf-8'), 6)
+    with transaction.atomic():
+        RenderedReport.objects.filter(logbook_id=logbook_id).exclude(content_version=version).delete()
+        RenderedReport.objects.update_or_create(
+            logbook_id=logbook_id,
+            content_version=version,
+            defaults={'html': compressed, 'size': len(compressed), 'last_accessed_at': timezone.now()},
+        )
+    evict()
+
+
+def evict():
+    """Drop least recently used reports until the cache fits MAX_BYTES and MAX_ENTRIES"""
+    totals = RenderedReport.objects.aggregate(entries=Count('id'), size=Sum('size'))
+    excess_entries = totals['entries'] - cache_setting('MAX_ENTRIES')
+    excess_bytes = (totals['size'] or 0) - cache_setting('MAX_BYTES')
+    if excess_entries <= 0 and excess_bytes <= 0:
+        return 0
+
+    doomed = []
+    for report_id, size in RenderedReport.objects.order_by('last_accessed_at', 'id').values_list('id', 'size').iterator():
+        if excess_entries <= 0 and excess_bytes <= 0:
+            break
+        doomed.append(report_id)
+        excess_entries -= 1
+        excess_bytes -= size
+    RenderedReport.objects.filter(id__in=doomed).delete()
+    return len(doomed)
+
+
+def render_missing(logbook_id):
+    """
+    Render whatever the logbook lacks without writing it: ``(logbook_id, 'snapshot', fields)``
+    for an approved logbook without a snapshot, ``(logbook_id, 'report', (version, html))`` for
+    any other logbook whose current report is not cached, or None.
+    """
+    logbook = WeeklyLogbook.objects.select_related('trainee__profile', 'snapshot').filter(pk=logbook_id).first()
+    if logbook is None or not hasattr(logbook.trainee, 'profile'):
+        return None
+    if logbook.status in snapshots.FROZEN_STATUSES:
+        if hasattr(logbook, 'snapshot'):
+            return None
+        fields, _ = snapshots.encode(logbook)
+        return logbook_id, 'snapshot', fields
+    version = content_version(logbook)
+    if RenderedReport.objects.filter(logbook_id=logbook_id, content_version=version).exists():
+        return None
+    return logbook_id, 'report', (version, render_report(logbook))
+
+
+def save_rendered(logbook_id, kind, data):
+    if kind == 'snapshot':
+        snapshots.store(logbook_id, data)
+    else:
+        store(logbook_id, *data)
+
+
+def prerender(logbook_id):
+    """Render the logbook's report ahead of its first read; returns False if it was already current"""
+    rendered = render_missing(logbook_id)
+    if rendered is None:
+        return False
+    save_rendered(*rendered)
+    return True
+
+
+def _prerender_safely(logbook_id):
+    try:
+        prerender(logbook_id)
+    except Exception:
+        logger.exception('Prerendering the report of logbook %s failed', logbook_id)
+
+
+_executor = None
+_pending = set()
+_lock = threading.Lock()
+
+
+def _run_in_background(logbook_id):
+    try:
+        _prerender_safely(logbook_id)
+    finally:
+        with _lock:
+            _pending.discard(logbook_id)
+        connections.close_all()
+
+
+def _dispatch(logbook_id, mode):
+    global _executor
+    if mode == 'inline':
+        _prerender_safely(logbook_id)
+        return
+    with _lock:
+        if logbook_id in _pending:
+            return
+        _pending.add(logbook_id)
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=cache_setting('PRERENDER_THREADS'), thread_name_prefix='report-prerender'
+            )
+    _executor.submit(_run_in_background, logbook_id)
+
+
+def schedule_prerender(logbook_id):
+    """Prerender the logbook's report once the current transaction commits"""
+    mode = cache_setting('PRERENDER')
+    if mode == 'off':
+        return
+    transaction.on_commit(lambda: _dispatch(logbook_id, mode))
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+def prerender_many(logbook_ids, processes=1):
+    """
+    Prerender the reports of many logbooks; returns how many were rendered.
+
+    With ``processes`` > 1 the rendering runs in a pool of worker processes
+    while this process writes the results, so the workers never contend for
+    write locks.
+    """
+    logbook_ids = list(logbook_ids)
+    if processes <= 1 or len(logbook_ids) <= 1:
+        return sum(1 for logbook_id in logbook_ids if prerender(logbook_id))
+
+    # Workers open their own connections; never share the parent's
+    connections.close_all()
+    chunksize = max(1, len(logbook_ids) // (processes * 4))
+    count = 0
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker) as pool:
+        for rendered in pool.map(render_missing, logbook_ids, chunksize=chunksize):
+            if rendered is not None:
+                save_rendered(*rendered)
+                count += 1
+    return count
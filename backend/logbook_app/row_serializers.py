@@ -0,0 +1,357 @@
+"""
+Read-only, plain-dict serialization for the logbook list endpoints.
+
+The ModelSerializers in logbook_app.serializers dispatch every field of every
+object through DRF and run their SerializerMethodFields per object, several
+of which query (profiles, supervisions, unlocks, totals, audit counts). For
+lists, the functions here build the same dicts from ``.values()`` rows:
+
+* plain model fields are compiled once per serializer from the serializer
+  itself (its field order and each field's ``to_representation``), so dates,
+  times and ids are formatted exactly as before;
+* users and profiles, active unlocks, frozen totals, primary supervisions and
+  audit counts are fetched once per list into lookup tables;
+* each method field becomes a plain expression over the row and those tables.
+
+The ModelSerializers remain the write path and the reference for the output:
+logbook_app.tests checks both produce identical data, and
+``manage.py benchmark_list_serializers`` times them on 1k-row lists.
+"""
+
+import functools
+from collections import defaultdict, namedtuple
+
+from django.contrib.auth.models import User
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from archive.history import archived_counts
+from utils.duration_utils import minutes_to_hours_minutes
+
+from .models import CommentMessage, LogbookAuditLog, LogbookSnapshot, UnlockRequest
+from .serializers import (
+    CommentMessageSerializer,
+    CommentThreadSerializer,
+    LogbookSerializer,
+    NotificationSerializer,
+    UnlockRequestSerializer,
+    notification_type_display,
+)
+from .snapshots import FROZEN_STATUSES
+
+EDITABLE_STATUSES = {'draft', 'returned_for_edits', 'rejected'}
+DCC_TYPES = {'client_contact'}
+CRA_TYPES = {'cra', 'independent_activity'}
+
+UserInfo = namedtuple('UserInfo', 'email has_profile name principal_supervisor organization_id profile_id')
+
+
+@functools.cache
+def compiled_fields(serializer_class):
+    """
+    ``((name, values() key, to_representation), ...)`` in the serializer's field order.
+
+    Related fields are served as the raw id (no converter, as PrimaryKeyRelatedField
+    does); fields without a model column have no key and are computed by the caller.
+    """
+    concrete = {field.name: field for field in serializer_class.Meta.model._meta.concrete_fields}
+    compiled = []
+    for name, field in serializer_class().fields.items():
+        model_field = concrete.get(field.source)
+        if model_field is None:
+            compiled.append((name, None, None))
+        elif model_field.is_relation:
+            compiled.append((name, model_field.attname, None))
+        else:
+            compiled.append((name, model_field.attname, field.to_representation))
+    return tuple(compiled)
+
+
+def value_keys(serializer_class, *extra):
+    return [key for _, key, _ in compiled_fields(serializer_class) if key] + list(extra)
+
+
+def build(serializer_class, row, computed):
+    data = {}
+    for name, key, to_representation in compiled_fields(serializer_class):
+        if key is None:
+            data[name] = computed[name]
+        else:
+            value = row[key]
+            data[name] = value if value is None or to_representation is None else to_representation(value)
+    return data
+
+
+def user_table(user_ids):
+    """``{user_id: UserInfo}`` for the given users, profile included, in one query"""
+    rows = User.objects.filter(id__in={user_id for user_id in user_ids if user_id}).values_list(
+        'id', 'email', 'profile__id', 'profile__first_name', 'profile__last_name',
+        'profile__principal_supervisor', 'profile__organization_id',
+    )
+    return {
+        user_id: UserInfo(
+            email=email,
+            has_profile=profile_id is not None,
+            name=f"{first_name} {last_name}".strip() if profile_id is not None else None,
+            principal_supervisor=principal_supervisor,
+            organization_id=organization_id,
+            profile_id=profile_id,
+        )
+        for user_id, email, profile_id, first_name, last_name, principal_supervisor, organization_id in rows
+    }
+
+
+def _name_or_email(user):
+    return user.name if user.has_profile else user.email
+
+
+def week_display(start, end):
+    """WeeklyLogbook.week_display for a row"""
+    return f"{start.strftime('%d %b %Y')} - {end.strftime('%d %b %Y')}"
+
+
+def notification_rows(queryset):
+    """NotificationSerializer(queryset, many=True).data"""
+    data = []
+    for row in queryset.values(*value_keys(NotificationSerializer)):
+        payload = row['payload']
+        payload = payload if payload and isinstance(payload, dict) else {}
+        data.append(build(NotificationSerializer, row, {
+            'type_display': notification_type_display(row['notification_type']),
+            'message': payload.get('message', ''),
+            'action_url': payload.get('link', ''),
+        }))
+    return data
+
+
+def unlock_request_rows(queryset, user=None):
+    """UnlockRequestSerializer(queryset, many=True, context={'request': request}).data for request.user"""
+    rows = list(queryset.values(*value_keys(
+        UnlockRequestSerializer, 'logbook__week_start_date', 'logbook__week_end_date', 'logbook__trainee_id',
+    )))
+    users = user_table(
+        [row['requester_id'] for row in rows] + [row['reviewed_by_id'] for row in rows]
+        + [row['logbook__trainee_id'] for row in rows]
+    )
+    profile = getattr(user, 'profile', None) if user else None
+    reviewer_role = {'ORG_ADMIN': 'org_admin', 'SUPERVISOR': 'supervisor'}.get(getattr(profile, 'role', None))
+    now = timezone.now()
+
+    data = []
+    for row in rows:
+        trainee = users[row['logbook__trainee_id']]
+        reviewed_by = users.get(row['reviewed_by_id'])
+        expires = row['unlock_expires_at']
+        unlocked = (
+            row['status'] == 'approved' and not row['manually_relocked'] and expires is not None and now < expires
+        )
+        data.append(build(UnlockRequestSerializer, row, {
+            'requester_name': _name_or_email(users[row['requester_id']]),
+            'reviewer_name': _name_or_email(reviewed_by) if reviewed_by else None,
+            'logbook_week_display': week_display(row['logbook__week_start_date'], row['logbook__week_end_date']),
+            'trainee_name': _name_or_email(trainee),
+            'can_review': reviewer_role is not None and reviewer_role == (
+                'org_admin' if trainee.organization_id else 'supervisor'
+            ),
+            'is_currently_unlocked': unlocked,
+            'remaining_time_minutes': max(0, int((expires - now).total_seconds() / 60)) if unlocked else 0,
+        }))
+    return data
+
+
+def comment_message_rows(queryset, user=None):
+    """CommentMessageSerializer(queryset, many=True, context={'request': request}).data for request.user"""
+    rows = list(queryset.values(*value_keys(CommentMessageSerializer, 'thread_id')))
+    users = user_table(row['author_id'] for row in rows)
+    user_id = user.id if user else None
+    data = []
+    for row in rows:
+        own = user is not None and not row['locked'] and row['author_id'] == user_id
+        data.append(build(CommentMessageSerializer, row, {
+            'author_name': _name_or_email(users[row['author_id']]),
+            'can_edit': own,
+            'can_delete': own,
+        }))
+    return rows, data
+
+
+def comment_thread_rows(queryset, user=None):
+    """CommentThreadSerializer(queryset, many=True, context={'request': request}).data for request.user"""
+    threads = list(queryset.values(*value_keys(CommentThreadSerializer)))
+    messages = defaultdict(list)
+    rows, data = comment_message_rows(
+        CommentMessage.objects.filter(thread_id__in=[thread['id'] for thread in threads]), user
+    )
+    for row, message in zip(rows, data):
+        messages[row['thread_id']].append(message)
+    return [build(CommentThreadSerializer, thread, {'messages': messages[thread['id']]}) for thread in threads]
+
+
+def _weekly_minutes(model, ids_by_logbook):
+    """``{entry_id: (entry_type or None, minutes)}`` for every entry the logbooks list"""
+    ids = set().union(*ids_by_logbook) if ids_by_logbook else set()
+    fields = ['id', 'duration_minutes'] + (['entry_type'] if model.__name__ == 'SectionAEntry' else [])
+    entries = {}
+    for row in model.objects.filter(id__in=ids).values(*fields).order_by():
+        entries[row['id']] = (row.get('entry_type'), row['duration_minutes'] or 0)
+    return entries
+
+
+def _minutes_by_week(model, owner_field, owner_ids, **filters):
+    """``{owner_id: [(week_starting, entry_type or None, minutes)]}`` of the owners' entries"""
+    group = [owner_field, 'week_starting'] + (['entry_type'] if 'entry_type__in' in filters else [])
+    rows = model.objects.filter(
+        **{f'{owner_field}__in': owner_ids, 'week_starting__isnull': False}, **filters
+    ).values(*group).annotate(minutes=Sum('duration_minutes')).order_by()
+    weeks = defaultdict(list)
+    for row in rows:
+        weeks[row[owner_field]].append((row['week_starting'], row.get('entry_type'), row['minutes'] or 0))
+    return weeks
+
+
+def section_totals(rows, users):
+    """``{logbook_id: WeeklyLogbook.calculate_section_totals()}`` for logbook rows, in six queries"""
+    from section_a.models import SectionAEntry
+    from section_b.models import ProfessionalDevelopmentEntry
+    from section_c.models import SupervisionEntry
+
+    def unique_ids(row, key):
+        return set(row[key] or [])
+
+    section_a = _weekly_minutes(SectionAEntry, [unique_ids(row, 'section_a_entry_ids') for row in rows])
+    section_b = _weekly_minutes(ProfessionalDevelopmentEntry, [unique_ids(row, 'section_b_entry_ids') for row in rows])
+    section_c = _weekly_minutes(SupervisionEntry, [unique_ids(row, 'section_c_entry_ids') for row in rows])
+
+    trainee_ids = {row['trainee_id'] for row in rows}
+    profile_ids = {users[tid].profile_id for tid in trainee_ids if tid in users and users[tid].has_profile}
+    previous_a = _minutes_by_week(SectionAEntry, 'trainee_id', trainee_ids, entry_type__in=DCC_TYPES | CRA_TYPES)
+    previous_b = _minutes_by_week(ProfessionalDevelopmentEntry, 'trainee_id', trainee_ids)
+    previous_c = _minutes_by_week(SupervisionEntry, 'trainee_id', profile_ids)
+
+    totals = {}
+    for row in rows:
+        start = row['week_start_date']
+        a_entries = [section_a[i] for i in unique_ids(row, 'section_a_entry_ids') if i in section_a]
+        dcc = sum(minutes for entry_type, minutes in a_entries if entry_type in DCC_TYPES)
+        cra = sum(minutes for entry_type, minutes in a_entries if entry_type in CRA_TYPES)
+        section_b_minutes = sum(section_b[i][1] for i in unique_ids(row, 'section_b_entry_ids') if i in section_b)
+        section_c_minutes = sum(section_c[i][1] for i in unique_ids(row, 'section_c_entry_ids') if i in section_c)
+
+        trainee_weeks = previous_a.get(row['trainee_id'], [])
+        cumulative_dcc = dcc + sum(m for week, t, m in trainee_weeks if week < start and t in DCC_TYPES)
+        cumulative_cra = cra + sum(m for week, t, m in trainee_weeks if week < start and t in CRA_TYPES)
+        cumulative_b = section_b_minutes + sum(
+            m for week, _, m in previous_b.get(row['trainee_id'], []) if week < start
+        )
+        trainee = users.get(row['trainee_id'])
+        profile_id = trainee.profile_id if trainee else None
+        cumulative_c = section_c_minutes + sum(m for week, _, m in previous_c.get(profile_id, []) if week < start)
+
+        section_a_minutes = dcc + cra
+        totals[row['id']] = {
+            'section_a': {
+                'weekly_hours': minutes_to_hours_minutes(section_a_minutes),
+                'cumulative_hours': minutes_to_hours_minutes(cumulative_dcc + cumulative_cra),
+                'dcc': {
+                    'weekly_hours': minutes_to_hours_minutes(dcc),
+                    'cumulative_hours': minutes_to_hours_minutes(cumulative_dcc),
+                },
+                'cra': {
+                    'weekly_hours': minutes_to_hours_minutes(cra),
+                    'cumulative_hours': minutes_to_hours_minutes(cumulative_cra),
+                },
+            },
+            'section_b': {
+                'weekly_hours': minutes_to_hours_minutes(section_b_minutes),
+                'cumulative_hours': minutes_to_hours_minutes(cumulative_b),
+            },
+            'section_c': {
+                'weekly_hours': minutes_to_hours_minutes(section_c_minutes),
+                'cumulative_hours': minutes_to_hours_minutes(cumulative_c),
+            },
+            'total': {
+                'weekly_hours': minutes_to_hours_minutes(section_a_minutes + section_b_minutes + section_c_minutes),
+                'cumulative_hours': minutes_to_hours_minutes(
+                    cumulative_dcc + cumulative_cra + cumulative_b + cumulative_c
+                ),
+            },
+        }
+    return totals
+
+
+def _primary_supervisors(trainee_ids):
+    """``{trainee_id: supervisor_id}`` of each trainee's latest accepted primary supervision"""
+    from api.models import Supervision
+
+    supervisors = {}
+    rows = Supervision.objects.filter(
+        supervisee_id__in=trainee_ids, role='PRIMARY', status='ACCEPTED'
+    ).values_list('supervisee_id', 'supervisor_id')
+    for trainee_id, supervisor_id in rows:
+        supervisors.setdefault(trainee_id, supervisor_id)
+    return supervisors
+
+
+def logbook_rows(queryset):
+    """LogbookSerializer(queryset, many=True).data"""
+    rows = list(queryset.values(*value_keys(LogbookSerializer)))
+    if not rows:
+        return []
+    ids = [row['id'] for row in rows]
+    trainee_ids = {row['trainee_id'] for row in rows}
+    now = timezone.now()
+
+    active_unlocks = {}
+    unlocks = UnlockRequest.objects.filter(
+        logbook_id__in=ids, status__in=['approved', 'approve'], manually_relocked=False, unlock_expires_at__gt=now,
+    ).values_list('logbook_id', 'unlock_expires_at', 'duration_minutes')
+    for logbook_id, expires, duration in unlocks:
+        active_unlocks.setdefault(logbook_id, {'unlock_expires_at': expires.isoformat(), 'duration_minutes': duration})
+
+    audit_counts = dict(
+        LogbookAuditLog.objects.filter(logbook_id__in=ids).values('logbook_id').annotate(n=Count('id'))
+        .order_by().values_list('logbook_id', 'n')
+    )
+    archived = archived_counts('logbook_audit', ids)
+    frozen = dict(
+        LogbookSnapshot.objects.filter(
+            logbook_id__in=[row['id'] for row in rows if row['status'] in FROZEN_STATUSES],
+            section_totals__isnull=False,
+        ).values_list('logbook_id', 'section_totals')
+    )
+    primary_supervisors = _primary_supervisors(trainee_ids)
+    users = user_table(
+        list(trainee_ids) + list(primary_supervisors.values())
+        + [row['supervisor_id'] for row in rows] + [row['reviewed_by_id'] for row in rows]
+    )
+    computed_totals = section_totals([row for row in rows if row['id'] not in frozen], users)
+
+    data = []
+    for row in rows:
+        trainee = users[row['trainee_id']]
+        reviewed_by = users.get(row['reviewed_by_id'])
+        active_unlock = active_unlocks.get(row['id'])
+        data.append(build(LogbookSerializer, row, {
+            'trainee_name': (trainee.name or trainee.email) if trainee.has_profile else trainee.email,
+            'week_display': week_display(row['week_start_date'], row['week_end_date']),
+            'is_editable': row['status'] in EDITABLE_STATUSES or active_unlock is not None,
+            'supervisor_name': _supervisor_name(row, trainee, users, primary_supervisors),
+            'reviewed_by_name': (
+                (reviewed_by.name or reviewed_by.email) if reviewed_by and reviewed_by.has_profile else None
+            ),
+            'section_totals': frozen[row['id']] if row['id'] in frozen else computed_totals[row['id']],
+            'active_unlock': active_unlock,
+            'audit_log_count': audit_counts.get(row['id'], 0) + archived.get(row['id'], 0),
+        }))
+    return data
+
+
+def _supervisor_name(row, trainee, users, primary_supervisors):
+    """LogbookSerializer.get_supervisor_name: assigned supervisor, primary supervision, then the profile's text"""
+    for supervisor_id in (row['supervisor_id'], primary_supervisors.get(row['trainee_id'])):
+        supervisor = users.get(supervisor_id)
+        if supervisor and supervisor.has_profile:
+            return supervisor.name or supervisor.email
+    if trainee.has_profile and trainee.principal_supervisor:
+        return trainee.principal_supervisor
+    return None
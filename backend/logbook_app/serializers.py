@@ -1,6 +1,17 @@
+from django.db import models
 from rest_framework import serializers
 from .models import WeeklyLogbook, LogbookAuditLog, LogbookMessage, CommentThread, CommentMessage, UnlockRequest, Notification, LogbookReviewRequest
 from django.contrib.auth.models import User
+from archive.history import archived_count, archived_counts
+
+
+class LogbookListSerializer(serializers.ListSerializer):
+    """Looks up the archived audit counts of the whole list in one query"""
+
+    def to_representation(self, data):
+        logbooks = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        self._context['archived_audit_counts'] = archived_counts('logbook_audit', [logbook.id for logbook in logbooks])
+        return super().to_representation(logbooks)
 
 
 class LogbookSerializer(serializers.ModelSerializer):
@@ -24,6 +35,7 @@ class LogbookSerializer(serializers.ModelSerializer):
             'section_totals', 'active_unlock', 'audit_log_count', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'trainee', 'submitted_at', 'reviewed_at', 'created_at', 'updated_at', 'is_editable']
+        list_serializer_class = LogbookListSerializer
     
     def get_trainee_name(self, obj):
         return f"{obj.trainee.profile.first_name} {obj.trainee.profile.last_name}".strip() or obj.trainee.email
@@ -56,7 +68,11 @@ class LogbookSerializer(serializers.ModelSerializer):
         return None
     
     def get_section_totals(self, obj):
-        """Calculate and return section totals"""
+        """Calculate and return section totals (frozen at approval for approved logbooks)"""
+        from .snapshots import frozen_section_totals
+        totals = frozen_section_totals(obj)
+        if totals is not None:
+            return totals
         return obj.calculate_section_totals()
     
     def get_active_unlock(self, obj):
@@ -70,8 +86,11 @@ class LogbookSerializer(serializers.ModelSerializer):
         return None
     
     def get_audit_log_count(self, obj):
-        """Get the count of audit logs for this logbook"""
-        return obj.audit_logs.count()
+        """Get the count of audit logs for this logbook, archived ones included"""
+        archived = self.context.get('archived_audit_counts')
+        if archived is None:
+            return obj.audit_logs.count() + archived_count('logbook_audit', obj.id)
+        return obj.audit_logs.count() + archived.get(obj.id, 0)
 
 
 class LogbookDraftSerializer(serializers.Serializer):
@@ -255,6 +274,23 @@ class UnlockRequestSerializer(serializers.ModelSerializer):
         return obj.get_remaining_time_minutes()
 
 
+NOTIFICATION_TYPE_DISPLAY = {
+    'logbook_submission': 'Logbook Submission',
+    'logbook_approved': 'Logbook Approved',
+    'logbook_rejected': 'Logbook Rejected',
+    'logbook_returned': 'Logbook Returned',
+    'supervision_invite': 'Supervision Invitation',
+    'supervision_accepted': 'Supervision Accepted',
+    'supervision_rejected': 'Supervision Rejected',
+    'system_alert': 'System Alert',
+}
+
+
+def notification_type_display(notification_type):
+    display = NOTIFICATION_TYPE_DISPLAY.get(notification_type)
+    return display if display is not None else notification_type.replace('_', ' ').title()
+
+
 class NotificationSerializer(serializers.ModelSerializer):
     """Serializer for Notification model"""
     
@@ -281,17 +317,7 @@ class NotificationSerializer(serializers.ModelSerializer):
     
     def get_type_display(self, obj):
         """Get human-readable notification type"""
-        type_display_map = {
-            'logbook_submission': 'Logbook Submission',
-            'logbook_approved': 'Logbook Approved',
-            'logbook_rejected': 'Logbook Rejected',
-            'logbook_returned': 'Logbook Returned',
-            'supervision_invite': 'Supervision Invitation',
-            'supervision_accepted': 'Supervision Accepted',
-            'supervision_rejected': 'Supervision Rejected',
-            'system_alert': 'System Alert',
-        }
-        return type_display_map.get(obj.notification_type, obj.notification_type.replace('_', ' ').title())
+        return notification_type_display(obj.notification_type)
 
 
 class LogbookReviewRequestSerializer(serializers.ModelSerializer):
@@ -0,0 +1,36 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import CommentMessage, CommentThread, LogbookAuditLog, UnlockRequest, WeeklyLogbook
+from .report_cache import PRERENDER_STATUSES, schedule_prerender
+from .snapshots import FROZEN_STATUSES, discard, discard_for_thread
+
+
+@receiver(post_save, sender=WeeklyLogbook)
+def discard_snapshot_when_reopened(sender, instance, raw=False, **kwargs):
+    """A logbook that is no longer approved (e.g. unlocked for edits) loses its snapshot"""
+    if not raw and instance.status not in FROZEN_STATUSES:
+        discard(instance.pk)
+
+
+@receiver(post_save, sender=CommentThread)
+@receiver(post_save, sender=UnlockRequest)
+@receiver(post_save, sender=LogbookAuditLog)
+def discard_snapshot_on_logbook_activity(sender, instance, raw=False, **kwargs):
+    """Comments, unlock requests and audit events still change an approved logbook's snapshot"""
+    if not raw:
+        discard(instance.logbook_id)
+
+
+@receiver(post_save, sender=CommentMessage)
+@receiver(post_delete, sender=CommentMessage)
+def discard_snapshot_on_comment_message(sender, instance, raw=False, **kwargs):
+    if not raw:
+        discard_for_thread(instance.thread_id)
+
+
+@receiver(post_save, sender=WeeklyLogbook)
+def prerender_report_for_review(sender, instance, raw=False, **kwargs):
+    """Submitted and approved logbooks get their report rendered before anyone opens it"""
+    if not raw and instance.status in PRERENDER_STATUSES:
+        schedule_prerender(instance.pk)
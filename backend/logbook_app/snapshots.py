@@ -0,0 +1,241 @@
+"""
+Frozen snapshots of approved logbooks.
+
+An approved logbook cannot change, so everything the read endpoints would
+otherwise recompute on every request (serialized entries, section totals,
+comment threads, the audit trail and the rendered HTML report) is captured once
+as a zlib-compressed JSON document keyed by its SHA-256. Reads of approved
+logbooks are served from the snapshot with the hash as ETag.
+
+The snapshot is discarded whenever the logbook leaves the approved state, e.g.
+when an UnlockRequest reopens it, and whenever a comment, unlock request or
+audit event is recorded on it (see logbook_app.signals), since those still
+change while the logbook stays approved. It is rebuilt on the next read. ``manage.py rebuild_logbook_snapshots``
+rebuilds them in bulk.
+"""
+
+import hashlib
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import Sum
+from django.http import HttpResponse, HttpResponseNotModified
+from django.template.loader import render_to_string
+from django.utils import timezone
+from rest_framework.response import Response
+
+from archive.history import with_history
+
+from .models import LogbookSnapshot
+
+SNAPSHOT_VERSION = 1
+FROZEN_STATUSES = {'approved'}
+# Safe to cache forever: the URL embeds the content hash
+IMMUTABLE_CACHE_CONTROL = 'private, max-age=31536000, immutable'
+# Stable URLs: the client keeps the copy but revalidates it with If-None-Match
+REVALIDATE_CACHE_CONTROL = 'private, no-cache'
+
+
+def _format_minutes(minutes):
+    hours = minutes // 60
+    mins = minutes % 60
+    return f"{hours}h {mins}m" if hours > 0 else f"{mins}m"
+
+
+def section_entries(logbook):
+    """The Section A/B/C entries recorded on the logbook, in date order"""
+    from section_a.models import SectionAEntry
+    from section_b.models import ProfessionalDevelopmentEntry
+    from section_c.models import SupervisionEntry
+
+    return {
+        'section_a': SectionAEntry.objects.filter(id__in=logbook.section_a_entry_ids).order_by('session_date'),
+        'section_b': ProfessionalDevelopmentEntry.objects.filter(
+            id__in=logbook.section_b_entry_ids
+        ).order_by('date_of_activity'),
+        'section_c': SupervisionEntry.objects.filter(
+            id__in=logbook.section_c_entry_ids
+        ).order_by('date_of_supervision'),
+    }
+
+
+def report_context(logbook, entries=None):
+    """Template context for logbook_report.html"""
+    from section_a.models import SectionAEntry
+    from section_b.models import ProfessionalDevelopmentEntry
+    from section_c.models import SupervisionEntry
+
+    entries = entries or section_entries(logbook)
+    section_a_total_minutes = sum(e.duration_minutes or 0 for e in entries['section_a'])
+    section_b_total_minutes = sum(e.duration_minutes or 0 for e in entries['section_b'])
+    section_c_total_minutes = sum(e.duration_minutes or 0 for e in entries['section_c'])
+
+    # Cumulative totals (all entries before and including this week)
+    section_a_cumulative = SectionAEntry.objects.filter(
+        trainee=logbook.trainee,
+        session_date__lte=logbook.week_end_date
+    ).aggregate(Sum('duration_minutes'))['duration_minutes__sum'] or 0
+    section_b_cumulative = ProfessionalDevelopmentEntry.objects.filter(
+        trainee=logbook.trainee,
+        date_of_activity__lte=logbook.week_end_date
+    ).aggregate(Sum('duration_minutes'))['duration_minutes__sum'] or 0
+    section_c_cumulative = SupervisionEntry.objects.filter(
+        trainee=logbook.trainee.profile,
+        week_starting__lte=logbook.week_start_date
+    ).aggregate(Sum('duration_minutes'))['duration_minutes__sum'] or 0
+
+    trainee_profile = logbook.trainee.profile
+    return {
+        'logbook': logbook,
+        'trainee_name': f"{trainee_profile.first_name} {trainee_profile.last_name}".strip(),
+        'ahpra_number': trainee_profile.ahpra_registration_number or "Not provided",
+        'supervisor_name': trainee_profile.principal_supervisor or "Not assigned",
+        'section_a_entries': entries['section_a'],
+        'section_b_entries': entries['section_b'],
+        'section_c_entries': entries['section_c'],
+        'section_a_total_minutes': section_a_total_minutes,
+        'section_b_total_minutes': section_b_total_minutes,
+        'section_c_total_minutes': section_c_total_minutes,
+        'section_a_cumulative_minutes': section_a_cumulative,
+        'section_b_cumulative_minutes': section_b_cumulative,
+        'section_c_cumulative_minutes': section_c_cumulative,
+        'section_a_total_hours': _format_minutes(section_a_total_minutes),
+        'section_b_total_hours': _format_minutes(section_b_total_minutes),
+        'section_c_total_hours': _format_minutes(section_c_total_minutes),
+        'section_a_cumulative_hours': _format_minutes(section_a_cumulative),
+        'section_b_cumulative_hours': _format_minutes(section_b_cumulative),
+        'section_c_cumulative_hours': _format_minutes(section_c_cumulative),
+        'total_weekly_hours': _format_minutes(section_a_total_minutes + section_b_total_minutes + section_c_total_minutes),
+        'total_cumulative_hours': _format_minutes(section_a_cumulative + section_b_cumulative + section_c_cumulative),
+        'now': timezone.now(),
+    }
+
+
+def build_payload(logbook):
+    """Everything the read endpoints serve for an approved logbook"""
+    from section_a.serializers import SectionAEntrySerializer
+    from section_b.serializers import ProfessionalDevelopmentEntrySerializer
+    from section_c.serializers import SupervisionEntrySerializer
+    from .serializers import CommentThreadSerializer, LogbookSerializer
+
+    entries = {section: list(queryset) for section, queryset in section_entries(logbook).items()}
+    audit_logs = with_history(
+        logbook.audit_logs.select_related('user').order_by('timestamp'), 'logbook_audit', logbook.id,
+        newest_first=False,
+    )
+    return {
+        'version': SNAPSHOT_VERSION,
+        'logbook': LogbookSerializer(logbook).data,
+        'entries': {
+            'section_a': SectionAEntrySerializer(entries['section_a'], many=True).data,
+            'section_b': ProfessionalDevelopmentEntrySerializer(entries['section_b'], many=True).data,
+            'section_c': SupervisionEntrySerializer(entries['section_c'], many=True).data,
+        },
+        'comments': CommentThreadSerializer(
+            logbook.comment_threads.prefetch_related('messages'), many=True
+        ).data,
+        'audit_summary': {
+            'count': len(audit_logs),
+            'events': [
+                {
+                    'action': log.action,
+                    'user': log.user.email if log.user else None,
+                    'user_role': log.user_role,
+                    'new_status': log.new_status,
+                    'timestamp': log.timestamp,
+                }
+                for log in audit_logs
+            ],
+        },
+        'report_html': render_to_string('logbook_report.html', report_context(logbook, entries)),
+    }
+
+
+def encode(logbook):
+    """``(fields, payload)``: the snapshot's column values and its decoded payload"""
+    document = json.dumps(
+        build_payload(logbook), cls=DjangoJSONEncoder, sort_keys=True, separators=(',', ':')
+    ).encode('utf-8')
+    payload = json.loads(document)
+    fields = {
+        'content_hash': hashlib.sha256(document).hexdigest(),
+        'payload': zlib.compress(document, 6),
+        'payload_size': len(document),
+        'section_totals': payload['logbook']['section_totals'],
+    }
+    return fields, payload
+
+
+def store(logbook_id, fields):
+    try:
+        with transaction.atomic():
+            snapshot, _ = LogbookSnapshot.objects.update_or_create(logbook_id=logbook_id, defaults=fields)
+    except IntegrityError:
+        # Built concurrently by another request; both describe the same content
+        snapshot = LogbookSnapshot.objects.get(logbook_id=logbook_id)
+    return snapshot
+
+
+def freeze(logbook):
+    """Write (or overwrite) the logbook's snapshot and return it"""
+    fields, payload = encode(logbook)
+    snapshot = store(logbook.pk, fields)
+    snapshot._decoded = payload
+    logbook.snapshot = snapshot
+    return snapshot
+
+
+def get_snapshot(logbook):
+    """The logbook's snapshot, built on first use; None unless the logbook is approved"""
+    if logbook.status not in FROZEN_STATUSES:
+        return None
+    try:
+        return logbook.snapshot
+    except LogbookSnapshot.DoesNotExist:
+        return freeze(logbook)
+
+
+def discard(logbook_id):
+    LogbookSnapshot.objects.filter(logbook_id=logbook_id).delete()
+
+
+def discard_for_thread(thread_id):
+    """Discard the snapshot of the logbook a comment thread belongs to"""
+    LogbookSnapshot.objects.filter(logbook__comment_threads=thread_id).delete()
+
+
+def load(snapshot):
+    """Decoded payload of a snapshot"""
+    if not hasattr(snapshot, '_decoded'):
+        snapshot._decoded = json.loads(zlib.decompress(bytes(snapshot.payload)))
+    return snapshot._decoded
+
+
+def frozen_section_totals(logbook):
+    """Section totals from the snapshot of an approved logbook, without decompressing it"""
+    if logbook.status not in FROZEN_STATUSES:
+        return None
+    if type(logbook).snapshot.related.is_cached(logbook):
+        snapshot = getattr(logbook, 'snapshot', None)
+        return snapshot.section_totals if snapshot else None
+    return LogbookSnapshot.objects.filter(logbook_id=logbook.pk).values_list('section_totals', flat=True).first()
+
+
+def etag(snapshot):
+    return f'"{snapshot.content_hash}"'
+
+
+def snapshot_response(request, snapshot, data=None, html=None, cache_control=REVALIDATE_CACHE_CONTROL):
+    """Serve snapshot content with its hash as ETag, answering 304 when the client is current"""
+    tag = etag(snapshot)
+    if tag in [value.strip() for value in request.headers.get('If-None-Match', '').split(',')]:
+        response = HttpResponseNotModified()
+    elif html is not None:
+        response = HttpResponse(html)
+    else:
+        response = Response(data)
+    response['ETag'] = tag
+    response['Cache-Control'] = cache_control
+    return response
@@ -1,11 +1,29 @@
 from datetime import date, timedelta
 
+from io import StringIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
-from rest_framework.test import APIClient
+from django.core.management import call_command
+from django.template.loader import render_to_string
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory
 
 from api.models import UserProfile, Organization
-from logbook_app.models import WeeklyLogbook
+from logbook_app import report_cache, row_serializers, snapshots
+from logbook_app.models import (
+    CommentMessage, CommentThread, LogbookAuditLog, LogbookSnapshot, Notification, RenderedReport, UnlockRequest,
+    WeeklyLogbook,
+)
+from logbook_app.serializers import (
+    CommentThreadSerializer, LogbookSerializer, NotificationSerializer, UnlockRequestSerializer,
+)
+from section_a.models import SectionAEntry
+from section_b.models import ProfessionalDevelopmentEntry
+from section_c.models import SupervisionEntry
 from api.models import Supervision
 
 
@@ -94,6 +112,365 @@ class LogbookStateTransitionTests(TestCase):
         self.logbook.refresh_from_db()
         self.assertEqual(self.logbook.status, "approved")
 
-from django.test import TestCase
 
-# Create your tests here.
+@override_settings(LOGBOOK_REPORT_CACHE={'PRERENDER': 'inline'})
+class LogbookSnapshotTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.trainee = User.objects.create_user(username="trainee@example.com", email="trainee@example.com", password="pass1234")
+        UserProfile.objects.create(user=self.trainee, role="PROVISIONAL", first_name="Terry", last_name="Trainee")
+        self.supervisor = User.objects.create_user(username="supervisor@example.com", email="supervisor@example.com", password="pass1234")
+        UserProfile.objects.create(user=self.supervisor, role="SUPERVISOR")
+        Supervision.objects.create(supervisor=self.supervisor, supervisee=self.trainee, role="PRIMARY", status="ACCEPTED")
+        self.logbook = WeeklyLogbook.objects.create(
+            trainee=self.trainee,
+            role_type="Provisional",
+            week_start_date=date(2025, 1, 13),
+            week_end_date=date(2025, 1, 19),
+            status="submitted",
+        )
+
+    def test_approval_freezes_snapshot(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.logbook.approve(self.supervisor, comments="Looks good")
+        snapshot = LogbookSnapshot.objects.get(logbook=self.logbook)
+        self.assertEqual(len(snapshot.content_hash), 64)
+
+        self.client.force_authenticate(user=self.supervisor)
+        response = self.client.get(f"/api/logbook/{self.logbook.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], f'"{snapshot.content_hash}"')
+        self.assertEqual(response.data["status"], "approved")
+        self.assertEqual(response.data["snapshot_hash"], snapshot.content_hash)
+        self.assertIn("section_a", response.data["entries"])
+
+        not_modified = self.client.get(
+            f"/api/logbook/{self.logbook.id}/", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+        report = self.client.get(f"/api/logbook/{self.logbook.id}/html-report/")
+        self.assertEqual(report.status_code, 200)
+        self.assertEqual(report["ETag"], response["ETag"])
+
+        frozen = self.client.get(f"/api/logbook/{self.logbook.id}/snapshot/{snapshot.content_hash}/")
+        self.assertEqual(frozen.status_code, 200)
+        self.assertIn("immutable", frozen["Cache-Control"])
+        self.assertNotIn("report_html", frozen.data)
+        stale = self.client.get(f"/api/logbook/{self.logbook.id}/snapshot/{'0' * 64}/")
+        self.assertEqual(stale.status_code, 404)
+
+    def test_reopening_discards_snapshot_until_next_read(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.logbook.approve(self.supervisor)
+        self.assertTrue(LogbookSnapshot.objects.filter(logbook=self.logbook).exists())
+        self.logbook.status = "submitted"
+        self.logbook.save()
+        self.assertFalse(LogbookSnapshot.objects.filter(logbook=self.logbook).exists())
+
+        self.client.force_authenticate(user=self.trainee)
+        response = self.client.get(f"/api/logbook/{self.logbook.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+
+        # Approval outside approve() (e.g. a forced relock) rebuilds on first read
+        WeeklyLogbook.objects.filter(pk=self.logbook.pk).update(status="approved")
+        response = self.client.get(f"/api/logbook/{self.logbook.id}/")
+        self.assertIn("ETag", response)
+        self.assertTrue(LogbookSnapshot.objects.filter(logbook=self.logbook).exists())
+
+    def test_activity_on_approved_logbook_refreshes_snapshot(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.logbook.approve(self.supervisor)
+        self.client.force_authenticate(user=self.trainee)
+        before = self.client.get(f"/api/logbook/{self.logbook.id}/")["ETag"]
+
+        thread = CommentThread.objects.create(logbook=self.logbook)
+        CommentMessage.objects.create(
+            thread=thread, author=self.supervisor, author_role="supervisor", message="Nice work"
+        )
+        after_comment = self.client.get(f"/api/logbook/{self.logbook.id}/")
+        self.assertNotEqual(after_comment["ETag"], before)
+        payload = self.client.get(
+            f"/api/logbook/{self.logbook.id}/snapshot/{after_comment.data['snapshot_hash']}/"
+        ).data
+        self.assertEqual(payload["comments"][0]["messages"][0]["message"], "Nice work")
+
+        UnlockRequest.objects.create(
+            logbook=self.logbook, requester=self.trainee, requester_role="provisional", reason="Typo"
+        )
+        self.assertFalse(LogbookSnapshot.objects.filter(logbook=self.logbook).exists())
+        self.assertIn("ETag", self.client.get(f"/api/logbook/{self.logbook.id}/"))
+
+
+@override_settings(LOGBOOK_REPORT_CACHE={'PRERENDER': 'inline'})
+class RenderedReportCacheTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.trainee = User.objects.create_user(username="trainee@example.com", email="trainee@example.com", password="pass1234")
+        UserProfile.objects.create(user=self.trainee, role="PROVISIONAL", first_name="Terry", last_name="Trainee")
+        self.entry = ProfessionalDevelopmentEntry.objects.create(
+            trainee=self.trainee, activity_type="WORKSHOP", date_of_activity=date(2025, 1, 14),
+            duration_minutes=90, activity_details="Ethics workshop", topics_covered="Ethics",
+            week_starting=date(2025, 1, 13),
+        )
+        self.logbook = self.create_logbook(date(2025, 1, 13))
+
+    def create_logbook(self, week_start, status="draft"):
+        return WeeklyLogbook.objects.create(
+            trainee=self.trainee,
+            role_type="Provisional",
+            week_start_date=week_start,
+            week_end_date=week_start + timedelta(days=6),
+            status=status,
+            section_b_entry_ids=[self.entry.id],
+        )
+
+    def get_report(self):
+        self.client.force_authenticate(user=self.trainee)
+        return self.client.get(f"/api/logbook/{self.logbook.id}/html-report/")
+
+    def test_report_rendered_once_per_content_version(self):
+        with mock.patch.object(report_cache, "render_to_string", wraps=render_to_string) as render:
+            first = self.get_report()
+            second = self.get_report()
+            self.assertEqual(render.call_count, 1)
+            self.assertEqual(first.content, second.content)
+            self.assertIn(b"Ethics workshop", first.content)
+
+            self.entry.activity_details = "Ethics and law workshop"
+            self.entry.save()
+            third = self.get_report()
+            self.assertEqual(render.call_count, 2)
+            self.assertIn(b"Ethics and law workshop", third.content)
+
+        # The superseded version was dropped
+        self.assertEqual(RenderedReport.objects.filter(logbook=self.logbook).count(), 1)
+
+    def test_submission_prerenders_report(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.logbook.status = "submitted"
+            self.logbook.save()
+        self.assertTrue(RenderedReport.objects.filter(logbook=self.logbook).exists())
+        with mock.patch.object(report_cache, "render_to_string") as render:
+            self.assertEqual(self.get_report().status_code, 200)
+        render.assert_not_called()
+
+    def test_least_recently_used_reports_are_evicted(self):
+        other = self.create_logbook(date(2025, 1, 20))
+        report_cache.get_report(self.logbook)
+        report_cache.get_report(other)
+        RenderedReport.objects.filter(logbook=other).update(last_accessed_at=date(2024, 1, 1))
+        with override_settings(LOGBOOK_REPORT_CACHE={'MAX_ENTRIES': 1}):
+            self.assertEqual(report_cache.evict(), 1)
+        self.assertEqual(list(RenderedReport.objects.values_list('logbook_id', flat=True)), [self.logbook.id])
+
+    def test_prerender_command(self):
+        self.logbook.status = "submitted"
+        self.logbook.save()
+        out = StringIO()
+        call_command("prerender_logbook_reports", stdout=out)
+        self.assertIn("Prerendered 1 of 1", out.getvalue())
+        self.assertTrue(RenderedReport.objects.filter(logbook=self.logbook).exists())
+
+
+class BulkReviewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.supervisor = User.objects.create_user(username="supervisor@example.com", email="supervisor@example.com", password="pass1234")
+        UserProfile.objects.create(user=self.supervisor, role="SUPERVISOR")
+        self.trainee = User.objects.create_user(username="trainee@example.com", email="trainee@example.com", password="pass1234")
+        UserProfile.objects.create(user=self.trainee, role="PROVISIONAL")
+        Supervision.objects.create(supervisor=self.supervisor, supervisee=self.trainee, role="PRIMARY", status="ACCEPTED")
+        self.client.force_authenticate(user=self.supervisor)
+
+    def create_submitted(self, week, trainee=None):
+        trainee = trainee or self.trainee
+        week_start = date(2025, 1, 6) + timedelta(weeks=week)
+        entry = ProfessionalDevelopmentEntry.objects.create(
+            trainee=trainee, activity_type="WORKSHOP", date_of_activity=week_start, duration_minutes=60,
+            activity_details="Workshop", topics_covered="Ethics", week_starting=week_start, locked=True,
+        )
+        logbook = WeeklyLogbook.objects.create(
+            trainee=trainee, role_type="Provisional", week_start_date=week_start,
+            week_end_date=week_start + timedelta(days=6), status="submitted", section_b_entry_ids=[entry.id],
+        )
+        return logbook, entry
+
+    def review(self, decisions):
+        return self.client.post("/api/logbook/bulk-review/", {"decisions": decisions}, format="json")
+
+    def test_applies_valid_decisions_and_reports_failures(self):
+        approved, approved_entry = self.create_submitted(0)
+        returned, returned_entry = self.create_submitted(1)
+        stranger = User.objects.create_user(username="other@example.com", email="other@example.com", password="pass1234")
+        UserProfile.objects.create(user=stranger, role="PROVISIONAL")
+        foreign, _ = self.create_submitted(2, trainee=stranger)
+
+        response = self.review([
+            {"logbookId": approved.id, "decision": "approve",
+             "entryComments": [{"entryId": approved_entry.id, "comment": "Well reflected"}]},
+            {"logbookId": returned.id, "decision": "return_for_edits", "generalComment": "Add detail"},
+            {"logbookId": foreign.id, "decision": "approve"},
+            {"logbookId": 999999, "decision": "approve"},
+            {"logbookId": approved.id, "decision": "reject", "generalComment": "Duplicate"},
+            {"logbookId": returned.id, "decision": "reject"},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["applied"], response.data["failed"]), (2, 4))
+        self.assertEqual(
+            [result.get("status") or result["error"] for result in response.data["results"]],
+            ["approved", "returned_for_edits", "Can only review logbooks from your supervisees",
+             "Logbook not found", "Duplicate decision for logbook", "Rejection reason is required"],
+        )
+
+        approved.refresh_from_db()
+        returned.refresh_from_db()
+        foreign.refresh_from_db()
+        self.assertEqual((approved.status, approved.reviewed_by, returned.status), ("approved", self.supervisor, "returned_for_edits"))
+        self.assertEqual(returned.review_comments, "Add detail")
+        self.assertEqual(foreign.status, "submitted")
+
+        approved_entry.refresh_from_db()
+        returned_entry.refresh_from_db()
+        self.assertEqual((approved_entry.locked, approved_entry.supervisor_comment), (True, "Well reflected"))
+        self.assertFalse(returned_entry.locked)
+
+        self.assertEqual(
+            set(LogbookAuditLog.objects.filter(logbook=returned).values_list("action", flat=True)),
+            {"returned_for_edits", "notification_sent"},
+        )
+        self.assertEqual(
+            set(Notification.objects.filter(user=self.trainee).values_list("notification_type", flat=True)),
+            {"logbook_approved", "logbook_returned"},
+        )
+
+    def test_statement_count_does_not_grow_with_batch_size(self):
+        def queries_for(weeks):
+            decisions = []
+            for week in weeks:
+                logbook, entry = self.create_submitted(week)
+                decisions.append({"logbookId": logbook.id, "decision": "approve",
+                                  "entryComments": [{"entryId": entry.id, "comment": "Good"}]})
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.review(decisions).data["applied"], len(decisions))
+            return len(queries)
+
+        queries_for([0])  # warms the cached supervisee scope
+        self.assertEqual(queries_for(range(1, 3)), queries_for(range(3, 9)))
+
+    def test_only_supervisors(self):
+        self.client.force_authenticate(user=self.trainee)
+        self.assertEqual(self.review([{"logbookId": 1, "decision": "approve"}]).status_code, 403)
+
+
+class RowSerializerTests(TestCase):
+    """The list endpoints' row serializers must match the ModelSerializers field for field"""
+
+    def setUp(self):
+        self.org = Organization.objects.create(name="Test Org")
+        self.supervisor = User.objects.create_user(username="supervisor@example.com", email="supervisor@example.com", password="pass1234")
+        UserProfile.objects.create(user=self.supervisor, role="SUPERVISOR", first_name="Sam", last_name="Super")
+        self.trainee = User.objects.create_user(username="trainee@example.com", email="trainee@example.com", password="pass1234")
+        UserProfile.objects.create(user=self.trainee, role="PROVISIONAL", first_name="Terry", last_name="Trainee")
+        Supervision.objects.create(supervisor=self.supervisor, supervisee=self.trainee, role="PRIMARY", status="ACCEPTED")
+        self.member = User.objects.create_user(username="member@example.com", email="member@example.com", password="pass1234")
+        UserProfile.objects.create(user=self.member, role="PROVISIONAL", organization=self.org, principal_supervisor="Dr Outside")
+
+        self.weeks = [date(2025, 1, 6) + timedelta(weeks=n) for n in range(3)]
+        entry_ids = self.create_entries(self.trainee, self.weeks[0]), self.create_entries(self.trainee, self.weeks[1])
+        self.draft = self.create_logbook(self.trainee, self.weeks[1], "draft", entry_ids[1])
+        self.approved = self.create_logbook(self.trainee, self.weeks[0], "approved", entry_ids[0], reviewed_by=self.supervisor)
+        snapshots.freeze(self.approved)
+        self.unlocked = self.create_logbook(self.member, self.weeks[0], "approved", supervisor=self.supervisor)
+        self.submitted = self.create_logbook(self.member, self.weeks[1], "submitted")
+        LogbookAuditLog.objects.create(logbook=self.draft, action="created", user=self.trainee)
+
+        UnlockRequest.objects.create(
+            logbook=self.unlocked, requester=self.member, requester_role="provisional", reason="Fix", status="approved",
+            reviewed_by=self.supervisor, reviewer_role="supervisor", reviewed_at=timezone.now(), duration_minutes=180,
+            unlock_expires_at=timezone.now() + timedelta(hours=2, seconds=30),
+        )
+        UnlockRequest.objects.create(logbook=self.approved, requester=self.trainee, requester_role="provisional", reason="Typo")
+
+    def create_entries(self, trainee, week):
+        dcc = SectionAEntry.objects.create(trainee=trainee, client_id="C-1", session_date=week, duration_minutes=60)
+        cra = SectionAEntry.objects.create(
+            trainee=trainee, entry_type="cra", client_id="C-1", session_date=week, duration_minutes=30, parent_dcc_entry=dcc,
+        )
+        pd = ProfessionalDevelopmentEntry.objects.create(
+            trainee=trainee, activity_type="WORKSHOP", date_of_activity=week, duration_minutes=45,
+            activity_details="Workshop", topics_covered="Ethics", week_starting=week,
+        )
+        supervision = SupervisionEntry.objects.create(
+            trainee=trainee.profile, date_of_supervision=week, week_starting=week, supervisor_name="Sam Super",
+            supervisor_type="PRINCIPAL", supervision_type="INDIVIDUAL", duration_minutes=60, summary="Cases",
+        )
+        return [dcc.id, cra.id], [pd.id], [supervision.id]
+
+    def create_logbook(self, trainee, week, status, entry_ids=([], [], []), **fields):
+        return WeeklyLogbook.objects.create(
+            trainee=trainee, role_type="Provisional", week_start_date=week, week_end_date=week + timedelta(days=6),
+            status=status, section_a_entry_ids=entry_ids[0], section_b_entry_ids=entry_ids[1],
+            section_c_entry_ids=entry_ids[2], **fields,
+        )
+
+    def request_for(self, user):
+        request = APIRequestFactory().get("/")
+        request.user = user
+        return request
+
+    def assertSameData(self, expected, rows):
+        self.assertEqual([list(item) for item in rows], [list(item) for item in expected])
+        self.assertEqual(rows, [dict(item) for item in expected])
+
+    def test_logbook_rows(self):
+        logbooks = WeeklyLogbook.objects.order_by("trainee_id", "-week_start_date")
+        rows = row_serializers.logbook_rows(logbooks)
+        self.assertSameData(LogbookSerializer(logbooks, many=True).data, rows)
+
+        by_id = {row["id"]: row for row in rows}
+        self.assertEqual(by_id[self.draft.id]["section_totals"]["section_a"]["dcc"]["cumulative_hours"], "2:00")
+        self.assertEqual(by_id[self.unlocked.id]["active_unlock"]["duration_minutes"], 180)
+        self.assertEqual(by_id[self.submitted.id]["supervisor_name"], "Dr Outside")
+        self.assertEqual(by_id[self.draft.id]["audit_log_count"], LogbookAuditLog.objects.filter(logbook=self.draft).count())
+
+    def test_unlock_request_and_notification_rows(self):
+        requests = UnlockRequest.objects.all()
+        for user in (self.supervisor, self.member):
+            self.assertSameData(
+                UnlockRequestSerializer(requests, many=True, context={"request": self.request_for(user)}).data,
+                row_serializers.unlock_request_rows(requests, user),
+            )
+
+        Notification.objects.create(user=self.trainee, notification_type="logbook_approved", payload={"message": "Approved", "link": "/logbook/1"})
+        Notification.objects.create(user=self.trainee, notification_type="weekly_digest")
+        notifications = Notification.objects.filter(user=self.trainee)[:10]
+        self.assertSameData(NotificationSerializer(notifications, many=True).data, row_serializers.notification_rows(notifications))
+
+    def test_comment_thread_rows_match_after_marking_seen(self):
+        thread = CommentThread.objects.create(logbook=self.draft)
+        first = CommentMessage.objects.create(thread=thread, author=self.supervisor, author_role="supervisor", message="Check C-1")
+        CommentMessage.objects.create(thread=thread, author=self.trainee, author_role="provisional", message="Done", reply_to=first)
+        CommentThread.objects.create(logbook=self.draft, entry_id="12", entry_section="A", thread_type="entry")
+
+        threads = CommentThread.objects.filter(logbook=self.draft)
+        self.assertSameData(
+            CommentThreadSerializer(threads, many=True, context={"request": self.request_for(self.trainee)}).data,
+            row_serializers.comment_thread_rows(threads, self.trainee),
+        )
+
+        client = APIClient()
+        client.force_authenticate(user=self.trainee)
+        response = client.get(f"/api/logbook/{self.draft.id}/comments/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), row_serializers.comment_thread_rows(threads, self.trainee))
+        messages = response.json()[0]["messages"]
+        self.assertEqual([(m["locked"], m["can_edit"]) for m in messages], [(True, False), (False, True)])
+
+    def test_benchmark_command_rolls_back(self):
+        out = StringIO()
+        call_command("benchmark_list_serializers", "--rows", "20", "--repeat", "1", stdout=out)
+        self.assertIn("20 logbooks", out.getvalue())
+        self.assertFalse(WeeklyLogbook.objects.filter(trainee__username__startswith="list-benchmark").exists())
+
@@ -2,14 +2,14 @@ from django.urls import path
 from .views import (
     logbook_list, logbook_dashboard_list, logbook_status_summary, eligible_weeks, logbook_draft, logbook_create, logbook_submit, 
     logbook_detail, logbook_audit_logs, logbook_valid_actions, logbook_request_return_for_edits, supervisor_logbooks,
-    logbook_approve, logbook_reject, logbook_entries, logbook_review,
+    logbook_approve, logbook_reject, logbook_entries, logbook_review, logbook_bulk_review,
     logbook_messages, logbook_audit_trail, logbook_resubmit,
     logbook_comment_threads, comment_message_reply, entry_comment_thread,
     comment_message_detail, create_unlock_request, unlock_requests_queue,
     review_unlock_request, force_relock_unlock_request,
     user_notifications, notification_stats, mark_notification_read,
     mark_all_notifications_read, create_notification,
-    logbook_html_report, notification_list, notification_mark_read,
+    logbook_html_report, logbook_snapshot, notification_list, notification_mark_read,
     # Enhanced review flow endpoints
     # logbook_start_review,  # DEPRECATED
     logbook_request_changes, logbook_approve_with_comments,
@@ -38,6 +38,7 @@ urlpatterns = [
     
     # Supervisor endpoints
     path('supervisor/', supervisor_logbooks, name='supervisor-logbooks'),
+    path('bulk-review/', logbook_bulk_review, name='logbook-bulk-review'),
     path('<int:logbook_id>/approve/', logbook_approve, name='logbook-approve'),
     path('<int:logbook_id>/reject/', logbook_reject, name='logbook-reject'),
     path('<int:logbook_id>/entries/', logbook_entries, name='logbook-entries'),
@@ -46,6 +47,7 @@ urlpatterns = [
     path('<int:logbook_id>/audit/', logbook_audit_trail, name='logbook-audit-trail'),
     path('<int:logbook_id>/resubmit/', logbook_resubmit, name='logbook-resubmit'),
     path('<int:logbook_id>/html-report/', logbook_html_report, name='logbook-html-report'),
+    path('<int:logbook_id>/snapshot/<str:content_hash>/', logbook_snapshot, name='logbook-snapshot'),
     
     # Comment system endpoints
     path('<int:logbook_id>/comments/', logbook_comment_threads, name='logbook-comment-threads'),
@@ -7,10 +7,14 @@ from rest_framework import status
 from django.utils import timezone
 from datetime import datetime, timedelta
 from django.db import transaction
-from django.shortcuts import render
+from django.http import HttpResponse
 from django.core.exceptions import ValidationError
 from .models import WeeklyLogbook, LogbookAuditLog, LogbookMessage, CommentThread, CommentMessage, UnlockRequest, Notification, LogbookReviewRequest
 from api.models import Supervision
+from api.data_version import etag_by_data_version
+from api.principal import get_principal
+from archive.history import archived_counts, with_history
+from . import bulk_review, report_cache, row_serializers, snapshots
 from .serializers import (
     LogbookSerializer, LogbookDraftSerializer, EligibleWeekSerializer, 
     LogbookSubmissionSerializer, LogbookAuditLogSerializer,
@@ -30,11 +34,12 @@ def logbook_list(request):
     try:
         print(f"DEBUG: logbook_list called by user: {request.user.email if request.user.is_authenticated else 'Anonymous'}")
         
-        if not hasattr(request.user, 'profile'):
+        principal = get_principal(request)
+        if not principal.has_profile:
             print(f"DEBUG: User {request.user.email} has no profile")
             return Response({'error': 'User profile not found'}, status=status.HTTP_403_FORBIDDEN)
         
-        user_role = request.user.profile.role
+        user_role = principal.role
         print(f"DEBUG: User role: {user_role}")
         
         if user_role in ['PROVISIONAL', 'REGISTRAR']:
@@ -43,8 +48,7 @@ def logbook_list(request):
             try:
                 logbooks = WeeklyLogbook.objects.filter(trainee=request.user).order_by('-week_start_date')
                 print(f"DEBUG: Found {logbooks.count()} logbooks")
-                serializer = LogbookSerializer(logbooks, many=True)
-                return Response(serializer.data)
+                return Response(row_serializers.logbook_rows(logbooks))
             except Exception as e:
                 print(f"DEBUG: Error getting logbooks: {e}")
                 import traceback
@@ -55,26 +59,17 @@ def logbook_list(request):
             # Supervisors see logbooks from their supervisees
             print(f"DEBUG: Getting logbooks for supervisor: {request.user.email}")
             try:
-                from api.models import Supervision
+                supervisee_ids = principal.supervisee_ids(primary_only=True)
                 
-                # Get supervisees for this supervisor
-                supervisee_relationships = Supervision.objects.filter(
-                    supervisor=request.user,
-                    role='PRIMARY',
-                    status='ACCEPTED'
-                )
-                supervisee_users = [rel.supervisee for rel in supervisee_relationships if rel.supervisee]
+                print(f"DEBUG: Found {len(supervisee_ids)} supervisees")
                 
-                print(f"DEBUG: Found {len(supervisee_users)} supervisees")
-                
-                if not supervisee_users:
+                if not supervisee_ids:
                     return Response([])
                 
                 # Get logbooks from supervisees
-                logbooks = WeeklyLogbook.objects.filter(trainee__in=supervisee_users).order_by('-week_start_date')
+                logbooks = WeeklyLogbook.objects.filter(trainee_id__in=supervisee_ids).order_by('-week_start_date')
                 print(f"DEBUG: Found {logbooks.count()} logbooks from supervisees")
-                serializer = LogbookSerializer(logbooks, many=True)
-                return Response(serializer.data)
+                return Response(row_serializers.logbook_rows(logbooks))
             except Exception as e:
                 print(f"DEBUG: Error getting supervisor logbooks: {e}")
                 import traceback
@@ -92,9 +87,22 @@ def logbook_list(request):
         return Response({'error': f'Internal server error: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def active_unlock_minute(request):
+    """While a week is unlocked its countdown and editability change every minute"""
+    now = timezone.now()
+    unlocked = UnlockRequest.objects.filter(
+        logbook__trainee=request.user,
+        status__in=['approved', 'approve'],
+        manually_relocked=False,
+        unlock_expires_at__gt=now,
+    ).exists()
+    return now.strftime('%Y-%m-%dT%H:%M') if unlocked else ''
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 @support_error_handler
+@etag_by_data_version('logbook-dashboard', clock=active_unlock_minute)
 def logbook_dashboard_list(request):
     """Get all weeks with entries for dashboard view, including weeks without logbooks"""
     try:
@@ -168,6 +176,9 @@ def logbook_dashboard_list(request):
         # Limit to last N weeks to prevent performance issues
         sorted_weeks = sorted(all_weeks, reverse=True)[:limit]
         
+        # Archived audit rows of every logbook, in one query
+        archived_audit = archived_counts('logbook_audit', WeeklyLogbook.objects.filter(trainee=request.user).values('id'))
+
         # Filter out current week and future weeks
         available_weeks = []
         for week_start in sorted_weeks:
@@ -206,7 +217,7 @@ def logbook_dashboard_list(request):
                             'remaining_minutes': active_unlock.get_remaining_time_minutes()
                         } if active_unlock else None,
                         'has_logbook': True,
-                        'audit_log_count': logbook.audit_logs.count()
+                        'audit_log_count': logbook.audit_logs.count() + archived_audit.get(logbook.id, 0)
                     })
                 except WeeklyLogbook.DoesNotExist:
                     # No logbook exists - create a "ready" entry with calculated stats
@@ -287,24 +298,17 @@ def logbook_dashboard_list(request):
 @support_error_handler
 def logbook_status_summary(request):
     """Get logbook status summary for dashboard display"""
-    if not hasattr(request.user, 'profile') or request.user.profile.role not in ['PROVISIONAL', 'REGISTRAR', 'SUPERVISOR']:
+    principal = get_principal(request)
+    if not principal.has_role('PROVISIONAL', 'REGISTRAR', 'SUPERVISOR'):
         return Response({'error': 'Only trainees and supervisors can view logbook status'}, status=status.HTTP_403_FORBIDDEN)
     
-    user_role = request.user.profile.role
+    user_role = principal.role
     
     # For supervisors, return submitted logbooks count
     if user_role == 'SUPERVISOR':
-        from api.models import Supervision
-        
-        # Get supervisees for this supervisor
-        supervisee_relationships = Supervision.objects.filter(
-            supervisor=request.user,
-            role='PRIMARY',
-            status='ACCEPTED'
-        )
-        supervisee_users = [rel.supervisee for rel in supervisee_relationships if rel.supervisee]
+        supervisee_ids = principal.supervisee_ids(primary_only=True)
         
-        if not supervisee_users:
+        if not supervisee_ids:
             return Response({
                 'overall_status': 'green',
                 'status_message': 'No supervisees assigned',
@@ -322,7 +326,7 @@ def logbook_status_summary(request):
         
         # Get submitted logbooks from supervisees
         submitted_logbooks = WeeklyLogbook.objects.filter(
-            trainee__in=supervisee_users,
+            trainee_id__in=supervisee_ids,
             status='submitted'
         ).count()
         
@@ -464,6 +468,7 @@ def logbook_status_summary(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 @support_error_handler
+@etag_by_data_version('eligible-weeks')
 def eligible_weeks(request):
     """Get eligible weeks for logbook submission (weeks with unlinked entries, excluding current week)"""
     if not hasattr(request.user, 'profile') or request.user.profile.role not in ['PROVISIONAL', 'REGISTRAR']:
@@ -952,6 +957,15 @@ def logbook_detail(request, logbook_id):
     if user_role in ['PROVISIONAL', 'REGISTRAR'] and logbook.trainee != request.user:
         return Response({'error': 'Can only view your own logbooks'}, status=status.HTTP_403_FORBIDDEN)
     
+    # Approved logbooks are served from their frozen snapshot
+    snapshot = snapshots.get_snapshot(logbook)
+    if snapshot:
+        payload = snapshots.load(snapshot)
+        logbook_data = dict(payload['logbook'], snapshot_hash=snapshot.content_hash)
+        if user_role == 'SUPERVISOR':
+            logbook_data['entries'] = payload['entries']
+        return snapshots.snapshot_response(request, snapshot, logbook_data)
+    
     # Get detailed logbook data including entries for supervisors
     if user_role == 'SUPERVISOR':
         from section_a.models import SectionAEntry
@@ -1003,7 +1017,9 @@ def logbook_audit_logs(request, logbook_id):
     if user_role in ['PROVISIONAL', 'REGISTRAR'] and logbook.trainee != request.user:
         return Response({'error': 'Can only view your own logbooks'}, status=status.HTTP_403_FORBIDDEN)
     
-    audit_logs = LogbookAuditLog.objects.filter(logbook=logbook).order_by('-timestamp')
+    audit_logs = with_history(
+        LogbookAuditLog.objects.filter(logbook=logbook).order_by('-timestamp'), 'logbook_audit', logbook.id
+    )
     serializer = LogbookAuditLogSerializer(audit_logs, many=True)
     return Response(serializer.data)
 
@@ -1027,14 +1043,8 @@ def logbook_valid_actions(request, logbook_id):
         return Response({'error': 'Can only view actions for your own logbooks'}, status=status.HTTP_403_FORBIDDEN)
 
     if user_role == 'supervisor':
-        from api.models import Supervision
-        supervisee_relationships = Supervision.objects.filter(
-            supervisor=request.user,
-            role='PRIMARY',
-            status='ACCEPTED'
-        )
-        supervisee_users = [rel.supervisee for rel in supervisee_relationships if rel.supervisee]
-        if logbook.trainee not in supervisee_users:
+        supervisee_ids = get_principal(request).supervisee_ids(primary_only=True)
+        if logbook.trainee_id not in supervisee_ids:
             return Response({'error': 'Can only view actions for your supervisees'}, status=status.HTTP_403_FORBIDDEN)
 
     # Get valid transitions from state machine
@@ -1101,38 +1111,35 @@ def logbook_request_return_for_edits(request, logbook_id):
 @support_error_handler
 def supervisor_logbooks(request):
     """Get all logbooks submitted by supervisees for supervisor review"""
-    if not hasattr(request.user, 'profile') or request.user.profile.role != 'SUPERVISOR':
+    principal = get_principal(request)
+    if not principal.is_supervisor:
         return Response({'error': 'Only supervisors can view supervisee logbooks'}, status=status.HTTP_403_FORBIDDEN)
     
     # Get filter parameter
     status_filter = request.query_params.get('status', 'submitted')
     
     # Get supervisees for this supervisor
-    supervisee_relationships = Supervision.objects.filter(
-        supervisor=request.user,
-        role='PRIMARY',
-        status='ACCEPTED'
-    )
-    supervisee_users = [rel.supervisee for rel in supervisee_relationships if rel.supervisee]
+    supervisee_ids = principal.supervisee_ids(primary_only=True)
     
-    if not supervisee_users:
+    if not supervisee_ids:
         return Response([])
     
     # Build queryset based on filter and supervisees
     if status_filter == 'all':
-        logbooks = WeeklyLogbook.objects.filter(trainee__in=supervisee_users)
+        logbooks = WeeklyLogbook.objects.filter(trainee_id__in=supervisee_ids)
     elif status_filter in ['submitted', 'rejected', 'approved', 'returned_for_edits']:
         logbooks = WeeklyLogbook.objects.filter(
-            trainee__in=supervisee_users,
+            trainee_id__in=supervisee_ids,
             status=status_filter
         )
     else:
         logbooks = WeeklyLogbook.objects.filter(
-            trainee__in=supervisee_users,
+            trainee_id__in=supervisee_ids,
             status='submitted'
         )
     
-    logbooks = logbooks.order_by('-submitted_at')
+    logbooks = list(logbooks.select_related('trainee__profile').order_by('-submitted_at'))
+    archived_audit = archived_counts('logbook_audit', [logbook.id for logbook in logbooks])
     
     # Format the response for supervisor review
     supervisor_logbooks = []
@@ -1152,7 +1159,7 @@ def supervisor_logbooks(request):
             'review_comments': logbook.review_comments,
             'section_totals': logbook.calculate_section_totals(),
             'message_count': logbook.messages.count(),
-            'audit_log_count': logbook.audit_logs.count()
+            'audit_log_count': logbook.audit_logs.count() + archived_audit.get(logbook.id, 0)
         })
     
     return Response(supervisor_logbooks)
@@ -1324,7 +1331,10 @@ def logbook_audit_trail(request, logbook_id):
     if user_role in ['PROVISIONAL', 'REGISTRAR'] and logbook.trainee != request.user:
         return Response({'error': 'Can only view your own logbooks'}, status=status.HTTP_403_FORBIDDEN)
     
-    audit_logs = LogbookAuditLog.objects.filter(logbook=logbook).order_by('-timestamp')
+    audit_logs = with_history(
+        LogbookAuditLog.objects.filter(logbook=logbook).select_related('user__profile').order_by('-timestamp'),
+        'logbook_audit', logbook.id,
+    )
     return Response([{
         'id': log.id,
         'action': log.action,
@@ -1397,14 +1407,16 @@ def logbook_comment_threads(request, logbook_id):
     if request.method == 'GET':
         # Get all comment threads for this logbook
         threads = CommentThread.objects.filter(logbook=logbook).prefetch_related('messages__author__profile')
-        serializer = CommentThreadSerializer(threads, many=True, context={'request': request})
         
         # Mark comments as seen by the current user
         for thread in threads:
             for message in thread.messages.all():
                 message.mark_as_seen(request.user)
         
-        return Response(serializer.data)
+        # Serialized after marking, so seen_by and locked include this view
+        return Response(row_serializers.comment_thread_rows(
+            CommentThread.objects.filter(logbook=logbook), request.user
+        ))
     
     elif request.method == 'POST':
         # Check if supervisor is trying to comment on rejected logbook
@@ -1495,17 +1507,15 @@ def logbook_section_a_entries(request, logbook_id):
     
     # Supervisors can view logbooks from their supervisees
     if user_role == 'SUPERVISOR':
-        from api.models import Supervision
-        supervisee_relationships = Supervision.objects.filter(
-            supervisor=request.user,
-            role='PRIMARY',
-            status='ACCEPTED'
-        )
-        supervisee_users = [rel.supervisee for rel in supervisee_relationships if rel.supervisee]
+        supervisee_ids = get_principal(request).supervisee_ids(primary_only=True)
         
-        if logbook.trainee not in supervisee_users:
+        if logbook.trainee_id not in supervisee_ids:
             return Response({'error': 'Can only view logbooks from your supervisees'}, status=status.HTTP_403_FORBIDDEN)
     
+    snapshot = snapshots.get_snapshot(logbook)
+    if snapshot:
+        return snapshots.snapshot_response(request, snapshot, snapshots.load(snapshot)['entries']['section_a'])
+    
     # Fetch Section A entries
     # IMPORTANT: Do not rely solely on stored IDs; compute by week so newly-added
     # entries for this trainee/week always appear even if IDs weren’t synced.
@@ -1545,16 +1555,14 @@ def logbook_section_b_entries(request, logbook_id):
         return Response({'error': 'Can only view your own logbooks'}, status=status.HTTP_403_FORBIDDEN)
 
     if user_role == 'SUPERVISOR':
-        from api.models import Supervision
-        supervisee_relationships = Supervision.objects.filter(
-            supervisor=request.user,
-            role='PRIMARY',
-            status='ACCEPTED'
-        )
-        supervisee_users = [rel.supervisee for rel in supervisee_relationships if rel.supervisee]
-        if logbook.trainee not in supervisee_users:
+        supervisee_ids = get_principal(request).supervisee_ids(primary_only=True)
+        if logbook.trainee_id not in supervisee_ids:
             return Response({'error': 'Can only view logbooks from your supervisees'}, status=status.HTTP_403_FORBIDDEN)
 
+    snapshot = snapshots.get_snapshot(logbook)
+    if snapshot:
+        return snapshots.snapshot_response(request, snapshot, snapshots.load(snapshot)['entries']['section_b'])
+
     from section_b.models import ProfessionalDevelopmentEntry
     from section_b.serializers import ProfessionalDevelopmentEntrySerializer
 
@@ -1587,16 +1595,14 @@ def logbook_section_c_entries(request, logbook_id):
         return Response({'error': 'Can only view your own logbooks'}, status=status.HTTP_403_FORBIDDEN)
 
     if user_role == 'SUPERVISOR':
-        from api.models import Supervision
-        supervisee_relationships = Supervision.objects.filter(
-            supervisor=request.user,
-            role='PRIMARY',
-            status='ACCEPTED'
-        )
-        supervisee_users = [rel.supervisee for rel in supervisee_relationships if rel.supervisee]
-        if logbook.trainee not in supervisee_users:
+        supervisee_ids = get_principal(request).supervisee_ids(primary_only=True)
+        if logbook.trainee_id not in supervisee_ids:
             return Response({'error': 'Can only view logbooks from your supervisees'}, status=status.HTTP_403_FORBIDDEN)
 
+    snapshot = snapshots.get_snapshot(logbook)
+    if snapshot:
+        return snapshots.snapshot_response(request, snapshot, snapshots.load(snapshot)['entries']['section_c'])
+
     from section_c.models import SupervisionEntry
     from section_c.serializers import SupervisionEntrySerializer
 
@@ -1824,20 +1830,19 @@ def unlock_requests_queue(request):
         requests = UnlockRequest.objects.filter(
             status='pending',
             logbook__trainee__profile__organization=user_org
-        ).prefetch_related('logbook__trainee__profile', 'requester__profile')
+        )
         
     elif user_role == 'SUPERVISOR':
         # Supervisors see requests from users not in an organization
         requests = UnlockRequest.objects.filter(
             status='pending',
             logbook__trainee__profile__organization__isnull=True
-        ).prefetch_related('logbook__trainee__profile', 'requester__profile')
+        )
         
     else:
         return Response({'error': 'Insufficient permissions'}, status=status.HTTP_403_FORBIDDEN)
     
-    serializer = UnlockRequestSerializer(requests, many=True, context={'request': request})
-    return Response(serializer.data)
+    return Response(row_serializers.unlock_request_rows(requests, request.user))
 
 
 @api_view(['POST'])
@@ -2356,6 +2361,32 @@ def logbook_review(request, logbook_id):
     return Response({'error': 'Invalid decision'}, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@support_error_handler
+def logbook_bulk_review(request):
+    """Supervisor approves, returns or rejects many submitted logbooks in one request"""
+    if not hasattr(request.user, 'profile') or request.user.profile.role != 'SUPERVISOR':
+        return Response({'error': 'Only supervisors can review'}, status=status.HTTP_403_FORBIDDEN)
+
+    decisions = request.data.get('decisions') if isinstance(request.data, dict) else None
+    if not isinstance(decisions, list) or not decisions:
+        return Response({'error': 'decisions must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(decisions) > bulk_review.MAX_DECISIONS:
+        return Response(
+            {'error': f'At most {bulk_review.MAX_DECISIONS} decisions per request'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    results = bulk_review.apply_decisions(request.user, decisions)
+    applied = sum(1 for result in results if result['success'])
+    return Response({
+        'applied': applied,
+        'failed': len(results) - applied,
+        'results': results,
+    })
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 @support_error_handler
@@ -2379,76 +2410,44 @@ def logbook_html_report(request, logbook_id):
     elif user_role != 'SUPERVISOR':
         return Response({'error': 'Insufficient permissions'}, status=status.HTTP_403_FORBIDDEN)
     
-    # Get all entries
-    from section_a.models import SectionAEntry
-    from section_b.models import ProfessionalDevelopmentEntry
-    from section_c.models import SupervisionEntry
-    from django.db.models import Sum
-    
-    section_a_entries = SectionAEntry.objects.filter(id__in=logbook.section_a_entry_ids).order_by('session_date')
-    section_b_entries = ProfessionalDevelopmentEntry.objects.filter(id__in=logbook.section_b_entry_ids).order_by('date_of_activity')
-    section_c_entries = SupervisionEntry.objects.filter(id__in=logbook.section_c_entry_ids).order_by('date_of_supervision')
+    snapshot = snapshots.get_snapshot(logbook)
+    if snapshot:
+        return snapshots.snapshot_response(request, snapshot, html=snapshots.load(snapshot)['report_html'])
     
-    # Calculate totals
-    section_a_total_minutes = sum(e.duration_minutes or 0 for e in section_a_entries)
-    section_b_total_minutes = sum(e.duration_minutes or 0 for e in section_b_entries)
-    section_c_total_minutes = sum(e.duration_minutes or 0 for e in section_c_entries)
-    
-    # Calculate cumulative totals (all entries before and including this week)
-    section_a_cumulative = SectionAEntry.objects.filter(
-        trainee=logbook.trainee,
-        session_date__lte=logbook.week_end_date
-    ).aggregate(Sum('duration_minutes'))['duration_minutes__sum'] or 0
+    return HttpResponse(report_cache.get_report(logbook))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@support_error_handler
+def logbook_snapshot(request, logbook_id, content_hash):
+    """Frozen snapshot of an approved logbook, addressed by its content hash (cacheable forever)"""
+    try:
+        logbook = WeeklyLogbook.objects.get(id=logbook_id)
+    except WeeklyLogbook.DoesNotExist:
+        return Response({'error': 'Logbook not found'}, status=status.HTTP_404_NOT_FOUND)
     
-    section_b_cumulative = ProfessionalDevelopmentEntry.objects.filter(
-        trainee=logbook.trainee,
-        date_of_activity__lte=logbook.week_end_date
-    ).aggregate(Sum('duration_minutes'))['duration_minutes__sum'] or 0
+    if not hasattr(request.user, 'profile'):
+        return Response({'error': 'User profile not found'}, status=status.HTTP_403_FORBIDDEN)
     
-    section_c_cumulative = SupervisionEntry.objects.filter(
-        trainee=logbook.trainee.profile,
-        week_starting__lte=logbook.week_start_date
-    ).aggregate(Sum('duration_minutes'))['duration_minutes__sum'] or 0
+    user_role = request.user.profile.role
+    if user_role in ['PROVISIONAL', 'REGISTRAR']:
+        if logbook.trainee != request.user:
+            return Response({'error': 'Can only view your own logbooks'}, status=status.HTTP_403_FORBIDDEN)
+    elif user_role == 'SUPERVISOR':
+        if logbook.trainee_id not in get_principal(request).supervisee_ids(primary_only=True):
+            return Response({'error': 'Can only view logbooks from your supervisees'}, status=status.HTTP_403_FORBIDDEN)
+    else:
+        return Response({'error': 'Insufficient permissions'}, status=status.HTTP_403_FORBIDDEN)
     
-    # Helper function to format minutes to hours:minutes
-    def format_minutes(minutes):
-        hours = minutes // 60
-        mins = minutes % 60
-        return f"{hours}h {mins}m" if hours > 0 else f"{mins}m"
-    
-    # Get trainee info
-    trainee_profile = logbook.trainee.profile
-    trainee_name = f"{trainee_profile.first_name} {trainee_profile.last_name}".strip()
-    ahpra_number = trainee_profile.ahpra_registration_number or "Not provided"
-    supervisor_name = trainee_profile.principal_supervisor or "Not assigned"
-    
-    # Prepare context
-    context = {
-        'logbook': logbook,
-        'trainee_name': trainee_name,
-        'ahpra_number': ahpra_number,
-        'supervisor_name': supervisor_name,
-        'section_a_entries': section_a_entries,
-        'section_b_entries': section_b_entries,
-        'section_c_entries': section_c_entries,
-        'section_a_total_minutes': section_a_total_minutes,
-        'section_b_total_minutes': section_b_total_minutes,
-        'section_c_total_minutes': section_c_total_minutes,
-        'section_a_cumulative_minutes': section_a_cumulative,
-        'section_b_cumulative_minutes': section_b_cumulative,
-        'section_c_cumulative_minutes': section_c_cumulative,
-        'section_a_total_hours': format_minutes(section_a_total_minutes),
-        'section_b_total_hours': format_minutes(section_b_total_minutes),
-        'section_c_total_hours': format_minutes(section_c_total_minutes),
-        'section_a_cumulative_hours': format_minutes(section_a_cumulative),
-        'section_b_cumulative_hours': format_minutes(section_b_cumulative),
-        'section_c_cumulative_hours': format_minutes(section_c_cumulative),
-        'total_weekly_hours': format_minutes(section_a_total_minutes + section_b_total_minutes + section_c_total_minutes),
-        'total_cumulative_hours': format_minutes(section_a_cumulative + section_b_cumulative + section_c_cumulative),
-        'now': timezone.now(),
-    }
+    snapshot = snapshots.get_snapshot(logbook)
+    if not snapshot or snapshot.content_hash != content_hash:
+        return Response({'error': 'Snapshot not found'}, status=status.HTTP_404_NOT_FOUND)
     
-    return render(request, 'logbook_report.html', context)
+    payload = {key: value for key, value in snapshots.load(snapshot).items() if key != 'report_html'}
+    return snapshots.snapshot_response(
+        request, snapshot, payload, cache_control=snapshots.IMMUTABLE_CACHE_CONTROL
+    )
 
 
 # Notification API endpoints
@@ -2467,8 +2466,7 @@ def notification_list(request):
         user=request.user
     ).order_by('-created_at')[:limit]
     
-    serializer = NotificationSerializer(notifications, many=True)
-    return Response(serializer.data)
+    return Response(row_serializers.notification_rows(notifications))
 
 
 @api_view(['GET'])
@@ -2719,7 +2717,9 @@ def logbook_review_history(request, logbook_id):
         return Response({'error': 'Insufficient permissions'}, status=status.HTTP_403_FORBIDDEN)
     
     # Get audit logs
-    audit_logs = LogbookAuditLog.objects.filter(logbook=logbook).order_by('-created_at')
+    audit_logs = with_history(
+        LogbookAuditLog.objects.filter(logbook=logbook).order_by('-timestamp'), 'logbook_audit', logbook.id
+    )
     audit_serializer = LogbookAuditLogSerializer(audit_logs, many=True, context={'request': request})
     
     # Get review requests
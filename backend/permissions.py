@@ -3,6 +3,7 @@ from django.contrib.auth.models import User
 from api.models import UserProfile
 from logging_utils import log_data_access
 from api.models import UserRole
+from api.principal import get_principal
 
 class TenantPermissionMixin:
     """
@@ -24,9 +25,9 @@ class TenantPermissionMixin:
             result='FILTERING'
         )
         
-        try:
-            user_profile = user.profile
-        except UserProfile.DoesNotExist:
+        principal = get_principal(self.request)
+        user_profile = principal.profile
+        if user_profile is None:
             # User has no profile - deny access
             log_data_access(
                 user=user,
@@ -67,8 +68,8 @@ class TenantPermissionMixin:
     
     def filter_for_supervisor(self, queryset, user_profile):
         """Filter data for supervisors - only their assigned trainees"""
-        # Get IDs of trainees assigned to this supervisor
-        trainee_ids = user_profile.supervising.values_list('id', flat=True)
+        # Profile IDs of trainees assigned to this supervisor (memoized per request)
+        trainee_ids = get_principal(self.request).supervisee_profile_ids()
         
         log_data_access(
             user=self.request.user,
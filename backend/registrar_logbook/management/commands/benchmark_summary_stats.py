@@ -0,0 +1,81 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from registrar_logbook.models import RegistrarPracticeEntry, RegistrarProgram
+from registrar_logbook.stats import practice_summary_stats
+
+TAGS = [
+    'Assessment', 'Intervention strategies', 'Ethical practice', 'Communication',
+    'Research and evaluation', 'Cultural competence', 'Consultation', 'Supervision',
+]
+
+
+class Command(BaseCommand):
+    help = 'Time practice-entry summary_stats over a synthetic program (all rows are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entries', type=int, default=50000, help='Practice entries to generate')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs after one warm-up run')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            program = self.create_program()
+            self.create_entries(program, options['entries'], rng)
+            entries = RegistrarPracticeEntry.objects.filter(program=program)
+
+            practice_summary_stats(entries)
+            timings = []
+            for _ in range(options['repeat']):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    stats = practice_summary_stats(entries)
+                    timings.append(time.perf_counter() - started)
+
+            timings.sort()
+            self.stdout.write(
+                f"{stats['total_entries']} entries on {connection.vendor}: "
+                f"{len(queries)} queries, median {timings[len(timings) // 2] * 1000:.1f} ms, "
+                f"best {timings[0] * 1000:.1f} ms"
+            )
+            transaction.set_rollback(True)
+
+    def create_program(self):
+        user = User.objects.create_user(username='summary-stats-benchmark', password=None)
+        return RegistrarProgram.objects.create(
+            user=user, aope='CLINICAL', qualification_tier='masters', start_date=date(2020, 1, 1),
+            expected_end_date=date(2022, 1, 1), targets_practice_hrs=3000, targets_supervision_hrs=80,
+            targets_cpd_hrs=80,
+        )
+
+    def create_entries(self, program, count, rng):
+        settings = [value for value, _ in RegistrarPracticeEntry.SETTING_CHOICES]
+        categories = [value for value, _ in RegistrarPracticeEntry.DCC_CATEGORIES]
+        batch = []
+        for n in range(count):
+            duration = rng.choice([30, 45, 60, 90, 120])
+            batch.append(RegistrarPracticeEntry(
+                program=program,
+                date=date(2020, 1, 1) + timedelta(days=n % 730),
+                duration_minutes=duration,
+                dcc_minutes=rng.choice([0, duration // 2, duration]),
+                dcc_categories=rng.sample(categories, rng.randint(0, 2)),
+                setting=rng.choice(settings),
+                modality='in_person',
+                client_code=f'C-{n % 1000:03d}',
+                client_age_band='26-44',
+                tasks='Benchmark entry',
+                competency_tags=rng.sample(TAGS, rng.randint(0, 3)),
+                created_by=program.user,
+            ))
+            if len(batch) == 5000:
+                RegistrarPracticeEntry.objects.bulk_create(batch)
+                batch = []
+        RegistrarPracticeEntry.objects.bulk_create(batch)
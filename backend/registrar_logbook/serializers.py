@@ -9,6 +9,7 @@ from .models import (
     RegistrarCpdEntry, SupervisorProfile, CompetencyFramework, 
     ProgressSnapshot, AuditLog
 )
+from .stats import attach_program_metrics, supervision_minutes, supervision_percentage
 
 
 class RegistrarValidationService:
@@ -39,36 +40,19 @@ class RegistrarValidationService:
     @staticmethod
     def validate_supervision_mix(program_id):
         """Validate supervision mix compliance"""
-        entries = RegistrarSupervisionEntry.objects.filter(program_id=program_id)
-        if not entries.exists():
+        minutes = supervision_minutes([program_id]).get(program_id)
+        if not minutes:
             return {'valid': True, 'warnings': []}
         
-        total_minutes = sum(entry.duration_minutes for entry in entries)
+        total_minutes = minutes['total']
         if total_minutes == 0:
             return {'valid': True, 'warnings': []}
         
         # Calculate percentages
-        principal_minutes = sum(
-            entry.duration_minutes for entry in entries 
-            if entry.supervisor_category == 'principal'
-        )
-        individual_minutes = sum(
-            entry.duration_minutes for entry in entries 
-            if entry.type == 'individual'
-        )
-        group_minutes = sum(
-            entry.duration_minutes for entry in entries 
-            if entry.type == 'group'
-        )
-        shorter_minutes = sum(
-            entry.duration_minutes for entry in entries 
-            if entry.shorter_than_60min
-        )
-        
-        principal_percentage = (principal_minutes / total_minutes) * 100
-        individual_percentage = (individual_minutes / total_minutes) * 100
-        group_percentage = (group_minutes / total_minutes) * 100
-        shorter_percentage = (shorter_minutes / total_minutes) * 100
+        principal_percentage = (minutes['principal'] / total_minutes) * 100
+        individual_percentage = (minutes['individual'] / total_minutes) * 100
+        group_percentage = (minutes['group'] / total_minutes) * 100
+        shorter_percentage = (minutes['shorter_than_60min'] / total_minutes) * 100
         
         warnings = []
         errors = []
@@ -90,14 +74,8 @@ class RegistrarValidationService:
             warnings.append(f"Short sessions (<60min) exceed 25% cap (currently {shorter_percentage:.1f}%)")
         
         # Check secondary supervisor caps
-        secondary_same_aope_minutes = sum(
-            entry.duration_minutes for entry in entries 
-            if entry.supervisor_category == 'secondary_same_aope'
-        )
-        secondary_other_minutes = sum(
-            entry.duration_minutes for entry in entries 
-            if entry.supervisor_category == 'secondary_other_or_not_endorsed'
-        )
+        secondary_same_aope_minutes = minutes['secondary_same_aope']
+        secondary_other_minutes = minutes['secondary_other_or_not_endorsed']
         
         secondary_same_aope_percentage = (secondary_same_aope_minutes / total_minutes) * 100
         secondary_other_percentage = (secondary_other_minutes / total_minutes) * 100
@@ -655,6 +633,13 @@ class RegistrarComplianceSummarySerializer(serializers.Serializer):
 
 # Specialized serializers for dashboard and reporting
 
+def program_metrics_for(program):
+    """Totals behind the dashboard/summary fields, loaded once per program"""
+    if not hasattr(program, 'dashboard_metrics'):
+        attach_program_metrics([program])
+    return program.dashboard_metrics
+
+
 class RegistrarProgramDashboardSerializer(serializers.ModelSerializer):
     """Serializer for registrar program dashboard with calculated metrics"""
     
@@ -689,95 +674,31 @@ class RegistrarProgramDashboardSerializer(serializers.ModelSerializer):
         ]
     
     def get_practice_hours_completed(self, obj):
-        from django.db.models import Sum
-        total_minutes = obj.practice_entries.aggregate(
-            total=Sum('duration_minutes')
-        )['total'] or 0
-        return round(total_minutes / 60, 2)
+        return round(program_metrics_for(obj)['practice_minutes'] / 60, 2)
     
     def get_supervision_hours_completed(self, obj):
-        from django.db.models import Sum
-        total_minutes = obj.supervision_entries.aggregate(
-            total=Sum('duration_minutes')
-        )['total'] or 0
-        return round(total_minutes / 60, 2)
+        return round(program_metrics_for(obj)['supervision']['total'] / 60, 2)
     
     def get_cpd_hours_completed(self, obj):
-        from django.db.models import Sum
-        total_hours = obj.cpd_entries.aggregate(
-            total=Sum('hours')
-        )['total'] or 0
-        return float(total_hours)
+        return program_metrics_for(obj)['cpd_hours']
     
     def get_dcc_hours_completed(self, obj):
-        from django.db.models import Sum
-        total_dcc_minutes = obj.practice_entries.filter(dcc_minutes__gt=0).aggregate(
-            total=Sum('dcc_minutes')
-        )['total'] or 0
-        return round(total_dcc_minutes / 60, 2)
+        return round(program_metrics_for(obj)['dcc_minutes'] / 60, 2)
     
     def get_active_cpd_hours_completed(self, obj):
-        from django.db.models import Sum
-        total_hours = obj.cpd_entries.filter(is_active_cpd=True).aggregate(
-            total=Sum('hours')
-        )['total'] or 0
-        return float(total_hours)
+        return program_metrics_for(obj)['active_cpd_hours']
     
     def get_principal_supervision_percentage(self, obj):
-        from django.db.models import Sum
-        total_minutes = obj.supervision_entries.aggregate(
-            total=Sum('duration_minutes')
-        )['total'] or 0
-        principal_minutes = obj.supervision_entries.filter(
-            supervisor_category='principal'
-        ).aggregate(total=Sum('duration_minutes'))['total'] or 0
-        
-        if total_minutes == 0:
-            return 0.0
-        
-        return round((principal_minutes / total_minutes) * 100, 1)
+        return supervision_percentage(program_metrics_for(obj)['supervision'], 'principal')
     
     def get_individual_supervision_percentage(self, obj):
-        from django.db.models import Sum
-        total_minutes = obj.supervision_entries.aggregate(
-            total=Sum('duration_minutes')
-        )['total'] or 0
-        individual_minutes = obj.supervision_entries.filter(
-            type='individual'
-        ).aggregate(total=Sum('duration_minutes'))['total'] or 0
-        
-        if total_minutes == 0:
-            return 0.0
-        
-        return round((individual_minutes / total_minutes) * 100, 1)
+        return supervision_percentage(program_metrics_for(obj)['supervision'], 'individual')
     
     def get_group_supervision_percentage(self, obj):
-        from django.db.models import Sum
-        total_minutes = obj.supervision_entries.aggregate(
-            total=Sum('duration_minutes')
-        )['total'] or 0
-        group_minutes = obj.supervision_entries.filter(
-            type='group'
-        ).aggregate(total=Sum('duration_minutes'))['total'] or 0
-        
-        if total_minutes == 0:
-            return 0.0
-        
-        return round((group_minutes / total_minutes) * 100, 1)
+        return supervision_percentage(program_metrics_for(obj)['supervision'], 'group')
     
     def get_short_sessions_percentage(self, obj):
-        from django.db.models import Sum
-        total_minutes = obj.supervision_entries.aggregate(
-            total=Sum('duration_minutes')
-        )['total'] or 0
-        short_minutes = obj.supervision_entries.filter(
-            shorter_than_60min=True
-        ).aggregate(total=Sum('duration_minutes'))['total'] or 0
-        
-        if total_minutes == 0:
-            return 0.0
-        
-        return round((short_minutes / total_minutes) * 100, 1)
+        return supervision_percentage(program_metrics_for(obj)['supervision'], 'shorter_than_60min')
     
     def get_supervision_compliance_status(self, obj):
         """Check supervision mix compliance"""
@@ -844,40 +765,21 @@ class RegistrarProgramSummarySerializer(serializers.ModelSerializer):
         ]
     
     def get_practice_hours_completed(self, obj):
-        from django.db.models import Sum
-        total_minutes = obj.practice_entries.aggregate(
-            total=Sum('duration_minutes')
-        )['total'] or 0
-        return round(total_minutes / 60, 2)
+        return round(program_metrics_for(obj)['practice_minutes'] / 60, 2)
     
     def get_supervision_hours_completed(self, obj):
-        from django.db.models import Sum
-        total_minutes = obj.supervision_entries.aggregate(
-            total=Sum('duration_minutes')
-        )['total'] or 0
-        return round(total_minutes / 60, 2)
+        return round(program_metrics_for(obj)['supervision']['total'] / 60, 2)
     
     def get_cpd_hours_completed(self, obj):
-        from django.db.models import Sum
-        total_hours = obj.cpd_entries.aggregate(
-            total=Sum('hours')
-        )['total'] or 0
-        return float(total_hours)
+        return program_metrics_for(obj)['cpd_hours']
     
     def get_dcc_hours_completed(self, obj):
-        from django.db.models import Sum
-        total_dcc_minutes = obj.practice_entries.filter(dcc_minutes__gt=0).aggregate(
-            total=Sum('dcc_minutes')
-        )['total'] or 0
-        return round(total_dcc_minutes / 60, 2)
+        return round(program_metrics_for(obj)['dcc_minutes'] / 60, 2)
     
     def get_supervision_mix(self, obj):
-        from django.db.models import Sum
-        total_minutes = obj.supervision_entries.aggregate(
-            total=Sum('duration_minutes')
-        )['total'] or 0
+        minutes = program_metrics_for(obj)['supervision']
         
-        if total_minutes == 0:
+        if minutes['total'] == 0:
             return {
                 'total_hours': 0,
                 'principal_percentage': 0,
@@ -886,28 +788,12 @@ class RegistrarProgramSummarySerializer(serializers.ModelSerializer):
                 'short_sessions_percentage': 0
             }
         
-        principal_minutes = obj.supervision_entries.filter(
-            supervisor_category='principal'
-        ).aggregate(total=Sum('duration_minutes'))['total'] or 0
-        
-        individual_minutes = obj.supervision_entries.filter(
-            type='individual'
-        ).aggregate(total=Sum('duration_minutes'))['total'] or 0
-        
-        group_minutes = obj.supervision_entries.filter(
-            type='group'
-        ).aggregate(total=Sum('duration_minutes'))['total'] or 0
-        
-        short_minutes = obj.supervision_entries.filter(
-            shorter_than_60min=True
-        ).aggregate(total=Sum('duration_minutes'))['total'] or 0
-        
         return {
-            'total_hours': round(total_minutes / 60, 2),
-            'principal_percentage': round((principal_minutes / total_minutes) * 100, 1),
-            'individual_percentage': round((individual_minutes / total_minutes) * 100, 1),
-            'group_percentage': round((group_minutes / total_minutes) * 100, 1),
-            'short_sessions_percentage': round((short_minutes / total_minutes) * 100, 1)
+            'total_hours': round(minutes['total'] / 60, 2),
+            'principal_percentage': supervision_percentage(minutes, 'principal'),
+            'individual_percentage': supervision_percentage(minutes, 'individual'),
+            'group_percentage': supervision_percentage(minutes, 'group'),
+            'short_sessions_percentage': supervision_percentage(minutes, 'shorter_than_60min')
         }
     
     def get_competency_summary(self, obj):
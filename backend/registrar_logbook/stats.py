@@ -0,0 +1,193 @@
+"""
+Set-based statistics over registrar practice, supervision and CPD entries.
+
+``practice_summary_stats`` answers the practice-entry summary in a fixed number
+of queries however many entries are in scope: one aggregate for the totals and
+date range, one GROUP BY on setting, and one query that unnests the
+``dcc_categories`` and ``competency_tags`` JSON arrays in the database
+(``jsonb_array_elements_text`` on Postgres, ``json_each`` on SQLite).
+
+``attach_program_metrics`` loads the dashboard totals of any number of programs
+with one grouped, conditional aggregate per entry table.
+"""
+
+from django.db import connections
+from django.db.models import Count, Max, Min, Q, Sum
+
+from .models import RegistrarCpdEntry, RegistrarPracticeEntry, RegistrarSupervisionEntry
+
+TABLE = RegistrarPracticeEntry._meta.db_table
+
+# Each branch yields (kind, value, count). DCC categories count entries (an entry
+# listing a category twice counts once); competency tags count every tag.
+UNNEST_SQL = {
+    'postgresql': f"""
+        SELECT 'dcc', j.value, COUNT(DISTINCT e.id)
+        FROM {TABLE} e CROSS JOIN LATERAL jsonb_array_elements_text(e.dcc_categories) AS j(value)
+        WHERE jsonb_typeof(e.dcc_categories) = 'array' AND e.id IN ({{scope}})
+        GROUP BY j.value
+        UNION ALL
+        SELECT 'tag', j.value, COUNT(*)
+        FROM {TABLE} e CROSS JOIN LATERAL jsonb_array_elements_text(e.competency_tags) AS j(value)
+        WHERE jsonb_typeof(e.competency_tags) = 'array' AND e.id IN ({{scope}})
+        GROUP BY j.value
+    """,
+    'sqlite': f"""
+        SELECT 'dcc', j.value, COUNT(DISTINCT e.id)
+        FROM {TABLE} e, json_each(e.dcc_categories) j
+        WHERE json_type(e.dcc_categories) = 'array' AND e.id IN ({{scope}})
+        GROUP BY j.value
+        UNION ALL
+        SELECT 'tag', j.value, COUNT(*)
+        FROM {TABLE} e, json_each(e.competency_tags) j
+        WHERE json_type(e.competency_tags) = 'array' AND e.id IN ({{scope}})
+        GROUP BY j.value
+    """,
+}
+
+
+def _unnest_counts(entries):
+    """``({category: entries}, {tag: occurrences})`` for the entries in scope"""
+    connection = connections[entries.db]
+    template = UNNEST_SQL.get(connection.vendor)
+    if template is None:
+        return _unnest_counts_in_python(entries)
+    scope_sql, scope_params = (
+        entries.order_by().values('id').query.get_compiler(connection=connection).as_sql()
+    )
+    categories, tags = {}, {}
+    with connection.cursor() as cursor:
+        cursor.execute(template.format(scope=scope_sql), list(scope_params) * 2)
+        for kind, value, count in cursor.fetchall():
+            (categories if kind == 'dcc' else tags)[value] = count
+    return categories, tags
+
+
+def _unnest_counts_in_python(entries):
+    categories, tags = {}, {}
+    for dcc_categories, competency_tags in entries.values_list('dcc_categories', 'competency_tags').iterator():
+        for category in set(dcc_categories or []):
+            categories[category] = categories.get(category, 0) + 1
+        for tag in competency_tags or []:
+            tags[tag] = tags.get(tag, 0) + 1
+    return categories, tags
+
+
+def practice_summary_stats(entries):
+    """Summary statistics for a queryset of practice entries"""
+    if entries.query.distinct:
+        # Joins behind a DISTINCT scope would inflate the GROUP BY counts
+        entries = RegistrarPracticeEntry.objects.filter(pk__in=entries.order_by().values('pk'))
+
+    totals = entries.order_by().aggregate(
+        count=Count('id'),
+        duration=Sum('duration_minutes'),
+        dcc=Sum('dcc_minutes'),
+        start=Min('date'),
+        end=Max('date'),
+    )
+    total_duration = totals['duration'] or 0
+    total_dcc = totals['dcc'] or 0
+
+    setting_counts = dict(entries.order_by().values_list('setting').annotate(count=Count('id')))
+    settings = {
+        label: setting_counts[value]
+        for value, label in RegistrarPracticeEntry.SETTING_CHOICES
+        if setting_counts.get(value)
+    }
+
+    category_counts, tag_counts = _unnest_counts(entries) if totals['count'] else ({}, {})
+    dcc_categories = {
+        label: category_counts[value]
+        for value, label in RegistrarPracticeEntry.DCC_CATEGORIES
+        if category_counts.get(value)
+    }
+
+    return {
+        'total_entries': totals['count'],
+        'total_duration_minutes': total_duration,
+        'total_duration_hours': round(total_duration / 60, 2),
+        'total_dcc_minutes': total_dcc,
+        'total_dcc_hours': round(total_dcc / 60, 2),
+        'dcc_ratio': round((total_dcc / total_duration * 100) if total_duration > 0 else 0, 1),
+        'settings_distribution': settings,
+        'dcc_categories_distribution': dcc_categories,
+        'competency_distribution': dict(sorted(tag_counts.items(), key=lambda item: (-item[1], item[0]))),
+        'date_range': {
+            'start': totals['start'],
+            'end': totals['end'],
+        },
+    }
+
+
+SUPERVISION_MIX = {
+    'principal': Q(supervisor_category='principal'),
+    'individual': Q(type='individual'),
+    'group': Q(type='group'),
+    'shorter_than_60min': Q(shorter_than_60min=True),
+    'secondary_same_aope': Q(supervisor_category='secondary_same_aope'),
+    'secondary_other_or_not_endorsed': Q(supervisor_category='secondary_other_or_not_endorsed'),
+}
+
+
+def _grouped(queryset, **aggregates):
+    rows = queryset.order_by().values('program_id').annotate(**aggregates)
+    return {row.pop('program_id'): row for row in rows}
+
+
+def supervision_minutes(program_ids):
+    """
+    ``{program_id: {'entries', 'total', <mix category>...}}`` of supervision
+    minutes, one row per program with supervision entries
+    """
+    aggregates = {key: Sum('duration_minutes', filter=condition) for key, condition in SUPERVISION_MIX.items()}
+    rows = _grouped(
+        RegistrarSupervisionEntry.objects.filter(program_id__in=program_ids),
+        entries=Count('id'), total=Sum('duration_minutes'), **aggregates,
+    )
+    for row in rows.values():
+        for key, value in row.items():
+            row[key] = value or 0
+    return rows
+
+
+def program_metrics(program_ids):
+    """Dashboard totals per program id, in one query per entry table"""
+    program_ids = list(program_ids)
+    practice = _grouped(
+        RegistrarPracticeEntry.objects.filter(program_id__in=program_ids),
+        practice_minutes=Sum('duration_minutes'), total_dcc_minutes=Sum('dcc_minutes'),
+    )
+    supervision = supervision_minutes(program_ids)
+    cpd = _grouped(
+        RegistrarCpdEntry.objects.filter(program_id__in=program_ids),
+        cpd_hours=Sum('hours'), active_cpd_hours=Sum('hours', filter=Q(is_active_cpd=True)),
+    )
+    empty_mix = dict.fromkeys(['entries', 'total', *SUPERVISION_MIX], 0)
+    metrics = {}
+    for program_id in program_ids:
+        practice_row = practice.get(program_id, {})
+        cpd_row = cpd.get(program_id, {})
+        metrics[program_id] = {
+            'practice_minutes': practice_row.get('practice_minutes') or 0,
+            'dcc_minutes': practice_row.get('total_dcc_minutes') or 0,
+            'supervision': supervision.get(program_id, empty_mix),
+            'cpd_hours': float(cpd_row.get('cpd_hours') or 0),
+            'active_cpd_hours': float(cpd_row.get('active_cpd_hours') or 0),
+        }
+    return metrics
+
+
+def attach_program_metrics(programs):
+    """Set ``dashboard_metrics`` on each program (see ``program_metrics``)"""
+    programs = list(programs)
+    metrics = program_metrics(program.pk for program in programs)
+    for program in programs:
+        program.dashboard_metrics = metrics[program.pk]
+    return programs
+
+
+def supervision_percentage(minutes, key):
+    if not minutes['total']:
+        return 0.0
+    return round(minutes[key] / minutes['total'] * 100, 1)
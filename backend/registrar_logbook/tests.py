@@ -1,3 +1,119 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.models import UserProfile
+from .models import RegistrarCpdEntry, RegistrarPracticeEntry, RegistrarProgram, RegistrarSupervisionEntry
+from .serializers import RegistrarProgramDashboardSerializer, RegistrarValidationService
+
+
+class PracticeSummaryStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='registrar', email='registrar@test.com', password='pass1234')
+        UserProfile.objects.create(user=self.user, role='REGISTRAR', first_name='Test', last_name='Registrar')
+        self.program = RegistrarProgram.objects.create(
+            user=self.user, aope='CLINICAL', qualification_tier='masters', start_date=date(2024, 1, 1),
+            expected_end_date=date(2025, 1, 1), targets_practice_hrs=3000, targets_supervision_hrs=80,
+            targets_cpd_hrs=80,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_entry(self, day, duration, dcc, setting, categories, tags):
+        RegistrarPracticeEntry.objects.create(
+            program=self.program, date=date(2024, 2, day), duration_minutes=duration, dcc_minutes=dcc,
+            dcc_categories=categories, setting=setting, modality='in_person', client_code='C-001',
+            client_age_band='26-44', tasks='Work', competency_tags=tags, created_by=self.user,
+        )
+
+    def test_summary_in_constant_queries(self):
+        self.add_entry(3, 120, 60, 'outpatient', ['assessment', 'assessment'], ['Assessment', 'Ethics'])
+        self.add_entry(1, 60, 0, 'outpatient', [], ['Assessment'])
+        self.add_entry(9, 60, 60, 'telehealth', ['intervention', 'unknown'], [])
+
+        # The aggregate, the setting GROUP BY and the unnesting query
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/registrar/practice-entries/summary_stats/')
+        data = response.data
+        self.assertEqual(
+            (data['total_entries'], data['total_duration_minutes'], data['total_dcc_minutes'], data['dcc_ratio']),
+            (3, 240, 120, 50.0),
+        )
+        self.assertEqual(data['settings_distribution'], {'Outpatient': 2, 'Telehealth': 1})
+        self.assertEqual(data['dcc_categories_distribution'], {'Assessment': 1, 'Intervention': 1})
+        self.assertEqual(data['competency_distribution'], {'Assessment': 2, 'Ethics': 1})
+        self.assertEqual(data['date_range'], {'start': date(2024, 2, 1), 'end': date(2024, 2, 9)})
+
+        filtered = self.client.get('/api/registrar/practice-entries/summary_stats/', {'setting': 'telehealth'}).data
+        self.assertEqual(filtered['total_entries'], 1)
+        self.assertEqual(filtered['competency_distribution'], {})
+
+    def test_empty_scope(self):
+        data = self.client.get('/api/registrar/practice-entries/summary_stats/').data
+        self.assertEqual(data['total_entries'], 0)
+        self.assertEqual(data['date_range'], {'start': None, 'end': None})
+
+    def test_benchmark_command_rolls_back(self):
+        out = StringIO()
+        call_command('benchmark_summary_stats', '--entries', '200', '--repeat', '1', stdout=out)
+        self.assertIn('200 entries', out.getvalue())
+        self.assertEqual(RegistrarPracticeEntry.objects.count(), 0)
+
+
+class ProgramDashboardMetricsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='registrar', email='registrar@test.com', password='pass1234')
+        UserProfile.objects.create(user=self.user, role='REGISTRAR', first_name='Test', last_name='Registrar')
+        self.supervisor = User.objects.create_user(username='supervisor', password='pass1234')
+        self.program = RegistrarProgram.objects.create(
+            user=self.user, aope='CLINICAL', qualification_tier='masters', start_date=date(2024, 1, 1),
+            expected_end_date=date(2025, 1, 1), targets_practice_hrs=3000, targets_supervision_hrs=80,
+            targets_cpd_hrs=80,
+        )
+        for duration, dcc in [(120, 90), (60, 0)]:
+            RegistrarPracticeEntry.objects.create(
+                program=self.program, date=date(2024, 2, 1), duration_minutes=duration, dcc_minutes=dcc,
+                setting='outpatient', modality='in_person', client_code='C-001', client_age_band='26-44',
+                tasks='Work', created_by=self.user,
+            )
+        for minutes, category, kind, short in [
+            (60, 'principal', 'individual', False),
+            (30, 'secondary_same_aope', 'group', True),
+            (30, 'principal', 'individual', True),
+        ]:
+            RegistrarSupervisionEntry.objects.create(
+                program=self.program, date=date(2024, 2, 2), duration_minutes=minutes, type=kind,
+                supervisor=self.supervisor, supervisor_category=category, shorter_than_60min=short,
+            )
+        for hours, active in [(Decimal('2.50'), True), (Decimal('1.00'), False)]:
+            RegistrarCpdEntry.objects.create(
+                program=self.program, date=date(2024, 2, 3), provider='APS', title='Workshop',
+                hours=hours, is_active_cpd=active,
+            )
+
+    def test_dashboard_reads_one_aggregate_per_entry_table(self):
+        program = RegistrarProgram.objects.get(pk=self.program.pk)
+        with self.assertNumQueries(3):
+            data = RegistrarProgramDashboardSerializer(program).data
+        self.assertEqual(
+            (data['practice_hours_completed'], data['dcc_hours_completed'], data['supervision_hours_completed']),
+            (3.0, 1.5, 2.0),
+        )
+        self.assertEqual((data['cpd_hours_completed'], data['active_cpd_hours_completed']), (3.5, 2.5))
+        self.assertEqual(
+            (data['principal_supervision_percentage'], data['individual_supervision_percentage'],
+             data['group_supervision_percentage'], data['short_sessions_percentage']),
+            (75.0, 75.0, 25.0, 50.0),
+        )
+        self.assertEqual(data['supervision_compliance_status'], 'non_compliant')
 
-# Create your tests here.
+    def test_supervision_mix_validation(self):
+        result = RegistrarValidationService.validate_supervision_mix(self.program.pk)
+        self.assertTrue(result['valid'])
+        self.assertEqual(result['percentages']['secondary_same_aope'], 25.0)
+        self.assertEqual(len(result['warnings']), 1)
@@ -11,6 +11,8 @@ import json
 import csv
 from django.http import HttpResponse
 from django.db import transaction
+from api.db_routing import read_from_replica
+from archive.history import with_history
 
 from .models import (
     RegistrarProgram, RegistrarPracticeEntry, RegistrarSupervisionEntry, 
@@ -26,6 +28,7 @@ from .serializers import (
     RegistrarComplianceSummarySerializer
 )
 from .report_generator import RegistrarReportGenerator
+from .stats import practice_summary_stats
 
 
 class IsRegistrar(permissions.BasePermission):
@@ -89,6 +92,7 @@ class RegistrarProgramViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
     @action(detail=True, methods=['get'])
+    @read_from_replica
     def dashboard(self, request, pk=None):
         """Get dashboard data for a registrar program"""
         program = self.get_object()
@@ -96,6 +100,7 @@ class RegistrarProgramViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=True, methods=['get'])
+    @read_from_replica
     def summary(self, request, pk=None):
         """Get summary data for reports"""
         program = self.get_object()
@@ -103,6 +108,7 @@ class RegistrarProgramViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=True, methods=['get'])
+    @read_from_replica
     def compliance(self, request, pk=None):
         """Get comprehensive compliance summary"""
         program = self.get_object()
@@ -215,6 +221,7 @@ class RegistrarProgramViewSet(viewsets.ModelViewSet):
         return Response({'detail': 'Final report submitted successfully'})
 
     @action(detail=True, methods=['get'])
+    @read_from_replica
     def generate_midpoint_report(self, request, pk=None):
         """Generate PREA-76 midpoint report"""
         program = self.get_object()
@@ -226,6 +233,7 @@ class RegistrarProgramViewSet(viewsets.ModelViewSet):
         return Response(report_data)
 
     @action(detail=True, methods=['get'])
+    @read_from_replica
     def generate_final_report(self, request, pk=None):
         """Generate AECR-76 final report"""
         program = self.get_object()
@@ -237,6 +245,7 @@ class RegistrarProgramViewSet(viewsets.ModelViewSet):
         return Response(report_data)
 
     @action(detail=True, methods=['get'])
+    @read_from_replica
     def export_report_csv(self, request, pk=None):
         """Export report as CSV"""
         program = self.get_object()
@@ -253,6 +262,7 @@ class RegistrarProgramViewSet(viewsets.ModelViewSet):
         return response
 
     @action(detail=True, methods=['get'])
+    @read_from_replica
     def export_report_zip(self, request, pk=None):
         """Export complete report package as ZIP"""
         program = self.get_object()
@@ -386,6 +396,7 @@ class RegistrarPracticeEntryViewSet(viewsets.ModelViewSet):
         )
 
     @action(detail=False, methods=['get'])
+    @read_from_replica
     def export_csv(self, request):
         """Export practice entries to CSV with comprehensive data"""
         entries = self.get_queryset()
@@ -429,54 +440,10 @@ class RegistrarPracticeEntryViewSet(viewsets.ModelViewSet):
         return response
 
     @action(detail=False, methods=['get'])
+    @read_from_replica
     def summary_stats(self, request):
         """Get summary statistics for practice entries"""
-        entries = self.get_queryset()
-        
-        # Calculate totals
-        total_duration = entries.aggregate(
-            total=Sum('duration_minutes')
-        )['total'] or 0
-        
-        total_dcc = entries.aggregate(
-            total=Sum('dcc_minutes')
-        )['total'] or 0
-        
-        # Count by setting
-        settings = {}
-        for setting_choice in RegistrarPracticeEntry.SETTING_CHOICES:
-            count = entries.filter(setting=setting_choice[0]).count()
-            if count > 0:
-                settings[setting_choice[1]] = count
-        
-        # Count by DCC categories
-        dcc_categories = {}
-        for dcc_choice in RegistrarPracticeEntry.DCC_CATEGORIES:
-            count = entries.filter(dcc_categories__contains=[dcc_choice[0]]).count()
-            if count > 0:
-                dcc_categories[dcc_choice[1]] = count
-        
-        # Competency distribution
-        competency_counts = {}
-        for entry in entries:
-            for tag in entry.competency_tags:
-                competency_counts[tag] = competency_counts.get(tag, 0) + 1
-        
-        return Response({
-            'total_entries': entries.count(),
-            'total_duration_minutes': total_duration,
-            'total_duration_hours': round(total_duration / 60, 2),
-            'total_dcc_minutes': total_dcc,
-            'total_dcc_hours': round(total_dcc / 60, 2),
-            'dcc_ratio': round((total_dcc / total_duration * 100) if total_duration > 0 else 0, 1),
-            'settings_distribution': settings,
-            'dcc_categories_distribution': dcc_categories,
-            'competency_distribution': competency_counts,
-            'date_range': {
-                'start': entries.order_by('date').first().date if entries.exists() else None,
-                'end': entries.order_by('-date').first().date if entries.exists() else None
-            }
-        })
+        return Response(practice_summary_stats(self.get_queryset()))
 
     @action(detail=True, methods=['post'])
     def bulk_update_tags(self, request, pk=None):
@@ -586,6 +553,7 @@ class RegistrarSupervisionEntryViewSet(viewsets.ModelViewSet):
         )
 
     @action(detail=False, methods=['get'])
+    @read_from_replica
     def export_csv(self, request):
         """Export supervision entries to CSV"""
         entries = self.get_queryset()
@@ -674,6 +642,7 @@ class RegistrarCpdEntryViewSet(viewsets.ModelViewSet):
         )
 
     @action(detail=False, methods=['get'])
+    @read_from_replica
     def export_csv(self, request):
         """Export CPD entries to CSV"""
         entries = self.get_queryset()
@@ -731,11 +700,22 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
             return AuditLog.objects.filter(program_id=program_id).order_by('-timestamp')
         return AuditLog.objects.none()
 
+    def list(self, request, *args, **kwargs):
+        program_id = request.query_params.get('program_id')
+        if not program_id or not program_id.isdigit():
+            return super().list(request, *args, **kwargs)
+        # Older history lives in the archive once archive_cold_rows has run
+        logs = with_history(
+            self.filter_queryset(self.get_queryset()).select_related('actor'), 'registrar_audit', int(program_id)
+        )
+        return Response(self.get_serializer(logs, many=True).data)
+
 
 class RegistrarReportsAPIView(APIView):
     """API for generating registrar reports"""
     permission_classes = [IsRegistrarOrSupervisor]
 
+    @read_from_replica
     def get(self, request, program_id):
         """Generate comprehensive report for a program"""
         try:
@@ -0,0 +1,282 @@
+"""
+Full-text search backends for SearchDocument.
+
+Postgres
+    A generated ``search_vector`` tsvector column (title weighted above body)
+    with a GIN index. It is computed by the database on every INSERT/UPDATE,
+    so the ORM never writes it. Queries use to_tsquery, ts_rank_cd and
+    ts_headline.
+
+SQLite (development and tests)
+    An external-content FTS5 table over (title, body), kept in sync by
+    triggers, ranked with bm25() and highlighted with snippet().
+
+Both index backends require every word of the query, the last one as a prefix
+(for search-as-you-type and partial client pseudonyms such as "LN-1").
+
+Anything else falls back to case-insensitive substring matching without
+ranking.
+
+``install_search_schema`` creates the vendor-specific objects idempotently; it
+runs from the search migrations.
+"""
+
+import html
+import re
+
+from django.db import connection as default_connection
+from django.db.models import Q
+
+from .models import SearchDocument
+
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_END = '</mark>'
+# The database marks matches with control characters; the snippet is HTML-escaped
+# before they are swapped for <mark> tags, so entry text can never inject markup
+_START = '\x02'
+_END = '\x03'
+
+TABLE = SearchDocument._meta.db_table
+FTS_TABLE = f'{TABLE}_fts'
+
+POSTGRES_SCHEMA = [
+    f"""
+    ALTER TABLE {TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(body, '')), 'B')
+    ) STORED
+    """,
+    f"CREATE INDEX IF NOT EXISTS {TABLE}_search_vector_gin ON {TABLE} USING GIN (search_vector)",
+]
+POSTGRES_DROP = [
+    f"DROP INDEX IF EXISTS {TABLE}_search_vector_gin",
+    f"ALTER TABLE {TABLE} DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_SCHEMA = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, body, content='{TABLE}', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO {FTS_TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    # Index any rows that existed before the FTS table
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+SQLITE_DROP = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def _sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE temp.search_fts5_probe USING fts5(x)")
+        except Exception:
+            return False
+        cursor.execute("DROP TABLE temp.search_fts5_probe")
+    return True
+
+
+def _execute_all(connection, statements):
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def install_search_schema(connection=None):
+    """Create the full-text index for the connection's database (idempotent)"""
+    connection = connection or default_connection
+    if connection.vendor == 'postgresql':
+        _execute_all(connection, POSTGRES_SCHEMA)
+    elif connection.vendor == 'sqlite' and _sqlite_has_fts5(connection):
+        _execute_all(connection, SQLITE_SCHEMA)
+
+
+def uninstall_search_schema(connection=None):
+    connection = connection or default_connection
+    if connection.vendor == 'postgresql':
+        _execute_all(connection, POSTGRES_DROP)
+    elif connection.vendor == 'sqlite':
+        _execute_all(connection, SQLITE_DROP)
+
+
+def query_terms(query):
+    """The words of a free-text query, as matched by the full-text backends"""
+    return re.findall(r'\w+', query)
+
+
+class SearchBackend:
+    """
+    Runs a text query against a SearchDocument queryset.
+
+    ``search`` returns ``(total, hits)`` where hits is a list of
+    ``(document_id, rank, highlight)`` for the requested page, best match first.
+    The scope queryset carries the caller's tenancy filter and is embedded as a
+    subquery, so ranking and pagination happen in the database.
+    """
+
+    def search(self, scope, query, limit, offset=0):
+        raise NotImplementedError
+
+    @staticmethod
+    def _scope_sql(scope, connection):
+        sql, params = scope.order_by().values('id').query.get_compiler(connection=connection).as_sql()
+        return sql, list(params)
+
+
+class PostgresSearchBackend(SearchBackend):
+    def __init__(self, connection):
+        self.connection = connection
+
+    @staticmethod
+    def tsquery_expression(query):
+        """
+        Turn free text into a to_tsquery expression: every word must match, the
+        last one as a prefix. Quoting keeps the words literal.
+        """
+        terms = query_terms(query)
+        if not terms:
+            return None
+        quoted = [f"'{term}'" for term in terms]
+        quoted[-1] += ':*'
+        return ' & '.join(quoted)
+
+    def search(self, scope, query, limit, offset=0):
+        tsquery = self.tsquery_expression(query)
+        if tsquery is None:
+            return 0, []
+        scope_sql, scope_params = self._scope_sql(scope, self.connection)
+        headline_options = f'StartSel={_START}, StopSel={_END}, MaxFragments=2, MaxWords=20, MinWords=5'
+        sql = f"""
+            WITH q AS (SELECT to_tsquery('english', %s) AS query)
+            SELECT d.id, ts_rank_cd(d.search_vector, q.query) AS rank,
+                   ts_headline('english', d.title || ' ' || d.body, q.query, %s) AS highlight,
+                   count(*) OVER () AS total
+            FROM {TABLE} d, q
+            WHERE d.search_vector @@ q.query AND d.id IN ({scope_sql})
+            ORDER BY rank DESC, d.entry_date DESC NULLS LAST, d.id DESC
+            LIMIT %s OFFSET %s
+        """
+        return _run(self.connection, sql, [tsquery, headline_options] + scope_params + [limit, offset], offset)
+
+
+class SQLiteFTSSearchBackend(SearchBackend):
+    def __init__(self, connection):
+        self.connection = connection
+
+    @staticmethod
+    def match_expression(query):
+        """
+        Turn free text into an FTS5 query: every word must match, the last one
+        as a prefix (for search-as-you-type). Quoting avoids FTS5 syntax errors.
+        """
+        terms = query_terms(query)
+        if not terms:
+            return None
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += '*'
+        return ' '.join(quoted)
+
+    def search(self, scope, query, limit, offset=0):
+        match = self.match_expression(query)
+        if match is None:
+            return 0, []
+        scope_sql, scope_params = self._scope_sql(scope, self.connection)
+        # bm25 is lower-is-better; weight title matches above body matches.
+        # snippet() column -1 picks the best matching column. FTS5 auxiliary
+        # functions must run in the MATCH query itself, hence the subquery.
+        sql = f"""
+            SELECT m.id, m.rank, m.highlight, count(*) OVER () AS total
+            FROM (
+                SELECT rowid AS id, -bm25({FTS_TABLE}, 10.0, 1.0) AS rank,
+                       snippet({FTS_TABLE}, -1, %s, %s, '...', 16) AS highlight
+                FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s
+            ) m JOIN {TABLE} d ON d.id = m.id
+            WHERE d.id IN ({scope_sql})
+            ORDER BY m.rank DESC, d.entry_date DESC, d.id DESC
+            LIMIT %s OFFSET %s
+        """
+        params = [_START, _END, match] + scope_params + [limit, offset]
+        return _run(self.connection, sql, params, offset)
+
+
+class SubstringSearchBackend(SearchBackend):
+    """Unranked icontains fallback for databases without a full-text index"""
+
+    def search(self, scope, query, limit, offset=0):
+        terms = query.split()
+        if not terms:
+            return 0, []
+        matches = scope
+        for term in terms:
+            matches = matches.filter(Q(title__icontains=term) | Q(body__icontains=term))
+        total = matches.count()
+        hits = []
+        for document in matches.order_by('-entry_date', '-id')[offset:offset + limit]:
+            hits.append((document.id, 0.0, _substring_highlight(document, terms[0])))
+        return total, hits
+
+
+def render_highlight(text):
+    return html.escape(text or '').replace(_START, HIGHLIGHT_START).replace(_END, HIGHLIGHT_END)
+
+
+def _substring_highlight(document, term):
+    for text in (document.title, document.body):
+        index = text.lower().find(term.lower())
+        if index >= 0:
+            start = max(0, index - 60)
+            end = index + len(term)
+            return render_highlight(
+                ('...' if start else '') + text[start:index] + _START + text[index:end]
+                + _END + text[end:end + 60] + ('...' if end + 60 < len(text) else '')
+            )
+    return render_highlight(document.title)
+
+
+def _run(connection, sql, params, offset):
+    """Execute a ranked query whose last two parameters are LIMIT and OFFSET"""
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+        if not rows and offset:
+            # Page past the end: still report the total number of matches
+            cursor.execute(sql, params[:-2] + [1, 0])
+            first = cursor.fetchone()
+            return (first[3] if first else 0), []
+    if not rows:
+        return 0, []
+    return rows[0][3], [(doc_id, float(rank or 0), render_highlight(highlight)) for doc_id, rank, highlight, _ in rows]
+
+
+def _fts_table_exists(connection):
+    return FTS_TABLE in connection.introspection.table_names()
+
+
+def get_search_backend(connection=None):
+    connection = connection or default_connection
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend(connection)
+    if connection.vendor == 'sqlite' and _fts_table_exists(connection):
+        return SQLiteFTSSearchBackend(connection)
+    return SubstringSearchBackend()
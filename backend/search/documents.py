@@ -0,0 +1,160 @@
+"""
+Mapping of Section A/B/C entries to SearchDocument rows.
+
+Each section registers how to derive the owner, title, searchable body and date
+of an entry. ``index_entry``/``remove_entry`` are called from search.signals;
+``rebuild_index`` backfills everything in bulk.
+
+Lock state is read from the entry tables (``exclude_locked``, ``entry_locks``)
+rather than from the copy: submitting, reviewing and unlocking logbooks lock
+and unlock entries with ``QuerySet.update``, which sends no signals.
+"""
+
+from django.db import transaction
+from django.db.models import Q
+
+from api.principal import get_principal
+from section_a.models import SectionAEntry
+from section_b.models import ProfessionalDevelopmentEntry
+from section_c.models import SupervisionEntry
+
+from .models import SearchDocument
+
+
+def _join(*parts):
+    return '\n'.join(str(part) for part in parts if part)
+
+
+def section_a_document(entry):
+    client = entry.client_id or entry.client_pseudonym
+    return {
+        'owner_id': entry.trainee_id,
+        'title': ' - '.join(part for part in [client, entry.get_entry_type_display()] if part),
+        'body': _join(
+            entry.presenting_issues,
+            entry.reflections_on_experience,
+            entry.activity_description,
+            entry.reflection,
+            entry.place_of_practice,
+            entry.activity_type,
+            entry.custom_activity_type,
+            ', '.join(str(t) for t in entry.session_activity_types or []),
+        ),
+        'entry_date': entry.session_date,
+        'locked': entry.locked,
+    }
+
+
+def section_b_document(entry):
+    return {
+        'owner_id': entry.trainee_id,
+        'title': f"{entry.get_activity_type_display()}: {entry.activity_details}",
+        'body': _join(
+            entry.topics_covered,
+            entry.reflection,
+            ', '.join(str(c) for c in entry.competencies_covered or []),
+        ),
+        'entry_date': entry.date_of_activity,
+        'locked': entry.locked,
+    }
+
+
+def section_c_document(entry):
+    return {
+        'owner_id': entry.trainee.user_id,
+        'title': f"{entry.get_supervision_type_display()} supervision with {entry.supervisor_name}",
+        'body': entry.summary,
+        'entry_date': entry.date_of_supervision,
+        'locked': entry.locked,
+    }
+
+
+SECTIONS = {
+    'A': (SectionAEntry, section_a_document, []),
+    'B': (ProfessionalDevelopmentEntry, section_b_document, []),
+    'C': (SupervisionEntry, section_c_document, ['trainee']),
+}
+SECTION_FOR_MODEL = {model: section for section, (model, _, _) in SECTIONS.items()}
+
+
+def _document(section, entry):
+    _, build, _ = SECTIONS[section]
+    fields = build(entry)
+    fields['title'] = fields['title'][:255]
+    return fields
+
+
+def index_entry(entry):
+    section = SECTION_FOR_MODEL[type(entry)]
+    SearchDocument.objects.update_or_create(
+        section=section, object_id=entry.pk, defaults=_document(section, entry)
+    )
+
+
+def remove_entry(entry):
+    section = SECTION_FOR_MODEL[type(entry)]
+    SearchDocument.objects.filter(section=section, object_id=entry.pk).delete()
+
+
+def rebuild_index(sections=None, batch_size=1000, apps=None):
+    """
+    Recreate the documents of the given sections (all by default); returns counts
+    per section. Models are looked up in ``apps`` when given (the historical
+    registry, when backfilling from the search migrations).
+    """
+    document_model = apps.get_model('search', 'SearchDocument') if apps else SearchDocument
+    counts = {}
+    for section in sections or SECTIONS:
+        model, _, related = SECTIONS[section]
+        if apps:
+            model = apps.get_model(model._meta.label)
+        with transaction.atomic():
+            document_model.objects.filter(section=section).delete()
+            batch = []
+            counts[section] = 0
+            for entry in model.objects.select_related(*related).order_by('pk').iterator(chunk_size=batch_size):
+                batch.append(document_model(section=section, object_id=entry.pk, **_document(section, entry)))
+                if len(batch) >= batch_size:
+                    document_model.objects.bulk_create(batch)
+                    counts[section] += len(batch)
+                    batch = []
+            document_model.objects.bulk_create(batch)
+            counts[section] += len(batch)
+    return counts
+
+
+def exclude_locked(scope):
+    """Drop documents whose entry is currently locked"""
+    for section, (model, _, _) in SECTIONS.items():
+        scope = scope.exclude(section=section, object_id__in=model.objects.filter(locked=True).values('pk'))
+    return scope
+
+
+def entry_locks(documents):
+    """``{(section, object_id): locked}`` for the documents' entries, one query per section"""
+    ids_by_section = {}
+    for document in documents:
+        ids_by_section.setdefault(document.section, []).append(document.object_id)
+    locks = {}
+    for section, object_ids in ids_by_section.items():
+        model = SECTIONS[section][0]
+        for pk, locked in model.objects.filter(pk__in=object_ids).values_list('pk', 'locked'):
+            locks[section, pk] = locked
+    return locks
+
+
+def visible_documents(user):
+    """
+    Documents the user may search, mirroring the section querysets: trainees see
+    their own Section A/B/C entries, supervisors the Section C entries of their
+    accepted supervisees, support admins every Section C entry.
+    """
+    if not user.is_authenticated:
+        return SearchDocument.objects.none()
+    principal = get_principal(user)
+    visible = Q(owner_id=user.id)
+    if principal.is_supervisor:
+        visible |= Q(section='C', owner_id__in=principal.supervisee_ids())
+    elif principal.has_role('SUPPORT_ADMIN'):
+        visible |= Q(section='C')
+    return SearchDocument.objects.filter(visible)
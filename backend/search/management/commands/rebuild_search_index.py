@@ -0,0 +1,33 @@
+"""
+Management command to (re)build the SearchDocument index from Section A/B/C entries.
+
+Entries are indexed on save and backfilled by the search migrations; run this after bulk
+imports that bypass model signals or to recover from drift.
+"""
+
+from django.core.management.base import BaseCommand
+
+from search.documents import SECTIONS, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for logbook entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--section',
+            choices=sorted(SECTIONS),
+            action='append',
+            help='Section to rebuild (repeatable; defaults to all)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Entries indexed per INSERT',
+        )
+
+    def handle(self, *args, **options):
+        counts = rebuild_index(options['section'], batch_size=options['batch_size'])
+        for section, count in counts.items():
+            self.stdout.write(self.style.SUCCESS(f'Section {section}: indexed {count} entries'))
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+
+def install_index(apps, schema_editor):
+    from search.backends import install_search_schema
+    install_search_schema(schema_editor.connection)
+
+
+def uninstall_index(apps, schema_editor):
+    from search.backends import uninstall_search_schema
+    uninstall_search_schema(schema_editor.connection)
+
+
+def backfill_documents(apps, schema_editor):
+    from search.documents import rebuild_index
+    rebuild_index(apps=apps)
+
+
+class Migration(migrations.Migration):
+    """
+    Vendor-specific full-text index (tsvector + GIN on Postgres, FTS5 on SQLite),
+    backfilled with the existing entries so search works from deploy.
+    """
+
+    dependencies = [
+        ('search', '0001_initial'),
+        ('section_a', '0012_trainee_client'),
+        ('section_b', '0005_professionaldevelopmententry_locked_and_more'),
+        ('section_c', '0008_ahpra_supervision_requirements'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_index, uninstall_index),
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+from django.contrib.auth.models import User
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """
+    Denormalised, searchable copy of a Section A/B/C entry.
+
+    One row per entry, kept in sync by search.signals. The full-text index itself
+    lives outside the ORM (see search.backends): a generated ``search_vector``
+    tsvector column with a GIN index on Postgres, or an FTS5 table on SQLite.
+    """
+
+    SECTION_CHOICES = [
+        ('A', 'Section A - Client Contact'),
+        ('B', 'Section B - Professional Development'),
+        ('C', 'Section C - Supervision'),
+    ]
+
+    section = models.CharField(max_length=1, choices=SECTION_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='search_documents',
+                              help_text="Trainee the entry belongs to")
+    title = models.CharField(max_length=255, blank=True)
+    body = models.TextField(blank=True)
+    entry_date = models.DateField(null=True, blank=True)
+    locked = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('section', 'object_id')
+        indexes = [
+            models.Index(fields=['owner', 'section']),
+        ]
+
+    def __str__(self):
+        return f"Section {self.section} #{self.object_id}: {self.title}"
@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from section_a.models import SectionAEntry
+from section_b.models import ProfessionalDevelopmentEntry
+from section_c.models import SupervisionEntry
+
+from .documents import index_entry, remove_entry
+
+
+@receiver(post_save, sender=SectionAEntry)
+@receiver(post_save, sender=ProfessionalDevelopmentEntry)
+@receiver(post_save, sender=SupervisionEntry)
+def index_saved_entry(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_entry(instance)
+
+
+@receiver(post_delete, sender=SectionAEntry)
+@receiver(post_delete, sender=ProfessionalDevelopmentEntry)
+@receiver(post_delete, sender=SupervisionEntry)
+def remove_deleted_entry(sender, instance, **kwargs):
+    remove_entry(instance)
@@ -0,0 +1,163 @@
+from datetime import date
+from importlib import import_module
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.models import Supervision, UserProfile
+from section_a.models import SectionAEntry
+from section_b.models import ProfessionalDevelopmentEntry
+from section_c.models import SupervisionEntry
+from .backends import (
+    PostgresSearchBackend, SQLiteFTSSearchBackend, SubstringSearchBackend, get_search_backend, install_search_schema,
+)
+from .models import SearchDocument
+from .views import matching_object_ids
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Idempotent; the test database may have been built without running migrations
+        install_search_schema(connection)
+
+    def setUp(self):
+        self.trainee = self.make_user('trainee@example.com', 'PROVISIONAL')
+        self.other = self.make_user('other@example.com', 'PROVISIONAL')
+        self.supervisor = self.make_user('sup@example.com', 'SUPERVISOR')
+        Supervision.objects.create(
+            supervisor=self.supervisor, supervisee=self.trainee, supervisee_email=self.trainee.email,
+            role='PRIMARY', status='ACCEPTED', verification_token='tok',
+        )
+
+        self.dcc = SectionAEntry.objects.create(
+            trainee=self.trainee, client_id='LN-1985-M', session_date=date(2025, 3, 3), duration_minutes=60,
+            presenting_issues='Generalised anxiety and insomnia',
+            reflections_on_experience='Explored <b>sleep hygiene</b> and anxiety management',
+        )
+        self.pd = ProfessionalDevelopmentEntry.objects.create(
+            trainee=self.trainee, activity_type='WORKSHOP', date_of_activity=date(2025, 3, 4),
+            week_starting=date(2025, 3, 3), duration_minutes=90,
+            activity_details='CBT for anxiety disorders', topics_covered='Exposure therapy',
+        )
+        self.supervision = SupervisionEntry.objects.create(
+            trainee=self.trainee.profile, date_of_supervision=date(2025, 3, 5), week_starting=date(2025, 3, 3),
+            supervisor_name='Sam Super', supervisor_type='PRINCIPAL', supervision_type='INDIVIDUAL',
+            duration_minutes=60, summary='Discussed case formulation for client with anxiety',
+        )
+        SectionAEntry.objects.create(
+            trainee=self.other, client_id='XY-2000-F', session_date=date(2025, 3, 3), duration_minutes=60,
+            presenting_issues='Anxiety',
+        )
+
+    def make_user(self, email, role):
+        user = User.objects.create_user(username=email, email=email, password='pass1234')
+        UserProfile.objects.create(
+            user=user, role=role, first_name='Test', last_name='User',
+            provisional_registration_date=date(2024, 1, 1) if role == 'PROVISIONAL' else None,
+        )
+        return user
+
+    def search(self, user, **params):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.get('/api/search/', params)
+
+    def test_uses_fts_on_sqlite(self):
+        self.assertIsInstance(get_search_backend(), SQLiteFTSSearchBackend)
+
+    def test_backends_match_last_term_as_prefix(self):
+        self.assertEqual(SQLiteFTSSearchBackend.match_expression('LN-1'), '"LN" "1"*')
+        self.assertEqual(PostgresSearchBackend.tsquery_expression("LN-1 o'brien"), "'LN' & '1' & 'o' & 'brien':*")
+        self.assertIsNone(PostgresSearchBackend.tsquery_expression('&!'))
+
+    def test_search_across_sections_respects_ownership(self):
+        response = self.search(self.trainee, q='anxiety')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(
+            {(r['section'], r['id']) for r in response.data['results']},
+            {('A', self.dcc.id), ('B', self.pd.id), ('C', self.supervision.id)},
+        )
+        # Title matches (the PD activity) rank above body-only matches
+        self.assertEqual(response.data['results'][0]['section'], 'B')
+        self.assertTrue(all('<mark>' in r['highlight'] for r in response.data['results']))
+
+    def test_supervisor_sees_supervisee_section_c_only(self):
+        response = self.search(self.supervisor, q='anxiety')
+        self.assertEqual([(r['section'], r['id']) for r in response.data['results']], [('C', self.supervision.id)])
+        self.assertEqual(self.search(self.other, q='formulation').data['count'], 0)
+
+    def test_section_filter_prefix_and_pagination(self):
+        response = self.search(self.trainee, q='anx', section='A,C', page_size=1)
+        self.assertEqual(response.data['count'], 2)
+        self.assertTrue(response.data['has_next'])
+        self.assertEqual(len(response.data['results']), 1)
+        page_two = self.search(self.trainee, q='anx', section='A,C', page_size=1, page=2)
+        self.assertFalse(page_two.data['has_next'])
+        self.assertEqual(self.search(self.trainee, q='anx', page=9).data['count'], 3)
+        self.assertEqual(self.search(self.trainee, q='anxiety', section='Z').status_code, 400)
+        self.assertEqual(self.search(self.trainee).status_code, 400)
+
+    def test_highlight_escapes_entry_text(self):
+        response = self.search(self.trainee, q='hygiene')
+        highlight = response.data['results'][0]['highlight']
+        self.assertIn('&lt;b&gt;sleep <mark>hygiene</mark>&lt;/b&gt;', highlight)
+
+    def test_index_follows_updates_and_deletes(self):
+        self.pd.topics_covered = 'Acceptance and commitment therapy'
+        self.pd.save()
+        self.assertEqual(self.search(self.trainee, q='commitment').data['count'], 1)
+        self.assertEqual(self.search(self.trainee, q='exposure').data['count'], 0)
+
+        self.dcc.delete()
+        self.assertFalse(SearchDocument.objects.filter(section='A', object_id=self.dcc.id).exists())
+        self.assertEqual(self.search(self.trainee, q='insomnia').data['count'], 0)
+
+    def test_rebuild_command(self):
+        SearchDocument.objects.all().delete()
+        call_command('rebuild_search_index', stdout=open('/dev/null', 'w'))
+        self.assertEqual(SearchDocument.objects.count(), 4)
+        self.assertEqual(self.search(self.trainee, q='insomnia').data['count'], 1)
+
+    def test_migration_backfills_existing_entries(self):
+        migration = import_module('search.migrations.0002_full_text_index')
+        with override_settings(MIGRATION_MODULES={}):
+            loader = MigrationLoader(connection)
+        historical_apps = loader.project_state(('search', '0002_full_text_index')).apps
+        SearchDocument.objects.all().delete()
+        migration.backfill_documents(historical_apps, None)
+        self.assertEqual(SearchDocument.objects.count(), 4)
+        self.assertEqual(self.search(self.trainee, q='insomnia').data['count'], 1)
+
+    def test_section_a_search_action(self):
+        client = APIClient()
+        client.force_authenticate(self.trainee)
+        response = client.get('/api/section-a/entries/search/', {'q': 'LN-1985'})
+        self.assertEqual([entry['id'] for entry in response.data], [self.dcc.id])
+
+    def test_locked_state_follows_bulk_updates(self):
+        # Logbook workflows lock entries without saving them
+        SectionAEntry.objects.filter(pk=self.dcc.pk).update(locked=True)
+        response = self.search(self.trainee, q='anxiety', include_locked='false')
+        self.assertEqual({r['section'] for r in response.data['results']}, {'B', 'C'})
+        locked = {r['section']: r['locked'] for r in self.search(self.trainee, q='anxiety').data['results']}
+        self.assertEqual(locked, {'A': True, 'B': False, 'C': False})
+
+    def test_section_a_search_is_not_truncated(self):
+        SectionAEntry.objects.bulk_create(
+            SectionAEntry(trainee=self.trainee, client_id=f'RS-{n}', session_date=date(2025, 3, 3), duration_minutes=60)
+            for n in range(5)
+        )
+        call_command('rebuild_search_index', stdout=open('/dev/null', 'w'))
+        self.assertEqual(len(matching_object_ids(self.trainee, 'RS', section='A', batch_size=2)), 5)
+
+    def test_substring_fallback(self):
+        scope = SearchDocument.objects.filter(owner=self.trainee)
+        total, hits = SubstringSearchBackend().search(scope, 'formulation', limit=10)
+        self.assertEqual(total, 1)
+        self.assertIn('<mark>formulation</mark>', hits[0][2])
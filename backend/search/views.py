@@ -0,0 +1,108 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from logging_utils import support_error_handler
+from permissions import DenyOrgAdmin
+from .backends import get_search_backend
+from .documents import SECTIONS, entry_locks, exclude_locked, visible_documents
+from .models import SearchDocument
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def _positive_int(value, default):
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        return default
+
+
+def run_search(user, query, sections=None, include_locked=True, page=1, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Ranked full-text search over the user's visible entries.
+
+    Returns ``(total, results)`` where each result is a dict with the section,
+    entry id, owner, title, date, rank and an HTML highlight (matches wrapped in
+    <mark>, everything else escaped).
+    """
+    scope = visible_documents(user)
+    if sections:
+        scope = scope.filter(section__in=sections)
+    if not include_locked:
+        scope = exclude_locked(scope)
+
+    total, hits = get_search_backend().search(scope, query, limit=page_size, offset=(page - 1) * page_size)
+    documents = SearchDocument.objects.select_related('owner').in_bulk([doc_id for doc_id, _, _ in hits])
+    locks = entry_locks(documents.values())
+    results = []
+    for doc_id, rank, highlight in hits:
+        document = documents.get(doc_id)
+        if document is None:
+            continue
+        results.append({
+            'section': document.section,
+            'id': document.object_id,
+            'owner': {
+                'id': document.owner_id,
+                'email': document.owner.email,
+                'name': document.owner.get_full_name(),
+            },
+            'title': document.title,
+            'entry_date': document.entry_date,
+            'locked': locks.get((document.section, document.object_id), document.locked),
+            'rank': rank,
+            'highlight': highlight,
+        })
+    return total, results
+
+
+def matching_object_ids(user, query, section, batch_size=1000):
+    """Ids of all the user's visible entries in one section matching ``query``, best first"""
+    scope = visible_documents(user).filter(section=section)
+    backend = get_search_backend()
+    total, hits = backend.search(scope, query, limit=batch_size)
+    if total > len(hits):
+        # Fetch the rest in one more query rather than cut the list short
+        _, rest = backend.search(scope, query, limit=total - len(hits), offset=len(hits))
+        hits += rest
+    object_ids = dict(SearchDocument.objects.filter(id__in=[doc_id for doc_id, _, _ in hits]).values_list('id', 'object_id'))
+    return [object_ids[doc_id] for doc_id, _, _ in hits if doc_id in object_ids]
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, DenyOrgAdmin])
+@support_error_handler
+def search_entries(request):
+    """
+    Search Section A, B and C entries.
+
+    Query parameters: q (required), section (A/B/C, repeatable or comma
+    separated), include_locked (default true), page, page_size (max 100).
+    """
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({'error': 'q parameter required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    sections = []
+    for value in request.query_params.getlist('section'):
+        sections.extend(part.strip().upper() for part in value.split(',') if part.strip())
+    invalid = [section for section in sections if section not in SECTIONS]
+    if invalid:
+        return Response({'error': f"Unknown section(s): {', '.join(invalid)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    include_locked = request.query_params.get('include_locked', 'true').lower() == 'true'
+    page = _positive_int(request.query_params.get('page'), 1)
+    page_size = min(_positive_int(request.query_params.get('page_size'), DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE)
+
+    total, results = run_search(request.user, query, sections, include_locked, page, page_size)
+    return Response({
+        'query': query,
+        'count': total,
+        'page': page,
+        'page_size': page_size,
+        'has_next': page * page_size < total,
+        'results': results,
+    })
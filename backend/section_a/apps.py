@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SectionAConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'section_a'
+
+    def ready(self):
+        import section_a.signals # noqa
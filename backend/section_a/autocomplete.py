@@ -0,0 +1,96 @@
+"""
+Per-trainee autocomplete store for Section A client IDs and places of practice.
+
+Every distinct value a trainee has used is kept once in AutocompleteValue with
+the number of entries using it and when it was last used. section_a.signals
+keeps the counts in step with entry saves and deletes, so ``suggest`` is a
+single indexed query instead of a scan over the trainee's entries.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from .models import AutocompleteValue
+
+CLIENT = 'client'
+PLACE = 'place'
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+
+def entry_values(entry):
+    """The autocomplete values an entry contributes, as ``{kind: value}``"""
+    values = {}
+    client = (entry.client_id or entry.client_pseudonym or '').strip()
+    if client:
+        values[CLIENT] = client
+    place = (entry.place_of_practice or '').strip()
+    if place:
+        values[PLACE] = place
+    return values
+
+
+def normalize(value):
+    return value.strip().lower()
+
+
+def record(trainee_id, kind, value, used_at=None):
+    """Count one more entry using ``value``"""
+    used_at = used_at or timezone.now()
+    matches = AutocompleteValue.objects.filter(trainee_id=trainee_id, kind=kind, value=value)
+    if matches.update(usage_count=F('usage_count') + 1, last_used_at=used_at):
+        return
+    try:
+        with transaction.atomic():
+            AutocompleteValue.objects.create(
+                trainee_id=trainee_id, kind=kind, value=value, normalized=normalize(value)[:200],
+                usage_count=1, last_used_at=used_at,
+            )
+    except IntegrityError:
+        # Created concurrently by another save
+        matches.update(usage_count=F('usage_count') + 1, last_used_at=used_at)
+
+
+def forget(trainee_id, kind, value):
+    """Count one entry fewer using ``value``, dropping it once nothing uses it"""
+    matches = AutocompleteValue.objects.filter(trainee_id=trainee_id, kind=kind, value=value)
+    matches.filter(usage_count__gt=0).update(usage_count=F('usage_count') - 1)
+    matches.filter(usage_count=0).delete()
+
+
+def apply_change(trainee_id, old_values, new_values, used_at=None):
+    """Move counts from an entry's previous values to its current ones"""
+    for kind in (CLIENT, PLACE):
+        old, new = old_values.get(kind), new_values.get(kind)
+        if old == new:
+            continue
+        if old:
+            forget(trainee_id, kind, old)
+        if new:
+            record(trainee_id, kind, new, used_at)
+
+
+def suggest(trainee, kind, query='', limit=DEFAULT_LIMIT):
+    """
+    Up to ``limit`` of the trainee's values containing ``query`` (case-insensitive).
+
+    Prefix matches rank first, then the most used and most recently used values.
+    """
+    suggestions = AutocompleteValue.objects.filter(trainee=trainee, kind=kind)
+    needle = normalize(query)
+    if needle:
+        suggestions = suggestions.filter(normalized__contains=needle).annotate(
+            is_prefix=Case(
+                When(normalized__startswith=needle, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        )
+    else:
+        suggestions = suggestions.annotate(is_prefix=Value(0, output_field=IntegerField()))
+    return list(
+        suggestions.order_by('-is_prefix', '-usage_count', '-last_used_at', 'value')
+        .values_list('value', flat=True)[:limit]
+    )
@@ -0,0 +1,118 @@
+"""
+Maintenance of the per-trainee TraineeClient registry.
+
+Each Section A entry with a client ID (or legacy pseudonym) points at the
+registry row for that client. Writes adjust the row's DCC session count and
+minutes by delta and refresh the latest-session pointer only when the entry
+could have changed it, so reads such as the "prefill from last session" lookup
+never scan the trainee's entries. Called from section_a.signals.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, OuterRef, Subquery
+
+from .models import SectionAEntry, TraineeClient
+
+DCC_ENTRY_TYPES = ('client_contact', 'simulated_contact')
+
+
+def client_label(entry):
+    return (entry.client_id or entry.client_pseudonym or '').strip()
+
+
+def normalize(label):
+    return label.strip().upper()
+
+
+def dcc_minutes(entry):
+    if entry.duration_minutes:
+        return entry.duration_minutes
+    if entry.duration_hours:
+        return int(entry.duration_hours * 60)
+    return 0
+
+
+def contribution(entry):
+    """``(client_id, is_dcc, minutes, session_date)`` of an entry as last saved"""
+    is_dcc = entry.entry_type in DCC_ENTRY_TYPES
+    return (entry.trainee_client_id, is_dcc, dcc_minutes(entry) if is_dcc else 0, entry.session_date)
+
+
+def resolve_client(entry):
+    """Point the entry at its registry row, creating the row for a new client"""
+    label = client_label(entry)
+    if not label:
+        entry.trainee_client = None
+        return
+    key = normalize(label)[:50]
+    client = TraineeClient.objects.filter(trainee_id=entry.trainee_id, key=key).first()
+    if client is None:
+        try:
+            with transaction.atomic():
+                client = TraineeClient.objects.create(trainee_id=entry.trainee_id, key=key, pseudonym=label)
+        except IntegrityError:
+            client = TraineeClient.objects.get(trainee_id=entry.trainee_id, key=key)
+    spellings = {label, (entry.client_pseudonym or '').strip()} - {'', client.pseudonym}
+    if not spellings.issubset(client.aliases):
+        client.aliases = sorted(set(client.aliases) | spellings)
+        client.save(update_fields=['aliases', 'updated_at'])
+    entry.trainee_client = client
+
+
+def apply_change(old, new):
+    """Move an entry's contribution from ``old`` to ``new`` (either may be None)"""
+    deltas = {}
+    for sign, state in ((-1, old), (1, new)):
+        if state and state[0] and state[1]:
+            count, minutes = deltas.get(state[0], (0, 0))
+            deltas[state[0]] = (count + sign, minutes + sign * state[2])
+    for client_id, (count, minutes) in deltas.items():
+        if count or minutes:
+            TraineeClient.objects.filter(pk=client_id).update(
+                session_count=F('session_count') + count,
+                total_dcc_minutes=F('total_dcc_minutes') + minutes,
+            )
+
+    # Only a new/removed DCC session or a moved session date can change which
+    # session is the latest
+    affected = set()
+    if not old or not new or (old[0], old[1], old[3]) != (new[0], new[1], new[3]):
+        affected = {state[0] for state in (old, new) if state and state[0] and state[1]}
+    if affected:
+        refresh_latest_session(affected)
+
+    if old and old[0] and (not new or new[0] != old[0]):
+        drop_unused([old[0]])
+
+
+def refresh_latest_session(client_ids):
+    latest = (
+        SectionAEntry.objects.filter(trainee_client=OuterRef('pk'), entry_type__in=DCC_ENTRY_TYPES)
+        .order_by(F('session_date').desc(nulls_last=True), '-created_at', '-id')
+        .values('pk')[:1]
+    )
+    TraineeClient.objects.filter(pk__in=client_ids).update(latest_session=Subquery(latest))
+
+
+def drop_unused(client_ids):
+    TraineeClient.objects.filter(pk__in=client_ids).filter(
+        ~Exists(SectionAEntry.objects.filter(trainee_client=OuterRef('pk')))
+    ).delete()
+
+
+def find_client(trainee, label):
+    """The trainee's registry row for a client ID, pseudonym or alias (or None)"""
+    label = (label or '').strip()
+    if not label:
+        return None
+    client = (
+        TraineeClient.objects.select_related('latest_session')
+        .filter(trainee=trainee, key=normalize(label)[:50]).first()
+    )
+    if client is None:
+        # Legacy pseudonyms recorded alongside a different client ID; a trainee
+        # has few clients, so this never touches the entries table
+        for candidate in TraineeClient.objects.select_related('latest_session').filter(trainee=trainee):
+            if label in candidate.aliases:
+                return candidate
+    return client
@@ -0,0 +1,84 @@
+# Generated by Django 5.1.2 on 2026-10-19 07:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Value
+from django.db.models.functions import Coalesce, NullIf, Trim
+
+
+TRIGRAM_INDEX = 'section_a_autocomplete_trgm'
+
+
+def create_trigram_index(apps, schema_editor):
+    # Postgres only: lets ``normalized LIKE '%term%'`` use an index as well
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = apps.get_model('section_a', 'AutocompleteValue')._meta.db_table
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX} ON {table} USING GIN (normalized gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {TRIGRAM_INDEX}')
+
+
+def backfill_values(apps, schema_editor):
+    SectionAEntry = apps.get_model('section_a', 'SectionAEntry')
+    AutocompleteValue = apps.get_model('section_a', 'AutocompleteValue')
+    sources = {
+        'client': Coalesce(NullIf(Trim('client_id'), Value('')), NullIf(Trim('client_pseudonym'), Value(''))),
+        'place': NullIf(Trim('place_of_practice'), Value('')),
+    }
+    batch = []
+    for kind, expression in sources.items():
+        rows = (
+            SectionAEntry.objects.annotate(autocomplete_value=expression)
+            .filter(~Q(autocomplete_value=None))
+            .values('trainee_id', 'autocomplete_value')
+            .annotate(usage_count=Count('id'), last_used_at=Max('created_at'))
+            .order_by()
+        )
+        for row in rows.iterator():
+            value = row['autocomplete_value'][:200]
+            batch.append(AutocompleteValue(
+                trainee_id=row['trainee_id'], kind=kind, value=value, normalized=value.lower(),
+                usage_count=row['usage_count'], last_used_at=row['last_used_at'],
+            ))
+            if len(batch) >= 1000:
+                AutocompleteValue.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+    AutocompleteValue.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('section_a', '0010_add_cra_fields'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AutocompleteValue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('client', 'Client ID'), ('place', 'Place of practice')], max_length=10)),
+                ('value', models.CharField(max_length=200)),
+                ('normalized', models.CharField(help_text='Lower-cased value used for lookups', max_length=200)),
+                ('usage_count', models.PositiveIntegerField(default=0)),
+                ('last_used_at', models.DateTimeField()),
+                ('trainee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='autocomplete_values', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-usage_count', '-last_used_at'],
+                'indexes': [models.Index(fields=['trainee', 'kind', 'normalized'], name='section_a_autocomplete_prefix', opclasses=['', '', 'text_pattern_ops'])],
+                'unique_together': {('trainee', 'kind', 'value')},
+            },
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+        migrations.RunPython(backfill_values, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 5.1.2 on 2026-10-19 07:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+DCC_ENTRY_TYPES = ('client_contact', 'simulated_contact')
+
+
+def backfill_clients(apps, schema_editor):
+    """Build the registry from existing entries, one trainee at a time"""
+    SectionAEntry = apps.get_model('section_a', 'SectionAEntry')
+    TraineeClient = apps.get_model('section_a', 'TraineeClient')
+    entries = (
+        SectionAEntry.objects.order_by('trainee_id', F('session_date').asc(nulls_first=True), 'created_at', 'id')
+        .only('trainee_id', 'entry_type', 'client_id', 'client_pseudonym', 'session_date',
+              'duration_minutes', 'duration_hours')
+    )
+
+    def flush(trainee_id, registry):
+        rows = {
+            key: TraineeClient(trainee_id=trainee_id, key=key, pseudonym=data['pseudonym'],
+                               aliases=sorted(data['aliases'] - {data['pseudonym']}),
+                               latest_session_id=data['latest'], session_count=data['count'],
+                               total_dcc_minutes=data['minutes'])
+            for key, data in registry.items()
+        }
+        TraineeClient.objects.bulk_create(rows.values())
+        linked = []
+        for key, data in registry.items():
+            for entry in data['entries']:
+                entry.trainee_client_id = rows[key].pk
+                linked.append(entry)
+        SectionAEntry.objects.bulk_update(linked, ['trainee_client'], batch_size=500)
+
+    trainee_id, registry = None, {}
+    for entry in entries.iterator(chunk_size=2000):
+        if entry.trainee_id != trainee_id:
+            if registry:
+                flush(trainee_id, registry)
+            trainee_id, registry = entry.trainee_id, {}
+        label = (entry.client_id or entry.client_pseudonym or '').strip()
+        if not label:
+            continue
+        data = registry.setdefault(label.upper()[:50], {
+            'pseudonym': label, 'aliases': set(), 'latest': None, 'count': 0, 'minutes': 0, 'entries': [],
+        })
+        data['aliases'].update(filter(None, [label, (entry.client_pseudonym or '').strip()]))
+        data['entries'].append(entry)
+        if entry.entry_type in DCC_ENTRY_TYPES:
+            # Entries arrive oldest first, so the last DCC session seen is the latest
+            data['latest'] = entry.pk
+            data['count'] += 1
+            if entry.duration_minutes:
+                data['minutes'] += entry.duration_minutes
+            elif entry.duration_hours:
+                data['minutes'] += int(entry.duration_hours * 60)
+    if registry:
+        flush(trainee_id, registry)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('section_a', '0011_autocompletevalue'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TraineeClient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='Normalized (upper-cased) client ID used for lookups', max_length=50)),
+                ('pseudonym', models.CharField(help_text='Canonical client pseudonym, e.g. LN-1985-M', max_length=50)),
+                ('aliases', models.JSONField(blank=True, default=list, help_text='Other spellings and legacy pseudonyms of this client')),
+                ('session_count', models.PositiveIntegerField(default=0, help_text='Number of DCC sessions')),
+                ('total_dcc_minutes', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('latest_session', models.ForeignKey(blank=True, help_text='Most recent DCC session with this client', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='section_a.sectionaentry')),
+                ('trainee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='section_a_clients', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['pseudonym'],
+            },
+        ),
+        migrations.AddField(
+            model_name='sectionaentry',
+            name='trainee_client',
+            field=models.ForeignKey(blank=True, help_text="Registry row for this entry's client, maintained by section_a.clients", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='entries', to='section_a.traineeclient'),
+        ),
+        migrations.AddIndex(
+            model_name='sectionaentry',
+            index=models.Index(fields=['trainee_client', 'session_date', 'created_at'], name='section_a_client_history'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='traineeclient',
+            unique_together={('trainee', 'key')},
+        ),
+        migrations.RunPython(backfill_clients, migrations.RunPython.noop),
+    ]
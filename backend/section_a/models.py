@@ -55,6 +55,14 @@ class SectionAEntry(models.Model):
     
     # Client and session details
     client_id = models.CharField(max_length=50, blank=True, help_text="Client pseudonym e.g., LN-1985-M")
+    trainee_client = models.ForeignKey(
+        'TraineeClient',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='entries',
+        help_text="Registry row for this entry's client, maintained by section_a.clients"
+    )
     session_date = models.DateField(null=True, blank=True)
     week_starting = models.DateField(null=True, blank=True, help_text="Week starting date for this session")
     place_of_practice = models.CharField(max_length=200, blank=True)
@@ -102,6 +110,9 @@ class SectionAEntry(models.Model):
     
     class Meta:
         ordering = ['-session_date', '-created_at']
+        indexes = [
+            models.Index(fields=['trainee_client', 'session_date', 'created_at'], name='section_a_client_history'),
+        ]
         verbose_name = 'Section A Entry'
         verbose_name_plural = 'Section A Entries'
     
@@ -253,4 +264,71 @@ class SectionAEntry(models.Model):
             'can_submit': True,
             'reason': 'All requirements met',
             'details': 'You can proceed with logbook submission.'
-        }
\ No newline at end of file
+        }
+
+class AutocompleteValue(models.Model):
+    """
+    Per-trainee distinct values offered as autocomplete suggestions.
+
+    Maintained from SectionAEntry saves/deletes (see section_a.autocomplete), so
+    suggestion lookups never scan the entries themselves.
+    """
+
+    KIND_CHOICES = [
+        ('client', 'Client ID'),
+        ('place', 'Place of practice'),
+    ]
+
+    trainee = models.ForeignKey(User, on_delete=models.CASCADE, related_name='autocomplete_values')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    value = models.CharField(max_length=200)
+    normalized = models.CharField(max_length=200, help_text="Lower-cased value used for lookups")
+    usage_count = models.PositiveIntegerField(default=0)
+    last_used_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ['trainee', 'kind', 'value']
+        indexes = [
+            # text_pattern_ops lets Postgres use the index for LIKE 'prefix%' under
+            # any collation; other databases ignore the operator class. Infix lookups
+            # use a pg_trgm GIN index created in the migration when available.
+            models.Index(
+                fields=['trainee', 'kind', 'normalized'],
+                name='section_a_autocomplete_prefix',
+                opclasses=['', '', 'text_pattern_ops'],
+            ),
+        ]
+        ordering = ['-usage_count', '-last_used_at']
+
+    def __str__(self):
+        return f"{self.trainee.username} {self.kind}: {self.value} ({self.usage_count})"
+
+
+class TraineeClient(models.Model):
+    """
+    Per-trainee registry of clients seen in Section A.
+
+    Entries reference their client through SectionAEntry.trainee_client, and the
+    session count, DCC minutes and latest-session pointer are kept current by
+    section_a.clients on every entry write.
+    """
+
+    trainee = models.ForeignKey(User, on_delete=models.CASCADE, related_name='section_a_clients')
+    key = models.CharField(max_length=50, help_text="Normalized (upper-cased) client ID used for lookups")
+    pseudonym = models.CharField(max_length=50, help_text="Canonical client pseudonym, e.g. LN-1985-M")
+    aliases = models.JSONField(default=list, blank=True, help_text="Other spellings and legacy pseudonyms of this client")
+    latest_session = models.ForeignKey(
+        SectionAEntry, on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+        help_text="Most recent DCC session with this client"
+    )
+    session_count = models.PositiveIntegerField(default=0, help_text="Number of DCC sessions")
+    total_dcc_minutes = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['trainee', 'key']
+        ordering = ['pseudonym']
+
+    def __str__(self):
+        return f"{self.trainee.username}: {self.pseudonym} ({self.session_count} sessions)"
@@ -0,0 +1,45 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import autocomplete, clients
+from .models import SectionAEntry
+
+
+@receiver(pre_save, sender=SectionAEntry)
+def capture_previous_entry(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None
+    if instance.pk:
+        previous = (
+            SectionAEntry.objects.filter(pk=instance.pk)
+            .only(
+                'trainee_id', 'trainee_client_id', 'entry_type', 'client_id', 'client_pseudonym',
+                'place_of_practice', 'session_date', 'duration_minutes', 'duration_hours',
+            )
+            .first()
+        )
+    instance._previous_state = (
+        (previous.trainee_id, autocomplete.entry_values(previous), clients.contribution(previous))
+        if previous else None
+    )
+    clients.resolve_client(instance)
+
+
+@receiver(post_save, sender=SectionAEntry)
+def update_derived_client_data(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_state', None)
+    instance._previous_state = None
+    clients.apply_change(previous[2] if previous else None, clients.contribution(instance))
+    if previous and previous[0] != instance.trainee_id:
+        autocomplete.apply_change(previous[0], previous[1], {})
+        previous = None
+    autocomplete.apply_change(instance.trainee_id, previous[1] if previous else {}, autocomplete.entry_values(instance))
+
+
+@receiver(post_delete, sender=SectionAEntry)
+def remove_derived_client_data(sender, instance, **kwargs):
+    clients.apply_change(clients.contribution(instance), None)
+    autocomplete.apply_change(instance.trainee_id, autocomplete.entry_values(instance), {})
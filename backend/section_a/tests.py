@@ -1,3 +1,211 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.models import UserProfile
+from section_c.models import SupervisionEntry
+from utils.weekly_grouping import group_entries_by_week, weekly_running_totals
+from .models import AutocompleteValue, SectionAEntry, TraineeClient
+
+
+class WeeklyGroupingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='trainee@example.com', email='trainee@example.com', password='pass1234')
+        self.profile = UserProfile.objects.create(
+            user=self.user, role='PROVISIONAL', first_name='Tia', last_name='Trainee',
+            provisional_registration_date=date(2024, 1, 1),
+        )
+        self.monday = date(2025, 3, 3)
+        # Week 1: 60 + 30, week 2: 45 (locked), week 3: 15, week 4: none, week 5: 120
+        for offset, minutes, locked in [(0, 60, False), (2, 30, False), (7, 45, True), (15, 15, False), (29, 120, False)]:
+            SectionAEntry.objects.create(
+                trainee=self.user,
+                session_date=self.monday + timedelta(days=offset),
+                duration_minutes=minutes,
+                locked=locked,
+            )
+
+    def test_running_totals(self):
+        totals = weekly_running_totals(SectionAEntry.objects.filter(trainee=self.user))
+        self.assertEqual(totals, {
+            self.monday: (90, 90),
+            self.monday + timedelta(days=7): (45, 135),
+            self.monday + timedelta(days=14): (15, 150),
+            self.monday + timedelta(days=28): (120, 270),
+        })
+
+    def test_grouping_uses_totals_scope(self):
+        all_entries = SectionAEntry.objects.filter(trainee=self.user)
+        with CaptureQueriesContext(connection) as ctx:
+            weeks = group_entries_by_week(
+                all_entries.filter(locked=False).order_by('-session_date'), totals_queryset=all_entries
+            )
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertEqual([w['week_starting'] for w in weeks], [
+            self.monday + timedelta(days=28), self.monday + timedelta(days=14), self.monday,
+        ])
+        self.assertEqual([w['cumulative_total_minutes'] for w in weeks], [270, 150, 90])
+        self.assertEqual([e.duration_minutes for e in weeks[2]['entries']], [30, 60])
+
+    def test_grouping_section_c_entries(self):
+        for offset, minutes in [(0, 60), (1, 60), (8, 30)]:
+            day = self.monday + timedelta(days=offset)
+            SupervisionEntry.objects.create(
+                trainee=self.profile, date_of_supervision=day,
+                week_starting=day - timedelta(days=day.weekday()),
+                supervisor_name='Sam', supervisor_type='PRINCIPAL', supervision_type='INDIVIDUAL',
+                duration_minutes=minutes, summary='Notes',
+            )
+        weeks = group_entries_by_week(SupervisionEntry.objects.filter(trainee=self.profile))
+        self.assertEqual([(w['week_total_minutes'], w['cumulative_total_minutes']) for w in weeks], [(30, 150), (120, 120)])
+
+    def test_grouped_by_week_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get('/api/section-a/entries/grouped-by-week/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(response.data[0]['cumulative_total_display'], '4:30')
+        self.assertEqual(response.data[2]['week_total_minutes'], 90)
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='trainee@example.com', email='trainee@example.com', password='pass1234')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_entry(self, client_id, place='', trainee=None):
+        return SectionAEntry.objects.create(
+            trainee=trainee or self.user, client_id=client_id, place_of_practice=place,
+            session_date=date(2025, 3, 3), duration_minutes=60,
+        )
+
+    def suggestions(self, action, **params):
+        response = self.client.get(f'/api/section-a/entries/{action}/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_counts_follow_saves_and_deletes(self):
+        first = self.add_entry('LN-1985-M', 'Northside Clinic')
+        self.add_entry('LN-1985-M', 'Northside Clinic')
+        self.assertEqual(
+            AutocompleteValue.objects.get(trainee=self.user, kind='client', value='LN-1985-M').usage_count, 2
+        )
+
+        first.client_id = 'AB-1990-F'
+        first.save()
+        first.delete()
+        self.assertEqual(
+            sorted(AutocompleteValue.objects.values_list('kind', 'value', 'usage_count')),
+            [('client', 'LN-1985-M', 1), ('place', 'Northside Clinic', 1)],
+        )
+
+    def test_ranks_prefix_then_usage(self):
+        self.add_entry('XLN-2001-F')
+        for _ in range(2):
+            self.add_entry('LN-1999-M')
+        self.add_entry('LN-1985-M')
+        self.add_entry('ZZ-2000-M', trainee=User.objects.create_user(username='other', password='pass1234'))
+
+        self.assertEqual(self.suggestions('client_autocomplete', q='ln'), ['LN-1999-M', 'LN-1985-M', 'XLN-2001-F'])
+        self.assertEqual(self.suggestions('client_autocomplete', q='ln', limit=1), ['LN-1999-M'])
+        self.assertEqual(self.suggestions('client_autocomplete', q='zz'), [])
+
+    def test_place_suggestions_single_query(self):
+        self.add_entry('LN-1985-M', 'Northside Clinic')
+        self.add_entry('LN-1985-M', 'Southside Hospital')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.suggestions('place_autocomplete', q='SIDE H'), ['Southside Hospital'])
+        self.assertEqual(sum('section_a_autocompletevalue' in q['sql'] for q in queries.captured_queries), 1)
+
+
+class TraineeClientRegistryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='trainee@example.com', email='trainee@example.com', password='pass1234')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_entry(self, client_id, day, minutes=60, entry_type='client_contact', **fields):
+        return SectionAEntry.objects.create(
+            trainee=self.user, client_id=client_id, entry_type=entry_type, session_date=date(2025, 3, day),
+            duration_minutes=minutes, session_activity_types=['assessment'], **fields,
+        )
+
+    def registry(self):
+        return TraineeClient.objects.get(trainee=self.user, key='LN-1985-M')
+
+    def test_counters_and_latest_session_follow_writes(self):
+        first = self.add_entry('LN-1985-M', 3, presenting_issues='Anxiety')
+        second = self.add_entry('ln-1985-m', 10, minutes=45, presenting_issues='Sleep')
+        self.add_entry('LN-1985-M', 11, minutes=30, entry_type='cra')
+        client = self.registry()
+        self.assertEqual((client.session_count, client.total_dcc_minutes), (2, 105))
+        self.assertEqual(client.latest_session_id, second.id)
+        self.assertEqual(client.aliases, ['ln-1985-m'])
+
+        # Back-dating the latest session hands the pointer to the other one
+        second.session_date = date(2025, 3, 1)
+        second.duration_minutes = 50
+        second.save()
+        client = self.registry()
+        self.assertEqual((client.session_count, client.total_dcc_minutes, client.latest_session_id), (2, 110, first.id))
+
+        first.client_id = 'AB-1990-F'
+        first.save()
+        client = self.registry()
+        self.assertEqual((client.session_count, client.total_dcc_minutes, client.latest_session_id), (1, 50, second.id))
+
+        SectionAEntry.objects.filter(client_id__iexact='LN-1985-M').delete()
+        self.assertEqual(list(TraineeClient.objects.values_list('key', flat=True)), ['AB-1990-F'])
+
+    def test_last_session_data_and_history(self):
+        self.add_entry('LN-1985-M', 3, presenting_issues='Anxiety', locked=True)
+        self.add_entry('LN-1985-M', 10, presenting_issues='Sleep', place_of_practice='Clinic', client_pseudonym='Legacy-LN')
+
+        # Profile lookup for the permission check, the registry row, then its latest entry
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/section-a/entries/last_session_data/', {'client_id': 'ln-1985-m'})
+        self.assertEqual(response.data['presenting_issues'], 'Sleep')
+        self.assertEqual(
+            self.client.get('/api/section-a/entries/last_session_data/', {'client_id': 'Legacy-LN'}).data['place_of_practice'],
+            'Clinic',
+        )
+        self.assertEqual(self.client.get('/api/section-a/entries/last_session_data/', {'client_id': 'XX'}).status_code, 404)
+
+        history = self.client.get('/api/section-a/entries/client_history/', {'client_id': 'LN-1985-M'}).data
+        self.assertEqual((history['session_count'], history['total_dcc_display']), (2, '2:00'))
+        self.assertEqual([entry['presenting_issues'] for entry in history['entries']], ['Sleep', 'Anxiety'])
+        self.assertEqual(self.client.get('/api/section-a/entries/client_history/').status_code, 400)
+
+    def test_last_session_data_uses_latest_unlocked_entry_of_any_type(self):
+        self.add_entry('LN-1985-M', 3, presenting_issues='Anxiety')
+        self.add_entry('LN-1985-M', 10, presenting_issues='Report writing', entry_type='cra')
+        self.add_entry('LN-1985-M', 12, presenting_issues='Approved week', locked=True)
+        url = '/api/section-a/entries/last_session_data/'
+
+        self.assertEqual(self.client.get(url, {'client_id': 'LN-1985-M'}).data['presenting_issues'], 'Report writing')
+        self.assertEqual(
+            self.client.get(url, {'client_id': 'LN-1985-M', 'include_locked': 'true'}).data['presenting_issues'],
+            'Approved week',
+        )
+
+    def test_migration_backfill_matches_signals(self):
+        import importlib
+        from django.apps import apps
+
+        self.add_entry('LN-1985-M', 3)
+        self.add_entry('ln-1985-m', 10, minutes=45, client_pseudonym='Legacy-LN')
+        self.add_entry('AB-1990-F', 4, entry_type='cra')
+        fields = ['key', 'pseudonym', 'aliases', 'latest_session_id', 'session_count', 'total_dcc_minutes']
+        maintained = sorted(TraineeClient.objects.values_list(*fields))
 
-# Create your tests here.
+        TraineeClient.objects.all().delete()
+        migration = importlib.import_module('section_a.migrations.0012_trainee_client')
+        migration.backfill_clients(apps, None)
+        self.assertEqual(sorted(TraineeClient.objects.values_list(*fields)), maintained)
+        self.assertFalse(SectionAEntry.objects.filter(trainee_client=None).exists())
@@ -1,11 +1,14 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q
 from .models import SectionAEntry, CustomSessionActivityType
 from .serializers import SectionAEntrySerializer, CustomSessionActivityTypeSerializer
 from permissions import DenyOrgAdmin
 from audit_utils import log_section_a_create, log_section_a_update, log_section_a_delete
+from utils.duration_utils import minutes_to_hours_minutes
+from utils.weekly_grouping import group_entries_by_week
+from search.views import matching_object_ids
+from . import autocomplete, clients
 
 
 class SectionAEntryViewSet(viewsets.ModelViewSet):
@@ -87,19 +90,38 @@ class SectionAEntryViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def search(self, request):
-        """Search entries by client pseudonym"""
-        query = request.query_params.get('q', '')
+        """Search entries by client, presenting issues, reflections and activity (ranked)"""
+        query = request.query_params.get('q', '').strip()
         queryset = self.get_queryset()
         
         if query:
-            queryset = queryset.filter(
-                Q(client_pseudonym__icontains=query) |
-                Q(activity_description__icontains=query)
-            )
+            # Ranked lookup in the full-text index instead of icontains scans
+            ids = matching_object_ids(request.user, query, section='A')
+            entries = queryset.in_bulk(ids)
+            queryset = [entries[entry_id] for entry_id in ids if entry_id in entries]
         
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'], url_path='grouped-by-week')
+    def grouped_by_week(self, request):
+        """Entries grouped by week with weekly and cumulative totals"""
+        queryset = self.get_queryset().order_by('-session_date', '-created_at')
+        all_entries = SectionAEntry.objects.filter(trainee=request.user)
+        weeks = group_entries_by_week(queryset, totals_queryset=all_entries)
+
+        result = []
+        for week in weeks:
+            result.append({
+                'week_starting': week['week_starting'],
+                'week_total_minutes': week['week_total_minutes'],
+                'cumulative_total_minutes': week['cumulative_total_minutes'],
+                'week_total_display': minutes_to_hours_minutes(week['week_total_minutes']),
+                'cumulative_total_display': minutes_to_hours_minutes(week['cumulative_total_minutes']),
+                'entries': self.get_serializer(week['entries'], many=True).data,
+            })
+        return Response(result)
+
     @action(detail=False, methods=['get'])
     def logbook_eligibility(self, request):
         """Check if user can submit their logbook"""
@@ -114,24 +136,16 @@ class SectionAEntryViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def client_autocomplete(self, request):
-        """Get unique client pseudonyms for autocomplete"""
-        query = request.query_params.get('q', '')
-        queryset = self.get_queryset()
-        
-        if query:
-            queryset = queryset.filter(
-                Q(client_id__icontains=query) | Q(client_pseudonym__icontains=query)
-            )
-        
-        # Get unique client IDs/pseudonyms
-        client_ids = set()
-        for entry in queryset:
-            if entry.client_id:
-                client_ids.add(entry.client_id)
-            elif entry.client_pseudonym:
-                client_ids.add(entry.client_pseudonym)
-        
-        return Response(list(client_ids))
+        """Get the trainee's client IDs/pseudonyms matching q, best matches first"""
+        return Response(self._suggestions(request, autocomplete.CLIENT))
+    
+    def _suggestions(self, request, kind):
+        try:
+            limit = int(request.query_params.get('limit', autocomplete.DEFAULT_LIMIT))
+        except ValueError:
+            limit = autocomplete.DEFAULT_LIMIT
+        limit = max(1, min(limit, autocomplete.MAX_LIMIT))
+        return autocomplete.suggest(request.user, kind, request.query_params.get('q', ''), limit)
     
     @action(detail=False, methods=['get'])
     def last_session_data(self, request):
@@ -140,10 +154,15 @@ class SectionAEntryViewSet(viewsets.ModelViewSet):
         if not client_id:
             return Response({'error': 'client_id parameter required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Find the most recent entry for this client
-        last_entry = self.get_queryset().filter(
-            Q(client_id=client_id) | Q(client_pseudonym=client_id)
-        ).order_by('-session_date', '-created_at').first()
+        # The client registry resolves the ID, pseudonym or alias without scanning
+        # the trainee's entries; the most recent entry of any type then comes from
+        # the (trainee_client, session_date, created_at) index. Locked entries are
+        # skipped unless include_locked=true, like the rest of the viewset.
+        client = clients.find_client(request.user, client_id)
+        last_entry = (
+            self.get_queryset().filter(trainee_client=client).order_by('-session_date', '-created_at').first()
+            if client else None
+        )
         
         if not last_entry:
             return Response({'error': 'No previous sessions found'}, status=status.HTTP_404_NOT_FOUND)
@@ -156,21 +175,31 @@ class SectionAEntryViewSet(viewsets.ModelViewSet):
         })
     
     @action(detail=False, methods=['get'])
-    def place_autocomplete(self, request):
-        """Get unique places of practice for autocomplete"""
-        query = request.query_params.get('q', '')
-        queryset = self.get_queryset()
-        
-        if query:
-            queryset = queryset.filter(place_of_practice__icontains=query)
+    def client_history(self, request):
+        """Get a client's session totals and entries, newest first"""
+        client_id = request.query_params.get('client_id', '')
+        if not client_id:
+            return Response({'error': 'client_id parameter required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Get unique places of practice
-        places = set()
-        for entry in queryset:
-            if entry.place_of_practice:
-                places.add(entry.place_of_practice)
+        client = clients.find_client(request.user, client_id)
+        if not client:
+            return Response({'error': 'No sessions found for this client'}, status=status.HTTP_404_NOT_FOUND)
         
-        return Response(list(places))
+        entries = client.entries.order_by('-session_date', '-created_at')
+        return Response({
+            'client_id': client.pseudonym,
+            'aliases': client.aliases,
+            'session_count': client.session_count,
+            'total_dcc_minutes': client.total_dcc_minutes,
+            'total_dcc_display': minutes_to_hours_minutes(client.total_dcc_minutes),
+            'last_session_date': client.latest_session.session_date if client.latest_session else None,
+            'entries': self.get_serializer(entries, many=True).data,
+        })
+    
+    @action(detail=False, methods=['get'])
+    def place_autocomplete(self, request):
+        """Get the trainee's places of practice matching q, best matches first"""
+        return Response(self._suggestions(request, autocomplete.PLACE))
 
 
 class CustomSessionActivityTypeViewSet(viewsets.ModelViewSet):
@@ -5,3 +5,6 @@ class SectionBConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'section_b'
     verbose_name = 'Section B - Professional Development'
+
+    def ready(self):
+        import section_b.signals # noqa
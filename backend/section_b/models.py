@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+from utils.weekly_summaries import WeeklySummaryMaintainer
 
 
 class ProfessionalDevelopmentEntry(models.Model):
@@ -117,3 +118,7 @@ class PDWeeklySummary(models.Model):
         hours = self.cumulative_total_minutes // 60
         minutes = self.cumulative_total_minutes % 60
         return f"{hours}:{minutes:02d}"
+
+
+# Incremental PDWeeklySummary maintenance, driven by section_b.signals
+weekly_summaries = WeeklySummaryMaintainer(ProfessionalDevelopmentEntry, PDWeeklySummary)
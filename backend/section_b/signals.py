@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import ProfessionalDevelopmentEntry, weekly_summaries
+
+
+@receiver(pre_save, sender=ProfessionalDevelopmentEntry)
+def capture_previous_pd_minutes(sender, instance, raw=False, **kwargs):
+    weekly_summaries.before_save(instance, raw=raw)
+
+
+@receiver(post_save, sender=ProfessionalDevelopmentEntry)
+def update_pd_weekly_summary(sender, instance, raw=False, **kwargs):
+    weekly_summaries.after_save(instance, raw=raw)
+
+
+@receiver(post_delete, sender=ProfessionalDevelopmentEntry)
+def remove_pd_from_weekly_summary(sender, instance, **kwargs):
+    weekly_summaries.after_delete(instance)
@@ -0,0 +1,139 @@
+from datetime import date, timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.models import UserProfile
+from section_c.models import SupervisionEntry, SupervisionWeeklySummary, weekly_summaries as supervision_weekly_summaries
+from .models import PDWeeklySummary, ProfessionalDevelopmentEntry
+
+
+MONDAY = date(2025, 3, 3)
+
+
+def week(n):
+    return MONDAY + timedelta(days=7 * n)
+
+
+class PDWeeklySummaryMaintenanceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='trainee@example.com', email='trainee@example.com', password='pass1234')
+
+    def add_entry(self, week_starting, minutes):
+        return ProfessionalDevelopmentEntry.objects.create(
+            trainee=self.user,
+            activity_type='WORKSHOP',
+            date_of_activity=week_starting,
+            week_starting=week_starting,
+            duration_minutes=minutes,
+            activity_details='Workshop',
+            topics_covered='Topics',
+        )
+
+    def totals(self):
+        return list(
+            PDWeeklySummary.objects.filter(trainee=self.user).order_by('week_starting')
+            .values_list('week_starting', 'week_total_minutes', 'cumulative_total_minutes')
+        )
+
+    def test_insert_shifts_later_weeks(self):
+        self.add_entry(week(0), 60)
+        self.add_entry(week(2), 30)
+        # Back-dated entry: every later cumulative total moves
+        self.add_entry(week(1), 45)
+        self.assertEqual(self.totals(), [(week(0), 60, 60), (week(1), 45, 105), (week(2), 30, 135)])
+
+    def test_update_and_move_between_weeks(self):
+        first = self.add_entry(week(0), 60)
+        self.add_entry(week(2), 30)
+
+        first.duration_minutes = 90
+        first.save()
+        self.assertEqual(self.totals(), [(week(0), 90, 90), (week(2), 30, 120)])
+
+        first.week_starting = first.date_of_activity = week(3)
+        first.save()
+        self.assertEqual(self.totals(), [(week(0), 0, 0), (week(2), 30, 30), (week(3), 90, 120)])
+
+    def test_delete(self):
+        self.add_entry(week(0), 60)
+        second = self.add_entry(week(1), 30)
+        self.add_entry(week(2), 15)
+        second.delete()
+        self.assertEqual(self.totals(), [(week(0), 60, 60), (week(1), 0, 60), (week(2), 15, 75)])
+
+    def test_deleting_trainee_cascades_cleanly(self):
+        self.add_entry(week(0), 60)
+        self.user.delete()
+        self.assertFalse(PDWeeklySummary.objects.exists())
+
+    def test_verifier_repairs_drift(self):
+        self.add_entry(week(0), 60)
+        self.add_entry(week(1), 30)
+        # Bypass the signals
+        ProfessionalDevelopmentEntry.objects.filter(week_starting=week(0)).update(duration_minutes=120)
+        PDWeeklySummary.objects.filter(week_starting=week(1)).delete()
+
+        out = StringIO()
+        call_command('verify_weekly_summaries', '--section', 'pd', stdout=out)
+        self.assertIn('drifted 1, missing 1', out.getvalue())
+        self.assertEqual(self.totals(), [(week(0), 60, 60)])
+
+        call_command('verify_weekly_summaries', '--section', 'pd', '--repair', stdout=StringIO())
+        self.assertEqual(self.totals(), [(week(0), 120, 120), (week(1), 30, 150)])
+
+        out = StringIO()
+        call_command('verify_weekly_summaries', stdout=out)
+        self.assertIn('PDWeeklySummary: checked 2, drifted 0, missing 0', out.getvalue())
+
+
+    def test_grouped_by_week_reads_maintained_totals(self):
+        self.add_entry(week(0), 60)
+        locked = self.add_entry(week(1), 30)
+        ProfessionalDevelopmentEntry.objects.filter(pk=locked.pk).update(locked=True)
+        self.add_entry(week(2), 15)
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.get('/api/section-b/entries/grouped-by-week/')
+        self.assertEqual(
+            [(w['week_total_display'], w['cumulative_total_display']) for w in response.data],
+            [('0:15', '1:45'), ('1:00', '1:00')],
+        )
+
+        # The totals come from PDWeeklySummary, not from the entries
+        PDWeeklySummary.objects.filter(week_starting=week(2)).update(cumulative_total_minutes=999)
+        response = client.get('/api/section-b/entries/grouped-by-week/')
+        self.assertEqual(response.data[0]['cumulative_total_display'], '16:39')
+
+
+class SupervisionWeeklySummaryMaintenanceTests(TestCase):
+    def test_entries_maintain_summary(self):
+        user = User.objects.create_user(username='trainee@example.com', email='trainee@example.com', password='pass1234')
+        profile = UserProfile.objects.create(
+            user=user, role='PROVISIONAL', first_name='Tia', last_name='Trainee',
+            provisional_registration_date=date(2024, 1, 1),
+        )
+        entries = [
+            SupervisionEntry.objects.create(
+                trainee=profile, date_of_supervision=week(n), week_starting=week(n),
+                supervisor_name='Sam', supervisor_type='PRINCIPAL', supervision_type='INDIVIDUAL',
+                duration_minutes=minutes, summary='Notes',
+            )
+            for n, minutes in [(0, 60), (1, 60), (1, 30)]
+        ]
+        entries[0].delete()
+        self.assertEqual(
+            list(SupervisionWeeklySummary.objects.filter(trainee=profile).order_by('week_starting')
+                 .values_list('week_total_minutes', 'cumulative_total_minutes')),
+            [(0, 0), (90, 90)],
+        )
+        self.assertEqual(supervision_weekly_summaries.verify(), {'checked': 2, 'drifted': 0, 'missing': 0})
+
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get('/api/section-c/entries/grouped-by-week/')
+        self.assertEqual([w['cumulative_total_minutes'] for w in response.data], [90])
@@ -2,20 +2,21 @@ from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from permissions import DenyOrgAdmin
+from api.data_version import etag_by_data_version
 from rest_framework.response import Response
 from django.db.models import Sum, Q
 from django.utils import timezone
 from django.conf import settings
 from datetime import datetime, timedelta
-from collections import defaultdict
 
-from .models import ProfessionalDevelopmentEntry, PDCompetency, PDWeeklySummary
+from .models import ProfessionalDevelopmentEntry, PDCompetency, PDWeeklySummary, weekly_summaries as pd_weekly_summaries
 from .serializers import (
     ProfessionalDevelopmentEntrySerializer, 
     PDCompetencySerializer,
     PDWeeklySummarySerializer,
     PDEntryWithSummarySerializer
 )
+from utils.weekly_grouping import group_entries_by_week
 from audit_utils import log_section_b_create, log_section_b_update, log_section_b_delete
 
 
@@ -49,40 +50,6 @@ class ProfessionalDevelopmentEntryListCreateView(generics.ListCreateAPIView):
         
         # Log the creation
         log_section_b_create(self.request.user, instance, self.request)
-        
-        # Update weekly summary
-        self.update_weekly_summary(self.request.user, week_starting)
-    
-    def update_weekly_summary(self, user, week_starting):
-        """Update or create weekly summary for the given week"""
-        # Calculate totals for the week
-        week_entries = ProfessionalDevelopmentEntry.objects.filter(
-            trainee=user,
-            week_starting=week_starting
-        )
-        week_total = week_entries.aggregate(Sum('duration_minutes'))['duration_minutes__sum'] or 0
-        
-        # Calculate cumulative total (all weeks up to and including this week)
-        cumulative_entries = ProfessionalDevelopmentEntry.objects.filter(
-            trainee=user,
-            week_starting__lte=week_starting
-        )
-        cumulative_total = cumulative_entries.aggregate(Sum('duration_minutes'))['duration_minutes__sum'] or 0
-        
-        # Update or create weekly summary
-        summary, created = PDWeeklySummary.objects.get_or_create(
-            trainee=user,
-            week_starting=week_starting,
-            defaults={
-                'week_total_minutes': week_total,
-                'cumulative_total_minutes': cumulative_total
-            }
-        )
-        
-        if not created:
-            summary.week_total_minutes = week_total
-            summary.cumulative_total_minutes = cumulative_total
-            summary.save()
 
 
 class ProfessionalDevelopmentEntryDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -113,9 +80,6 @@ class ProfessionalDevelopmentEntryDetailView(generics.RetrieveUpdateDestroyAPIVi
             
             # Log the update
             log_section_b_update(self.request.user, updated_instance, old_data, self.request)
-            
-            # Update weekly summary
-            self.update_weekly_summary(self.request.user, week_starting)
         else:
             updated_instance = serializer.save()
             # Log the update
@@ -130,47 +94,12 @@ class ProfessionalDevelopmentEntryDetailView(generics.RetrieveUpdateDestroyAPIVi
             'competencies_covered': instance.competencies_covered,
         }
         entry_id = instance.id
-        week_starting = instance.week_starting
         
         # Perform deletion
         instance.delete()
         
         # Log the deletion
         log_section_b_delete(self.request.user, entry_id, entry_data, self.request)
-        
-        # Update weekly summary after deletion
-        self.update_weekly_summary(self.request.user, week_starting)
-    
-    def update_weekly_summary(self, user, week_starting):
-        """Update or create weekly summary for the given week"""
-        # Calculate totals for the week
-        week_entries = ProfessionalDevelopmentEntry.objects.filter(
-            trainee=user,
-            week_starting=week_starting
-        )
-        week_total = week_entries.aggregate(Sum('duration_minutes'))['duration_minutes__sum'] or 0
-        
-        # Calculate cumulative total (all weeks up to and including this week)
-        cumulative_entries = ProfessionalDevelopmentEntry.objects.filter(
-            trainee=user,
-            week_starting__lte=week_starting
-        )
-        cumulative_total = cumulative_entries.aggregate(Sum('duration_minutes'))['duration_minutes__sum'] or 0
-        
-        # Update or create weekly summary
-        summary, created = PDWeeklySummary.objects.get_or_create(
-            trainee=user,
-            week_starting=week_starting,
-            defaults={
-                'week_total_minutes': week_total,
-                'cumulative_total_minutes': cumulative_total
-            }
-        )
-        
-        if not created:
-            summary.week_total_minutes = week_total
-            summary.cumulative_total_minutes = cumulative_total
-            summary.save()
 
 
 class PDCompetencyListView(generics.ListAPIView):
@@ -184,63 +113,29 @@ class PDCompetencyListView(generics.ListAPIView):
 @permission_classes([IsAuthenticated, DenyOrgAdmin])
 def pd_entries_grouped_by_week(request):
     """Get PD entries grouped by week with summary data"""
-    entries = ProfessionalDevelopmentEntry.objects.filter(
-        trainee=request.user
-    ).order_by('-week_starting', '-date_of_activity')
+    entries = ProfessionalDevelopmentEntry.objects.filter(trainee=request.user).order_by(
+        '-week_starting', '-date_of_activity'
+    )
     
     # Filter by locked status if provided
     include_locked = request.GET.get('include_locked', 'false').lower() == 'true'
     if not include_locked:
         entries = entries.filter(locked=False)
     
-    # Group entries by week
-    grouped_entries = defaultdict(list)
-    week_summaries = {}
-    
-    for entry in entries:
-        week_key = entry.week_starting.strftime('%Y-%m-%d')
-        grouped_entries[week_key].append(entry)
-        
-        # Get or create week summary
-        if week_key not in week_summaries:
-            try:
-                summary = PDWeeklySummary.objects.get(
-                    trainee=request.user,
-                    week_starting=entry.week_starting
-                )
-                week_summaries[week_key] = {
-                    'week_starting': summary.week_starting,
-                    'week_total_display': summary.week_total_display,
-                    'cumulative_total_display': summary.cumulative_total_display
-                }
-            except PDWeeklySummary.DoesNotExist:
-                # Calculate on the fly if summary doesn't exist
-                week_entries = ProfessionalDevelopmentEntry.objects.filter(
-                    trainee=request.user,
-                    week_starting=entry.week_starting
-                )
-                week_total = week_entries.aggregate(Sum('duration_minutes'))['duration_minutes__sum'] or 0
-                
-                cumulative_entries = ProfessionalDevelopmentEntry.objects.filter(
-                    trainee=request.user,
-                    week_starting__lte=entry.week_starting
-                )
-                cumulative_total = cumulative_entries.aggregate(Sum('duration_minutes'))['duration_minutes__sum'] or 0
-                
-                week_summaries[week_key] = {
-                    'week_starting': entry.week_starting,
-                    'week_total_display': f"{week_total // 60}:{week_total % 60:02d}",
-                    'cumulative_total_display': f"{cumulative_total // 60}:{cumulative_total % 60:02d}"
-                }
+    # Week and cumulative totals over all of the trainee's entries, as maintained
+    # in PDWeeklySummary
+    weeks = group_entries_by_week(entries, totals=pd_weekly_summaries.stored_totals(request.user.id))
     
     # Format response
     result = []
-    for week_key in sorted(grouped_entries.keys(), reverse=True):
+    for week in weeks:
+        week_total = week['week_total_minutes']
+        cumulative_total = week['cumulative_total_minutes']
         week_data = {
-            'week_starting': week_summaries[week_key]['week_starting'],
-            'week_total_display': week_summaries[week_key]['week_total_display'],
-            'cumulative_total_display': week_summaries[week_key]['cumulative_total_display'],
-            'entries': PDEntryWithSummarySerializer(grouped_entries[week_key], many=True).data
+            'week_starting': week['week_starting'],
+            'week_total_display': f"{week_total // 60}:{week_total % 60:02d}",
+            'cumulative_total_display': f"{cumulative_total // 60}:{cumulative_total % 60:02d}",
+            'entries': PDEntryWithSummarySerializer(week['entries'], many=True).data
         }
         result.append(week_data)
     
@@ -249,6 +144,7 @@ def pd_entries_grouped_by_week(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, DenyOrgAdmin])
+@etag_by_data_version('pd-summary-metrics')
 def pd_summary_metrics(request):
     """Get PD summary metrics for dashboard"""
     # Get current week starting date
@@ -2,6 +2,7 @@ from django.db import models
 from api.models import UserProfile
 from django.db.models import Sum
 from datetime import timedelta, datetime
+from utils.weekly_summaries import WeeklySummaryMaintainer
 
 class SupervisionEntry(models.Model):
     SUPERVISOR_TYPE_CHOICES = [
@@ -213,3 +214,7 @@ class SupervisionComplianceReport(models.Model):
     
     def __str__(self):
         return f"Compliance Report for {self.trainee.user.email}"
+
+
+# Incremental SupervisionWeeklySummary maintenance, driven by section_c.signals
+weekly_summaries = WeeklySummaryMaintainer(SupervisionEntry, SupervisionWeeklySummary)
@@ -1,2 +1,19 @@
-# Signals for section_c app
-# Currently no signals needed, but file exists to prevent import errors
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import SupervisionEntry, weekly_summaries
+
+
+@receiver(pre_save, sender=SupervisionEntry)
+def capture_previous_supervision_minutes(sender, instance, raw=False, **kwargs):
+    weekly_summaries.before_save(instance, raw=raw)
+
+
+@receiver(post_save, sender=SupervisionEntry)
+def update_supervision_weekly_summary(sender, instance, raw=False, **kwargs):
+    weekly_summaries.after_save(instance, raw=raw)
+
+
+@receiver(post_delete, sender=SupervisionEntry)
+def remove_supervision_from_weekly_summary(sender, instance, **kwargs):
+    weekly_summaries.after_delete(instance)
@@ -3,8 +3,15 @@ from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.db.models import Sum
 from datetime import timedelta, datetime
-from .models import SupervisionEntry, SupervisionWeeklySummary, SupervisionObservation, SupervisionComplianceReport
+from .models import (
+    SupervisionEntry, SupervisionWeeklySummary, SupervisionObservation, SupervisionComplianceReport,
+    weekly_summaries as supervision_weekly_summaries,
+)
 from api.models import UserProfile
+from api.data_version import etag_by_data_version
+from api.db_routing import read_from_replica
+from api.principal import get_principal
+from utils.weekly_grouping import group_entries_by_week
 from .serializers import (
     SupervisionEntrySerializer, 
     SupervisionWeeklySummarySerializer,
@@ -21,27 +28,32 @@ class SupervisionEntryViewSet(TenantPermissionMixin, viewsets.ModelViewSet):
     serializer_class = SupervisionEntrySerializer
     permission_classes = [RoleBasedPermission, DenyOrgAdmin]
 
+    def get_scope_queryset(self):
+        """All entries the caller may see, before the request's query filters"""
+        user = self.request.user
+        if not (user.is_authenticated and hasattr(user, 'profile')):
+            return SupervisionEntry.objects.none()
+        # Filter by current user's entries
+        if user.profile.role in ['PROVISIONAL', 'REGISTRAR']:
+            return SupervisionEntry.objects.filter(trainee=user.profile)
+        elif user.profile.role == 'SUPERVISOR':
+            trainee_ids = get_principal(user).supervisee_profile_ids()
+            return SupervisionEntry.objects.filter(trainee__id__in=trainee_ids)
+        elif user.profile.role == 'ORG_ADMIN':
+            org_trainee_ids = UserProfile.objects.filter(
+                organization=user.profile.organization, 
+                role__in=['PROVISIONAL', 'REGISTRAR']
+            ).values_list('id', flat=True)
+            return SupervisionEntry.objects.filter(trainee__id__in=org_trainee_ids)
+        elif user.profile.role == 'SUPPORT_ADMIN':
+            # Support admin can see all entries
+            return SupervisionEntry.objects.all()
+        return SupervisionEntry.objects.none()
+
     def get_queryset(self):
         user = self.request.user
         if user.is_authenticated and hasattr(user, 'profile'):
-            # Filter by current user's entries
-            if user.profile.role in ['PROVISIONAL', 'REGISTRAR']:
-                queryset = SupervisionEntry.objects.filter(trainee=user.profile)
-            elif user.profile.role == 'SUPERVISOR':
-                trainee_ids = user.profile.supervising.values_list('id', flat=True)
-                queryset = SupervisionEntry.objects.filter(trainee__id__in=trainee_ids)
-            elif user.profile.role == 'ORG_ADMIN':
-                from api.models import UserProfile
-                org_trainee_ids = UserProfile.objects.filter(
-                    organization=user.profile.organization, 
-                    role__in=['PROVISIONAL', 'REGISTRAR']
-                ).values_list('id', flat=True)
-                queryset = SupervisionEntry.objects.filter(trainee__id__in=org_trainee_ids)
-            elif user.profile.role == 'SUPPORT_ADMIN':
-                # Support admin can see all entries
-                queryset = SupervisionEntry.objects.all()
-            else:
-                queryset = SupervisionEntry.objects.none()
+            queryset = self.get_scope_queryset()
             
             # Filter by locked status if provided
             include_locked = self.request.query_params.get('include_locked', 'false').lower() == 'true'
@@ -80,8 +92,13 @@ class SupervisionEntryViewSet(TenantPermissionMixin, viewsets.ModelViewSet):
             'supervisor_name': instance.supervisor_name,
         }
         
-        # Perform update
-        updated_instance = serializer.save()
+        # Perform update, keeping week_starting in step with the supervision date
+        if 'date_of_supervision' in serializer.validated_data:
+            date_of_supervision = serializer.validated_data['date_of_supervision']
+            week_starting = date_of_supervision - timedelta(days=date_of_supervision.weekday())
+            updated_instance = serializer.save(week_starting=week_starting)
+        else:
+            updated_instance = serializer.save()
         
         # Log the update
         log_section_c_update(self.request.user, updated_instance, old_data, self.request)
@@ -105,69 +122,36 @@ class SupervisionEntryViewSet(TenantPermissionMixin, viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], url_path='grouped-by-week', permission_classes=[permissions.IsAuthenticated])
     def grouped_by_week(self, request):
-        queryset = self.get_queryset()
-        
-        # Group entries by week_starting
-        entries_by_week = {}
-        for entry in queryset:
-            week_start = entry.week_starting
-            if week_start not in entries_by_week:
-                entries_by_week[week_start] = []
-            entries_by_week[week_start].append(entry)
+        queryset = self.get_queryset().select_related('trainee__user')
+
+        # Cumulative totals cover the caller's whole scope (including locked
+        # entries), not just the entries listed. A trainee's scope is their own
+        # entries, whose totals SupervisionWeeklySummary already maintains.
+        profile = getattr(request.user, 'profile', None)
+        if profile and profile.role in ['PROVISIONAL', 'REGISTRAR']:
+            weeks = group_entries_by_week(
+                queryset, totals=supervision_weekly_summaries.stored_totals(profile.id)
+            )
+        else:
+            weeks = group_entries_by_week(queryset, totals_queryset=self.get_scope_queryset())
 
         # Create SupervisionWeeklySummary objects for serialization
         weekly_summaries = []
-        cumulative_total_minutes = 0
-        sorted_weeks = sorted(entries_by_week.keys(), reverse=True)
-
-        for week_start in sorted_weeks:
-            week_entries = sorted(entries_by_week[week_start], key=lambda x: x.date_of_supervision, reverse=True)
-            week_total_minutes = sum(entry.duration_minutes for entry in week_entries)
-            
-            # Calculate cumulative up to the end of this week
-            # Use the same filtering logic as get_queryset()
-            user = request.user
-            if user.is_authenticated and hasattr(user, 'profile'):
-                if user.profile.role in ['PROVISIONAL', 'REGISTRAR']:
-                    all_entries_up_to_week = SupervisionEntry.objects.filter(
-                        trainee=user.profile,
-                        date_of_supervision__lt=week_start + timedelta(days=7)
-                    )
-                elif user.profile.role == 'SUPERVISOR':
-                    trainee_ids = user.profile.supervising.values_list('id', flat=True)
-                    all_entries_up_to_week = SupervisionEntry.objects.filter(
-                        trainee__id__in=trainee_ids,
-                        date_of_supervision__lt=week_start + timedelta(days=7)
-                    )
-                elif user.profile.role == 'ORG_ADMIN':
-                    org_trainee_ids = UserProfile.objects.filter(organization=user.profile.organization, role__in=['PROVISIONAL', 'REGISTRAR']).values_list('id', flat=True)
-                    all_entries_up_to_week = SupervisionEntry.objects.filter(
-                        trainee__id__in=org_trainee_ids,
-                        date_of_supervision__lt=week_start + timedelta(days=7)
-                    )
-                elif user.profile.role == 'SUPPORT_ADMIN':
-                    all_entries_up_to_week = SupervisionEntry.objects.filter(
-                        date_of_supervision__lt=week_start + timedelta(days=7)
-                    )
-                else:
-                    all_entries_up_to_week = SupervisionEntry.objects.none()
-            else:
-                all_entries_up_to_week = SupervisionEntry.objects.none()
-            cumulative_total_minutes = all_entries_up_to_week.aggregate(Sum('duration_minutes'))['duration_minutes__sum'] or 0
-
+        for week in weeks:
             summary = SupervisionWeeklySummary(
                 trainee=request.user.profile, # This is a dummy for serializer, actual object not saved here
-                week_starting=week_start,
-                week_total_minutes=week_total_minutes,
-                cumulative_total_minutes=cumulative_total_minutes
+                week_starting=week['week_starting'],
+                week_total_minutes=sum(entry.duration_minutes for entry in week['entries']),
+                cumulative_total_minutes=week['cumulative_total_minutes']
             )
-            summary.entries = week_entries # Attach entries for nested serialization
+            summary.entries = week['entries'] # Attach entries for nested serialization
             weekly_summaries.append(summary)
 
         serializer = SupervisionWeeklySummarySerializer(weekly_summaries, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    @etag_by_data_version('supervision-summary-metrics')
     def summary_metrics(self, request):
         # Some users might not have a related profile due to data seeding; guard against it
         try:
@@ -202,6 +186,7 @@ class SupervisionEntryViewSet(TenantPermissionMixin, viewsets.ModelViewSet):
         return Response(data)
     
     @action(detail=False, methods=['get'], url_path='compliance-summary', permission_classes=[permissions.IsAuthenticated])
+    @read_from_replica
     def compliance_summary(self, request):
         """Get AHPRA supervision compliance summary for the authenticated user"""
         try:
@@ -279,7 +264,7 @@ class SupervisionComplianceViewSet(TenantPermissionMixin, viewsets.ReadOnlyModel
                 queryset = SupervisionComplianceReport.objects.filter(trainee=user.profile)
             # Supervisors can see compliance of their supervisees
             elif user.profile.role == 'SUPERVISOR':
-                trainee_ids = user.profile.supervising.values_list('id', flat=True)
+                trainee_ids = get_principal(user).supervisee_profile_ids()
                 queryset = SupervisionComplianceReport.objects.filter(trainee__id__in=trainee_ids)
             # Support admin can see all
             elif user.profile.role == 'SUPPORT_ADMIN':
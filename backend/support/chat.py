@@ -0,0 +1,132 @@
+"""
+Chat storage helpers for ChatConsumer.
+
+History is served in windows: the latest ``HISTORY_PAGE_SIZE`` messages on
+connect, then older pages on request (``before=<message id>``), each loaded in
+one query with the sender joined. Read receipts are applied as one UPDATE per
+receipt covering every unread message up to the given id, rather than per
+message.
+
+A ticket's conversation lives in the ticket owner's session; support staff
+reach it through ``ticket_session`` rather than a session of their own.
+"""
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .emails import send_ticket_reply_email
+from .models import ChatMessage, ChatSession, SupportTicket
+
+HISTORY_PAGE_SIZE = 50
+MAX_HISTORY_PAGE_SIZE = 200
+
+
+def serialize_message(message):
+    sender = message.sender
+    return {
+        'id': message.id,
+        'message': message.message,
+        'sender': {
+            'id': sender.id,
+            'email': sender.email,
+            'first_name': sender.first_name,
+            'last_name': sender.last_name,
+        },
+        'is_support': message.is_support,
+        'created_at': message.created_at.isoformat(),
+        'read_by_user': message.read_by_user,
+        'read_by_support': message.read_by_support,
+    }
+
+
+def find_session(user, ticket_id):
+    """The user's chat session for a ticket ('general' for the ticketless session), or None"""
+    ticket_filter = {'ticket__isnull': True} if ticket_id == 'general' else {'ticket_id': ticket_id}
+    return ChatSession.objects.select_related('ticket').filter(user=user, **ticket_filter).first()
+
+
+def ticket_session(ticket_id, create=False):
+    """The ticket owner's chat session for a ticket, as support staff see it (created on request)"""
+    session = ChatSession.objects.select_related('ticket').filter(
+        ticket_id=ticket_id, user=F('ticket__user')
+    ).first()
+    if session is None and create:
+        owner = SupportTicket.objects.only('user').get(pk=ticket_id).user
+        session = get_or_create_session(owner, ticket_id)
+    return session
+
+
+def get_or_create_session(user, ticket_id):
+    session, _ = ChatSession.objects.select_related('ticket').get_or_create(
+        user=user,
+        ticket_id=None if ticket_id == 'general' else ticket_id,
+        defaults={'status': 'ACTIVE', 'support_user': None},
+    )
+    return session
+
+
+def history_page(session_id, before=None, limit=HISTORY_PAGE_SIZE):
+    """
+    ``(messages, has_more)``: up to ``limit`` messages older than ``before``
+    (or the latest ones), oldest first
+    """
+    limit = max(1, min(int(limit), MAX_HISTORY_PAGE_SIZE))
+    messages = ChatMessage.objects.filter(session_id=session_id).select_related('sender')
+    if before is not None:
+        messages = messages.filter(id__lt=before)
+    window = list(messages.order_by('-id')[:limit + 1])
+    has_more = len(window) > limit
+    return [serialize_message(message) for message in reversed(window[:limit])], has_more
+
+
+def save_message(session, sender, text, is_support):
+    """Store a message and bump the session and ticket with narrow writes"""
+    now = timezone.now()
+    with transaction.atomic():
+        message = ChatMessage.objects.create(
+            session=session,
+            sender=sender,
+            message=text,
+            is_support=is_support,
+            read_by_user=not is_support,  # User has read their own message
+            read_by_support=is_support,   # Support has read their own message
+        )
+
+        session_fields = ['last_message_at']
+        if is_support and not session.support_user_id:
+            # First support message assigns the session
+            session.support_user = sender
+            session.status = 'ACTIVE'
+            session_fields += ['support_user', 'status']
+        session.save(update_fields=session_fields)
+
+        if session.ticket_id:
+            ticket = session.ticket
+            ticket.last_message_at = now
+            ticket.has_unread_messages = True
+            ticket.save(update_fields=['last_message_at', 'has_unread_messages', 'updated_at'])
+            send_ticket_reply_email(ticket, message, is_support)
+    return message
+
+
+def mark_read(session_id, up_to, by_support):
+    """
+    Mark every message from the other side up to ``up_to`` as read in one UPDATE.
+    Returns the number of messages that changed.
+    """
+    flag = 'read_by_support' if by_support else 'read_by_user'
+    with transaction.atomic():
+        updated = ChatMessage.objects.filter(
+            session_id=session_id, id__lte=up_to, is_support=not by_support, **{flag: False}
+        ).update(**{flag: True})
+        if by_support and updated:
+            # Support has caught up with the user's messages on this ticket
+            ticket_id = ChatSession.objects.filter(pk=session_id).values_list('ticket_id', flat=True).first()
+            if ticket_id and not ChatMessage.objects.filter(
+                session_id=session_id, is_support=False, read_by_support=False
+            ).exists():
+                SupportTicket.objects.filter(pk=ticket_id, has_unread_messages=True).update(
+                    has_unread_messages=False, updated_at=timezone.now()
+                )
+    return updated
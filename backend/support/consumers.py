@@ -1,10 +1,9 @@
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
+from asgiref.sync import sync_to_async
 from channels.db import database_sync_to_async
-from django.contrib.auth.models import User
-from django.utils import timezone
-from .models import ChatSession, ChatMessage, SupportTicket, SupportUserStatus
-from .emails import send_ticket_reply_email
+from . import chat, presence
+from .models import SupportTicket
 
 
 class ChatConsumer(AsyncWebsocketConsumer):
@@ -19,6 +18,9 @@ class ChatConsumer(AsyncWebsocketConsumer):
             await self.close()
             return
         
+        self.session = None
+        self.is_support = await self.has_support_profile()
+        
         # Check if user has permission to access this ticket
         if not await self.check_ticket_permission():
             await self.close()
@@ -30,13 +32,24 @@ class ChatConsumer(AsyncWebsocketConsumer):
             self.channel_name
         )
         
+        # Follow support team presence
+        await self.channel_layer.group_add(
+            presence.GROUP,
+            self.channel_name
+        )
+        
         await self.accept()
         
         # Send chat history
         await self.send_chat_history()
         
-        # Update support user status if applicable
-        await self.update_support_status()
+        # Mark support staff present, then tell this socket who is online
+        await self.presence_heartbeat()
+        await self.send(text_data=json.dumps({
+            'type': 'support_status',
+            **await database_sync_to_async(presence.team_status)(),
+            'heartbeat_seconds': presence.presence_setting('HEARTBEAT_SECONDS'),
+        }))
 
     async def disconnect(self, close_code):
         """Leave room group"""
@@ -44,14 +57,48 @@ class ChatConsumer(AsyncWebsocketConsumer):
             self.room_group_name,
             self.channel_name
         )
+        await self.channel_layer.group_discard(
+            presence.GROUP,
+            self.channel_name
+        )
         
-        # Update last activity timestamp
-        await self.update_support_status()
+        if getattr(self, 'is_support', False):
+            if await sync_to_async(presence.leave)(self.user.id, self.channel_name):
+                await self.broadcast_presence()
 
     async def receive(self, text_data):
-        """Receive message from WebSocket"""
+        """Receive a message, a history page request or a read receipt from the WebSocket"""
         try:
             text_data_json = json.loads(text_data)
+            command = text_data_json.get('type', 'message')
+            
+            # Any frame from a support agent keeps them present
+            await self.presence_heartbeat()
+            if command == 'heartbeat':
+                return
+            
+            if command == 'history':
+                # Older messages: {"type": "history", "before": <message id>, "limit": <n>}
+                await self.send_chat_history(
+                    before=text_data_json.get('before'),
+                    limit=text_data_json.get('limit', chat.HISTORY_PAGE_SIZE),
+                )
+                return
+            
+            if command == 'mark_read':
+                # Everything from the other side up to a message id: {"type": "mark_read", "up_to": <id>}
+                up_to = int(text_data_json['up_to'])
+                if await self.mark_read(up_to):
+                    await self.channel_layer.group_send(
+                        self.room_group_name,
+                        {
+                            'type': 'read_receipt',
+                            'up_to': up_to,
+                            'by_support': self.is_support,
+                        }
+                    )
+                return
+            
             message = text_data_json['message']
             
             # Save message to database
@@ -62,21 +109,10 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 self.room_group_name,
                 {
                     'type': 'chat_message',
-                    'message': {
-                        'id': chat_message['id'],
-                        'message': chat_message['message'],
-                        'sender': chat_message['sender'],
-                        'is_support': chat_message['is_support'],
-                        'created_at': chat_message['created_at'],
-                        'read_by_user': chat_message['read_by_user'],
-                        'read_by_support': chat_message['read_by_support'],
-                    }
+                    'message': chat_message,
                 }
             )
             
-            # Send email notification if needed
-            await self.send_email_notification(chat_message)
-            
         except json.JSONDecodeError:
             await self.send(text_data=json.dumps({
                 'error': 'Invalid JSON'
@@ -96,14 +132,52 @@ class ChatConsumer(AsyncWebsocketConsumer):
             'message': message
         }))
 
-    async def send_chat_history(self):
-        """Send chat history to newly connected user"""
-        messages = await self.get_chat_history()
+    async def presence_changed(self, event):
+        """Relay a support team online/offline change from the presence group"""
+        await self.send(text_data=json.dumps({
+            'type': 'support_status',
+            **event['status'],
+        }))
+
+    async def presence_heartbeat(self):
+        """Refresh this socket's presence (support staff only); announces the team coming online"""
+        if not self.is_support:
+            return
+        if await sync_to_async(presence.heartbeat)(self.user, self.channel_name):
+            await self.broadcast_presence()
+        await database_sync_to_async(presence.maybe_snapshot)()
+
+    async def broadcast_presence(self):
+        await self.channel_layer.group_send(
+            presence.GROUP,
+            {
+                'type': 'presence_changed',
+                'status': await database_sync_to_async(presence.team_status)(),
+            }
+        )
+
+    async def read_receipt(self, event):
+        """Relay a batched read receipt from the room group"""
+        await self.send(text_data=json.dumps({
+            'type': 'read_receipt',
+            'up_to': event['up_to'],
+            'by_support': event['by_support'],
+        }))
+
+    async def send_chat_history(self, before=None, limit=chat.HISTORY_PAGE_SIZE):
+        """Send a window of chat history: the latest messages, or those before a message id"""
+        messages, has_more = await self.get_chat_history(before, limit)
         await self.send(text_data=json.dumps({
             'type': 'chat_history',
-            'messages': messages
+            'messages': messages,
+            'before': before,
+            'has_more': has_more,
         }))
 
+    @database_sync_to_async
+    def has_support_profile(self):
+        return hasattr(self.user, 'support_profile')
+
     @database_sync_to_async
     def check_ticket_permission(self):
         """Check if user has permission to access this ticket"""
@@ -125,153 +199,48 @@ class ChatConsumer(AsyncWebsocketConsumer):
         except SupportTicket.DoesNotExist:
             return False
 
+    def find_session(self, create=False):
+        """Support staff work in the ticket owner's session; everyone else in their own"""
+        if self.is_support and self.ticket_id != 'general':
+            return chat.ticket_session(self.ticket_id, create=create)
+        if create:
+            return chat.get_or_create_session(self.user, self.ticket_id)
+        return chat.find_session(self.user, self.ticket_id)
+
     @database_sync_to_async
     def save_message(self, message_text):
         """Save message to database"""
         try:
-            # Get or create chat session
-            if self.ticket_id == 'general':
-                # General chat session (not tied to a specific ticket)
-                session, created = ChatSession.objects.get_or_create(
-                    user=self.user,
-                    ticket=None,
-                    defaults={
-                        'status': 'ACTIVE',
-                        'support_user': None
-                    }
-                )
-            else:
-                ticket = SupportTicket.objects.get(id=self.ticket_id)
-                session, created = ChatSession.objects.get_or_create(
-                    user=self.user,
-                    ticket=ticket,
-                    defaults={
-                        'status': 'ACTIVE',
-                        'support_user': None
-                    }
-                )
-            
-            # Check if user is support staff
-            is_support = hasattr(self.user, 'support_profile')
-            
-            # Create message
-            chat_message = ChatMessage.objects.create(
-                session=session,
-                sender=self.user,
-                message=message_text,
-                is_support=is_support,
-                read_by_user=not is_support,  # User has read their own message
-                read_by_support=is_support    # Support has read their own message
-            )
+            if self.session is None:
+                self.session = self.find_session(create=True)
             
-            # Update session last message time
-            session.last_message_at = timezone.now()
-            session.save()
-            
-            # Update ticket if applicable
-            if session.ticket:
-                session.ticket.last_message_at = timezone.now()
-                session.ticket.has_unread_messages = True
-                session.ticket.save()
-            
-            # Assign support user if this is the first support message
-            if is_support and not session.support_user:
-                session.support_user = self.user
-                session.status = 'ACTIVE'
-                session.save()
-            
-            return {
-                'id': chat_message.id,
-                'message': chat_message.message,
-                'sender': {
-                    'id': self.user.id,
-                    'email': self.user.email,
-                    'first_name': self.user.first_name,
-                    'last_name': self.user.last_name,
-                },
-                'is_support': chat_message.is_support,
-                'created_at': chat_message.created_at.isoformat(),
-                'read_by_user': chat_message.read_by_user,
-                'read_by_support': chat_message.read_by_support,
-            }
+            # The message, session/ticket updates and the queued email notification
+            # commit together; delivery happens in the email outbox worker
+            chat_message = chat.save_message(self.session, self.user, message_text, self.is_support)
+            chat_message.sender = self.user
+            return chat.serialize_message(chat_message)
             
         except Exception as e:
             raise Exception(f"Failed to save message: {str(e)}")
 
     @database_sync_to_async
-    def get_chat_history(self):
-        """Get chat history for this ticket/session"""
+    def get_chat_history(self, before=None, limit=chat.HISTORY_PAGE_SIZE):
+        """Get one window of chat history for this ticket/session"""
         try:
-            if self.ticket_id == 'general':
-                # Get general chat session for this user
-                session = ChatSession.objects.filter(
-                    user=self.user,
-                    ticket=None
-                ).first()
-            else:
-                ticket = SupportTicket.objects.get(id=self.ticket_id)
-                session = ChatSession.objects.filter(
-                    user=self.user,
-                    ticket=ticket
-                ).first()
-            
-            if not session:
-                return []
-            
-            messages = ChatMessage.objects.filter(session=session).order_by('created_at')
-            
-            return [
-                {
-                    'id': msg.id,
-                    'message': msg.message,
-                    'sender': {
-                        'id': msg.sender.id,
-                        'email': msg.sender.email,
-                        'first_name': msg.sender.first_name,
-                        'last_name': msg.sender.last_name,
-                    },
-                    'is_support': msg.is_support,
-                    'created_at': msg.created_at.isoformat(),
-                    'read_by_user': msg.read_by_user,
-                    'read_by_support': msg.read_by_support,
-                }
-                for msg in messages
-            ]
+            if self.session is None:
+                self.session = self.find_session()
+            if not self.session:
+                return [], False
+            return chat.history_page(self.session.id, before=before, limit=limit)
             
         except Exception as e:
-            return []
+            return [], False
 
     @database_sync_to_async
-    def update_support_status(self):
-        """Update support user status"""
-        try:
-            if hasattr(self.user, 'support_profile'):
-                status, created = SupportUserStatus.objects.get_or_create(
-                    user=self.user,
-                    defaults={
-                        'is_online': True,
-                        'auto_status': True
-                    }
-                )
-                status.last_activity = timezone.now()
-                status.save()
-        except Exception:
-            pass  # Ignore errors for non-support users
-
-    @database_sync_to_async
-    def send_email_notification(self, chat_message_data):
-        """Send email notification for chat message"""
-        try:
-            # Get the chat message object
-            chat_message = ChatMessage.objects.get(id=chat_message_data['id'])
-            
-            # Send email notification
-            if chat_message.session.ticket:
-                send_ticket_reply_email(
-                    chat_message.session.ticket,
-                    chat_message,
-                    chat_message.is_support
-                )
-        except Exception as e:
-            print(f"Failed to send email notification: {e}")
-            pass  # Don't fail the WebSocket connection if email fails
+    def mark_read(self, up_to):
+        """Apply a read receipt for the other side's messages; returns whether anything changed"""
+        if self.session is None:
+            self.session = self.find_session()
+        if not self.session:
+            return False
+        return chat.mark_read(self.session.id, up_to, self.is_support) > 0
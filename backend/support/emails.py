@@ -1,7 +1,14 @@
-from django.core.mail import send_mail
+"""
+Support ticket email notifications.
+
+Emails are queued in the transactional EmailOutbox (api.outbox) rather than sent
+inline, so chat consumers and views never block on SMTP. Reply notifications are
+collapsed per ticket within the outbox dedup window.
+"""
 from django.template.loader import render_to_string
 from django.conf import settings
 from django.contrib.auth.models import User
+from api.outbox import enqueue_email
 from .models import SupportTicket, ChatMessage, SupportUser
 
 
@@ -44,13 +51,13 @@ Description:
 You can view and respond to this ticket at: {context['site_url']}/support/
         """.strip()
         
-        send_mail(
+        enqueue_email(
             subject=subject,
-            message=plain_message,
-            html_message=html_message,
+            body=plain_message,
+            html_body=html_message or '',
             from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=support_emails,
-            fail_silently=False,
+            recipients=support_emails,
+            category='SUPPORT_NEW_TICKET',
         )
         
         return True
@@ -126,13 +133,14 @@ You can view and respond at: {context['site_url']}/support/
         except:
             html_message = None
         
-        send_mail(
+        enqueue_email(
             subject=subject,
-            message=plain_message,
-            html_message=html_message,
+            body=plain_message,
+            html_body=html_message or '',
             from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=recipient_email,
-            fail_silently=False,
+            recipients=recipient_email,
+            dedup_key=f"ticket-reply:{ticket.id}:{'user' if is_support_reply else 'support'}",
+            category='SUPPORT_TICKET_REPLY',
         )
         
         return True
@@ -174,13 +182,14 @@ Updated By: {updated_by.get_full_name() or updated_by.email}
 You can view your ticket at: {context['site_url']}/support-tickets
         """.strip()
         
-        send_mail(
+        enqueue_email(
             subject=subject,
-            message=plain_message,
-            html_message=html_message,
+            body=plain_message,
+            html_body=html_message or '',
             from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[ticket.user.email],
-            fail_silently=False,
+            recipients=[ticket.user.email],
+            dedup_key=f'ticket-update:{ticket.id}:{new_status}',
+            category='SUPPORT_TICKET_UPDATE',
         )
         
         return True
@@ -1,15 +1,16 @@
 import subprocess
 import os
 import signal
-import psutil
+import time
 from django.core.management.base import BaseCommand
 from django.conf import settings
+from support import status_probe
 
 class Command(BaseCommand):
     help = 'Control Django and frontend servers'
 
     def add_arguments(self, parser):
-        parser.add_argument('action', choices=['start', 'stop', 'restart', 'status'], help='Action to perform')
+        parser.add_argument('action', choices=['start', 'stop', 'restart', 'status', 'probe'], help='Action to perform')
         parser.add_argument('--server', choices=['django', 'frontend', 'both'], default='both', help='Which server to control')
 
     def handle(self, *args, **options):
@@ -25,6 +26,10 @@ class Command(BaseCommand):
             self.start_servers(server)
         elif action == 'status':
             self.check_status()
+        elif action == 'probe':
+            self.probe_forever()
+        if action in ('start', 'stop', 'restart'):
+            status_probe.refresh_soon()
 
     def start_servers(self, server):
         """Start the specified servers"""
@@ -149,26 +154,11 @@ class Command(BaseCommand):
 
     def is_django_running(self):
         """Check if Django server is running"""
-        try:
-            if os.path.exists('django.pid'):
-                with open('django.pid', 'r') as f:
-                    pid = int(f.read().strip())
-                return psutil.pid_exists(pid)
-        except:
-            pass
-        return False
+        return status_probe.is_running('django')
 
     def is_frontend_running(self):
         """Check if frontend server is running"""
-        try:
-            frontend_pid_file = os.path.join(settings.BASE_DIR, '..', 'frontend', 'frontend.pid')
-            if os.path.exists(frontend_pid_file):
-                with open(frontend_pid_file, 'r') as f:
-                    pid = int(f.read().strip())
-                return psutil.pid_exists(pid)
-        except:
-            pass
-        return False
+        return status_probe.is_running('frontend')
 
     def check_status(self):
         """Check status of both servers"""
@@ -178,3 +168,14 @@ class Command(BaseCommand):
         self.stdout.write(f"Django Server: {django_status}")
         self.stdout.write(f"Frontend Server: {frontend_status}")
 
+    def probe_forever(self):
+        """Refresh the cached server status every INTERVAL_SECONDS (for a shared cache)"""
+        interval = status_probe.probe_setting('INTERVAL_SECONDS')
+        self.stdout.write(self.style.SUCCESS(f'Probing server status every {interval}s'))
+        while True:
+            results = status_probe.refresh()
+            self.stdout.write(', '.join(
+                f"{name}: {'Running' if result['running'] else 'Stopped'} ({result['method']})"
+                for name, result in results['servers'].items()
+            ))
+            time.sleep(interval)
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.2 on 2026-10-19 08:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('support', '0007_chat_message_window_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=30, unique=True)),
+                ('last_id', models.BigIntegerField(default=0, help_text='Rows up to this id are counted in StatsRollup')),
+                ('compacted_until', models.DateTimeField(blank=True, help_text='For sources compacted by time', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StatsRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('bucket_start', models.DateTimeField(help_text='Start of the UTC hour or day counted')),
+                ('metric', models.CharField(max_length=30)),
+                ('key', models.CharField(blank=True, default='', help_text='Breakdown, e.g. activity type', max_length=50)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['granularity', 'metric', 'bucket_start'], name='support_rollup_window')],
+                'unique_together': {('granularity', 'metric', 'key', 'bucket_start')},
+            },
+        ),
+    ]
@@ -301,6 +301,40 @@ class WeeklyStats(models.Model):
         return f"Week of {self.week_start} - {self.active_users} active users"
 
 
+class StatsRollup(models.Model):
+    """Hourly and daily event counters behind the support dashboard (see support.rollups)"""
+    GRANULARITY_CHOICES = [
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    ]
+
+    granularity = models.CharField(max_length=4, choices=GRANULARITY_CHOICES)
+    bucket_start = models.DateTimeField(help_text="Start of the UTC hour or day counted")
+    metric = models.CharField(max_length=30)
+    key = models.CharField(max_length=50, blank=True, default='', help_text="Breakdown, e.g. activity type")
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['granularity', 'metric', 'key', 'bucket_start']
+        indexes = [
+            models.Index(fields=['granularity', 'metric', 'bucket_start'], name='support_rollup_window'),
+        ]
+
+    def __str__(self):
+        return f"{self.metric}:{self.key} {self.granularity} {self.bucket_start} = {self.count}"
+
+
+class RollupCursor(models.Model):
+    """How far support.rollups has compacted one source table"""
+    source = models.CharField(max_length=30, unique=True)
+    last_id = models.BigIntegerField(default=0, help_text="Rows up to this id are counted in StatsRollup")
+    compacted_until = models.DateTimeField(null=True, blank=True, help_text="For sources compacted by time")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source} @ {self.last_id or self.compacted_until}"
+
+
 class SupportUserStatus(models.Model):
     """Track support team online/offline status"""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='support_status')
@@ -364,6 +398,10 @@ class ChatMessage(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Windowed history: latest N messages of a session, paged by id
+            models.Index(fields=['session', 'id'], name='support_chatmsg_window'),
+        ]
 
     def __str__(self):
         return f"Message from {self.sender.email} in session #{self.session.id}"
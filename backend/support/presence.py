@@ -0,0 +1,175 @@
+"""
+Ephemeral presence for support staff.
+
+Support agents are online while at least one of their chat sockets has sent a
+heartbeat within ``TTL_SECONDS``. Presence lives in the shared Django cache
+(Redis when it is reachable, otherwise the per-process in-memory cache,
+mirroring the channel layer choice in settings), never in the socket
+lifecycle's database path:
+
+    support-presence:user:<id>   {'name', 'channels': {channel_name: expires_at}}
+    support-presence:index       ids of agents that may be online
+    support-presence:overrides   {user_id: {'is_online', 'name'}} manual toggles
+
+Sockets that subscribe to ``GROUP`` receive ``presence_changed`` events when
+the team goes online or offline. ``maybe_snapshot`` persists which agents are
+online or offline to SupportUserStatus at most once per ``SNAPSHOT_SECONDS`` so
+the database copy (admin, reports) stays roughly current; manual toggles
+(``auto_status=False``) are left alone.
+
+Settings (SUPPORT_PRESENCE):
+    TTL_SECONDS        seconds a socket stays online without a heartbeat
+    HEARTBEAT_SECONDS  heartbeat interval advertised to clients
+    SNAPSHOT_SECONDS   minimum interval between SupportUserStatus snapshots
+"""
+
+import time
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import SupportUserStatus
+
+GROUP = 'support_presence'
+INDEX_KEY = 'support-presence:index'
+OVERRIDES_KEY = 'support-presence:overrides'
+SNAPSHOT_LOCK_KEY = 'support-presence:snapshot-lock'
+
+DEFAULTS = {
+    'TTL_SECONDS': 90,
+    'HEARTBEAT_SECONDS': 30,
+    'SNAPSHOT_SECONDS': 300,
+}
+
+
+def presence_setting(name):
+    return getattr(settings, 'SUPPORT_PRESENCE', {}).get(name, DEFAULTS[name])
+
+
+def user_key(user_id):
+    return f'support-presence:user:{user_id}'
+
+
+def display_name(user):
+    return f"{user.first_name} {user.last_name}".strip() or user.email
+
+
+def _live_channels(entry, now):
+    return {channel: expires for channel, expires in (entry or {}).get('channels', {}).items() if expires > now}
+
+
+def heartbeat(user, channel_name):
+    """Refresh one socket of an agent; returns True if the agent just came online"""
+    now = time.time()
+    ttl = presence_setting('TTL_SECONDS')
+    entry = cache.get(user_key(user.id))
+    channels = _live_channels(entry, now)
+    came_online = not channels
+    channels[channel_name] = now + ttl
+    cache.set(user_key(user.id), {'name': display_name(user), 'channels': channels}, ttl)
+
+    index = cache.get(INDEX_KEY) or []
+    if user.id not in index:
+        cache.set(INDEX_KEY, index + [user.id], None)
+    return came_online
+
+
+def leave(user_id, channel_name):
+    """Drop one socket of an agent; returns True if the agent just went offline"""
+    now = time.time()
+    entry = cache.get(user_key(user_id))
+    channels = _live_channels(entry, now)
+    if channel_name not in channels:
+        return False
+    del channels[channel_name]
+    if channels:
+        cache.set(user_key(user_id), dict(entry, channels=channels), max(channels.values()) - now)
+        return False
+    cache.delete(user_key(user_id))
+    return True
+
+
+def online_agents():
+    """``{user_id: name}`` of agents with a live socket"""
+    index = cache.get(INDEX_KEY) or []
+    if not index:
+        return {}
+    now = time.time()
+    entries = cache.get_many([user_key(user_id) for user_id in index])
+    online = {}
+    for user_id in index:
+        entry = entries.get(user_key(user_id))
+        if _live_channels(entry, now):
+            online[user_id] = entry['name']
+    if len(online) < len(index):
+        # Forget agents whose sockets all expired
+        cache.set(INDEX_KEY, [user_id for user_id in (cache.get(INDEX_KEY) or []) if user_id in online], None)
+    return online
+
+
+def overrides():
+    """Manual online/offline toggles, loaded from SupportUserStatus on a cold cache"""
+    cached = cache.get(OVERRIDES_KEY)
+    if cached is None:
+        cached = {
+            status.user_id: {'is_online': status.is_online, 'name': display_name(status.user)}
+            for status in SupportUserStatus.objects.filter(auto_status=False).select_related('user')
+        }
+        cache.set(OVERRIDES_KEY, cached, None)
+    return cached
+
+
+def set_override(user, is_online):
+    current = dict(overrides())
+    current[user.id] = {'is_online': is_online, 'name': display_name(user)}
+    cache.set(OVERRIDES_KEY, current, None)
+
+
+def team_status():
+    """``{'is_online', 'support_name'}`` as shown to users waiting for support"""
+    manual = overrides()
+    for user_id, name in online_agents().items():
+        if manual.get(user_id, {}).get('is_online', True):
+            return {'is_online': True, 'support_name': name}
+    for override in manual.values():
+        if override['is_online']:
+            return {'is_online': True, 'support_name': override['name']}
+    return {'is_online': False}
+
+
+def broadcast():
+    """Push the current team status to subscribed sockets (for sync callers)"""
+    channel_layer = get_channel_layer()
+    if channel_layer is not None:
+        async_to_sync(channel_layer.group_send)(GROUP, {'type': 'presence_changed', 'status': team_status()})
+
+
+def maybe_snapshot():
+    """Persist online agents to SupportUserStatus, at most once per SNAPSHOT_SECONDS"""
+    if not cache.add(SNAPSHOT_LOCK_KEY, True, presence_setting('SNAPSHOT_SECONDS')):
+        return 0
+    return snapshot()
+
+
+def snapshot():
+    """Mark auto-status agents online or offline to match their live sockets"""
+    online_ids = list(online_agents())
+    now = timezone.now()
+    SupportUserStatus.objects.filter(auto_status=True, is_online=True).exclude(user_id__in=online_ids).update(
+        is_online=False, updated_at=now
+    )
+    if not online_ids:
+        return 0
+    existing = set(SupportUserStatus.objects.filter(user_id__in=online_ids).values_list('user_id', flat=True))
+    SupportUserStatus.objects.filter(user_id__in=existing, auto_status=True).update(
+        is_online=True, last_activity=now, updated_at=now
+    )
+    SupportUserStatus.objects.bulk_create(
+        [SupportUserStatus(user_id=user_id, is_online=True, auto_status=True)
+         for user_id in online_ids if user_id not in existing],
+        ignore_conflicts=True,
+    )
+    return len(online_ids)
@@ -0,0 +1,341 @@
+"""
+Rollup counters for the support dashboard.
+
+Event tables (UserActivity, users, the three entry tables, tickets, alerts)
+are compacted into StatsRollup rows: counts per UTC hour and per UTC day for
+each metric, optionally broken down by a key (activity type, user id, alert
+type). Dashboard windows are then summed from a handful of rollup rows plus a
+small live delta, so their cost no longer grows with the event tables:
+
+    window = hourly buckets of the window's first (partial) day
+           + daily buckets from the first whole day on
+           + live count of the rows not compacted yet
+
+Windows are therefore aligned to the hour (to the day for day-only metrics
+such as per-user activity).
+
+Insert-only sources are compacted by primary key: each pass counts the rows
+between the source's RollupCursor.last_id and the highest id at least
+``SETTLE_SECONDS`` old (capped at ``BATCH_ROWS`` rows), grouped by hour, and
+adds them to the rollups in the same transaction that advances the cursor.
+The live delta is ``id > last_id``, a primary key range. Resolved tickets are
+compacted by ``resolved_at`` instead, up to the last closed hour.
+
+``maybe_compact`` runs a pass at most once per ``COMPACT_SECONDS`` (called
+from the dashboard endpoints); ``manage.py compact_support_stats`` catches up
+a backlog, e.g. after deploying, and can rebuild everything from scratch.
+A pass that compacts anything also rewrites the last twelve WeeklyStats rows.
+
+Settings (SUPPORT_STATS_ROLLUP):
+    COMPACT_SECONDS  minimum interval between opportunistic compaction passes
+    BATCH_ROWS       rows per source compacted in one pass
+    SETTLE_SECONDS   age a row must reach before it is compacted, so rows of
+                     transactions still in flight are not skipped
+"""
+
+from datetime import timedelta, timezone as dt_timezone
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from api.db_routing import primary_reads
+
+from .models import RollupCursor, StatsRollup, WeeklyStats
+
+COMPACT_LOCK_KEY = 'support-rollups:compact-lock'
+
+DEFAULTS = {
+    'COMPACT_SECONDS': 60,
+    'BATCH_ROWS': 20000,
+    'SETTLE_SECONDS': 60,
+}
+
+HOURLY = ('hour', 'day')
+DAILY = ('day',)
+
+# metric -> (model, timestamp field, breakdown key field or None, granularities)
+ID_SOURCES = {
+    'activity': ('support.UserActivity', 'created_at', 'activity_type', HOURLY),
+    'user_activity': ('support.UserActivity', 'created_at', 'user_id', DAILY),
+    'users_joined': ('auth.User', 'date_joined', None, HOURLY),
+    'section_a_entries': ('section_a.SectionAEntry', 'created_at', None, HOURLY),
+    'section_b_entries': ('section_b.ProfessionalDevelopmentEntry', 'created_at', None, HOURLY),
+    'section_c_entries': ('section_c.SupervisionEntry', 'created_at', None, HOURLY),
+    'tickets_opened': ('support.SupportTicket', 'created_at', None, HOURLY),
+    'alerts': ('support.SystemAlert', 'created_at', 'alert_type', HOURLY),
+}
+
+# metric -> (model, timestamp field, filter); compacted by closed hours of the timestamp
+TIME_SOURCES = {
+    'tickets_resolved': ('support.SupportTicket', 'resolved_at', {'status': 'RESOLVED'}),
+}
+
+
+def rollup_setting(name):
+    return getattr(settings, 'SUPPORT_STATS_ROLLUP', {}).get(name, DEFAULTS[name])
+
+
+def _floor_hour(moment):
+    return moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def _floor_day(moment):
+    return _floor_hour(moment).replace(hour=0)
+
+
+def _add_counts(metric, increments):
+    """Add ``{(granularity, bucket_start, key): count}`` to the metric's rollup rows"""
+    if not increments:
+        return
+    existing = StatsRollup.objects.filter(
+        metric=metric,
+        bucket_start__in={bucket for _, bucket, _ in increments},
+        key__in={key for _, _, key in increments},
+    )
+    changed = []
+    for rollup in existing:
+        added = increments.pop((rollup.granularity, rollup.bucket_start, rollup.key), None)
+        if added:
+            rollup.count += added
+            changed.append(rollup)
+    StatsRollup.objects.bulk_update(changed, ['count'])
+    StatsRollup.objects.bulk_create([
+        StatsRollup(granularity=granularity, bucket_start=bucket, metric=metric, key=key, count=count)
+        for (granularity, bucket, key), count in increments.items()
+    ])
+
+
+def _bucket_increments(rows, granularities):
+    """Expand ``(hour, key, count)`` rows into increments for each granularity"""
+    increments = {}
+    for hour, key, count in rows:
+        hour = _floor_hour(hour)
+        for granularity in granularities:
+            bucket = hour if granularity == 'hour' else hour.replace(hour=0)
+            increments[(granularity, bucket, key)] = increments.get((granularity, bucket, key), 0) + count
+    return increments
+
+
+def _grouped_counts(queryset, timestamp_field, key_field):
+    fields = ['hour'] + ([key_field] if key_field else [])
+    rows = (
+        queryset.annotate(hour=TruncHour(timestamp_field, tzinfo=dt_timezone.utc))
+        .values(*fields)
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    return [(row['hour'], str(row[key_field]) if key_field else '', row['n']) for row in rows]
+
+
+def _compact_id_source(metric, now, batch):
+    model_path, timestamp_field, key_field, granularities = ID_SOURCES[metric]
+    model = apps.get_model(model_path)
+    with transaction.atomic():
+        cursor, _ = RollupCursor.objects.select_for_update().get_or_create(source=metric)
+        pending = model.objects.filter(id__gt=cursor.last_id)
+        batch_end = next(iter(pending.order_by('id').values_list('id', flat=True)[batch - 1:batch]), None)
+        if batch_end is not None:
+            pending = pending.filter(id__lte=batch_end)
+        settled = now - timedelta(seconds=rollup_setting('SETTLE_SECONDS'))
+        upper = pending.filter(**{f'{timestamp_field}__lte': settled}).aggregate(upper=Max('id'))['upper']
+        if upper is None:
+            return 0
+
+        rows = _grouped_counts(
+            model.objects.filter(id__gt=cursor.last_id, id__lte=upper), timestamp_field, key_field
+        )
+        _add_counts(metric, _bucket_increments(rows, granularities))
+        cursor.last_id = upper
+        cursor.save(update_fields=['last_id', 'updated_at'])
+    return sum(count for _, _, count in rows)
+
+
+def _compact_time_source(metric, now):
+    model_path, timestamp_field, filters = TIME_SOURCES[metric]
+    queryset = apps.get_model(model_path).objects.filter(**filters)
+    until = _floor_hour(now - timedelta(seconds=rollup_setting('SETTLE_SECONDS')))
+    with transaction.atomic():
+        cursor, _ = RollupCursor.objects.select_for_update().get_or_create(source=metric)
+        window = queryset.filter(**{f'{timestamp_field}__lt': until})
+        if cursor.compacted_until:
+            window = window.filter(**{f'{timestamp_field}__gte': cursor.compacted_until})
+        rows = _grouped_counts(window, timestamp_field, None)
+        _add_counts(metric, _bucket_increments(rows, HOURLY))
+        cursor.compacted_until = until
+        cursor.save(update_fields=['compacted_until', 'updated_at'])
+    return sum(count for _, _, count in rows)
+
+
+def compact(now=None, batch=None):
+    """Run one compaction pass over every source; returns the number of rows compacted"""
+    now = now or timezone.now()
+    batch = batch or rollup_setting('BATCH_ROWS')
+    # Cursors and sources must be read where the rollups are written, even from a replica view
+    with primary_reads():
+        compacted = {metric: _compact_id_source(metric, now, batch) for metric in ID_SOURCES}
+        compacted.update({metric: _compact_time_source(metric, now) for metric in TIME_SOURCES})
+        total = sum(compacted.values())
+        if total:
+            refresh_weekly_stats()
+    return total
+
+
+def maybe_compact():
+    """Compact at most once per COMPACT_SECONDS across processes sharing the cache"""
+    if not cache.add(COMPACT_LOCK_KEY, True, rollup_setting('COMPACT_SECONDS')):
+        return 0
+    return compact()
+
+
+def rebuild(batch=None):
+    """Drop every rollup and compact the sources again from the start"""
+    with transaction.atomic():
+        StatsRollup.objects.all().delete()
+        RollupCursor.objects.all().delete()
+    return catch_up(batch)
+
+
+def catch_up(batch=None):
+    """Compact until every settled row is counted; returns the number of rows compacted"""
+    total = 0
+    while True:
+        compacted = compact(batch=batch)
+        if not compacted:
+            return total
+        total += compacted
+
+
+def _cursors():
+    return {cursor.source: cursor for cursor in RollupCursor.objects.all()}
+
+
+def _window_filter(since, granularities):
+    start = _floor_hour(since)
+    if 'hour' not in granularities:
+        return Q(granularity='day', bucket_start__gte=_floor_day(start))
+    first_day = start if start.hour == 0 else _floor_day(start) + timedelta(days=1)
+    return (
+        Q(granularity='hour', bucket_start__gte=start, bucket_start__lt=first_day)
+        | Q(granularity='day', bucket_start__gte=first_day)
+    )
+
+
+def _granularities(metric):
+    return ID_SOURCES[metric][3] if metric in ID_SOURCES else HOURLY
+
+
+def _delta(metric, since, cursor, key=None):
+    """Rows of the metric since ``since`` that are not compacted yet"""
+    if metric in TIME_SOURCES:
+        model_path, timestamp_field, filters = TIME_SOURCES[metric]
+        start = max(since, cursor.compacted_until) if cursor and cursor.compacted_until else since
+        return apps.get_model(model_path).objects.filter(
+            **filters, **{f'{timestamp_field}__gte': start}
+        ).count()
+    model_path, timestamp_field, key_field, _ = ID_SOURCES[metric]
+    queryset = apps.get_model(model_path).objects.filter(
+        id__gt=cursor.last_id if cursor else 0, **{f'{timestamp_field}__gte': since}
+    )
+    if key is not None:
+        queryset = queryset.filter(**{key_field: key})
+    return queryset.count()
+
+
+def totals(since, counters):
+    """
+    Counts since ``since`` for ``counters``, a list of ``(metric, key)`` pairs
+    (key None for every key): ``{(metric, key): count}``
+    """
+    metrics = {metric for metric, _ in counters}
+    window = Q()
+    for metric in metrics:
+        window |= Q(metric=metric) & _window_filter(since, _granularities(metric))
+    summed = {
+        (row['metric'], row['key']): row['total']
+        for row in StatsRollup.objects.filter(window).values('metric', 'key').annotate(total=Sum('count')).order_by()
+    }
+    cursors = _cursors()
+    result = {}
+    for metric, key in counters:
+        compacted = sum(
+            total for (summed_metric, summed_key), total in summed.items()
+            if summed_metric == metric and (key is None or summed_key == key)
+        )
+        result[(metric, key)] = compacted + _delta(metric, since, cursors.get(metric), key)
+    return result
+
+
+def top_users(since, limit=10):
+    """``[(user_id, activity count)]`` of the most active users since ``since`` (day-aligned)"""
+    cursor = RollupCursor.objects.filter(source='user_activity').first()
+    _, timestamp_field, _, _ = ID_SOURCES['user_activity']
+    start = _floor_day(since)
+    # Filtered here rather than in SQL so the database walks the primary key
+    # range of the (few) uncompacted rows instead of a week of the timestamp index
+    delta = {}
+    for user_id, created_at in apps.get_model('support.UserActivity').objects.filter(
+        id__gt=cursor.last_id if cursor else 0
+    ).order_by('id').values_list('user_id', timestamp_field):
+        if created_at >= start:
+            delta[user_id] = delta.get(user_id, 0) + 1
+    # A user outside the compacted top (limit + len(delta)) cannot overtake it
+    compacted = (
+        StatsRollup.objects.filter(Q(metric='user_activity') & _window_filter(since, DAILY))
+        .values('key').annotate(total=Sum('count')).order_by('-total', 'key')[:limit + len(delta)]
+    )
+    counts = {int(row['key']): row['total'] for row in compacted}
+    for user_id, n in delta.items():
+        counts[user_id] = counts.get(user_id, 0) + n
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+
+# WeeklyStats field -> metric
+WEEKLY_COUNTERS = {
+    'new_registrations': 'users_joined',
+    'pd_entries_created': 'section_b_entries',
+    'supervision_entries_created': 'section_c_entries',
+    'section_a_entries_created': 'section_a_entries',
+    'support_tickets_created': 'tickets_opened',
+    'support_tickets_resolved': 'tickets_resolved',
+    'error_count': 'alerts',
+}
+
+
+def refresh_weekly_stats(weeks=12):
+    """Rewrite the WeeklyStats rows of the last ``weeks`` weeks from the daily rollups"""
+    today = _floor_day(timezone.now())
+    first_week = today - timedelta(days=today.weekday() + 7 * (weeks - 1))
+    daily = StatsRollup.objects.filter(granularity='day', bucket_start__gte=first_week)
+
+    per_week = {}
+    for row in daily.exclude(metric='user_activity').values('metric', 'bucket_start').annotate(total=Sum('count')):
+        week = (row['bucket_start'] - timedelta(days=row['bucket_start'].weekday())).date()
+        per_week.setdefault(week, {}).setdefault(row['metric'], 0)
+        per_week[week][row['metric']] += row['total']
+
+    active = {}
+    for user_key, bucket in daily.filter(metric='user_activity').values_list('key', 'bucket_start'):
+        active.setdefault((bucket - timedelta(days=bucket.weekday())).date(), set()).add(user_key)
+
+    total_users = StatsRollup.objects.filter(
+        granularity='day', metric='users_joined', bucket_start__lt=first_week
+    ).aggregate(total=Sum('count'))['total'] or 0
+
+    with transaction.atomic():
+        for offset in range(weeks):
+            week = (first_week + timedelta(days=7 * offset)).date()
+            counts = per_week.get(week, {})
+            total_users += counts.get('users_joined', 0)
+            WeeklyStats.objects.update_or_create(
+                week_start=week,
+                defaults={
+                    'total_users': total_users,
+                    'active_users': len(active.get(week, ())),
+                    **{field: counts.get(metric, 0) for field, metric in WEEKLY_COUNTERS.items()},
+                },
+            )
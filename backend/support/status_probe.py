@@ -0,0 +1,241 @@
+"""
+Cached status of the Django and frontend dev servers.
+
+Each server is probed in turn by its PID file, an HTTP request to its local
+port and finally a scan of the process table for its command line. The probes
+for both servers run concurrently on an asyncio loop (the process-table scan,
+which psutil only offers synchronously, in a worker thread and once for both
+servers), and the result is kept in the Django cache with the time it was
+taken:
+
+    server-status:results  {'checked_at', 'servers': {name: {'running', 'method', 'checked_at'}}}
+
+``get_status`` only ever reads that entry, so the support dashboard never
+waits on a probe. In 'thread' mode a daemon thread per process refreshes it
+every ``INTERVAL_SECONDS``, and a cache lock keeps several worker processes
+from probing in the same interval; ``refresh_soon`` wakes it early, e.g.
+after a server was started or stopped. In 'inline' mode a stale entry is
+refreshed in the calling request instead (tests, one-off commands).
+
+Starting and stopping servers must not act on a result that may predate the
+last start or stop, so ``is_running`` always probes (and re-caches) first.
+
+Settings (SERVER_STATUS_PROBE):
+    MODE              'thread' (background refresh) or 'inline' (refresh stale results on read)
+    INTERVAL_SECONDS  seconds between background probes
+    STALE_SECONDS     age after which cached results are reported as stale
+    HTTP_TIMEOUT      seconds an HTTP probe waits for the server's status line
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+
+import psutil
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+RESULTS_KEY = 'server-status:results'
+LOCK_KEY = 'server-status:probe-lock'
+
+DEFAULTS = {
+    'MODE': 'thread',
+    'INTERVAL_SECONDS': 15,
+    'STALE_SECONDS': 60,
+    'HTTP_TIMEOUT': 2,
+}
+
+
+def probe_setting(name):
+    return getattr(settings, 'SERVER_STATUS_PROBE', {}).get(name, DEFAULTS[name])
+
+
+def _django_cmdline(cmdline):
+    return any('manage.py' in arg and 'runserver' in arg for arg in cmdline)
+
+
+def _frontend_cmdline(cmdline):
+    return any('vite' in arg.lower() or 'npm' in arg or 'node' in arg for arg in cmdline)
+
+
+# name -> (PID file, (host, port, path), accepted HTTP status codes, command line matcher, URL)
+SERVERS = {
+    'django': (
+        lambda: 'django.pid',
+        ('localhost', 8000, '/admin/'),
+        {200, 302},
+        _django_cmdline,
+        'http://localhost:8000',
+    ),
+    'frontend': (
+        lambda: os.path.join(settings.BASE_DIR, '..', 'frontend', 'frontend.pid'),
+        ('localhost', 5173, '/'),
+        {200},
+        _frontend_cmdline,
+        'http://localhost:5173',
+    ),
+}
+
+
+def server_url(name):
+    return SERVERS[name][4]
+
+
+def _pid_file_status(pid_file):
+    """True/False if the PID file names a (dead) process, None without a usable PID file"""
+    try:
+        with open(pid_file, 'r') as f:
+            pid = int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+    return psutil.pid_exists(pid)
+
+
+async def _http_status(host, port, path, timeout):
+    """HTTP status code of ``GET path``, or None if the server does not answer in time"""
+    writer = None
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        writer.write(f'GET {path} HTTP/1.0\r\nHost: {host}:{port}\r\n\r\n'.encode('ascii'))
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        return int(status_line.split()[1])
+    except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+        return None
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _scan_processes(names):
+    """Names of the servers whose command line shows up in the process table"""
+    found = set()
+    for proc in psutil.process_iter(['cmdline']):
+        cmdline = proc.info.get('cmdline')
+        if not cmdline:
+            continue
+        for name in names:
+            if name not in found and SERVERS[name][3](cmdline):
+                found.add(name)
+        if found == set(names):
+            break
+    return found
+
+
+async def probe_all():
+    """Probe every server concurrently: ``{name: {'running', 'method', 'checked_at'}}``"""
+    timeout = probe_setting('HTTP_TIMEOUT')
+    results = {}
+    unresolved = []
+    for name, (pid_file, *_) in SERVERS.items():
+        running = _pid_file_status(pid_file())
+        if running is None:
+            unresolved.append(name)
+        else:
+            results[name] = {'running': running, 'method': 'pid_file'}
+
+    if unresolved:
+        http_codes, scanned = await asyncio.gather(
+            asyncio.gather(*(_http_status(*SERVERS[name][1], timeout) for name in unresolved)),
+            asyncio.to_thread(_scan_processes, unresolved),
+        )
+        for name, code in zip(unresolved, http_codes):
+            if code in SERVERS[name][2]:
+                results[name] = {'running': True, 'method': 'http'}
+            else:
+                results[name] = {'running': name in scanned, 'method': 'process'}
+
+    checked_at = time.time()
+    for result in results.values():
+        result['checked_at'] = checked_at
+    return results
+
+
+def refresh():
+    """Probe the servers now and cache the result"""
+    servers = asyncio.run(probe_all())
+    results = {'checked_at': time.time(), 'servers': servers}
+    cache.set(RESULTS_KEY, results, None)
+    return results
+
+
+def _is_stale(results):
+    return results is None or time.time() - results['checked_at'] > probe_setting('STALE_SECONDS')
+
+
+def cached_results():
+    """The cached probe results (refreshed first in 'inline' mode when stale), or None"""
+    results = cache.get(RESULTS_KEY)
+    if probe_setting('MODE') == 'inline':
+        if _is_stale(results):
+            results = refresh()
+    else:
+        _ensure_started()
+    return results
+
+
+def server_status(name, results):
+    entry = (results or {}).get('servers', {}).get(name)
+    if entry is None:
+        return {'running': False, 'status': 'Unknown', 'url': None, 'checked_at': None}
+    return {
+        'running': entry['running'],
+        'status': 'Running' if entry['running'] else 'Stopped',
+        'url': server_url(name) if entry['running'] else None,
+        'checked_at': entry['checked_at'],
+    }
+
+
+def get_status():
+    """``{name: {'running', 'status', 'url', 'checked_at'}, 'checked_at', 'stale'}`` from the cache"""
+    results = cached_results()
+    status = {name: server_status(name, results) for name in SERVERS}
+    status['checked_at'] = results['checked_at'] if results else None
+    status['stale'] = _is_stale(results)
+    return status
+
+
+def is_running(name):
+    """Whether the server is running now, for start/stop decisions (never from the cache)"""
+    return refresh()['servers'][name]['running']
+
+
+_thread = None
+_wake = threading.Event()
+_lock = threading.Lock()
+
+
+def _probe_loop():
+    while True:
+        interval = probe_setting('INTERVAL_SECONDS')
+        try:
+            # One probe per interval across every process sharing the cache
+            if cache.add(LOCK_KEY, True, max(1, interval - 1)):
+                refresh()
+        except Exception:
+            logger.exception('Probing server status failed')
+        _wake.wait(interval)
+        _wake.clear()
+
+
+def _ensure_started():
+    global _thread
+    if _thread is not None:
+        return
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_probe_loop, name='server-status-probe', daemon=True)
+            _thread.start()
+
+
+def refresh_soon():
+    """Have the next read see fresh results, e.g. after starting or stopping a server"""
+    cache.delete(LOCK_KEY)
+    if probe_setting('MODE') == 'inline':
+        cache.delete(RESULTS_KEY)
+    else:
+        _wake.set()
@@ -0,0 +1,434 @@
+import asyncio
+import time
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import chat, presence, rollups, status_probe, ticket_listing
+from .consumers import ChatConsumer
+from .models import (
+    ChatMessage, RollupCursor, StatsRollup, SupportTicket, SupportUser, SupportUserStatus, UserActivity,
+)
+
+
+class ChatHistoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='user', email='user@example.com', password='pass1234')
+        self.agent = User.objects.create_user(username='agent', email='agent@example.com', password='pass1234')
+        self.ticket = SupportTicket.objects.create(user=self.user, subject='Help', description='Stuck')
+        self.session = chat.get_or_create_session(self.user, str(self.ticket.id))
+
+    def add_messages(self, count, sender=None, is_support=False):
+        return [
+            chat.save_message(self.session, sender or self.user, f'message {n}', is_support)
+            for n in range(count)
+        ]
+
+    def test_history_is_windowed_and_paged_by_id(self):
+        messages = self.add_messages(7)
+
+        with self.assertNumQueries(1):
+            latest, has_more = chat.history_page(self.session.id, limit=3)
+        self.assertEqual([m['id'] for m in latest], [m.id for m in messages[4:]])
+        self.assertTrue(has_more)
+        self.assertEqual(latest[0]['sender']['email'], 'user@example.com')
+
+        older, has_more = chat.history_page(self.session.id, before=latest[0]['id'], limit=3)
+        self.assertEqual([m['id'] for m in older], [m.id for m in messages[1:4]])
+        self.assertTrue(has_more)
+
+        oldest, has_more = chat.history_page(self.session.id, before=older[0]['id'], limit=3)
+        self.assertEqual([m['id'] for m in oldest], [messages[0].id])
+        self.assertFalse(has_more)
+
+    def test_save_message_bumps_session_and_ticket(self):
+        message = chat.save_message(self.session, self.agent, 'On it', is_support=True)
+        self.session.refresh_from_db()
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.session.support_user, self.agent)
+        self.assertTrue(self.ticket.has_unread_messages)
+        self.assertEqual(self.ticket.last_message_at.date(), message.created_at.date())
+        self.assertEqual((message.read_by_user, message.read_by_support), (False, True))
+
+    def test_read_receipt_marks_messages_in_one_update(self):
+        messages = self.add_messages(4)
+        reply = chat.save_message(self.session, self.agent, 'Reply', is_support=True)
+
+        self.assertEqual(chat.mark_read(self.session.id, messages[1].id, by_support=True), 2)
+        self.assertEqual(
+            list(ChatMessage.objects.filter(is_support=False, read_by_support=True).values_list('id', flat=True)),
+            [m.id for m in messages[:2]],
+        )
+        self.ticket.refresh_from_db()
+        self.assertTrue(self.ticket.has_unread_messages)
+
+        chat.mark_read(self.session.id, reply.id, by_support=True)
+        self.ticket.refresh_from_db()
+        self.assertFalse(self.ticket.has_unread_messages)
+
+        self.assertEqual(chat.mark_read(self.session.id, reply.id, by_support=False), 1)
+        self.assertEqual(chat.mark_read(self.session.id, reply.id, by_support=False), 0)
+
+    @override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+    def test_support_socket_works_in_the_ticket_owners_session(self):
+        cache.clear()
+        SupportUser.objects.create(user=self.agent)
+        messages = self.add_messages(2)
+
+        async def receive(communicator, frame_type):
+            while True:
+                frame = await communicator.receive_json_from()
+                if frame.get('type') == frame_type:
+                    return frame
+
+        async def agent_reads_and_replies():
+            communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), f'/ws/chat/{self.ticket.id}/')
+            communicator.scope['user'] = self.agent
+            communicator.scope['url_route'] = {'kwargs': {'ticket_id': str(self.ticket.id)}}
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            history = await receive(communicator, 'chat_history')
+            await communicator.send_json_to({'type': 'mark_read', 'up_to': messages[-1].id})
+            receipt = await receive(communicator, 'read_receipt')
+            unread = await sync_to_async(lambda: SupportTicket.objects.get(pk=self.ticket.pk).has_unread_messages)()
+            await communicator.send_json_to({'type': 'message', 'message': 'On it'})
+            await receive(communicator, 'message')
+            await communicator.disconnect()
+            return history, receipt, unread
+
+        history, receipt, unread = async_to_sync(agent_reads_and_replies)()
+        self.assertEqual([m['id'] for m in history['messages']], [m.id for m in messages])
+        self.assertEqual(receipt, {'type': 'read_receipt', 'up_to': messages[-1].id, 'by_support': True})
+        self.assertFalse(ChatMessage.objects.filter(is_support=False, read_by_support=False).exists())
+        self.assertFalse(unread)
+        # The reply lands in the user's session, not one of the agent's own
+        self.assertEqual(self.session.messages.filter(is_support=True).count(), 1)
+        self.assertFalse(self.agent.user_chat_sessions.exists())
+
+
+class SupportPresenceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.agent = User.objects.create_user(
+            username='agent', email='agent@example.com', password='pass1234', first_name='Alex', last_name='Agent'
+        )
+        self.user = User.objects.create_user(username='user', email='user@example.com', password='pass1234')
+
+    def test_online_while_any_socket_is_live(self):
+        self.assertTrue(presence.heartbeat(self.agent, 'socket-1'))
+        self.assertFalse(presence.heartbeat(self.agent, 'socket-2'))
+        self.assertEqual(presence.team_status(), {'is_online': True, 'support_name': 'Alex Agent'})
+
+        self.assertFalse(presence.leave(self.agent.id, 'socket-1'))
+        self.assertTrue(presence.leave(self.agent.id, 'socket-2'))
+        self.assertEqual(presence.team_status(), {'is_online': False})
+
+    def test_heartbeats_expire(self):
+        presence.heartbeat(self.agent, 'socket-1')
+        later = presence.time.time() + presence.presence_setting('TTL_SECONDS') + 1
+        with mock.patch.object(presence.time, 'time', return_value=later):
+            self.assertEqual(presence.online_agents(), {})
+            self.assertTrue(presence.heartbeat(self.agent, 'socket-1'))
+
+    def test_manual_override_wins(self):
+        presence.heartbeat(self.agent, 'socket-1')
+        presence.set_override(self.agent, False)
+        self.assertEqual(presence.team_status(), {'is_online': False})
+
+        presence.leave(self.agent.id, 'socket-1')
+        presence.set_override(self.agent, True)
+        self.assertTrue(presence.team_status()['is_online'])
+
+    def test_status_endpoint_reads_no_rows(self):
+        SupportUserStatus.objects.create(user=self.agent, is_online=True, auto_status=False)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        client.get('/support/api/chat/online-status/')  # loads the manual overrides once
+
+        presence.heartbeat(self.agent, 'socket-1')
+        with self.assertNumQueries(0):
+            response = client.get('/support/api/chat/online-status/')
+        self.assertEqual(response.data, {'is_online': True, 'support_name': 'Alex Agent'})
+
+    def test_snapshot_is_periodic(self):
+        presence.heartbeat(self.agent, 'socket-1')
+        self.assertEqual(presence.maybe_snapshot(), 1)
+        self.assertEqual(presence.maybe_snapshot(), 0)
+        status = SupportUserStatus.objects.get(user=self.agent)
+        self.assertTrue(status.is_online and status.auto_status)
+
+    def test_snapshot_marks_departed_agents_offline(self):
+        manual = User.objects.create_user(username='manual', email='manual@example.com', password='pass1234')
+        SupportUserStatus.objects.create(user=manual, is_online=True, auto_status=False)
+        presence.heartbeat(self.agent, 'socket-1')
+        presence.snapshot()
+
+        presence.leave(self.agent.id, 'socket-1')
+        self.assertEqual(presence.snapshot(), 0)
+
+        self.assertFalse(SupportUserStatus.objects.get(user=self.agent).is_online)
+        # Manual toggles are not touched by snapshots
+        self.assertTrue(SupportUserStatus.objects.get(user=manual).is_online)
+
+
+class ServerStatusProbeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_user(username='staff', email='staff@example.com', password='pass1234', is_staff=True)
+        self.client.force_login(self.staff)
+
+    def test_http_probe_reads_status_line(self):
+        async def probe():
+            async def respond(reader, writer):
+                await reader.readline()
+                writer.write(b'HTTP/1.1 302 Found\r\n\r\n')
+                await writer.drain()
+                writer.close()
+
+            server = await asyncio.start_server(respond, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                return await status_probe._http_status('127.0.0.1', port, '/admin/', 1)
+
+        self.assertEqual(asyncio.run(probe()), 302)
+        self.assertIsNone(asyncio.run(status_probe._http_status('127.0.0.1', 1, '/', 1)))
+
+    def test_probes_run_concurrently(self):
+        async def slow_http(host, port, path, timeout):
+            await asyncio.sleep(0.3)
+            return 200 if port == 8000 else None
+
+        def slow_scan(names):
+            time.sleep(0.3)
+            return {'frontend'}
+
+        with mock.patch.object(status_probe, '_pid_file_status', return_value=None), \
+                mock.patch.object(status_probe, '_http_status', slow_http), \
+                mock.patch.object(status_probe, '_scan_processes', slow_scan):
+            started = time.monotonic()
+            results = asyncio.run(status_probe.probe_all())
+            elapsed = time.monotonic() - started
+
+        self.assertLess(elapsed, 0.55)
+        self.assertEqual(results['django']['method'], 'http')
+        self.assertEqual((results['frontend']['running'], results['frontend']['method']), (True, 'process'))
+
+    @override_settings(SERVER_STATUS_PROBE={'MODE': 'thread'})
+    def test_status_endpoint_serves_cached_results(self):
+        with mock.patch.object(status_probe, '_ensure_started'), \
+                mock.patch.object(status_probe, 'refresh', side_effect=AssertionError('probed in request')):
+            cold = self.client.get('/support/api/server-status/').json()
+            self.assertEqual(cold['django']['status'], 'Unknown')
+            self.assertTrue(cold['stale'])
+
+            checked_at = time.time()
+            cache.set(status_probe.RESULTS_KEY, {'checked_at': checked_at, 'servers': {
+                'django': {'running': True, 'method': 'http', 'checked_at': checked_at},
+                'frontend': {'running': False, 'method': 'process', 'checked_at': checked_at},
+            }})
+            status = self.client.get('/support/api/server-status/').json()
+            health = self.client.get('/support/api/system-health/').json()
+
+        self.assertEqual(status['django'], {
+            'running': True, 'status': 'Running', 'url': 'http://localhost:8000', 'checked_at': checked_at,
+        })
+        self.assertEqual(status['frontend']['status'], 'Stopped')
+        self.assertFalse(status['stale'])
+        self.assertEqual(health['servers']['django']['status'], 'Running')
+
+    @override_settings(SERVER_STATUS_PROBE={'MODE': 'inline', 'STALE_SECONDS': 60})
+    def test_inline_mode_refreshes_stale_results(self):
+        probed = {'django': {'running': False, 'method': 'pid_file', 'checked_at': 0},
+                  'frontend': {'running': False, 'method': 'pid_file', 'checked_at': 0}}
+
+        async def fake_probe():
+            return probed
+
+        with mock.patch.object(status_probe, 'probe_all', fake_probe):
+            first = status_probe.get_status()
+            checked_at = first['checked_at']
+            self.assertEqual(status_probe.get_status()['checked_at'], checked_at)
+
+            later = time.time() + 61
+            with mock.patch.object(status_probe.time, 'time', return_value=later):
+                self.assertEqual(status_probe.get_status()['checked_at'], later)
+        self.assertEqual(first['django']['status'], 'Stopped')
+
+    def test_start_and_stop_decisions_probe_first(self):
+        checked_at = time.time()
+        cache.set(status_probe.RESULTS_KEY, {'checked_at': checked_at, 'servers': {
+            'django': {'running': True, 'method': 'http', 'checked_at': checked_at},
+            'frontend': {'running': True, 'method': 'http', 'checked_at': checked_at},
+        }})
+
+        async def stopped():
+            return {name: {'running': False, 'method': 'pid_file', 'checked_at': time.time()}
+                    for name in status_probe.SERVERS}
+
+        # A fresh "Running" entry from before a stop must not block the next start
+        with mock.patch.object(status_probe, 'probe_all', stopped):
+            self.assertFalse(status_probe.is_running('django'))
+        self.assertFalse(cache.get(status_probe.RESULTS_KEY)['servers']['frontend']['running'])
+
+
+@override_settings(SUPPORT_STATS_ROLLUP={'SETTLE_SECONDS': 0, 'BATCH_ROWS': 3, 'COMPACT_SECONDS': 60})
+class StatsRollupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+        self.since = rollups._floor_hour(self.now) - timedelta(days=7)
+        self.staff = User.objects.create_user(username='staff', email='staff@example.com', password='pass1234', is_staff=True)
+        self.users = [
+            User.objects.create_user(username=f'user{n}', email=f'user{n}@example.com', password='pass1234')
+            for n in range(3)
+        ]
+
+    def add_activity(self, user, activity_type, age):
+        activity = UserActivity.objects.create(user=user, activity_type=activity_type, description='')
+        UserActivity.objects.filter(pk=activity.pk).update(created_at=self.now - age)
+
+    def seed(self):
+        for hours in (1, 30, 100, 300, 400):
+            self.add_activity(self.users[0], 'LOGIN', timedelta(hours=hours))
+        for hours in (2, 50):
+            self.add_activity(self.users[1], 'LOGIN', timedelta(hours=hours))
+            self.add_activity(self.users[1], 'PROFILE_UPDATE', timedelta(hours=hours))
+
+    def raw_logins(self):
+        return UserActivity.objects.filter(activity_type='LOGIN', created_at__gte=self.since).count()
+
+    def test_totals_match_raw_counts_across_compaction(self):
+        self.seed()
+        counter = ('activity', 'LOGIN')
+        self.assertEqual(rollups.totals(self.since, [counter])[counter], self.raw_logins())
+
+        while rollups.compact(now=self.now):
+            pass
+        self.assertEqual(RollupCursor.objects.get(source='activity').last_id, UserActivity.objects.latest('id').id)
+        self.add_activity(self.users[2], 'LOGIN', timedelta(minutes=5))  # live delta
+
+        totals = rollups.totals(self.since, [counter, ('activity', None)])
+        self.assertEqual(totals[counter], self.raw_logins())
+        self.assertEqual(totals[('activity', None)], UserActivity.objects.filter(created_at__gte=self.since).count())
+
+        # Compacting the delta moves it into the rollups without counting it twice
+        self.assertEqual(rollups.compact(now=self.now), 2)
+        self.assertEqual(rollups.totals(self.since, [counter]), {counter: self.raw_logins()})
+
+    def test_compaction_is_incremental(self):
+        self.seed()
+        daily_total = lambda: StatsRollup.objects.filter(
+            metric='activity', granularity='day'
+        ).aggregate(total=Sum('count'))['total']
+
+        rollups.compact(now=self.now)
+        ids = list(UserActivity.objects.order_by('id').values_list('id', flat=True))
+        self.assertEqual(RollupCursor.objects.get(source='activity').last_id, ids[2])  # BATCH_ROWS
+        self.assertEqual(daily_total(), 3)
+
+        while rollups.compact(now=self.now):
+            pass
+        rollups.compact(now=self.now)
+        self.assertEqual(daily_total(), len(ids))
+
+    def test_top_users_merges_rollups_and_delta(self):
+        self.seed()
+        while rollups.compact(now=self.now):
+            pass
+        for _ in range(5):
+            self.add_activity(self.users[2], 'LOGIN', timedelta(minutes=1))
+        self.assertEqual(rollups.top_users(self.since, limit=2), [(self.users[2].id, 5), (self.users[1].id, 4)])
+
+    def test_resolved_tickets_roll_up_by_resolution_time(self):
+        ticket = SupportTicket.objects.create(user=self.users[0], subject='Help', description='Stuck')
+        SupportTicket.objects.filter(pk=ticket.pk).update(status='RESOLVED', resolved_at=self.now - timedelta(days=2))
+        counter = ('tickets_resolved', None)
+        rollups.compact(now=self.now)
+        self.assertEqual(StatsRollup.objects.get(metric='tickets_resolved', granularity='day').count, 1)
+        self.assertEqual(rollups.totals(self.since, [counter])[counter], 1)
+
+        recent = SupportTicket.objects.create(user=self.users[0], subject='More', description='Still stuck')
+        SupportTicket.objects.filter(pk=recent.pk).update(status='RESOLVED', resolved_at=self.now)
+        self.assertEqual(rollups.totals(self.since, [counter])[counter], 2)
+
+    def test_dashboard_and_weekly_stats_are_served_from_rollups(self):
+        self.seed()
+        self.client.force_login(self.staff)
+        stats = self.client.get('/support/api/dashboard-stats/').json()
+        self.assertEqual(stats['users']['total'], 4)
+        self.assertEqual(stats['users']['new_this_week'], 4)
+        self.assertEqual(stats['users']['recent_logins'], UserActivity.objects.filter(
+            activity_type='LOGIN', created_at__gte=self.now - timedelta(days=7)
+        ).count())
+        self.assertEqual(stats['activities']['most_active_users'][0]['user__email'], 'user1@example.com')
+
+        while rollups.compact():
+            pass
+        weekly = self.client.get('/support/api/weekly-stats/').json()['weekly_stats']
+        self.assertEqual(len(weekly), 12)
+        self.assertEqual(weekly[0]['new_registrations'], 4)
+        self.assertEqual(weekly[0]['total_users'], 4)
+
+
+class TicketListingTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='staff', email='staff@example.com', password='pass1234', is_staff=True)
+        self.user = User.objects.create_user(username='user', email='user@example.com', password='pass1234')
+        self.tickets = [
+            SupportTicket.objects.create(
+                user=self.user, subject=f'Ticket {n}', description='...',
+                status='OPEN' if n % 2 else 'RESOLVED', ticket_type='BUG' if n < 3 else 'QUESTION',
+                assigned_to=self.staff if n == 4 else None,
+            )
+            for n in range(6)
+        ]
+        session = chat.get_or_create_session(self.user, str(self.tickets[1].id))
+        for n in range(3):
+            chat.save_message(session, self.user, f'message {n}', is_support=False)
+        chat.save_message(session, self.staff, 'reply', is_support=True)
+        self.session = session
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_page_is_one_query_with_unread_counts(self):
+        with self.assertNumQueries(1):
+            page = ticket_listing.list_page({}, self.staff)
+        self.assertEqual([t['id'] for t in page['tickets']], [t.id for t in reversed(self.tickets)])
+        by_id = {t['id']: t for t in page['tickets']}
+        self.assertEqual((by_id[self.tickets[1].id]['unread_count'], by_id[self.tickets[1].id]['session_id']),
+                         (3, self.session.id))
+        self.assertEqual((by_id[self.tickets[0].id]['unread_count'], by_id[self.tickets[0].id]['session_id']), (0, None))
+        self.assertEqual(by_id[self.tickets[4].id]['assigned_to'], 'staff@example.com')
+
+    def test_cursor_pages_cover_every_ticket_once(self):
+        seen, cursor = [], None
+        while True:
+            response = self.client.get('/support/api/jwt/tickets/all/', {'limit': 4, **({'cursor': cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200)
+            seen += [t['id'] for t in response.data['tickets']]
+            cursor = response.data['next_cursor']
+            if not response.data['has_more']:
+                break
+        self.assertEqual(seen, [t.id for t in reversed(self.tickets)])
+
+    def test_filters(self):
+        def ids(**params):
+            return {t['id'] for t in ticket_listing.list_page(params, self.staff)['tickets']}
+
+        self.assertEqual(ids(status='OPEN', type='BUG'), {self.tickets[1].id})
+        self.assertEqual(ids(status='OPEN,RESOLVED', type='QUESTION'), {t.id for t in self.tickets[3:]})
+        self.assertEqual(ids(assigned_to='me'), {self.tickets[4].id})
+        self.assertEqual(len(ids(assigned_to='none')), 5)
+        self.assertEqual(ids(stage='IDEA'), {t.id for t in self.tickets})
+
+        response = self.client.get('/support/api/jwt/tickets/all/', {'status': 'BOGUS'})
+        self.assertEqual(response.status_code, 400)
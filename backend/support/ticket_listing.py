@@ -0,0 +1,118 @@
+"""
+Ticket listing for the support dashboards.
+
+``annotated_tickets`` loads tickets with their user and assignee joined and
+two correlated subqueries per row, so a page costs one query however many
+tickets it holds: the id of the ticket's latest chat session (the one
+``ChatSession.objects.filter(ticket=...).first()`` returns) and the number of
+user messages in that session support has not read yet.
+
+``list_page`` filters by status, stage, type and assignee (each backed by one
+of SupportTicket's indexes) and pages newest first by id. The cursor is the
+id of the last ticket on the previous page, so later pages are a primary key
+range rather than an OFFSET.
+"""
+
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import ChatMessage, ChatSession, SupportTicket
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# query parameter -> (model field, allowed values)
+CHOICE_FILTERS = {
+    'status': ('status', {value for value, _ in SupportTicket.STATUS_CHOICES}),
+    'stage': ('stage', {value for value, _ in SupportTicket._meta.get_field('stage').choices}),
+    'type': ('ticket_type', {value for value, _ in SupportTicket.TYPE_CHOICES}),
+}
+
+
+def annotated_tickets():
+    latest_session = ChatSession.objects.filter(ticket=OuterRef('pk')).order_by('-last_message_at', '-id')
+    unread = (
+        ChatMessage.objects.filter(session_id=OuterRef('latest_session_id'), is_support=False, read_by_support=False)
+        .order_by()
+        .values('session_id')
+        .annotate(n=Count('id'))
+        .values('n')
+    )
+    return (
+        SupportTicket.objects.select_related('user', 'assigned_to')
+        .annotate(latest_session_id=Subquery(latest_session.values('id')[:1]))
+        .annotate(unread_count=Coalesce(Subquery(unread, output_field=IntegerField()), Value(0)))
+    )
+
+
+def serialize_ticket(ticket):
+    user = ticket.user
+    return {
+        'id': ticket.id,
+        'subject': ticket.subject,
+        'description': ticket.description,
+        'status': ticket.status,
+        'ticket_type': ticket.ticket_type,
+        'stage': ticket.stage,
+        'priority': ticket.priority,
+        'user': {
+            'email': user.email,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'name': f"{user.first_name} {user.last_name}".strip() or user.email
+        },
+        'created_at': ticket.created_at.isoformat(),
+        'updated_at': ticket.updated_at.isoformat(),
+        'has_unread_messages': ticket.has_unread_messages,
+        'unread_count': ticket.unread_count,
+        'assigned_to': ticket.assigned_to.email if ticket.assigned_to else None,
+        'tags': ticket.tags,
+        'session_id': ticket.latest_session_id,
+    }
+
+
+def _filter(tickets, params, user):
+    for param, (field, allowed) in CHOICE_FILTERS.items():
+        if not params.get(param):
+            continue
+        values = params[param].split(',')
+        unknown = set(values) - allowed
+        if unknown:
+            raise ValueError(f"Invalid {param}: {', '.join(sorted(unknown))}")
+        tickets = tickets.filter(**{f'{field}__in': values})
+
+    assignee = params.get('assigned_to')
+    if assignee == 'me':
+        tickets = tickets.filter(assigned_to=user)
+    elif assignee == 'none':
+        tickets = tickets.filter(assigned_to__isnull=True)
+    elif assignee:
+        try:
+            tickets = tickets.filter(assigned_to_id=int(assignee))
+        except ValueError:
+            raise ValueError("assigned_to must be a user id, 'me' or 'none'")
+    return tickets
+
+
+def list_page(params, user):
+    """
+    One page of tickets matching the query parameters: ``{'tickets',
+    'next_cursor', 'has_more'}``. Raises ValueError for invalid parameters.
+    """
+    try:
+        limit = max(1, min(int(params.get('limit') or PAGE_SIZE), MAX_PAGE_SIZE))
+        cursor = int(params['cursor']) if params.get('cursor') else None
+    except ValueError:
+        raise ValueError('limit and cursor must be integers')
+
+    tickets = _filter(annotated_tickets(), params, user)
+    if cursor is not None:
+        tickets = tickets.filter(id__lt=cursor)
+    page = list(tickets.order_by('-id')[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+    return {
+        'tickets': [serialize_ticket(ticket) for ticket in page],
+        'next_cursor': str(page[-1].id) if has_more else None,
+        'has_more': has_more,
+    }
@@ -4,6 +4,7 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
+from django.db import transaction
 from django.db.models import Count, Q, Sum
 from django.utils import timezone
 from django.contrib.auth.models import User
@@ -14,8 +15,10 @@ import subprocess
 import psutil
 import signal
 from datetime import datetime, timedelta
+from api.db_routing import read_from_replica
 from api.models import UserProfile
 from .models import SupportUser, UserActivity, SupportTicket, SystemAlert, WeeklyStats, ChatSession, ChatMessage, SupportUserStatus, Release
+from . import presence, rollups, status_probe, ticket_listing
 from .emails import send_new_ticket_email, send_ticket_reply_email, send_ticket_update_email
 from section_b.models import ProfessionalDevelopmentEntry
 from section_c.models import SupervisionEntry
@@ -236,6 +239,10 @@ def get_system_health(request):
                 health_status['logs'] = 'warning'
                 break
         
+        servers = status_probe.get_status()
+        health_status['servers'] = {name: servers[name] for name in status_probe.SERVERS}
+        health_status['servers_checked_at'] = servers['checked_at']
+        
         return JsonResponse(health_status)
     
     except Exception as e:
@@ -243,6 +250,7 @@ def get_system_health(request):
 
 @staff_member_required
 @require_http_methods(["GET"])
+@read_from_replica
 def get_dashboard_stats(request):
     """Get comprehensive dashboard statistics"""
     try:
@@ -250,55 +258,60 @@ def get_dashboard_stats(request):
         week_ago = now - timedelta(days=7)
         month_ago = now - timedelta(days=30)
         
+        # Event counts come from the hourly/daily rollups plus the rows not compacted yet
+        rollups.maybe_compact()
+        week = rollups.totals(week_ago, [
+            ('users_joined', None),
+            ('activity', 'LOGIN'),
+            ('section_a_entries', None),
+            ('section_b_entries', None),
+            ('section_c_entries', None),
+            ('tickets_resolved', None),
+        ])
+        month = rollups.totals(month_ago, [('users_joined', None)])
+        
         # User statistics
-        total_users = User.objects.count()
-        active_users = User.objects.filter(is_active=True).count()
-        new_users_week = User.objects.filter(date_joined__gte=week_ago).count()
-        new_users_month = User.objects.filter(date_joined__gte=month_ago).count()
+        user_counts = User.objects.aggregate(total=Count('id'), active=Count('id', filter=Q(is_active=True)))
+        total_users = user_counts['total']
+        active_users = user_counts['active']
+        new_users_week = week[('users_joined', None)]
+        new_users_month = month[('users_joined', None)]
         
         # User activity statistics
-        recent_logins = UserActivity.objects.filter(
-            activity_type='LOGIN',
-            created_at__gte=week_ago
-        ).count()
+        recent_logins = week[('activity', 'LOGIN')]
         
         last_10_logins = UserActivity.objects.filter(
             activity_type='LOGIN'
         ).select_related('user').order_by('-created_at')[:10]
         
-        # Most active users (by activity count)
-        most_active_users = UserActivity.objects.filter(
-            created_at__gte=week_ago
-        ).values('user__email', 'user__first_name', 'user__last_name').annotate(
-            activity_count=Count('id')
-        ).order_by('-activity_count')[:10]
+        # Most active users (by activity count, whole days)
+        top_users = rollups.top_users(week_ago)
+        top_user_details = User.objects.in_bulk([user_id for user_id, _ in top_users])
+        most_active_users = [
+            {
+                'user__email': top_user_details[user_id].email,
+                'user__first_name': top_user_details[user_id].first_name,
+                'user__last_name': top_user_details[user_id].last_name,
+                'activity_count': activity_count,
+            }
+            for user_id, activity_count in top_users if user_id in top_user_details
+        ]
         
         # Entry statistics
-        pd_entries_week = ProfessionalDevelopmentEntry.objects.filter(
-            created_at__gte=week_ago
-        ).count()
-        
-        supervision_entries_week = SupervisionEntry.objects.filter(
-            created_at__gte=week_ago
-        ).count()
-        
-        section_a_entries_week = SectionAEntry.objects.filter(
-            created_at__gte=week_ago
-        ).count()
+        pd_entries_week = week[('section_b_entries', None)]
+        supervision_entries_week = week[('section_c_entries', None)]
+        section_a_entries_week = week[('section_a_entries', None)]
         
         # Support ticket statistics
         open_tickets = SupportTicket.objects.filter(status__in=['OPEN', 'IN_PROGRESS']).count()
-        resolved_tickets_week = SupportTicket.objects.filter(
-            status='RESOLVED',
-            resolved_at__gte=week_ago
-        ).count()
+        resolved_tickets_week = week[('tickets_resolved', None)]
         
         # System alerts
-        active_alerts = SystemAlert.objects.filter(is_resolved=False).count()
-        critical_alerts = SystemAlert.objects.filter(
-            is_resolved=False,
-            severity='CRITICAL'
-        ).count()
+        alert_counts = SystemAlert.objects.filter(is_resolved=False).aggregate(
+            active=Count('id'), critical=Count('id', filter=Q(severity='CRITICAL'))
+        )
+        active_alerts = alert_counts['active']
+        critical_alerts = alert_counts['critical']
         
         # User role distribution
         role_distribution = UserProfile.objects.values('role').annotate(
@@ -327,7 +340,7 @@ def get_dashboard_stats(request):
                     }
                     for activity in last_10_logins
                 ],
-                'most_active_users': list(most_active_users),
+                'most_active_users': most_active_users,
                 'recent_activities': [
                     {
                         'user': f"{activity.user.first_name} {activity.user.last_name}",
@@ -416,6 +429,7 @@ def get_system_alerts(request):
 def get_weekly_stats(request):
     """Get weekly statistics"""
     try:
+        rollups.maybe_compact()  # keeps the WeeklyStats rows current
         weeks = WeeklyStats.objects.order_by('-week_start')[:12]  # Last 12 weeks
         
         stats_data = []
@@ -443,26 +457,8 @@ def get_weekly_stats(request):
 def get_server_status(request):
     """Get status of Django and frontend servers"""
     try:
-        # Debug: Log the request
-        print(f"Server status request from user: {request.user.is_authenticated}, is_staff: {request.user.is_staff}")
-        
-        django_running = is_django_running()
-        frontend_running = is_frontend_running()
-        
-        status = {
-            'django': {
-                'running': django_running,
-                'status': 'Running' if django_running else 'Stopped',
-                'url': 'http://localhost:8000' if django_running else None
-            },
-            'frontend': {
-                'running': frontend_running,
-                'status': 'Running' if frontend_running else 'Stopped',
-                'url': 'http://localhost:5173' if frontend_running else None
-            }
-        }
-        
-        return JsonResponse(status)
+        # Served from the background probe's cache; never probes in the request
+        return JsonResponse(status_probe.get_status())
     
     except Exception as e:
         print(f"Server status error: {e}")
@@ -488,6 +484,7 @@ def control_server(request):
         else:
             return JsonResponse({'error': 'Invalid action'}, status=400)
         
+        status_probe.refresh_soon()
         return JsonResponse({'success': True, 'message': result})
     
     except Exception as e:
@@ -563,61 +560,12 @@ def get_all_users(request):
 
 # Helper functions for server control
 def is_django_running():
-    """Check if Django server is running"""
-    try:
-        # First try PID file method
-        if os.path.exists('django.pid'):
-            with open('django.pid', 'r') as f:
-                pid = int(f.read().strip())
-            return psutil.pid_exists(pid)
-        
-        # If no PID file, try HTTP request method
-        try:
-            import urllib.request
-            response = urllib.request.urlopen('http://localhost:8000/admin/', timeout=2)
-            return response.getcode() in [200, 302]  # 200 or redirect to login
-        except:
-            pass
-            
-        # If HTTP fails, try to find Django process by name
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-            try:
-                if proc.info['cmdline'] and any('manage.py' in arg and 'runserver' in arg for arg in proc.info['cmdline']):
-                    return True
-            except:
-                pass
-    except:
-        pass
-    return False
+    """Check if Django server is running (fresh probe, see support.status_probe)"""
+    return status_probe.is_running('django')
 
 def is_frontend_running():
-    """Check if frontend server is running"""
-    try:
-        # First try PID file method
-        frontend_pid_file = os.path.join(settings.BASE_DIR, '..', 'frontend', 'frontend.pid')
-        if os.path.exists(frontend_pid_file):
-            with open(frontend_pid_file, 'r') as f:
-                pid = int(f.read().strip())
-            return psutil.pid_exists(pid)
-        
-        # If no PID file, try HTTP request method
-        try:
-            import urllib.request
-            response = urllib.request.urlopen('http://localhost:5173/', timeout=2)
-            return response.getcode() == 200
-        except:
-            pass
-            
-        # If HTTP fails, try to find Vite/Node process by name
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-            try:
-                if proc.info['cmdline'] and any('vite' in arg.lower() or 'npm' in arg or 'node' in arg for arg in proc.info['cmdline']):
-                    return True
-            except:
-                pass
-    except:
-        pass
-    return False
+    """Check if frontend server is running (fresh probe, see support.status_probe)"""
+    return status_probe.is_running('frontend')
 
 def start_servers(server):
     """Start the specified servers"""
@@ -778,10 +726,11 @@ def create_support_ticket(request):
         # Set stage for all ticket types to avoid database constraint violation
         ticket_data['stage'] = 'IDEA'
         
-        ticket = SupportTicket.objects.create(**ticket_data)
-        
-        # Send email notification to support team
-        send_new_ticket_email(ticket)
+        with transaction.atomic():
+            ticket = SupportTicket.objects.create(**ticket_data)
+            
+            # Queue email notification to support team
+            send_new_ticket_email(ticket)
         
         return Response({
             'id': ticket.id,
@@ -1347,31 +1296,33 @@ def send_ticket_message(request, ticket_id):
             }
         )
         
-        # Create the message
-        is_support_message = request.user.is_staff
-        chat_message = ChatMessage.objects.create(
-            session=session,
-            sender=request.user,
-            message=message_content,
-            is_support=is_support_message,
-            read_by_user=is_support_message,  # Mark as read by user if sent by support
-            read_by_support=not is_support_message  # Mark as read by support if sent by user
-        )
+        # The message and its queued email notification commit together
+        with transaction.atomic():
+            # Create the message
+            is_support_message = request.user.is_staff
+            chat_message = ChatMessage.objects.create(
+                session=session,
+                sender=request.user,
+                message=message_content,
+                is_support=is_support_message,
+                read_by_user=is_support_message,  # Mark as read by user if sent by support
+                read_by_support=not is_support_message  # Mark as read by support if sent by user
+            )
         
-        # Update session's last_message_at
-        session.last_message_at = timezone.now()
-        session.save()
+            # Update session's last_message_at
+            session.last_message_at = timezone.now()
+            session.save()
         
-        # Update ticket's unread status
-        if is_support_message:
-            ticket.has_unread_messages = False  # Support replied, user needs to read
-        else:
-            ticket.has_unread_messages = True  # User replied, support needs to read
-        ticket.last_message_at = timezone.now()
-        ticket.save()
+            # Update ticket's unread status
+            if is_support_message:
+                ticket.has_unread_messages = False  # Support replied, user needs to read
+            else:
+                ticket.has_unread_messages = True  # User replied, support needs to read
+            ticket.last_message_at = timezone.now()
+            ticket.save()
         
-        # Send email notification
-        send_ticket_reply_email(ticket, chat_message, is_support_message)
+            # Queue email notification
+            send_ticket_reply_email(ticket, chat_message, is_support_message)
         
         return Response({
             'id': chat_message.id,
@@ -1539,18 +1490,7 @@ def get_test_plan_session(request, ticket_id):
 def get_support_online_status(request):
     """Check if support team is online"""
     try:
-        # Check if any support staff are online
-        online_support = SupportUserStatus.objects.filter(
-            is_online=True
-        ).first()
-        
-        if online_support and online_support.is_actually_online:
-            return Response({
-                'is_online': True,
-                'support_name': f"{online_support.user.first_name} {online_support.user.last_name}".strip() or online_support.user.email
-            })
-        
-        return Response({'is_online': False})
+        return Response(presence.team_status())
         
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -1902,31 +1842,33 @@ def send_ticket_message_dashboard(request, ticket_id):
             }
         )
         
-        # Create the message
-        is_support_message = request.user.is_staff
-        chat_message = ChatMessage.objects.create(
-            session=session,
-            sender=request.user,
-            message=message_content,
-            is_support=is_support_message,
-            read_by_user=is_support_message,  # Mark as read by user if sent by support
-            read_by_support=not is_support_message  # Mark as read by support if sent by user
-        )
+        # The message and its queued email notification commit together
+        with transaction.atomic():
+            # Create the message
+            is_support_message = request.user.is_staff
+            chat_message = ChatMessage.objects.create(
+                session=session,
+                sender=request.user,
+                message=message_content,
+                is_support=is_support_message,
+                read_by_user=is_support_message,  # Mark as read by user if sent by support
+                read_by_support=not is_support_message  # Mark as read by support if sent by user
+            )
         
-        # Update session's last_message_at
-        session.last_message_at = timezone.now()
-        session.save()
+            # Update session's last_message_at
+            session.last_message_at = timezone.now()
+            session.save()
         
-        # Update ticket's unread status
-        if is_support_message:
-            ticket.has_unread_messages = False  # Support replied, user needs to read
-        else:
-            ticket.has_unread_messages = True  # User replied, support needs to read
-        ticket.last_message_at = timezone.now()
-        ticket.save()
+            # Update ticket's unread status
+            if is_support_message:
+                ticket.has_unread_messages = False  # Support replied, user needs to read
+            else:
+                ticket.has_unread_messages = True  # User replied, support needs to read
+            ticket.last_message_at = timezone.now()
+            ticket.save()
         
-        # Send email notification
-        send_ticket_reply_email(ticket, chat_message, is_support_message)
+            # Queue email notification
+            send_ticket_reply_email(ticket, chat_message, is_support_message)
         
         return JsonResponse({
             'id': chat_message.id,
@@ -1967,6 +1909,8 @@ def toggle_support_status(request):
         status.auto_status = False  # Manual override
         status.last_activity = timezone.now()
         status.save()
+        presence.set_override(request.user, is_online)
+        presence.broadcast()
         
         return JsonResponse({
             'is_online': status.is_online,
@@ -1980,48 +1924,13 @@ def toggle_support_status(request):
 
 @staff_member_required
 @require_http_methods(["GET"])
+@read_from_replica
 def get_all_tickets_dashboard(request):
     """Get all tickets for support dashboard (staff only) - Django session auth"""
     try:
-        tickets = SupportTicket.objects.all().order_by('-created_at')
-        
-        ticket_list = []
-        for ticket in tickets:
-            # Get chat session info
-            session = ChatSession.objects.filter(ticket=ticket).first()
-            unread_count = 0
-            if session:
-                unread_count = ChatMessage.objects.filter(
-                    session=session,
-                    is_support=False,
-                    read_by_support=False
-                ).count()
-            
-            ticket_list.append({
-                'id': ticket.id,
-                'subject': ticket.subject,
-                'description': ticket.description,
-                'status': ticket.status,
-                'ticket_type': ticket.ticket_type,
-                'stage': ticket.stage,
-                'priority': ticket.priority,
-                'user': {
-                    'email': ticket.user.email,
-                    'first_name': ticket.user.first_name,
-                    'last_name': ticket.user.last_name,
-                    'name': f"{ticket.user.first_name} {ticket.user.last_name}".strip() or ticket.user.email
-                },
-                'created_at': ticket.created_at.isoformat(),
-                'updated_at': ticket.updated_at.isoformat(),
-                'has_unread_messages': ticket.has_unread_messages,
-                'unread_count': unread_count,
-                'assigned_to': ticket.assigned_to.email if ticket.assigned_to else None,
-                'tags': ticket.tags,
-                'session_id': session.id if session else None
-            })
-        
-        return JsonResponse({'tickets': ticket_list})
-        
+        return JsonResponse(ticket_listing.list_page(request.GET, request.user))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
@@ -2034,45 +1943,9 @@ def get_all_tickets(request):
         return Response({'error': 'Permission denied. Staff access required.'}, status=status.HTTP_403_FORBIDDEN)
     
     try:
-        tickets = SupportTicket.objects.all().order_by('-created_at')
-        
-        ticket_list = []
-        for ticket in tickets:
-            # Get chat session info
-            session = ChatSession.objects.filter(ticket=ticket).first()
-            unread_count = 0
-            if session:
-                unread_count = ChatMessage.objects.filter(
-                    session=session,
-                    is_support=False,
-                    read_by_support=False
-                ).count()
-            
-            ticket_list.append({
-                'id': ticket.id,
-                'subject': ticket.subject,
-                'description': ticket.description,
-                'status': ticket.status,
-                'ticket_type': ticket.ticket_type,
-                'stage': ticket.stage,
-                'priority': ticket.priority,
-                'user': {
-                    'email': ticket.user.email,
-                    'first_name': ticket.user.first_name,
-                    'last_name': ticket.user.last_name,
-                    'name': f"{ticket.user.first_name} {ticket.user.last_name}".strip() or ticket.user.email
-                },
-                'created_at': ticket.created_at.isoformat(),
-                'updated_at': ticket.updated_at.isoformat(),
-                'has_unread_messages': ticket.has_unread_messages,
-                'unread_count': unread_count,
-                'assigned_to': ticket.assigned_to.email if ticket.assigned_to else None,
-                'tags': ticket.tags,
-                'session_id': session.id if session else None
-            })
-        
-        return Response({'tickets': ticket_list})
-        
+        return Response(ticket_listing.list_page(request.query_params, request.user))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -2942,6 +2815,7 @@ def get_test_plan_session(request, ticket_id):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdminUser])
+@read_from_replica
 def get_planning_dashboard(request):
     """Admin: Get planning dashboard statistics"""
     try:
@@ -0,0 +1,74 @@
+"""
+Weekly grouping of logbook entries with running totals.
+
+Shared by the Section A, B and C "grouped by week" endpoints. Two queries are
+issued regardless of the number of weeks: one computing the weekly totals
+(SUM() OVER (PARTITION BY week)) and running totals (SUM() OVER (ORDER BY
+week)), reduced to one row per week with DISTINCT, and one for the entries
+themselves. Window functions are supported by Postgres and by
+SQLite >= 3.25. Callers that already have the totals (e.g. from the maintained
+summary tables in utils.weekly_summaries) pass them in and skip the first query.
+"""
+
+from django.db.models import F, Sum, ValueRange, Window
+from django.db.models.functions import Coalesce
+
+
+def weekly_running_totals(queryset, week_field='week_starting', value_field='duration_minutes'):
+    """
+    Return ``{week: (week_total, cumulative_total)}`` for every week in the queryset.
+
+    The cumulative total of a week covers all entries of the queryset in that
+    week and the weeks before it.
+    """
+    value = Coalesce(value_field, 0)
+    rows = (
+        queryset.order_by()
+        .filter(**{f'{week_field}__isnull': False})
+        .annotate(
+            _week_total=Window(Sum(value), partition_by=F(week_field)),
+            # RANGE frame: every row up to and including the current week's peers
+            _cumulative_total=Window(
+                Sum(value), order_by=F(week_field).asc(), frame=ValueRange(start=None, end=0)
+            ),
+        )
+        .values_list(week_field, '_week_total', '_cumulative_total')
+        .distinct()
+    )
+    return {week: (total or 0, cumulative or 0) for week, total, cumulative in rows}
+
+
+def group_entries_by_week(entries, totals_queryset=None, week_field='week_starting', value_field='duration_minutes',
+                          totals=None):
+    """
+    Group ``entries`` by week, newest week first, with weekly and running totals.
+
+    ``totals_queryset`` is the scope the totals are computed over; it defaults
+    to ``entries`` but is usually the unfiltered scope (e.g. including locked
+    entries) so that the cumulative figures match the trainee's full history.
+    ``entries`` keeps its own ordering within each week. ``totals`` (a
+    ``{week: (week_total, cumulative_total)}`` dict) replaces the computed totals.
+
+    Returns a list of dicts with week_starting, week_total_minutes,
+    cumulative_total_minutes and entries.
+    """
+    if totals is None:
+        totals = weekly_running_totals(
+            entries if totals_queryset is None else totals_queryset, week_field, value_field
+        )
+    grouped = {}
+    for entry in entries:
+        week = getattr(entry, week_field)
+        if week is not None:
+            grouped.setdefault(week, []).append(entry)
+
+    weeks = []
+    for week in sorted(grouped, reverse=True):
+        week_total, cumulative_total = totals.get(week, (0, 0))
+        weeks.append({
+            'week_starting': week,
+            'week_total_minutes': week_total,
+            'cumulative_total_minutes': cumulative_total,
+            'entries': grouped[week],
+        })
+    return weeks
@@ -0,0 +1,201 @@
+"""
+Incremental maintenance of per-trainee weekly summary tables.
+
+PDWeeklySummary and SupervisionWeeklySummary store a week total and a running
+(cumulative) total per trainee and week. Instead of recomputing a week from
+scratch, every entry insert/update/delete is turned into a (week, delta) pair:
+the week's total and the cumulative totals of that week and every later week
+are shifted by the delta with a single UPDATE. Moving an entry between weeks is
+a negative delta on the old week plus a positive delta on the new one.
+
+The grouped-by-week endpoints of trainees read their totals from these rows
+(``stored_totals``) rather than recomputing them from the entries.
+
+Writes that bypass model signals (queryset.update, bulk_create, raw SQL) are not
+tracked; ``WeeklySummaryMaintainer.verify`` recomputes the expected totals in
+bulk and repairs any drift (see the verify_weekly_summaries command).
+"""
+
+import bisect
+
+from django.db import transaction
+from django.db.models import Case, ExpressionWrapper, F, IntegerField, Sum, ValueRange, When, Window
+from django.db.models.functions import Coalesce
+
+
+def _shift(field, delta):
+    # The summary columns may be PositiveIntegerFields; adding a plain int needs
+    # an explicit output field
+    return ExpressionWrapper(F(field) + delta, output_field=IntegerField())
+
+
+class WeeklySummaryMaintainer:
+    """Keeps a weekly summary model in step with its entry model"""
+
+    def __init__(self, entry_model, summary_model, owner_field='trainee',
+                 week_field='week_starting', value_field='duration_minutes'):
+        self.entry_model = entry_model
+        self.summary_model = summary_model
+        self.owner_attname = f'{owner_field}_id'
+        self.week_field = week_field
+        self.value_field = value_field
+
+    def entry_key(self, entry):
+        """(owner id, week, minutes) contributed by an entry, or None if it contributes nothing"""
+        week = getattr(entry, self.week_field)
+        owner_id = getattr(entry, self.owner_attname)
+        if week is None or owner_id is None:
+            return None
+        return owner_id, week, getattr(entry, self.value_field) or 0
+
+    def stored_entry_key(self, pk):
+        row = self.entry_model.objects.filter(pk=pk).values_list(
+            self.owner_attname, self.week_field, self.value_field
+        ).first()
+        if row is None or row[0] is None or row[1] is None:
+            return None
+        return row[0], row[1], row[2] or 0
+
+    def apply_change(self, old_key, new_key):
+        """Apply the difference between an entry's previous and current contribution"""
+        if old_key == new_key:
+            return
+        if old_key and new_key and old_key[:2] == new_key[:2]:
+            self.apply_delta(old_key[0], old_key[1], new_key[2] - old_key[2])
+            return
+        with transaction.atomic():
+            if old_key:
+                self.apply_delta(old_key[0], old_key[1], -old_key[2])
+            if new_key:
+                self.apply_delta(new_key[0], new_key[1], new_key[2])
+
+    def apply_delta(self, owner_id, week, delta):
+        """Add ``delta`` minutes to a week and shift every later cumulative total"""
+        summaries = self.summary_model.objects.filter(**{self.owner_attname: owner_id})
+        with transaction.atomic():
+            # Removals never create a week: if it is missing (e.g. its summaries were
+            # cascade-deleted with the trainee) there is nothing to subtract from
+            if delta > 0 and not summaries.filter(week_starting=week).exists():
+                # A new week starts from the cumulative total of the week before it
+                previous = summaries.filter(week_starting__lt=week).order_by('-week_starting').values_list(
+                    'cumulative_total_minutes', flat=True
+                ).first()
+                self.summary_model.objects.get_or_create(
+                    **{self.owner_attname: owner_id, 'week_starting': week},
+                    defaults={'week_total_minutes': 0, 'cumulative_total_minutes': previous or 0},
+                )
+            if delta:
+                summaries.filter(week_starting__gte=week).update(
+                    week_total_minutes=Case(
+                        When(week_starting=week, then=_shift('week_total_minutes', delta)),
+                        default=F('week_total_minutes'),
+                        output_field=IntegerField(),
+                    ),
+                    cumulative_total_minutes=_shift('cumulative_total_minutes', delta),
+                )
+
+    def stored_totals(self, owner_id):
+        """``{week: (week_total, cumulative_total)}`` of one owner, from the summary rows"""
+        rows = self.summary_model.objects.filter(**{self.owner_attname: owner_id}).values_list(
+            'week_starting', 'week_total_minutes', 'cumulative_total_minutes'
+        )
+        return {week: (week_total, cumulative_total) for week, week_total, cumulative_total in rows}
+
+    def expected_totals(self, owner_ids=None):
+        """
+        Recompute ``{owner_id: [(week, week_total, cumulative_total), ...]}`` from the entries.
+
+        One query with window functions partitioned by owner, ordered by week.
+        """
+        value = Coalesce(self.value_field, 0)
+        entries = self.entry_model.objects.order_by().filter(**{f'{self.week_field}__isnull': False})
+        if owner_ids is not None:
+            entries = entries.filter(**{f'{self.owner_attname}__in': owner_ids})
+        rows = (
+            entries.annotate(
+                _week_total=Window(Sum(value), partition_by=[F(self.owner_attname), F(self.week_field)]),
+                _cumulative_total=Window(
+                    Sum(value),
+                    partition_by=[F(self.owner_attname)],
+                    order_by=F(self.week_field).asc(),
+                    frame=ValueRange(start=None, end=0),
+                ),
+            )
+            .values_list(self.owner_attname, self.week_field, '_week_total', '_cumulative_total')
+            .distinct()
+        )
+        expected = {}
+        for owner_id, week, week_total, cumulative_total in rows:
+            expected.setdefault(owner_id, []).append((week, week_total or 0, cumulative_total or 0))
+        for weeks in expected.values():
+            weeks.sort()
+        return expected
+
+    def verify(self, owner_ids=None, repair=False, batch_size=1000):
+        """
+        Compare stored summaries with the entries and optionally repair them.
+
+        Returns a dict with the number of summaries checked, drifted and missing.
+        Summaries of weeks without entries are kept with a zero week total and
+        the cumulative total carried over from the previous week.
+        """
+        expected = self.expected_totals(owner_ids)
+        summaries = self.summary_model.objects.all()
+        if owner_ids is not None:
+            summaries = summaries.filter(**{f'{self.owner_attname}__in': owner_ids})
+
+        stats = {'checked': 0, 'drifted': 0, 'missing': 0}
+        drifted = []
+        seen = set()
+        for summary in summaries.iterator(chunk_size=batch_size):
+            stats['checked'] += 1
+            owner_id = getattr(summary, self.owner_attname)
+            weeks = expected.get(owner_id, [])
+            seen.add((owner_id, summary.week_starting))
+            # Latest week with entries at or before this one
+            index = bisect.bisect_right(weeks, (summary.week_starting, float('inf'), float('inf'))) - 1
+            if index >= 0 and weeks[index][0] == summary.week_starting:
+                week_total, cumulative_total = weeks[index][1], weeks[index][2]
+            else:
+                week_total, cumulative_total = 0, weeks[index][2] if index >= 0 else 0
+            if (summary.week_total_minutes, summary.cumulative_total_minutes) != (week_total, cumulative_total):
+                stats['drifted'] += 1
+                summary.week_total_minutes = week_total
+                summary.cumulative_total_minutes = cumulative_total
+                drifted.append(summary)
+
+        missing = [
+            self.summary_model(**{
+                self.owner_attname: owner_id,
+                'week_starting': week,
+                'week_total_minutes': week_total,
+                'cumulative_total_minutes': cumulative_total,
+            })
+            for owner_id, weeks in expected.items()
+            for week, week_total, cumulative_total in weeks
+            if (owner_id, week) not in seen
+        ]
+        stats['missing'] = len(missing)
+
+        if repair:
+            with transaction.atomic():
+                self.summary_model.objects.bulk_update(
+                    drifted, ['week_total_minutes', 'cumulative_total_minutes'], batch_size=batch_size
+                )
+                self.summary_model.objects.bulk_create(missing, batch_size=batch_size)
+        return stats
+
+    # Signal hooks (see section_b.signals and section_c.signals)
+
+    def before_save(self, instance, raw=False):
+        instance._weekly_summary_key = None if raw or instance.pk is None else self.stored_entry_key(instance.pk)
+
+    def after_save(self, instance, raw=False):
+        if raw:
+            return
+        new_key = self.entry_key(instance)
+        self.apply_change(getattr(instance, '_weekly_summary_key', None), new_key)
+        instance._weekly_summary_key = new_key
+
+    def after_delete(self, instance):
+        self.apply_change(self.entry_key(instance), None)
@@ -15,6 +15,11 @@ interface Message {
   read_by_support: boolean
 }
 
+interface SupportStatus {
+  isOnline: boolean
+  supportName: string | null
+}
+
 interface UseChatWebSocketProps {
   ticketId: string | number | null
   enabled?: boolean
@@ -23,9 +28,13 @@ interface UseChatWebSocketProps {
 interface UseChatWebSocketReturn {
   messages: Message[]
   sendMessage: (message: string) => void
+  loadOlderMessages: () => void
+  hasMoreHistory: boolean
+  isLoadingHistory: boolean
   isConnected: boolean
   error: string | null
   isLoading: boolean
+  supportStatus: SupportStatus | null
 }
 
 export function useChatWebSocket({ 
@@ -36,12 +45,34 @@ export function useChatWebSocket({
   const [isConnected, setIsConnected] = useState(false)
   const [error, setError] = useState<string | null>(null)
   const [isLoading, setIsLoading] = useState(false)
+  const [supportStatus, setSupportStatus] = useState<SupportStatus | null>(null)
+  const [hasMoreHistory, setHasMoreHistory] = useState(false)
+  const [isLoadingHistory, setIsLoadingHistory] = useState(false)
   
   const wsRef = useRef<WebSocket | null>(null)
   const reconnectTimeoutRef = useRef<NodeJS.Timeout | null>(null)
+  const heartbeatIntervalRef = useRef<NodeJS.Timeout | null>(null)
   const reconnectAttempts = useRef(0)
   const maxReconnectAttempts = 5
 
+  const stopHeartbeat = useCallback(() => {
+    if (heartbeatIntervalRef.current) {
+      clearInterval(heartbeatIntervalRef.current)
+      heartbeatIntervalRef.current = null
+    }
+  }, [])
+
+  // Support staff stay "online" only while their socket keeps sending frames,
+  // so an idle but open chat pings at the interval the server advertises
+  const startHeartbeat = useCallback((seconds: number) => {
+    stopHeartbeat()
+    heartbeatIntervalRef.current = setInterval(() => {
+      if (wsRef.current && wsRef.current.readyState === WebSocket.OPEN) {
+        wsRef.current.send(JSON.stringify({ type: 'heartbeat' }))
+      }
+    }, seconds * 1000)
+  }, [stopHeartbeat])
+
   const connect = useCallback(() => {
     if (!enabled || !ticketId) return
 
@@ -67,9 +98,25 @@ export function useChatWebSocket({
           const data = JSON.parse(event.data)
           
           if (data.type === 'chat_history') {
-            setMessages(data.messages || [])
+            // The server sends the latest page on connect and older pages on request
+            const page: Message[] = data.messages || []
+            if (data.before == null) {
+              setMessages(page)
+            } else {
+              setMessages(prev => {
+                const known = new Set(prev.map(m => m.id))
+                return [...page.filter(m => !known.has(m.id)), ...prev]
+              })
+            }
+            setHasMoreHistory(Boolean(data.has_more))
+            setIsLoadingHistory(false)
           } else if (data.type === 'message') {
             setMessages(prev => [...prev, data.message])
+          } else if (data.type === 'support_status') {
+            setSupportStatus({ isOnline: data.is_online, supportName: data.support_name ?? null })
+            if (data.heartbeat_seconds) {
+              startHeartbeat(data.heartbeat_seconds)
+            }
           } else if (data.type === 'error') {
             setError(data.error)
           }
@@ -80,6 +127,7 @@ export function useChatWebSocket({
       
       wsRef.current.onclose = (event) => {
         console.log('WebSocket disconnected:', event.code, event.reason)
+        stopHeartbeat()
         setIsConnected(false)
         setIsLoading(false)
         
@@ -108,13 +156,14 @@ export function useChatWebSocket({
       setError('Failed to connect to chat')
       setIsLoading(false)
     }
-  }, [enabled, ticketId])
+  }, [enabled, ticketId, startHeartbeat, stopHeartbeat])
 
   const disconnect = useCallback(() => {
     if (reconnectTimeoutRef.current) {
       clearTimeout(reconnectTimeoutRef.current)
       reconnectTimeoutRef.current = null
     }
+    stopHeartbeat()
     
     if (wsRef.current) {
       wsRef.current.close(1000, 'Component unmounting')
@@ -123,7 +172,8 @@ export function useChatWebSocket({
     
     setIsConnected(false)
     setError(null)
-  }, [])
+    setIsLoadingHistory(false)
+  }, [stopHeartbeat])
 
   const sendMessage = useCallback((message: string) => {
     if (wsRef.current && wsRef.current.readyState === WebSocket.OPEN) {
@@ -138,6 +188,15 @@ export function useChatWebSocket({
     }
   }, [])
 
+  // Request the page of messages before the oldest one loaded so far
+  const loadOlderMessages = useCallback(() => {
+    if (!hasMoreHistory || isLoadingHistory || messages.length === 0) return
+    if (wsRef.current && wsRef.current.readyState === WebSocket.OPEN) {
+      setIsLoadingHistory(true)
+      wsRef.current.send(JSON.stringify({ type: 'history', before: messages[0].id }))
+    }
+  }, [hasMoreHistory, isLoadingHistory, messages])
+
   useEffect(() => {
     if (enabled && ticketId) {
       connect()
@@ -160,8 +219,12 @@ export function useChatWebSocket({
   return {
     messages,
     sendMessage,
+    loadOlderMessages,
+    hasMoreHistory,
+    isLoadingHistory,
     isConnected,
     error,
-    isLoading
+    isLoading,
+    supportStatus
   }
 }